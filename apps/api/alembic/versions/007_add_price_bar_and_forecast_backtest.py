@@ -0,0 +1,54 @@
+"""add price_bar store and forecast_backtest results
+
+Revision ID: 007
+Revises: 006
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Local daily close store (read by backtests and batch forecasts)
+    op.create_table(
+        "price_bar",
+        sa.Column("ticker", sa.String(), nullable=False),
+        sa.Column("bar_date", sa.Date(), nullable=False),
+        sa.Column("close", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("ticker", "bar_date"),
+    )
+
+    op.create_table(
+        "forecast_backtest",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("method", sa.String(), nullable=False),
+        sa.Column("tickers", postgresql.JSONB(), nullable=True),
+        sa.Column("params", postgresql.JSONB(), nullable=True),
+        sa.Column("metrics", postgresql.JSONB(), nullable=True),
+        sa.Column("num_origins", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+    op.create_index(
+        "ix_forecast_backtest_method_created_at",
+        "forecast_backtest",
+        ["method", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_forecast_backtest_method_created_at")
+    op.drop_table("forecast_backtest")
+    op.drop_table("price_bar")
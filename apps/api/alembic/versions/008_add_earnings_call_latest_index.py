@@ -0,0 +1,26 @@
+"""add composite index for latest earnings call per ticker
+
+Revision ID: 008
+Revises: 007
+"""
+from typing import Union
+
+from alembic import op
+
+
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_earnings_call_user_ticker_created_at",
+        "earnings_call",
+        ["user_id", "ticker", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_earnings_call_user_ticker_created_at")
@@ -0,0 +1,36 @@
+"""add materialized portfolio_daily_value series
+
+Revision ID: 009
+Revises: 008
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "portfolio_daily_value",
+        sa.Column(
+            "portfolio_id",
+            sa.Integer(),
+            sa.ForeignKey("portfolio.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("value_date", sa.Date(), nullable=False),
+        sa.Column("value", sa.Float(), nullable=False),
+        sa.Column("cost", sa.Float(), nullable=False),
+        sa.Column("flows", sa.Float(), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("portfolio_id", "value_date"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("portfolio_daily_value")
@@ -0,0 +1,117 @@
+"""partition portfolio_snapshot by month and add history index
+
+Revision ID: 010
+Revises: 009
+
+Rebuilds portfolio_snapshot as a table range-partitioned on created_at, one
+partition per calendar month plus a DEFAULT catch-all. Postgres requires the
+partition key in every unique constraint, so the primary key becomes
+(id, created_at); ids keep coming from the existing sequence. Future
+partitions are created ahead of time by the snapshot retention job
+(services/snapshot_retention.py).
+"""
+from typing import Union
+
+from alembic import op
+
+
+revision: str = "010"
+down_revision: Union[str, None] = "009"
+branch_labels = None
+depends_on = None
+
+COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('portfolio_snapshot_id_seq'),
+    user_id varchar NOT NULL,
+    portfolio_id integer NOT NULL REFERENCES portfolio (id),
+    created_at timestamptz NOT NULL,
+    total_value double precision,
+    num_positions integer NOT NULL DEFAULT 0,
+    recent_earnings_coverage double precision,
+    avg_sentiment_score double precision,
+    risk_exposure_score double precision,
+    health_score integer,
+    concentration_risk double precision
+"""
+
+COPY_COLUMNS = (
+    "id, user_id, portfolio_id, created_at, total_value, num_positions, "
+    "recent_earnings_coverage, avg_sentiment_score, risk_exposure_score, "
+    "health_score, concentration_risk"
+)
+
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE portfolio_snapshot RENAME TO portfolio_snapshot_unpartitioned")
+    op.execute(
+        "ALTER TABLE portfolio_snapshot_unpartitioned "
+        "RENAME CONSTRAINT portfolio_snapshot_pkey TO portfolio_snapshot_unpartitioned_pkey"
+    )
+    op.execute(
+        f"CREATE TABLE portfolio_snapshot ({COLUMNS}, PRIMARY KEY (id, created_at)) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    op.execute("ALTER SEQUENCE portfolio_snapshot_id_seq OWNED BY portfolio_snapshot.id")
+    op.execute(
+        "CREATE TABLE portfolio_snapshot_default PARTITION OF portfolio_snapshot DEFAULT"
+    )
+
+    # One partition per month from the oldest snapshot to a few months ahead
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month_start timestamptz := date_trunc(
+                'month',
+                coalesce(
+                    (SELECT min(created_at) FROM portfolio_snapshot_unpartitioned), now()
+                ) AT TIME ZONE 'UTC'
+            ) AT TIME ZONE 'UTC';
+            last_start timestamptz := date_trunc('month', now() AT TIME ZONE 'UTC')
+                AT TIME ZONE 'UTC' + interval '{MONTHS_AHEAD} months';
+        BEGIN
+            WHILE month_start <= last_start LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF portfolio_snapshot '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'portfolio_snapshot_' || to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM'),
+                    month_start,
+                    month_start + interval '1 month'
+                );
+                month_start := month_start + interval '1 month';
+            END LOOP;
+        END $$;
+        """
+    )
+
+    op.execute(
+        f"INSERT INTO portfolio_snapshot ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM portfolio_snapshot_unpartitioned"
+    )
+    op.execute("DROP TABLE portfolio_snapshot_unpartitioned")
+
+    op.create_index("ix_portfolio_snapshot_portfolio_id", "portfolio_snapshot", ["portfolio_id"])
+    op.create_index(
+        "ix_portfolio_snapshot_user_portfolio_created_at",
+        "portfolio_snapshot",
+        ["user_id", "portfolio_id", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE portfolio_snapshot RENAME TO portfolio_snapshot_partitioned")
+    op.execute(
+        "ALTER TABLE portfolio_snapshot_partitioned "
+        "RENAME CONSTRAINT portfolio_snapshot_pkey TO portfolio_snapshot_partitioned_pkey"
+    )
+    op.execute(f"CREATE TABLE portfolio_snapshot ({COLUMNS}, PRIMARY KEY (id))")
+    op.execute("ALTER SEQUENCE portfolio_snapshot_id_seq OWNED BY portfolio_snapshot.id")
+    op.execute(
+        f"INSERT INTO portfolio_snapshot ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM portfolio_snapshot_partitioned"
+    )
+    op.execute("DROP TABLE portfolio_snapshot_partitioned")
+    op.create_index("ix_portfolio_snapshot_user_id", "portfolio_snapshot", ["user_id"])
+    op.create_index("ix_portfolio_snapshot_portfolio_id", "portfolio_snapshot", ["portfolio_id"])
@@ -0,0 +1,41 @@
+"""store holding.next_earnings_date as a date
+
+Revision ID: 011
+Revises: 010
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "011"
+down_revision: Union[str, None] = "010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Malformed provider strings become NULL rather than failing the cast
+    op.alter_column(
+        "holding",
+        "next_earnings_date",
+        type_=sa.Date(),
+        existing_type=sa.String(),
+        existing_nullable=True,
+        postgresql_using=(
+            "CASE WHEN next_earnings_date ~ '^\\d{4}-\\d{2}-\\d{2}$' "
+            "THEN next_earnings_date::date END"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        "holding",
+        "next_earnings_date",
+        type_=sa.String(),
+        existing_type=sa.Date(),
+        existing_nullable=True,
+        postgresql_using="to_char(next_earnings_date, 'YYYY-MM-DD')",
+    )
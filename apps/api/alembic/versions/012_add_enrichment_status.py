@@ -0,0 +1,30 @@
+"""add enrichment_status to holding and watchlist_item
+
+Revision ID: 012
+Revises: 011
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "012"
+down_revision: Union[str, None] = "011"
+branch_labels = None
+depends_on = None
+
+TABLES = ("holding", "watchlist_item")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column("enrichment_status", sa.String(), nullable=False, server_default="ready"),
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_column(table, "enrichment_status")
@@ -0,0 +1,49 @@
+"""add shared ai_analysis_cache and earnings_call.analysis_key
+
+Revision ID: 013
+Revises: 012
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+revision: str = "013"
+down_revision: Union[str, None] = "012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ai_analysis_cache",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("prompt_version", sa.String(), nullable=False),
+        sa.Column("ticker", sa.String(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=False),
+        sa.Column("parsed", JSONB(), nullable=True),
+        sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_hit_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index("ix_ai_analysis_cache_ticker", "ai_analysis_cache", ["ticker"])
+    op.add_column(
+        "earnings_call",
+        sa.Column(
+            "analysis_key",
+            sa.String(),
+            sa.ForeignKey("ai_analysis_cache.key", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+    op.create_index("ix_earnings_call_analysis_key", "earnings_call", ["analysis_key"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_earnings_call_analysis_key", table_name="earnings_call")
+    op.drop_column("earnings_call", "analysis_key")
+    op.drop_index("ix_ai_analysis_cache_ticker", table_name="ai_analysis_cache")
+    op.drop_table("ai_analysis_cache")
@@ -0,0 +1,53 @@
+"""add shared, compressed transcript table and earnings_call.transcript_id
+
+Revision ID: 014
+Revises: 013
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "014"
+down_revision: Union[str, None] = "013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "transcript",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("ticker", sa.String(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=True),
+        sa.Column("quarter", sa.Integer(), nullable=True),
+        sa.Column("call_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("content_hash", sa.String(), nullable=False, unique=True),
+        sa.Column("content", sa.LargeBinary(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+        sa.UniqueConstraint("ticker", "year", "quarter", name="uq_transcript_ticker_period"),
+    )
+    op.create_index("ix_transcript_ticker", "transcript", ["ticker"])
+    # Already compressed; skip TOAST's second pglz pass
+    op.execute("ALTER TABLE transcript ALTER COLUMN content SET STORAGE EXTERNAL")
+
+    op.add_column(
+        "earnings_call",
+        sa.Column(
+            "transcript_id",
+            sa.Integer(),
+            sa.ForeignKey("transcript.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+    op.create_index("ix_earnings_call_transcript_id", "earnings_call", ["transcript_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_earnings_call_transcript_id", table_name="earnings_call")
+    op.drop_column("earnings_call", "transcript_id")
+    op.drop_index("ix_transcript_ticker", table_name="transcript")
+    op.drop_table("transcript")
@@ -0,0 +1,41 @@
+"""add ai_usage table for per-call token, latency and retry accounting
+
+Revision ID: 015
+Revises: 014
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "015"
+down_revision: Union[str, None] = "014"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ai_usage",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.Column("job_type", sa.String(), nullable=False),
+        sa.Column("job_id", sa.String(), nullable=True),
+        sa.Column("cache_hit", sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column("prompt_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("completion_tokens", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("latency_ms", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_ai_usage_job_type", "ai_usage", ["job_type"])
+    # Daily budget checks sum one user's tokens since midnight
+    op.create_index("ix_ai_usage_user_created", "ai_usage", ["user_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_ai_usage_user_created", table_name="ai_usage")
+    op.drop_index("ix_ai_usage_job_type", table_name="ai_usage")
+    op.drop_table("ai_usage")
@@ -0,0 +1,27 @@
+"""add job_watermark table for resumable nightly jobs
+
+Revision ID: 016
+Revises: 015
+"""
+from typing import Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "016"
+down_revision: Union[str, None] = "015"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "job_watermark",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("processed_until", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_watermark")
@@ -0,0 +1,27 @@
+"""scope transcript content-hash dedup to the ticker
+
+Revision ID: 017
+Revises: 016
+"""
+from typing import Union
+
+from alembic import op
+
+
+revision: str = "017"
+down_revision: Union[str, None] = "016"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The same text pasted under another ticker is that ticker's transcript
+    op.drop_constraint("transcript_content_hash_key", "transcript", type_="unique")
+    op.create_unique_constraint(
+        "uq_transcript_ticker_content_hash", "transcript", ["ticker", "content_hash"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_transcript_ticker_content_hash", "transcript", type_="unique")
+    op.create_unique_constraint("transcript_content_hash_key", "transcript", ["content_hash"])
@@ -1,32 +1,36 @@
-import asyncio
+import json
+import time
 
 import structlog
+from arq import ArqRedis
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
+from app.api.deps import get_arq_pool, get_current_user
+from app.core.cache import cache
+from app.core.job_stream import job_streams
 from app.core.rate_limiter import AI_LIMIT, limiter
 from app.database import get_db
 from app.models import AnalysisJob
-from app.schemas.analysis import CompareRequest, JobStatus
+from app.schemas.analysis import CompareRequest, ForecastQuality, JobStatus
+from app.services import backtest
 from app.services import portfolio as portfolio_svc
 from app.services import subscription as sub_svc
-from app.workers.tasks import run_portfolio_analysis, run_comparison
+from app.workers.dispatch import JobDispatchError, dispatch_job
+from app.workers.tasks import job_progress_key, run_portfolio_analysis, run_comparison
 
 logger = structlog.stdlib.get_logger(__name__)
 
 
-def _log_task_exception(task: asyncio.Task) -> None:
-    if task.cancelled():
-        return
-    exc = task.exception()
-    if exc:
-        logger.error("Background task failed", error=str(exc), exc_info=exc)
-
-
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 
+# Job types whose worker publishes model output to core/job_stream.py
+STREAMING_JOB_TYPES = {"portfolio_analysis", "earnings_analysis", "comparison"}
+STREAM_MAX_SECONDS = 600
+STREAM_KEEPALIVE_MS = 15_000
+
 
 @router.post("/portfolios/{portfolio_id}/analyze", response_model=JobStatus, status_code=202)
 @limiter.limit(AI_LIMIT)
@@ -35,8 +39,9 @@ async def analyze_portfolio(
     portfolio_id: int,
     db: AsyncSession = Depends(get_db),
     user_id: str = Depends(get_current_user),
+    pool: ArqRedis | None = Depends(get_arq_pool),
 ):
-    """Start an AI portfolio analysis as a background task.
+    """Start an AI portfolio analysis as a background job.
 
     Returns immediately with a pending job. Poll GET /analysis/jobs/{job_id}
     for status updates.
@@ -50,6 +55,10 @@ async def analyze_portfolio(
             403,
             "Free plan allows 1 portfolio analysis per month. Upgrade to Pro for unlimited.",
         )
+    if not await sub_svc.check_ai_budget(db, user_id):
+        raise HTTPException(
+            429, "Daily AI usage limit for your plan reached. Try again tomorrow."
+        )
 
     job = AnalysisJob(
         user_id=user_id,
@@ -62,11 +71,10 @@ async def analyze_portfolio(
     await db.refresh(job)
     await db.commit()
 
-    # Run as inline background task (no separate worker needed)
-    task = asyncio.create_task(
-        run_portfolio_analysis({}, str(job.id), user_id, portfolio_id)
-    )
-    task.add_done_callback(_log_task_exception)
+    try:
+        await dispatch_job(db, pool, job, run_portfolio_analysis, user_id, portfolio_id)
+    except JobDispatchError as exc:
+        raise HTTPException(503, str(exc))
 
     return job
 
@@ -78,8 +86,9 @@ async def compare_earnings(
     body: CompareRequest,
     db: AsyncSession = Depends(get_db),
     user_id: str = Depends(get_current_user),
+    pool: ArqRedis | None = Depends(get_arq_pool),
 ):
-    """Start a multi-ticker comparison as a background task.
+    """Start a multi-ticker comparison as a background job.
 
     Returns immediately with a pending job. Poll GET /analysis/jobs/{job_id}
     for status updates.
@@ -88,6 +97,10 @@ async def compare_earnings(
         raise HTTPException(
             403, "Stock comparison requires Pro plan. Upgrade to unlock."
         )
+    if not await sub_svc.check_ai_budget(db, user_id):
+        raise HTTPException(
+            429, "Daily AI usage limit for your plan reached. Try again tomorrow."
+        )
 
     job = AnalysisJob(
         user_id=user_id,
@@ -100,11 +113,10 @@ async def compare_earnings(
     await db.refresh(job)
     await db.commit()
 
-    # Run as inline background task (no separate worker needed)
-    task = asyncio.create_task(
-        run_comparison({}, str(job.id), user_id, body.tickers)
-    )
-    task.add_done_callback(_log_task_exception)
+    try:
+        await dispatch_job(db, pool, job, run_comparison, user_id, body.tickers)
+    except JobDispatchError as exc:
+        raise HTTPException(503, str(exc))
 
     return job
 
@@ -130,6 +142,30 @@ async def list_comparisons(
     return list(result.scalars().all())
 
 
+# ─── Forecast model quality ──────────────────────────────────────────
+
+@router.get("/forecast-quality", response_model=ForecastQuality)
+async def get_forecast_quality(
+    db: AsyncSession = Depends(get_db),
+    _user_id: str = Depends(get_current_user),
+):
+    """Return the most recent walk-forward backtest of the forecast model."""
+    result = await backtest.get_latest_backtest(db)
+    if result is None:
+        raise HTTPException(404, "No forecast backtest has been run yet")
+    metrics = result.metrics or {}
+    return ForecastQuality(
+        id=result.id,
+        method=result.method,
+        tickers=result.tickers or [],
+        params=result.params,
+        num_origins=result.num_origins,
+        created_at=result.created_at,
+        overall=metrics.get("overall", {}),
+        by_ticker=metrics.get("by_ticker", {}),
+    )
+
+
 # ─── Job status polling ───────────────────────────────────────────────
 
 @router.get("/jobs/{job_id}", response_model=JobStatus)
@@ -147,4 +183,67 @@ async def get_job_status(
     job = result.scalars().first()
     if job is None:
         raise HTTPException(404, "Job not found")
-    return job
+    status = JobStatus.model_validate(job)
+    if job.status == "processing":
+        status.progress = await cache.get(job_progress_key(job.id))
+    return status
+
+
+def _sse(event: str, data: dict, event_id: str | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/jobs/{job_id}/stream")
+async def stream_job(
+    job_id: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    """Server-Sent Events relay of a job's AI output as it is generated.
+
+    Events: `delta` ({"text"}: append), `reset` (a retried model call starts
+    over: clear), `done` ({"status"}: fetch GET /analysis/jobs/{job_id} for
+    the final result). Reconnects resume from the Last-Event-ID header.
+    """
+    result = await db.execute(
+        select(AnalysisJob).where(
+            AnalysisJob.id == job_id,
+            AnalysisJob.user_id == user_id,
+        )
+    )
+    job = result.scalars().first()
+    if job is None:
+        raise HTTPException(404, "Job not found")
+    if job.job_type not in STREAMING_JOB_TYPES:
+        raise HTTPException(400, "This job type does not stream output")
+
+    terminal = job.status if job.status in ("completed", "failed") else None
+    after = request.headers.get("last-event-id") or "0"
+    # Return the connection to the pool instead of holding it for the stream
+    await db.close()
+
+    async def events():
+        nonlocal after
+        if terminal is not None:
+            yield _sse("done", {"status": terminal})
+            return
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        while time.monotonic() < deadline and not await request.is_disconnected():
+            batch = await job_streams.read(job_id, after, block_ms=STREAM_KEEPALIVE_MS)
+            if not batch:
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event in batch:
+                after = event_id
+                kind = event["type"]
+                yield _sse(kind, {k: v for k, v in event.items() if k != "type"}, event_id)
+                if kind == "done":
+                    return
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
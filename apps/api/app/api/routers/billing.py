@@ -18,6 +18,7 @@ from app.schemas.subscription import (
     SubscriptionRead,
     UsageInfo,
 )
+from app.services import ai_usage
 from app.services import subscription as sub_svc
 
 logger = structlog.stdlib.get_logger(__name__)
@@ -70,6 +71,8 @@ async def get_usage(
         portfolio_analysis_limit=limits["portfolio_analysis_per_month"],
         portfolio_count=portfolio_count,
         portfolio_limit=limits["portfolios"],
+        ai_tokens_used_today=await ai_usage.tokens_used_today(db, user_id),
+        ai_tokens_per_day=limits["ai_tokens_per_day"],
         can_create_portfolio=(
             limits["portfolios"] is None or portfolio_count < limits["portfolios"]
         ),
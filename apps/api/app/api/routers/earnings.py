@@ -1,31 +1,24 @@
-import asyncio
 from datetime import datetime, timezone
 
 import structlog
+from arq import ArqRedis
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_current_user
+from app.api.deps import get_arq_pool, get_current_user
 from app.core.rate_limiter import AI_LIMIT, limiter
 from app.database import get_db
 from app.models import AnalysisJob, EarningsCall
 from app.schemas.analysis import JobStatus
 from app.schemas.earnings import EarningsAnalyzeRequest, EarningsCallRead
 from app.services import subscription as sub_svc
+from app.workers.dispatch import JobDispatchError, dispatch_job
 from app.workers.tasks import run_earnings_analysis
 
 logger = structlog.stdlib.get_logger(__name__)
 
 
-def _log_task_exception(task: asyncio.Task) -> None:
-    if task.cancelled():
-        return
-    exc = task.exception()
-    if exc:
-        logger.error("Background task failed", error=str(exc), exc_info=exc)
-
-
 router = APIRouter(prefix="/stocks/{ticker}/earnings", tags=["earnings"])
 
 
@@ -54,8 +47,9 @@ async def analyze_earnings(
     body: EarningsAnalyzeRequest,
     db: AsyncSession = Depends(get_db),
     user_id: str = Depends(get_current_user),
+    pool: ArqRedis | None = Depends(get_arq_pool),
 ):
-    """Start an AI earnings analysis as a background task.
+    """Start an AI earnings analysis as a background job.
 
     Returns immediately with a pending job. Poll GET /analysis/jobs/{job_id}
     for status updates.
@@ -65,6 +59,10 @@ async def analyze_earnings(
             403,
             "Free plan allows 3 earnings analyses per month. Upgrade to Pro for unlimited.",
         )
+    if not await sub_svc.check_ai_budget(db, user_id):
+        raise HTTPException(
+            429, "Daily AI usage limit for your plan reached. Try again tomorrow."
+        )
     job = AnalysisJob(
         user_id=user_id,
         job_type="earnings_analysis",
@@ -79,12 +77,11 @@ async def analyze_earnings(
     await db.refresh(job)
     await db.commit()
 
-    # Run as inline background task (no separate worker needed)
-    task = asyncio.create_task(
-        run_earnings_analysis(
-            {}, str(job.id), user_id, ticker.upper(), body.transcript
+    try:
+        await dispatch_job(
+            db, pool, job, run_earnings_analysis, user_id, ticker.upper(), body.transcript
         )
-    )
-    task.add_done_callback(_log_task_exception)
+    except JobDispatchError as exc:
+        raise HTTPException(503, str(exc))
 
     return job
@@ -1,20 +1,37 @@
 from __future__ import annotations
 
+import asyncio
 from typing import TYPE_CHECKING
 
+import structlog
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
+from app.config import settings
 from app.core.rate_limiter import AI_LIMIT, limiter
 from app.database import get_db
-from app.schemas.holding import HoldingCreate, HoldingRead, HoldingUpdate
+from app.models import AnalysisJob
+from app.schemas.holding import HoldingCreate, HoldingImportResult, HoldingRead, HoldingUpdate
+from app.services import holdings_import
+from app.services.enrichment import enricher
 from app.services import portfolio as portfolio_svc
 from app.services import subscription as sub_svc
+from app.workers.tasks import run_holdings_enrichment
+
+logger = structlog.stdlib.get_logger(__name__)
 
 router = APIRouter(prefix="/portfolios/{portfolio_id}/holdings", tags=["holdings"])
 
 
+def _log_task_exception(task: asyncio.Task) -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc:
+        logger.error("Background task failed", error=str(exc), exc_info=exc)
+
+
 @router.get("", response_model=list[HoldingRead])
 async def list_holdings(
     portfolio_id: int,
@@ -44,9 +61,74 @@ async def add_holding(
     )
     if holding is None:
         raise HTTPException(404, "Portfolio not found")
+    if holding.enrichment_status == "pending":
+        # Commit first so the background enrichment can see the row
+        await db.commit()
+        enricher.schedule(holding.ticker)
     return holding
 
 
+@router.post("/import", response_model=HoldingImportResult, status_code=202)
+@limiter.limit(AI_LIMIT)
+async def import_holdings(
+    request: Request,
+    portfolio_id: int,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    """Bulk-add holdings from a CSV (text/csv) or JSON (application/json) body.
+
+    Valid rows are inserted at once and returned immediately; prices and
+    fundamentals are filled by one background enrichment job. Poll
+    GET /analysis/jobs/{job_id} for progress. Invalid rows are skipped and
+    reported in `errors`.
+    """
+    portfolio = await portfolio_svc.get_portfolio(db, user_id, portfolio_id)
+    if portfolio is None:
+        raise HTTPException(404, "Portfolio not found")
+
+    try:
+        rows, errors = holdings_import.parse_holdings(
+            await request.body(),
+            request.headers.get("content-type", ""),
+            settings.holdings_import_max_rows,
+        )
+    except holdings_import.ImportFormatError as exc:
+        raise HTTPException(400, str(exc))
+    if not rows:
+        raise HTTPException(
+            422,
+            {"message": "No valid holdings to import", "errors": [e.model_dump() for e in errors]},
+        )
+    current = len(portfolio.holdings)
+    if not await sub_svc.check_can_add_holding(db, user_id, current + len(rows) - 1):
+        raise HTTPException(
+            403,
+            "Free plan allows 10 holdings per portfolio. Upgrade to Pro for unlimited.",
+        )
+
+    ids = await portfolio_svc.import_holdings(db, user_id, portfolio_id, rows)
+    job = AnalysisJob(
+        user_id=user_id,
+        job_type="holdings_import",
+        status="pending",
+        input_data={"portfolio_id": portfolio_id, "holdings": len(ids)},
+    )
+    db.add(job)
+    await db.flush()
+    await db.commit()
+
+    # Run as inline background task (no separate worker needed)
+    task = asyncio.create_task(
+        run_holdings_enrichment({}, str(job.id), user_id, portfolio_id, ids)
+    )
+    task.add_done_callback(_log_task_exception)
+
+    return HoldingImportResult(
+        imported=len(ids), holding_ids=ids, errors=errors, job_id=str(job.id)
+    )
+
+
 @router.put("/{holding_id}", response_model=HoldingRead)
 async def update_holding(
     portfolio_id: int,
@@ -1,6 +1,6 @@
 import asyncio
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
@@ -14,13 +14,18 @@ from app.schemas.portfolio import (
 from app.schemas.analysis import (
     DashboardSummary,
     EarningsInsights,
+    PortfolioForecast,
     PortfolioHistoryWithBenchmark,
+    PortfolioReturns,
+    PortfolioRisk,
     PortfolioSnapshotRead,
+    PortfolioVaR,
     SectorAllocation,
 )
 from app.schemas.holding import HoldingRead
 from app.schemas.stock import NewsArticle, RedditPost
-from app.services import news, reddit, portfolio as portfolio_svc, stock_data
+from app.services import montecarlo, news, reddit, portfolio as portfolio_svc
+from app.services import portfolio_history, risk
 from app.services import subscription as sub_svc
 
 router = APIRouter(prefix="/portfolios", tags=["portfolios"])
@@ -125,143 +130,27 @@ async def get_portfolio_history_with_benchmark(
 ):
     """Return portfolio % change alongside S&P 500 % change.
 
-    If holdings have purchased_at dates, reconstructs history from yfinance.
-    Otherwise falls back to snapshot-based history.
+    If holdings have purchased_at dates, reads the materialized daily value
+    series (time-weighted return). Otherwise falls back to snapshot-based
+    history.
     """
-    from datetime import timedelta, datetime as dt
-    from app.schemas.analysis import BenchmarkPoint
-
-    # ── Try reconstructed history first ──────────────────────────────
-    reconstructed = await portfolio_svc.reconstruct_portfolio_history(
-        db, user_id, portfolio_id
-    )
-
-    if reconstructed and len(reconstructed) >= 2:
-        start_str = reconstructed[0]["date"]
-        end_str = reconstructed[-1]["date"]
-
-        spy_bars = await stock_data.get_benchmark_history(start_str, end_str)
-        spy_by_date: dict[str, float] = {b["date"]: b["close"] for b in spy_bars}
-        spy_dates_sorted = sorted(spy_by_date.keys())
-
-        base_spy = spy_by_date.get(spy_dates_sorted[0], 0) if spy_dates_sorted else 0
-
-        if reconstructed[0]["value"] > 0 and base_spy > 0:
-            data: list[BenchmarkPoint] = []
-            last_spy_close = base_spy
-
-            # Time-Weighted Return (TWR): chain daily returns so that
-            # adding new holdings doesn't create a fake spike.
-            # When cost changes (new holding enters), we rebase:
-            # the return for that day uses the NEW cost as denominator.
-            cumulative_return = 1.0  # starts at 1.0 = 0% gain
-            prev_value = reconstructed[0]["value"]
-            prev_cost = reconstructed[0].get("cost", prev_value)
-
-            for i, point in enumerate(reconstructed):
-                d = point["date"]
-                value = point["value"]
-                cost = point.get("cost", value)
-
-                if i == 0:
-                    # Day 1: 0% for both
-                    portfolio_pct = 0.0
-                else:
-                    # If cost changed (new holding entered), rebase:
-                    # compute return only on the portion that existed yesterday.
-                    if cost != prev_cost and prev_cost > 0:
-                        # Market movement on existing holdings before new one:
-                        # old_holdings_today = value - (cost - prev_cost)
-                        old_value_today = value - (cost - prev_cost)
-                        daily_return = old_value_today / prev_value if prev_value > 0 else 1.0
-                    else:
-                        daily_return = value / prev_value if prev_value > 0 else 1.0
-
-                    cumulative_return *= daily_return
-                    portfolio_pct = (cumulative_return - 1.0) * 100
-
-                prev_value = value
-                prev_cost = cost
-
-                spy_close = spy_by_date.get(d)
-                if spy_close is None:
-                    for sd in reversed(spy_dates_sorted):
-                        if sd <= d:
-                            spy_close = spy_by_date[sd]
-                            break
-                if spy_close is None:
-                    spy_close = last_spy_close
-                last_spy_close = spy_close
-
-                sp500_pct = ((spy_close - base_spy) / base_spy) * 100
-
-                date_obj = dt.strptime(d, "%Y-%m-%d")
-                data.append(
-                    BenchmarkPoint(
-                        date=date_obj.strftime("%b %d"),
-                        portfolio_pct=round(portfolio_pct, 2),
-                        sp500_pct=round(sp500_pct, 2),
-                    )
-                )
-
-            # Downsample if too many points (keep chart responsive)
-            if len(data) > 120:
-                step = len(data) // 90
-                data = data[::step] + [data[-1]]
-
-            return PortfolioHistoryWithBenchmark(data=data)
-
-    # ── Fallback: snapshot-based history ─────────────────────────────
-    snapshots = await portfolio_svc.get_snapshot_history(
+    return await portfolio_history.get_history_with_benchmark(
         db, user_id, portfolio_id, days
     )
-    if len(snapshots) < 2:
-        return PortfolioHistoryWithBenchmark(data=[])
-
-    start_dt = snapshots[0].created_at
-    end_dt = snapshots[-1].created_at + timedelta(days=1)
-    start_str_snap = start_dt.strftime("%Y-%m-%d")
-    end_str_snap = end_dt.strftime("%Y-%m-%d")
-
-    spy_bars_snap = await stock_data.get_benchmark_history(start_str_snap, end_str_snap)
-    spy_by_date_snap: dict[str, float] = {b["date"]: b["close"] for b in spy_bars_snap}
-
-    base_portfolio_snap = snapshots[0].total_value or 0
-    spy_dates_sorted_snap = sorted(spy_by_date_snap.keys())
-    base_spy_snap = spy_by_date_snap[spy_dates_sorted_snap[0]] if spy_dates_sorted_snap else 0
-
-    if base_portfolio_snap == 0 or base_spy_snap == 0:
-        return PortfolioHistoryWithBenchmark(data=[])
-
-    fallback_data: list[BenchmarkPoint] = []
-    last_spy_snap = base_spy_snap
-
-    for snap in snapshots:
-        snap_date = snap.created_at.strftime("%Y-%m-%d")
-        portfolio_val = snap.total_value or 0
-        portfolio_pct = ((portfolio_val - base_portfolio_snap) / base_portfolio_snap) * 100
-
-        spy_close = spy_by_date_snap.get(snap_date)
-        if spy_close is None:
-            for d in reversed(spy_dates_sorted_snap):
-                if d <= snap_date:
-                    spy_close = spy_by_date_snap[d]
-                    break
-        if spy_close is None:
-            spy_close = last_spy_snap
-        last_spy_snap = spy_close
-
-        sp500_pct = ((spy_close - base_spy_snap) / base_spy_snap) * 100
-
-        fallback_data.append(
-            BenchmarkPoint(
-                date=snap.created_at.strftime("%b %d"),
-                portfolio_pct=round(portfolio_pct, 2),
-                sp500_pct=round(sp500_pct, 2),
-            )
-        )
 
-    return PortfolioHistoryWithBenchmark(data=fallback_data)
+
+@router.get("/{portfolio_id}/returns", response_model=PortfolioReturns)
+async def get_portfolio_returns(
+    portfolio_id: int,
+    window: int = Query(21, ge=2, le=252),
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    """Time- and money-weighted, trailing and rolling returns vs. SPY."""
+    result = await portfolio_history.get_returns(db, user_id, portfolio_id, window)
+    if result is None:
+        raise HTTPException(404, "Portfolio not found")
+    return result
 
 
 @router.get("/{portfolio_id}/snapshot", response_model=PortfolioSnapshotRead)
@@ -270,13 +159,70 @@ async def get_portfolio_snapshot(
     db: AsyncSession = Depends(get_db),
     user_id: str = Depends(get_current_user),
 ):
-    snapshot = await portfolio_svc.analyze_portfolio(db, user_id, portfolio_id)
-    holdings = await portfolio_svc.get_holdings(db, user_id, portfolio_id)
-    daily_change, daily_change_pct = portfolio_svc.compute_daily_change(holdings)
+    """Live snapshot metrics; read-only and cached until holdings change."""
+    result = await portfolio_svc.get_snapshot(db, user_id, portfolio_id)
+    if result is None:
+        raise HTTPException(404, "Portfolio not found")
+    return result
+
+
+@router.get("/{portfolio_id}/var", response_model=PortfolioVaR)
+async def get_portfolio_var(
+    portfolio_id: int,
+    confidence: float = Query(0.95, ge=0.5, le=0.999),
+    paths: int | None = Query(None, ge=1000, le=50000),
+    model: str = Query("gbm", pattern=r"^(gbm|bootstrap)$"),
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    """Monte Carlo 1-day and 10-day Value-at-Risk / CVaR for current holdings."""
+    try:
+        result = await portfolio_svc.simulate_portfolio_var(
+            db, user_id, portfolio_id, confidence=confidence, n_paths=paths, model=model
+        )
+    except montecarlo.SimulationError as exc:
+        raise HTTPException(400, str(exc))
+    if result is None:
+        raise HTTPException(404, "Portfolio not found")
+    return result
+
+
+@router.get("/{portfolio_id}/risk", response_model=PortfolioRisk)
+async def get_portfolio_risk(
+    portfolio_id: int,
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    """Volatility, beta vs SPY, risk contributions, drawdown and correlations."""
+    try:
+        result = await risk.get_portfolio_risk(db, user_id, portfolio_id)
+    except risk.RiskError as exc:
+        raise HTTPException(400, str(exc))
+    if result is None:
+        raise HTTPException(404, "Portfolio not found")
+    return result
+
 
-    result = PortfolioSnapshotRead.model_validate(snapshot)
-    result.daily_change = daily_change
-    result.daily_change_pct = daily_change_pct
+@router.get("/{portfolio_id}/forecasts", response_model=PortfolioForecast)
+async def get_portfolio_forecasts(
+    portfolio_id: int,
+    days: int = Query(30, ge=7, le=90),
+    method: str = Query("linear", pattern=r"^(linear|montecarlo)$"),
+    model: str = Query("gbm", pattern=r"^(gbm|bootstrap)$"),
+    paths: int | None = Query(None, ge=1000, le=50000),
+    db: AsyncSession = Depends(get_db),
+    user_id: str = Depends(get_current_user),
+):
+    """Forecast every holding plus the value-weighted portfolio in one call."""
+    if not await sub_svc.check_can_forecast(db, user_id):
+        raise HTTPException(
+            403, "Price forecasting requires Pro plan. Upgrade to unlock."
+        )
+    result = await portfolio_svc.forecast_portfolio(
+        db, user_id, portfolio_id, forecast_days=days, method=method, n_paths=paths, model=model
+    )
+    if result is None:
+        raise HTTPException(404, "Portfolio not found")
     return result
 
 
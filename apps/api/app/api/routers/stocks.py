@@ -102,15 +102,24 @@ async def get_stock_news(
 async def get_stock_forecast(
     ticker: str,
     days: int = Query(30, ge=7, le=90),
+    method: str = Query("linear", pattern=r"^(linear|montecarlo)$"),
+    model: str = Query("gbm", pattern=r"^(gbm|bootstrap)$"),
+    paths: int | None = Query(None, ge=1000, le=50000),
     db: AsyncSession = Depends(get_db),
     user_id: str = Depends(get_current_user),
 ):
-    """Get price forecast for a stock using predictive model."""
+    """Get price forecast for a stock using predictive model.
+
+    `method=montecarlo` simulates `paths` GBM or bootstrapped-return paths
+    and returns a percentile fan instead of regression bands.
+    """
     if not await sub_svc.check_can_forecast(db, user_id):
         raise HTTPException(
             403, "Price forecasting requires Pro plan. Upgrade to unlock."
         )
-    result = await forecast.get_forecast(ticker, forecast_days=days)
+    result = await forecast.get_forecast(
+        ticker, forecast_days=days, method=method, n_paths=paths, model=model
+    )
     if "error" in result:
         raise HTTPException(400, result["error"])
     return StockForecast(**result)
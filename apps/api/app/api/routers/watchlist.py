@@ -10,6 +10,7 @@ from app.core.rate_limiter import AI_LIMIT, limiter
 from app.database import get_db
 from app.schemas.watchlist import WatchlistItemCreate, WatchlistItemRead
 from app.services import watchlist as watchlist_svc
+from app.services.enrichment import enricher
 
 router = APIRouter(prefix="/watchlist", tags=["watchlist"])
 
@@ -28,7 +29,11 @@ async def add_to_watchlist(
     db: AsyncSession = Depends(get_db),
     user_id: str = Depends(get_current_user),
 ):
-    return await watchlist_svc.add_item(db, user_id, body.ticker)
+    item = await watchlist_svc.add_item(db, user_id, body.ticker)
+    if item.enrichment_status == "pending":
+        await db.commit()
+        enricher.schedule(item.ticker)
+    return item
 
 
 @router.delete("/{item_id}", status_code=204)
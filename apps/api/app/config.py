@@ -50,10 +50,91 @@ class Settings(BaseSettings):
     alpha_vantage_base_url: str = "https://www.alphavantage.co/query"
     massive_base_url: str = "https://api.massive.com/v3/reference/tickers"
 
+    # Outbound Alpha Vantage quota (free tier; premium keys allow 75/min and
+    # 10 concurrent requests)
+    alpha_vantage_requests_per_minute: int = 5
+    alpha_vantage_max_concurrency: int = 1
+    fmp_requests_per_minute: int = 250
+    fmp_max_concurrency: int = 4
+    deepseek_requests_per_minute: int = 60
+    # Per-process ceiling; core/ai_scheduler.py sets the effective, global cap
+    deepseek_max_concurrency: int = 16
+
+    # Global AI scheduler (shared through Redis): adaptive in-flight cap
+    ai_initial_concurrency: int = 4
+    ai_min_concurrency: int = 1
+    ai_max_concurrency: int = 16
+    ai_throttle_cooldown_seconds: float = 2.0
+    ai_slot_lease_seconds: int = 180
+
+    # Analysis jobs: "arq" enqueues to the worker (`arq app.workers.WorkerSettings`),
+    # "inline" runs them as tasks in the API process
+    job_backend: str = "arq"
+    # Run in-process when the arq pool is unavailable or no worker is running
+    # (e.g. an API-only deploy) instead of failing the job
+    job_inline_fallback: bool = True
+    job_timeout_seconds: int = 300
+    # Transient failures (provider, network, database) are retried with backoff
+    job_max_tries: int = 3
+    job_retry_backoff_seconds: float = 15.0
+    worker_max_jobs: int = 10
+    # Workers refresh their arq health-check key this often; the API keeps
+    # enqueuing for a few intervals after it last saw the key
+    worker_health_check_seconds: int = 60
+
+    # Per-ticker budget when analyses gather earnings data concurrently (a long
+    # transcript adds earnings_chunk_timeout_seconds per map-reduce chunk), and
+    # how many tickers one job gathers at once (each briefly holds a DB session)
+    earnings_ticker_timeout_seconds: float = 120.0
+    earnings_chunk_timeout_seconds: float = 30.0
+    earnings_gather_concurrency: int = 4
+
+    # Shared quote / reference data cache (fills new holdings when warm)
+    quote_cache_ttl: int = 60
+    fundamentals_cache_ttl: int = 86400
+
+    # Stored "latest" transcripts younger than this are reused without asking FMP
+    transcript_refresh_hours: int = 24
+
     # AI Settings
     ai_max_tokens: int = 2000
+    # Longer transcripts are summarized per chunk (map) and then combined (reduce)
+    transcript_chunk_chars: int = 12000
+    ai_chunk_max_tokens: int = 600
     ai_temperature: float = 0.3
 
+    # CPU-bound model work (backtests, batch forecasts); 0 = one worker per core
+    compute_max_workers: int = 0
+
+    # Monte Carlo forecasts / VaR
+    simulation_max_workers: int = 4
+    montecarlo_paths: int = 10000
+
+    # Forecast results are shared between single-ticker and portfolio endpoints
+    forecast_cache_ttl: int = 900
+
+    # Covariance blocks are keyed by ticker set and as-of date
+    risk_cache_ttl: int = 21600
+
+    # Live snapshot reads are cached; the worker persists at most one
+    # snapshot per portfolio per interval
+    snapshot_cache_ttl: int = 300
+    snapshot_persist_interval_hours: int = 24
+
+    # Dashboard summary (best/worst movers, upcoming earnings) per user
+    dashboard_cache_ttl: int = 300
+
+    # Snapshot retention: full resolution, then daily, then weekly
+    snapshot_full_resolution_days: int = 30
+    snapshot_daily_resolution_days: int = 365
+
+    # Rows still "pending" this long (e.g. the API restarted mid-fetch) are
+    # enriched again by the worker and end up "ready" or "failed"
+    enrichment_stale_minutes: int = 15
+
+    # Bulk holdings import
+    holdings_import_max_rows: int = 1000
+
     # CORS
     cors_origins: str = "http://localhost:3000"
 
@@ -0,0 +1,296 @@
+"""
+Global, priority-aware admission control for AI provider calls.
+
+The deepseek rate governor (core/rate_governor.py) spaces requests within
+one process; this scheduler caps how many AI requests are in flight across
+every API process and arq worker, through Redis. Callers wait in a single
+queue ordered by priority, then arrival, so interactive earnings analyses
+go ahead of batch portfolio analyses and Pro users ahead of free ones.
+
+The cap adapts (AIMD): each successful call raises it by 1/limit (about +1
+per round of calls), and a 429 from the provider halves it, at most once
+per settings.ai_throttle_cooldown_seconds so one burst of 429s counts as
+one signal. The cap stays between ai_min_concurrency and
+ai_max_concurrency.
+
+Slots are leases with an expiry, and queued tickets must keep polling, so
+a crashed process cannot hold capacity or block the queue. Like
+core/cache.py it falls back to an in-process scheduler with the same
+semantics when Redis is unreachable.
+"""
+
+import asyncio
+import time
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+import redis.asyncio as aioredis
+import structlog
+
+from app.config import settings
+from app.core.cache import KEY_PREFIX
+
+logger = structlog.stdlib.get_logger(__name__)
+
+_REDIS_RETRY_SECONDS = 30.0
+# A queued ticket not polled for this long belongs to a dead waiter
+_STALE_TICKET_MS = 10_000
+_POLL_MIN_SECONDS = 0.02
+_POLL_MAX_SECONDS = 0.25
+
+# Lower is served first
+JOB_PRIORITY = {
+    "earnings_analysis": 0,  # interactive: a user is waiting on one ticker
+    "comparison": 1,
+    "portfolio_analysis": 2,  # batch: many tickers, then one summary
+}
+_DEFAULT_PRIORITY = 3
+
+
+def priority_for(job_type: str | None, plan: str | None) -> int:
+    """Queue priority for a call made by a `job_type` job of a `plan` user."""
+    base = JOB_PRIORITY.get(job_type or "", _DEFAULT_PRIORITY)
+    return base * 2 + (0 if plan == "pro" else 1)
+
+
+def _key(name: str) -> str:
+    return f"{KEY_PREFIX}ai-scheduler:{name}"
+
+
+# KEYS: inflight, queue, waiting, state
+# ARGV: ticket, queue score, lease ms, stale ms, initial limit
+_ACQUIRE = """
+redis.replicate_commands()
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local stale = redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now - tonumber(ARGV[4]))
+for _, ticket in ipairs(stale) do
+  redis.call('ZREM', KEYS[2], ticket)
+  redis.call('ZREM', KEYS[3], ticket)
+end
+redis.call('ZADD', KEYS[2], 'NX', ARGV[2], ARGV[1])
+redis.call('ZADD', KEYS[3], now, ARGV[1])
+local limit = tonumber(redis.call('HGET', KEYS[4], 'limit') or ARGV[5])
+local free = math.floor(limit) - redis.call('ZCARD', KEYS[1])
+if free > 0 and redis.call('ZRANK', KEYS[2], ARGV[1]) < free then
+  redis.call('ZREM', KEYS[2], ARGV[1])
+  redis.call('ZREM', KEYS[3], ARGV[1])
+  redis.call('ZADD', KEYS[1], now + tonumber(ARGV[3]), ARGV[1])
+  return 1
+end
+return 0
+"""
+
+# KEYS: inflight, queue, waiting, state
+# ARGV: ticket, outcome, initial, min, max, cooldown ms
+_RELEASE = """
+redis.replicate_commands()
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('ZREM', KEYS[3], ARGV[1])
+if ARGV[2] == 'cancelled' then
+  return false
+end
+local limit = tonumber(redis.call('HGET', KEYS[4], 'limit') or ARGV[3])
+if ARGV[2] == 'throttled' then
+  local last = tonumber(redis.call('HGET', KEYS[4], 'decreased_at') or 0)
+  if now - last >= tonumber(ARGV[6]) then
+    limit = math.max(tonumber(ARGV[4]), limit / 2)
+    redis.call('HSET', KEYS[4], 'decreased_at', now)
+  end
+elseif ARGV[2] == 'ok' then
+  limit = math.min(tonumber(ARGV[5]), limit + 1 / limit)
+end
+redis.call('HSET', KEYS[4], 'limit', tostring(limit))
+return tostring(limit)
+"""
+
+
+class _MemoryScheduler:
+    """In-process twin of the Redis scripts above."""
+
+    def __init__(self) -> None:
+        self.inflight: dict[str, float] = {}
+        self.queue: dict[str, tuple[float, float]] = {}  # ticket -> (score, last poll)
+        self.limit: float | None = None
+        self.decreased_at = float("-inf")
+
+    def acquire(self, ticket: str, score: float) -> bool:
+        now = time.monotonic()
+        self.inflight = {t: exp for t, exp in self.inflight.items() if exp > now}
+        stale = now - _STALE_TICKET_MS / 1000
+        self.queue = {t: q for t, q in self.queue.items() if q[1] >= stale}
+        self.queue[ticket] = (self.queue.get(ticket, (score, now))[0], now)
+        free = int(self._limit()) - len(self.inflight)
+        if free > 0:
+            ahead = sorted(self.queue, key=lambda t: (self.queue[t][0], t))
+            if ahead.index(ticket) < free:
+                del self.queue[ticket]
+                self.inflight[ticket] = now + settings.ai_slot_lease_seconds
+                return True
+        return False
+
+    def release(self, ticket: str, outcome: str) -> float | None:
+        self.inflight.pop(ticket, None)
+        self.queue.pop(ticket, None)
+        if outcome == "cancelled":
+            return None
+        limit = self._limit()
+        if outcome == "throttled":
+            now = time.monotonic()
+            if now - self.decreased_at >= settings.ai_throttle_cooldown_seconds:
+                limit = max(settings.ai_min_concurrency, limit / 2)
+                self.decreased_at = now
+        elif outcome == "ok":
+            limit = min(settings.ai_max_concurrency, limit + 1 / limit)
+        self.limit = limit
+        return limit
+
+    def _limit(self) -> float:
+        return self.limit if self.limit is not None else float(settings.ai_initial_concurrency)
+
+    def clear(self) -> None:
+        self.__init__()
+
+
+class AISlot:
+    """Admission to make one AI request; report a 429 with throttled()."""
+
+    def __init__(self) -> None:
+        self.outcome = "ok"
+
+    def throttled(self) -> None:
+        self.outcome = "throttled"
+
+
+class AIScheduler:
+    """Usage:
+        async with ai_scheduler.slot(priority_for("comparison", "pro")) as slot:
+            resp = await client.post(...)
+            if resp.status_code == 429:
+                slot.throttled()
+    """
+
+    def __init__(self) -> None:
+        self._redis: aioredis.Redis | None = None
+        self._scripts: tuple | None = None
+        self._memory = _MemoryScheduler()
+        self._memory_only = False
+        self._redis_down_until = 0.0
+        self._released: asyncio.Event | None = None
+        self._keys = [_key("inflight"), _key("queue"), _key("waiting"), _key("state")]
+
+    def configure(self, memory_only: bool) -> None:
+        """Force the in-memory backend (used by the test suite)."""
+        self._memory_only = memory_only
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+        self._released = None
+
+    def _client(self) -> aioredis.Redis | None:
+        if self._memory_only or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                settings.redis_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=1.0,
+                decode_responses=True,
+            )
+            self._scripts = (
+                self._redis.register_script(_ACQUIRE),
+                self._redis.register_script(_RELEASE),
+            )
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        if self._redis_down_until == 0.0:
+            logger.warning("AI scheduler falling back to in-process queue", error=str(exc))
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    def _wake_event(self) -> asyncio.Event:
+        # Local releases wake local waiters at once; remote ones are seen on the next poll
+        if self._released is None:
+            self._released = asyncio.Event()
+        return self._released
+
+    async def _try_acquire(self, ticket: str, score: float) -> bool:
+        if self._client() is not None:
+            try:
+                acquire, _ = self._scripts
+                granted = await acquire(
+                    keys=self._keys,
+                    args=[
+                        ticket,
+                        score,
+                        settings.ai_slot_lease_seconds * 1000,
+                        _STALE_TICKET_MS,
+                        settings.ai_initial_concurrency,
+                    ],
+                )
+                return bool(granted)
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+        return self._memory.acquire(ticket, score)
+
+    async def _release(self, ticket: str, outcome: str) -> None:
+        limit: float | str | None = None
+        released = False
+        if self._client() is not None:
+            try:
+                _, release = self._scripts
+                limit = await release(
+                    keys=self._keys,
+                    args=[
+                        ticket,
+                        outcome,
+                        settings.ai_initial_concurrency,
+                        settings.ai_min_concurrency,
+                        settings.ai_max_concurrency,
+                        int(settings.ai_throttle_cooldown_seconds * 1000),
+                    ],
+                )
+                released = True
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+        if not released:
+            limit = self._memory.release(ticket, outcome)
+        if outcome == "throttled":
+            logger.warning("AI provider throttled; concurrency limit now %.1f", float(limit))
+        event, self._released = self._wake_event(), None
+        event.set()
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncIterator[AISlot]:
+        """Wait for an AI request slot; released (and the limit adapted) on exit."""
+        ticket = uuid.uuid4().hex
+        # Priority first, then arrival (milliseconds fit well below 1e13)
+        score = priority * 1e13 + time.time() * 1000
+        delay = _POLL_MIN_SECONDS
+        try:
+            while not await self._try_acquire(ticket, score):
+                try:
+                    await asyncio.wait_for(self._wake_event().wait(), delay)
+                except asyncio.TimeoutError:
+                    delay = min(delay * 2, _POLL_MAX_SECONDS)
+        except BaseException:
+            await self._release(ticket, "cancelled")
+            raise
+
+        slot = AISlot()
+        try:
+            yield slot
+        except BaseException:
+            if slot.outcome == "ok":
+                slot.outcome = "error"
+            raise
+        finally:
+            await self._release(ticket, slot.outcome)
+
+
+ai_scheduler = AIScheduler()
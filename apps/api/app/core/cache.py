@@ -0,0 +1,149 @@
+"""
+Shared JSON cache.
+
+Backed by Redis so cached values are shared between API processes and arq
+workers. When Redis is unreachable (local development without docker, tests)
+it degrades to a bounded per-process in-memory store and retries Redis after
+a short back-off, so callers never have to care which backend is live.
+
+Values must be JSON-serialisable; callers dump Pydantic models first.
+"""
+
+import json
+import time
+from typing import Any
+
+import redis.asyncio as aioredis
+import structlog
+
+from app.config import settings
+
+logger = structlog.stdlib.get_logger(__name__)
+
+KEY_PREFIX = "stockbuddy:"
+_REDIS_RETRY_SECONDS = 30.0
+
+
+class _MemoryBackend:
+    """Bounded dict with per-key expiry; oldest entries are evicted first."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self._data: dict[str, tuple[float, str]] = {}
+        self._max_entries = max_entries
+
+    async def get(self, key: str) -> str | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._data.pop(key, None)
+        if len(self._data) >= self._max_entries:
+            now = time.monotonic()
+            for k in [k for k, (exp, _) in self._data.items() if exp < now]:
+                del self._data[k]
+            while len(self._data) >= self._max_entries:
+                del self._data[next(iter(self._data))]
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._data if k.startswith(prefix)]:
+            del self._data[key]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class Cache:
+    def __init__(self) -> None:
+        self._redis: aioredis.Redis | None = None
+        self._memory = _MemoryBackend()
+        self._memory_only = False
+        self._redis_down_until = 0.0
+
+    def configure(self, memory_only: bool) -> None:
+        """Force the in-memory backend (used by the test suite)."""
+        self._memory_only = memory_only
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def _client(self) -> aioredis.Redis | None:
+        if self._memory_only or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            self._redis = aioredis.from_url(
+                settings.redis_url,
+                socket_connect_timeout=0.5,
+                socket_timeout=1.0,
+                decode_responses=True,
+            )
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        if self._redis_down_until == 0.0:
+            logger.warning("Cache falling back to in-memory store", error=str(exc))
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    async def get(self, key: str) -> Any | None:
+        key = KEY_PREFIX + key
+        client = self._client()
+        raw: str | None
+        if client is not None:
+            try:
+                raw = await client.get(key)
+                return json.loads(raw) if raw is not None else None
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+        raw = await self._memory.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        key = KEY_PREFIX + key
+        raw = json.dumps(value, default=str)
+        client = self._client()
+        if client is not None:
+            try:
+                await client.set(key, raw, ex=ttl)
+                return
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+        await self._memory.set(key, raw, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        """Delete exact keys from both backends."""
+        if not keys:
+            return
+        full = [KEY_PREFIX + k for k in keys]
+        await self._memory.delete(*full)
+        client = self._client()
+        if client is not None:
+            try:
+                await client.delete(*full)
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        """Delete every key starting with `prefix` from both backends."""
+        full = KEY_PREFIX + prefix
+        await self._memory.delete_prefix(full)
+        client = self._client()
+        if client is not None:
+            try:
+                keys = [k async for k in client.scan_iter(match=f"{full}*", count=500)]
+                if keys:
+                    await client.delete(*keys)
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+
+
+cache = Cache()
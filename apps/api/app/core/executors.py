@@ -0,0 +1,70 @@
+"""
+Shared executors for CPU-bound work.
+
+Model fitting (backtests, batch forecasts) runs in a process pool so it
+neither blocks the event loop nor competes for the GIL with request handling.
+Workers are spawned rather than forked so they never inherit the event loop,
+DB connections or yfinance threads of the parent.
+
+Monte Carlo simulations run in a small bounded thread pool instead: they are
+large vectorised NumPy calls that release the GIL, and their inputs/outputs
+are too big to be worth pickling across processes.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from app.config import settings
+
+_process_pool: ProcessPoolExecutor | None = None
+_thread_pool: ThreadPoolExecutor | None = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Return the lazily created, process-wide pool."""
+    global _process_pool
+    if _process_pool is None:
+        workers = settings.compute_max_workers or os.cpu_count() or 1
+        _process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+async def run_in_process(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a picklable top-level function in the shared process pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), fn, *args)
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Return the lazily created, bounded simulation thread pool."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=settings.simulation_max_workers,
+            thread_name_prefix="simulation",
+        )
+    return _thread_pool
+
+
+async def run_in_thread_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking NumPy-heavy function in the bounded simulation pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(), fn, *args)
+
+
+def shutdown() -> None:
+    """Stop any started pools (called on app shutdown)."""
+    global _process_pool, _thread_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
@@ -0,0 +1,189 @@
+"""
+Per-job event streams for live AI output.
+
+Workers publish partial model output for a job; the SSE endpoint
+(GET /analysis/jobs/{id}/stream) relays it to the browser as it arrives.
+Backed by Redis streams (XADD / blocking XREAD) so a job running in an arq
+worker can be followed from any API process, with the same in-memory
+fallback as app.core.cache when Redis is unreachable (single-process dev,
+tests).
+
+Events are dicts with a "type":
+    {"type": "delta", "text": "..."}   more output
+    {"type": "reset"}                  a retried model call starts over
+    {"type": "done", "status": "completed" | "failed"}
+"""
+
+import asyncio
+import json
+import time
+
+import redis.asyncio as aioredis
+import structlog
+
+from app.config import settings
+from app.core.cache import KEY_PREFIX
+
+logger = structlog.stdlib.get_logger(__name__)
+
+STREAM_TTL_SECONDS = 3600
+STREAM_MAXLEN = 10_000
+_REDIS_RETRY_SECONDS = 30.0
+
+
+def _key(job_id: str) -> str:
+    return f"{KEY_PREFIX}job-stream:{job_id}"
+
+
+class _MemoryStreams:
+    """Append-only event lists with a wake-up event per stream."""
+
+    def __init__(self) -> None:
+        self._events: dict[str, list[str]] = {}
+        self._signals: dict[str, asyncio.Event] = {}
+        self._expires: dict[str, float] = {}
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, exp in self._expires.items() if exp < now]:
+            self._events.pop(key, None)
+            self._signals.pop(key, None)
+            del self._expires[key]
+
+    def add(self, key: str, event: dict) -> str:
+        self._expire()
+        events = self._events.setdefault(key, [])
+        events.append(json.dumps(event))
+        self._expires[key] = time.monotonic() + STREAM_TTL_SECONDS
+        signal = self._signals.pop(key, None)
+        if signal is not None:
+            signal.set()
+        return str(len(events))
+
+    async def read(self, key: str, after: str, block_ms: int) -> list[tuple[str, dict]]:
+        start = int(after) if after.isdigit() else 0
+        events = self._events.get(key, [])
+        if len(events) <= start:
+            signal = self._signals.setdefault(key, asyncio.Event())
+            try:
+                await asyncio.wait_for(signal.wait(), block_ms / 1000)
+            except asyncio.TimeoutError:
+                return []
+            events = self._events.get(key, [])
+        return [(str(i), json.loads(raw)) for i, raw in enumerate(events[start:], start + 1)]
+
+    def clear(self) -> None:
+        self._events.clear()
+        self._signals.clear()
+        self._expires.clear()
+
+
+class JobStreams:
+    def __init__(self) -> None:
+        self._redis: aioredis.Redis | None = None
+        self._memory = _MemoryStreams()
+        self._memory_only = False
+        self._redis_down_until = 0.0
+
+    def configure(self, memory_only: bool) -> None:
+        """Force the in-memory backend (used by the test suite)."""
+        self._memory_only = memory_only
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def _client(self) -> aioredis.Redis | None:
+        if self._memory_only or time.monotonic() < self._redis_down_until:
+            return None
+        if self._redis is None:
+            # No socket_timeout: reads block server-side for up to block_ms
+            self._redis = aioredis.from_url(
+                settings.redis_url, socket_connect_timeout=0.5, decode_responses=True
+            )
+        return self._redis
+
+    def _redis_failed(self, exc: Exception) -> None:
+        if self._redis_down_until == 0.0:
+            logger.warning("Job streams falling back to in-memory store", error=str(exc))
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    async def publish(self, job_id: str, event: dict) -> None:
+        key = _key(job_id)
+        client = self._client()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.xadd(key, {"e": json.dumps(event)}, maxlen=STREAM_MAXLEN, approximate=True)
+                    pipe.expire(key, STREAM_TTL_SECONDS)
+                    await pipe.execute()
+                return
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+        self._memory.add(key, event)
+
+    async def read(
+        self, job_id: str, after: str = "0", block_ms: int = 15_000
+    ) -> list[tuple[str, dict]]:
+        """Events after stream id `after`, waiting up to `block_ms` for new ones.
+
+        Returns [(event id, event), ...]; empty on timeout.
+        """
+        key = _key(job_id)
+        client = self._client()
+        if client is not None:
+            try:
+                result = await client.xread({key: after}, block=block_ms, count=500)
+                return [
+                    (entry_id, json.loads(fields["e"]))
+                    for _, entries in result
+                    for entry_id, fields in entries
+                ]
+            except aioredis.RedisError as exc:
+                self._redis_failed(exc)
+        return await self._memory.read(key, after, block_ms)
+
+    async def finish(self, job_id: str, status: str) -> None:
+        await self.publish(job_id, {"type": "done", "status": status})
+
+
+job_streams = JobStreams()
+
+
+class JobTextWriter:
+    """Publishes model output for one job, batching tiny token deltas.
+
+    Usage:
+        writer = JobTextWriter(job_id)
+        text = await ai_analysis.analyze_...(..., stream=writer)
+    """
+
+    def __init__(self, job_id: str, min_chars: int = 48, max_delay: float = 0.1):
+        self.job_id = job_id
+        self._buffer: list[str] = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        self._min_chars = min_chars
+        self._max_delay = max_delay
+
+    async def write(self, text: str) -> None:
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if (
+            self._buffered >= self._min_chars
+            or time.monotonic() - self._last_flush >= self._max_delay
+        ):
+            await self.flush()
+
+    async def reset(self) -> None:
+        self._buffer.clear()
+        self._buffered = 0
+        await job_streams.publish(self.job_id, {"type": "reset"})
+
+    async def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        await job_streams.publish(self.job_id, {"type": "delta", "text": text})
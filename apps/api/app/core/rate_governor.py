@@ -0,0 +1,91 @@
+"""
+Outbound rate governors for third-party APIs.
+
+Where core/rate_limiter.py limits what clients may ask of us, a governor
+limits what we ask of an upstream provider: a token bucket enforces the
+provider's requests-per-minute quota and a semaphore caps in-flight calls.
+Callers fire requests concurrently and the governor spaces them out, which
+replaces fixed sleeps between calls.
+
+Governors are per-process; limits are configurable via config.py.
+"""
+
+import asyncio
+import time
+
+from app.config import settings
+
+
+class RateGovernor:
+    """Token bucket (requests per minute) plus a concurrency cap.
+
+    Usage:
+        async with alpha_vantage:
+            resp = await client.get(...)
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, max_concurrency: int):
+        self.name = name
+        self._rate = requests_per_minute / 60.0
+        # A full minute's quota may be spent at once; the bucket then refills.
+        self._capacity = float(max(requests_per_minute, 1))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._max_concurrency = max_concurrency
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock: asyncio.Lock
+        self._semaphore: asyncio.Semaphore
+
+    def _bind_loop(self) -> None:
+        # asyncio primitives belong to one event loop; rebuild them if the
+        # governor is used from a new loop (worker restarts, tests).
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+    async def _take_token(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self._capacity, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    async def __aenter__(self) -> "RateGovernor":
+        self._bind_loop()
+        await self._semaphore.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+
+alpha_vantage = RateGovernor(
+    "alpha_vantage",
+    requests_per_minute=settings.alpha_vantage_requests_per_minute,
+    max_concurrency=settings.alpha_vantage_max_concurrency,
+)
+
+fmp = RateGovernor(
+    "fmp",
+    requests_per_minute=settings.fmp_requests_per_minute,
+    max_concurrency=settings.fmp_max_concurrency,
+)
+
+deepseek = RateGovernor(
+    "deepseek",
+    requests_per_minute=settings.deepseek_requests_per_minute,
+    max_concurrency=settings.deepseek_max_concurrency,
+)
@@ -1,4 +1,4 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Awaitable, Callable, Hashable
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
@@ -6,6 +6,41 @@ from sqlmodel import SQLModel
 
 from app.config import settings
 
+_AFTER_COMMIT = "after_commit"
+
+
+class AppSession(AsyncSession):
+    """AsyncSession that runs after_commit() callbacks once it commits.
+
+    Cache invalidations go here: dropped before the commit, a concurrent
+    read could refill the cache from the old rows for a whole TTL. A
+    rollback discards the pending callbacks.
+    """
+
+    async def commit(self) -> None:
+        await super().commit()
+        callbacks = self.info.pop(_AFTER_COMMIT, {})
+        for callback in callbacks.values():
+            await callback()
+
+    async def rollback(self) -> None:
+        self.info.pop(_AFTER_COMMIT, None)
+        await super().rollback()
+
+    async def close(self) -> None:
+        self.info.pop(_AFTER_COMMIT, None)
+        await super().close()
+
+
+def after_commit(
+    db: AsyncSession, key: Hashable, callback: Callable[[], Awaitable[None]]
+) -> None:
+    """Run `callback` after `db` next commits; the last callback per `key` wins."""
+    if not isinstance(db, AppSession):
+        raise TypeError("after_commit needs a session from an AppSession factory")
+    db.info.setdefault(_AFTER_COMMIT, {})[key] = callback
+
+
 engine = create_async_engine(
     settings.async_database_url,
     echo=settings.debug,
@@ -15,7 +50,7 @@ engine = create_async_engine(
 
 async_session_factory = sessionmaker(
     engine,
-    class_=AsyncSession,
+    class_=AppSession,
     expire_on_commit=False,
 )
 
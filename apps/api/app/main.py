@@ -72,8 +72,14 @@ async def lifespan(app: FastAPI):
         await app.state.arq_pool.close()
         logger.info("arq connection pool closed")
 
+    from app.core import executors
     from app.database import engine
+    from app.services.enrichment import enricher
+    from app.services.portfolio_history import refresher
 
+    await enricher.wait_idle()
+    await refresher.wait_idle()
+    executors.shutdown()
     await engine.dispose()
 
 
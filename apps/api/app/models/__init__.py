@@ -6,6 +6,13 @@ from .analysis_job import AnalysisJob
 from .subscription import Subscription
 from .watchlist import WatchlistItem
 from .price_alert import PriceAlert
+from .price_bar import PriceBar
+from .forecast_backtest import ForecastBacktest
+from .portfolio_daily_value import PortfolioDailyValue
+from .ai_analysis_cache import AIAnalysisCache
+from .transcript import Transcript
+from .ai_usage import AIUsage
+from .job_watermark import JobWatermark
 
 __all__ = [
     "Portfolio",
@@ -16,4 +23,11 @@ __all__ = [
     "Subscription",
     "WatchlistItem",
     "PriceAlert",
+    "PriceBar",
+    "ForecastBacktest",
+    "PortfolioDailyValue",
+    "AIAnalysisCache",
+    "Transcript",
+    "AIUsage",
+    "JobWatermark",
 ]
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from sqlalchemy import Column, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class AIAnalysisCache(SQLModel, table=True):
+    """AI analysis shared across users, keyed by a hash of everything in the prompt."""
+
+    __tablename__ = "ai_analysis_cache"
+
+    # sha256 of (kind, prompt version, ticker, input content, fundamentals bucket)
+    key: str = Field(primary_key=True)
+    kind: str  # e.g. "earnings_call"
+    prompt_version: str
+    ticker: str = Field(index=True)
+
+    summary: str = Field(sa_column=Column(Text, nullable=False))
+    # sentiment_parser.parse_analysis output for `summary`
+    parsed: dict | None = Field(default=None, sa_column=Column(JSONB))
+
+    hit_count: int = 0
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=sa.DateTime(timezone=True),
+    )
+    last_hit_at: datetime | None = Field(default=None, sa_type=sa.DateTime(timezone=True))
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from sqlmodel import Field, SQLModel
+
+
+class AIUsage(SQLModel, table=True):
+    """One model call (or shared-cache hit) made on behalf of a job."""
+
+    __tablename__ = "ai_usage"
+    __table_args__ = (sa.Index("ix_ai_usage_user_created", "user_id", "created_at"),)
+
+    id: int | None = Field(default=None, primary_key=True)
+    user_id: str | None = None
+    job_type: str = Field(index=True)  # AnalysisJob.job_type, or "unscoped"
+    job_id: str | None = None
+
+    cache_hit: bool = False
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_ms: int = 0
+    attempts: int = 1  # tenacity attempts; >1 means retries
+    error: str | None = None
+
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=sa.DateTime(timezone=True),
+    )
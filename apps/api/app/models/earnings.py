@@ -2,7 +2,7 @@ from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
 import sqlalchemy as sa
-from sqlalchemy import Column, Text
+from sqlalchemy import Column, Index, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Field, Relationship, SQLModel
 
@@ -14,6 +14,10 @@ class EarningsCall(SQLModel, table=True):
     """Analyzed earnings call transcript for a stock."""
 
     __tablename__ = "earnings_call"
+    __table_args__ = (
+        # Latest-call-per-ticker lookups (portfolio snapshots, insights, jobs)
+        Index("ix_earnings_call_user_ticker_created_at", "user_id", "ticker", "created_at"),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
     user_id: str = Field(index=True)
@@ -21,9 +25,16 @@ class EarningsCall(SQLModel, table=True):
     ticker: str = Field(index=True)
 
     call_date: datetime | None = Field(default=None, sa_type=sa.DateTime(timezone=True))
+    # Full text lives in the shared transcript table; extracted_text is only
+    # set on rows from before it existed and on fundamentals-only analyses
+    transcript_id: int | None = Field(default=None, foreign_key="transcript.id", index=True)
     extracted_text: str | None = Field(default=None, sa_column=Column(Text))
     summary: str | None = Field(default=None, sa_column=Column(Text))
     key_metrics: dict | None = Field(default=None, sa_column=Column(JSONB))
+    # Shared analysis this call's summary/metrics were copied from, if any
+    analysis_key: str | None = Field(
+        default=None, foreign_key="ai_analysis_cache.key", index=True
+    )
 
     # Analysis results
     sentiment_score: float | None = None
@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+
+
+class ForecastBacktest(SQLModel, table=True):
+    """Stored result of a walk-forward backtest of the price forecast model."""
+
+    __tablename__ = "forecast_backtest"
+    __table_args__ = (
+        sa.Index("ix_forecast_backtest_method_created_at", "method", "created_at"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    method: str  # forecast method that was replayed, e.g. "linear"
+    tickers: list | None = Field(default=None, sa_column=Column(JSONB))
+    params: dict | None = Field(default=None, sa_column=Column(JSONB))
+
+    # {"<horizon>": {"mae": ..., "mape": ..., "coverage": ..., "hit_rate": ..., "n": ...}}
+    metrics: dict | None = Field(default=None, sa_column=Column(JSONB))
+    num_origins: int = 0
+
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=sa.DateTime(timezone=True),
+    )
@@ -28,9 +28,12 @@ class Holding(SQLModel, table=True):
     sector: str | None = None
     beta: float | None = None
     dividend_yield: float | None = None
+    # "ready", or "pending"/"failed" while market data is fetched in the
+    # background (services/enrichment.py)
+    enrichment_status: str = Field(default="ready", sa_column_kwargs={"server_default": "ready"})
 
     # Upcoming earnings
-    next_earnings_date: str | None = None
+    next_earnings_date: date | None = None
 
     # Earnings tracking
     latest_earnings_call: datetime | None = Field(
@@ -0,0 +1,13 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlmodel import Field, SQLModel
+
+
+class JobWatermark(SQLModel, table=True):
+    """How far a recurring job has processed, so the next run resumes there."""
+
+    __tablename__ = "job_watermark"
+
+    name: str = Field(primary_key=True)  # e.g. "snapshot_retention.weekly"
+    processed_until: datetime = Field(sa_type=sa.DateTime(timezone=True))
@@ -0,0 +1,19 @@
+from datetime import date
+
+from sqlmodel import Field, SQLModel
+
+
+class PortfolioDailyValue(SQLModel, table=True):
+    """Materialized end-of-day value of a portfolio's dated holdings.
+
+    `flows` is the capital added that day (change in invested cost), so
+    time-weighted returns can be chained without the holdings themselves.
+    """
+
+    __tablename__ = "portfolio_daily_value"
+
+    portfolio_id: int = Field(foreign_key="portfolio.id", primary_key=True, ondelete="CASCADE")
+    value_date: date = Field(primary_key=True)
+    value: float
+    cost: float
+    flows: float = 0.0
@@ -0,0 +1,13 @@
+from datetime import date
+
+from sqlmodel import Field, SQLModel
+
+
+class PriceBar(SQLModel, table=True):
+    """Locally stored daily closing price for a ticker (adjusted, from yfinance)."""
+
+    __tablename__ = "price_bar"
+
+    ticker: str = Field(primary_key=True)
+    bar_date: date = Field(primary_key=True)
+    close: float
@@ -2,6 +2,7 @@ from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
 import sqlalchemy as sa
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 if TYPE_CHECKING:
@@ -12,9 +13,20 @@ class PortfolioSnapshot(SQLModel, table=True):
     """Point-in-time snapshot of portfolio analysis metrics."""
 
     __tablename__ = "portfolio_snapshot"
+    __table_args__ = (
+        # History range scans (get_snapshot_history). In Postgres the table is
+        # range-partitioned by created_at month with PK (id, created_at); see
+        # migration 010. The ORM only needs id as the identity.
+        Index(
+            "ix_portfolio_snapshot_user_portfolio_created_at",
+            "user_id",
+            "portfolio_id",
+            "created_at",
+        ),
+    )
 
     id: int | None = Field(default=None, primary_key=True)
-    user_id: str = Field(index=True)
+    user_id: str
     portfolio_id: int = Field(foreign_key="portfolio.id", index=True)
 
     created_at: datetime = Field(
@@ -0,0 +1,40 @@
+import zlib
+from datetime import datetime, timezone
+
+import sqlalchemy as sa
+from sqlmodel import Field, SQLModel
+
+
+class Transcript(SQLModel, table=True):
+    """Earnings call transcript, stored once and zlib-compressed.
+
+    Shared by every user's EarningsCall (EarningsCall.transcript_id). FMP
+    transcripts are keyed by (ticker, year, quarter); pasted transcripts
+    have no period and are deduplicated by (ticker, content hash).
+    """
+
+    __tablename__ = "transcript"
+    __table_args__ = (
+        sa.UniqueConstraint("ticker", "year", "quarter", name="uq_transcript_ticker_period"),
+        sa.UniqueConstraint("ticker", "content_hash", name="uq_transcript_ticker_content_hash"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    ticker: str = Field(index=True)
+    year: int | None = None
+    quarter: int | None = None
+    call_date: datetime | None = Field(default=None, sa_type=sa.DateTime(timezone=True))
+    source: str = "fmp"  # "fmp" or "user"
+
+    content_hash: str  # sha256 of the uncompressed text
+    content: bytes = Field(sa_type=sa.LargeBinary)
+    size: int = 0  # uncompressed characters
+
+    fetched_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=sa.DateTime(timezone=True),
+    )
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(self.content).decode("utf-8")
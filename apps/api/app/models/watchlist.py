@@ -16,6 +16,7 @@ class WatchlistItem(SQLModel, table=True):
     last_price: float | None = None
     previous_close: float | None = None
     sector: str | None = None
+    enrichment_status: str = Field(default="ready", sa_column_kwargs={"server_default": "ready"})
     added_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
         sa_type=sa.DateTime(timezone=True),
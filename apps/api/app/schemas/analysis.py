@@ -1,12 +1,15 @@
-from datetime import datetime
+from datetime import date, datetime
 
 from pydantic import BaseModel, ConfigDict, Field
 
+from app.schemas.stock import ForecastPrediction, StockForecast
+
 
 class PortfolioSnapshotRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
-    id: int
+    # None for live snapshots that have not been persisted
+    id: int | None = None
     portfolio_id: int
     created_at: datetime
     total_value: float | None = None
@@ -36,6 +39,15 @@ class SectorAllocation(BaseModel):
     value: float
 
 
+class PortfolioTotals(BaseModel):
+    """Value aggregates of a portfolio's holdings at their last price."""
+
+    total_value: float = 0.0
+    num_positions: int = 0
+    concentration_risk: float = 0.0  # largest single-holding weight
+    sectors: list[SectorAllocation] = []  # by value, descending
+
+
 class EarningsInsights(BaseModel):
     holdings_with_recent_earnings: list[str] = []
     positive_outlooks: list[str] = []
@@ -56,6 +68,7 @@ class JobStatus(BaseModel):
     created_at: datetime
     started_at: datetime | None = None
     completed_at: datetime | None = None
+    progress: dict | None = None  # {"done", "total"} while processing, if reported
 
 
 class CompareRequest(BaseModel):
@@ -72,3 +85,119 @@ class DashboardSummary(BaseModel):
     worst_performer: PerformerInfo | None = None
     upcoming_earnings_count: int = 0
     upcoming_earnings_tickers: list[str] = []
+
+
+class HorizonMetrics(BaseModel):
+    mae: float
+    mape: float | None = None  # percent
+    coverage: float  # share of actuals inside the forecast band
+    hit_rate: float  # share of origins where the predicted direction was right
+    n: int
+
+
+class ForecastQuality(BaseModel):
+    """Latest walk-forward backtest of the forecast model."""
+
+    id: int
+    method: str
+    tickers: list[str] = []
+    params: dict | None = None
+    num_origins: int = 0
+    created_at: datetime
+    overall: dict[str, HorizonMetrics] = {}  # keyed by horizon in trading days
+    by_ticker: dict[str, dict[str, HorizonMetrics]] = {}
+
+
+class VaRHorizon(BaseModel):
+    days: int
+    var: float  # loss in dollars not exceeded with `confidence` probability
+    cvar: float  # expected loss beyond the VaR
+    var_pct: float
+    cvar_pct: float
+
+
+class PortfolioVaR(BaseModel):
+    """Monte Carlo Value-at-Risk for a portfolio's current positions."""
+
+    portfolio_id: int
+    total_value: float
+    confidence: float
+    model: str
+    paths: int
+    horizons: list[VaRHorizon] = []
+    excluded_tickers: list[str] = []  # positions without enough price history
+
+
+class RiskContribution(BaseModel):
+    ticker: str
+    weight: float
+    marginal_pct: float  # annualized d(volatility)/d(weight)
+    contribution_pct: float  # share of portfolio volatility; sums to 100
+
+
+class PortfolioRisk(BaseModel):
+    """Covariance-based risk metrics for a portfolio's current positions."""
+
+    portfolio_id: int
+    as_of: date | None = None
+    tickers: list[str] = []  # row/column order of `correlation`
+    excluded_tickers: list[str] = []  # positions without price history
+    observations: int = 0  # aligned daily returns used
+    shrinkage: float | None = None  # Ledoit-Wolf intensity (0 = sample covariance)
+    volatility_pct: float | None = None  # annualized
+    beta: float | None = None  # realized, vs SPY
+    max_drawdown_pct: float | None = None  # over the past year, flows excluded
+    contributions: list[RiskContribution] = []
+    correlation: list[list[float]] = []
+
+
+class HoldingForecast(BaseModel):
+    ticker: str
+    shares: float
+    value: float  # current position value at the forecast's current price
+    weight: float  # share of the forecasted portfolio value
+    forecast: StockForecast | None = None
+    error: str | None = None
+
+
+class PortfolioForecast(BaseModel):
+    """Per-holding forecasts plus a value-weighted portfolio projection."""
+
+    portfolio_id: int
+    forecast_days: int
+    method: str
+    current_value: float = 0.0
+    predicted_value: float = 0.0
+    value_change: float = 0.0
+    pct_change: float = 0.0
+    trend_signal: str = "Neutral"
+    # Portfolio value path: sum of shares x per-holding forecast path/bands
+    aggregate: ForecastPrediction | None = None
+    holdings: list[HoldingForecast] = []
+
+
+class TrailingReturn(BaseModel):
+    period: str  # "1M", "3M", "6M", "1Y", "YTD"
+    portfolio_pct: float | None = None  # None if history starts after the period
+    benchmark_pct: float | None = None
+
+
+class RollingReturnPoint(BaseModel):
+    date: date
+    portfolio_pct: float
+    benchmark_pct: float | None = None
+
+
+class PortfolioReturns(BaseModel):
+    """Return metrics over the materialized daily value series."""
+
+    portfolio_id: int
+    start_date: date | None = None
+    end_date: date | None = None
+    twr_pct: float | None = None  # time-weighted, since inception
+    twr_annualized_pct: float | None = None  # only for spans of a year or more
+    mwr_pct: float | None = None  # money-weighted (XIRR), annualized
+    benchmark_pct: float | None = None  # SPY over the same range
+    trailing: list[TrailingReturn] = []
+    rolling_window: int
+    rolling: list[RollingReturnPoint] = []  # trailing `rolling_window`-day returns
@@ -30,7 +30,8 @@ class HoldingRead(BaseModel):
     sector: str | None = None
     beta: float | None = None
     dividend_yield: float | None = None
-    next_earnings_date: str | None = None
+    enrichment_status: str = "ready"  # "pending" until market data arrives
+    next_earnings_date: date | None = None
     latest_earnings_call: datetime | None = None
     earnings_call_summary: str | None = None
     created_at: datetime
@@ -39,3 +40,15 @@ class HoldingRead(BaseModel):
     @property
     def value(self) -> float:
         return (self.last_price or 0.0) * self.shares
+
+
+class HoldingImportError(BaseModel):
+    row: int  # 1-based, excluding the CSV header
+    error: str
+
+
+class HoldingImportResult(BaseModel):
+    imported: int
+    holding_ids: list[int] = []
+    errors: list[HoldingImportError] = []  # rows skipped
+    job_id: str | None = None  # price/fundamentals enrichment; poll /analysis/jobs/{id}
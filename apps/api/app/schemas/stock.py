@@ -96,13 +96,14 @@ class ForecastPrediction(BaseModel):
     prices: list[float]
     upper_bound: list[float]
     lower_bound: list[float]
+    percentiles: dict[str, list[float]] | None = None  # Monte Carlo fan: p5 … p95
 
 
 class ForecastModelInfo(BaseModel):
     method: str
     training_period: str
     slope_per_day: float
-    r_squared: float
+    r_squared: float | None = None  # not defined for Monte Carlo forecasts
 
 
 class RedditPost(BaseModel):
@@ -30,6 +30,8 @@ class UsageInfo(BaseModel):
     portfolio_analysis_limit: int | None
     portfolio_count: int
     portfolio_limit: int | None
+    ai_tokens_used_today: int = 0
+    ai_tokens_per_day: int | None = None
     can_create_portfolio: bool
     can_analyze_earnings: bool
     can_analyze_portfolio: bool
@@ -16,4 +16,5 @@ class WatchlistItemRead(BaseModel):
     last_price: float | None = None
     previous_close: float | None = None
     sector: str | None = None
+    enrichment_status: str = "ready"  # "pending" until market data arrives
     added_at: datetime
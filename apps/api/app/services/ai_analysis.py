@@ -4,19 +4,37 @@ Async AI analysis via DeepSeek / OpenAI.
 Migrated from: ai_explainer.py (original StockBuddy)
 Changes: sync requests → async httpx, errors raised as exceptions not strings,
          prompt templates preserved verbatim, retry logic added.
+
+Every analysis method takes an optional `stream` (core/job_stream.py
+JobTextWriter): the provider's token stream is then consumed and relayed
+to the job's SSE stream as it arrives, and the full text is still returned.
 """
 
+import json
+import time
+
 import structlog
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import AsyncRetrying, RetryError, stop_after_attempt, wait_exponential
 
 from app.config import settings
+from app.core.ai_scheduler import ai_scheduler, priority_for
+from app.core.job_stream import JobTextWriter
+from app.core.rate_governor import deepseek
+from app.services import ai_usage
 
 logger = structlog.stdlib.get_logger(__name__)
 
 SYSTEM_PROMPT = "You are a knowledgeable, unbiased investment analyst."
 
+# Bump when the explain_earnings_call prompt changes: it is part of the
+# shared analysis cache key (services/analysis_cache.py).
+EARNINGS_PROMPT_VERSION = "earnings-v1"
+EARNINGS_CHUNK_PROMPT_VERSION = "earnings-chunk-v1"
+# Longest transcript analyzed in a single call; longer ones are map-reduced
+EARNINGS_TRANSCRIPT_CHARS = 15000
+
 
 class AIAnalysisError(Exception):
     pass
@@ -24,10 +42,100 @@ class AIAnalysisError(Exception):
 
 # ─── Low-level API call ──────────────────────────────────────────────
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=30))
-async def _call_ai_api(prompt: str, max_tokens: int | None = None) -> str:
+def _stream_chunk(line: str) -> tuple[str | None, dict | None]:
+    """(text, usage) carried by one server-sent line of a streamed completion.
+
+    The last chunk, requested with stream_options.include_usage, has no
+    choices and carries the token usage instead.
+    """
+    if not line.startswith("data:"):
+        return None, None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None, None
+    try:
+        chunk = json.loads(data)
+        choices = chunk.get("choices") or []
+        text = choices[0]["delta"].get("content") if choices else None
+        return text, chunk.get("usage")
+    except (ValueError, KeyError, IndexError, AttributeError) as exc:
+        raise AIAnalysisError(f"Unexpected AI stream chunk: {exc}") from exc
+
+
+def _priority() -> int:
+    # Interactive before batch, Pro before free (core/ai_scheduler.py)
+    scope = ai_usage.current_scope()
+    return priority_for(scope.job_type, scope.plan) if scope else priority_for(None, None)
+
+
+def _add_usage(totals: dict[str, int], usage: dict | None) -> None:
+    for key in ("prompt_tokens", "completion_tokens"):
+        totals[key] = totals.get(key, 0) + ((usage or {}).get(key) or 0)
+
+
+async def _request_completion(
+    headers: dict, payload: dict, stream: JobTextWriter | None, usage: dict[str, int]
+) -> str:
+    """One attempt: the response text.
+
+    Provider token usage is added to `usage` as soon as it arrives, so a
+    stream that fails after its usage chunk is still billed. Waits for a
+    slot from the global AI scheduler, then the deepseek governor.
+    """
+    if stream is not None:
+        await stream.reset()
+        parts: list[str] = []
+        async with (
+            ai_scheduler.slot(_priority()) as slot,
+            deepseek,
+            httpx.AsyncClient(timeout=60.0) as client,
+        ):
+            async with client.stream(
+                "POST", settings.deepseek_url, headers=headers, json=payload
+            ) as resp:
+                if resp.status_code == 429:
+                    slot.throttled()
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    text, chunk_usage = _stream_chunk(line)
+                    if chunk_usage:
+                        _add_usage(usage, chunk_usage)
+                    if text:
+                        parts.append(text)
+                        await stream.write(text)
+        await stream.flush()
+        if not parts:
+            raise AIAnalysisError("AI stream ended without content")
+        return "".join(parts)
+
+    async with (
+        ai_scheduler.slot(_priority()) as slot,
+        deepseek,
+        httpx.AsyncClient(timeout=60.0) as client,
+    ):
+        resp = await client.post(settings.deepseek_url, headers=headers, json=payload)
+        if resp.status_code == 429:
+            slot.throttled()
+        resp.raise_for_status()
+        data = resp.json()
+
+    _add_usage(usage, data.get("usage"))
+    try:
+        return data["choices"][0]["message"]["content"]
+    except (KeyError, IndexError) as exc:
+        raise AIAnalysisError(f"Unexpected AI response structure: {exc}") from exc
+
+
+async def _call_ai_api(
+    prompt: str,
+    max_tokens: int | None = None,
+    stream: JobTextWriter | None = None,
+) -> str:
     """Post a prompt to the configured AI service and return the response text.
 
+    With `stream`, the completion is requested as a token stream and each
+    piece is written to it as it arrives (a retried attempt resets it first).
+    Tokens, latency and attempts are reported to services/ai_usage.py.
     Raises AIAnalysisError on failure.
     """
     if not settings.deepseek_api_key:
@@ -46,36 +154,58 @@ async def _call_ai_api(prompt: str, max_tokens: int | None = None) -> str:
             {"role": "system", "content": SYSTEM_PROMPT},
             {"role": "user", "content": prompt},
         ],
-        "stream": False,
+        "stream": stream is not None,
         "max_tokens": max_tokens,
         "temperature": settings.ai_temperature,
     }
+    if stream is not None:
+        payload["stream_options"] = {"include_usage": True}
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        resp = await client.post(settings.deepseek_url, headers=headers, json=payload)
-        resp.raise_for_status()
-        data = resp.json()
-
+    started = time.perf_counter()
+    attempts = 0
+    usage: dict[str, int] = {}  # summed over every attempt, failed ones included
+    error: str | None = None
     try:
-        return data["choices"][0]["message"]["content"]
-    except (KeyError, IndexError) as exc:
-        raise AIAnalysisError(f"Unexpected AI response structure: {exc}") from exc
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=30)
+        ):
+            with attempt:
+                attempts += 1
+                text = await _request_completion(headers, payload, stream, usage)
+        return text
+    except Exception as exc:
+        if isinstance(exc, RetryError):
+            exc = exc.last_attempt.exception() or exc
+        error = f"{type(exc).__name__}: {exc}"[:200]
+        raise
+    finally:
+        ai_usage.record_call(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+            latency_ms=round((time.perf_counter() - started) * 1000),
+            attempts=attempts,
+            error=error,
+        )
+        # Counted against the daily budget while the job is still running
+        await ai_usage.flush_usage()
 
 
 # ─── High-level analysis methods ─────────────────────────────────────
 
-async def explain_earnings_call(
-    ticker: str,
-    call_text: str,
-    fundamentals: dict | None = None,
-) -> str:
-    """Generate comprehensive earnings call analysis.
+# The seven sections sentiment_parser.parse_analysis reads
+EARNINGS_SECTIONS = """1. EXECUTIVE SUMMARY (3-4 bullet points)
+    2. FINANCIAL PERFORMANCE (Revenue, EPS, Margins mentioned)
+    3. BUSINESS HIGHLIGHTS (Key developments, new products, expansions)
+    4. MANAGEMENT GUIDANCE (Future outlook, forecasts)
+    5. RISK FACTORS (Challenges, competition, market risks mentioned)
+    6. INVESTMENT IMPLICATIONS (What this means for investors)
+    7. SENTIMENT ANALYSIS (Overall tone: Positive/Neutral/Negative)"""
 
-    Prompt preserved from EnhancedAIExplainer.explain_earnings_call.
-    """
-    fundamentals_str = ""
-    if fundamentals:
-        fundamentals_str = f"""
+
+def _fundamentals_context(fundamentals: dict | None) -> str:
+    if not fundamentals:
+        return ""
+    return f"""
         Company Fundamentals:
         - Sector: {fundamentals.get('sector', 'N/A')}
         - Market Cap: {fundamentals.get('market_cap', 'N/A')}
@@ -84,34 +214,100 @@ async def explain_earnings_call(
         - Dividend Yield: {fundamentals.get('dividend_yield', 'N/A')}
         """
 
+
+async def explain_earnings_call(
+    ticker: str,
+    call_text: str,
+    fundamentals: dict | None = None,
+    stream: JobTextWriter | None = None,
+) -> str:
+    """Generate comprehensive earnings call analysis.
+
+    Prompt preserved from EnhancedAIExplainer.explain_earnings_call.
+    """
     prompt = f"""
     You are an investment analyst. Analyze this earnings call transcript for {ticker}.
 
-    {fundamentals_str}
+    {_fundamentals_context(fundamentals)}
 
     Please provide a comprehensive analysis covering:
 
-    1. EXECUTIVE SUMMARY (3-4 bullet points)
-    2. FINANCIAL PERFORMANCE (Revenue, EPS, Margins mentioned)
-    3. BUSINESS HIGHLIGHTS (Key developments, new products, expansions)
-    4. MANAGEMENT GUIDANCE (Future outlook, forecasts)
-    5. RISK FACTORS (Challenges, competition, market risks mentioned)
-    6. INVESTMENT IMPLICATIONS (What this means for investors)
-    7. SENTIMENT ANALYSIS (Overall tone: Positive/Neutral/Negative)
+    {EARNINGS_SECTIONS}
 
     Focus on actionable insights. Be concise but thorough.
 
     EARNINGS CALL TRANSCRIPT:
-    {call_text[:15000]}
+    {call_text[:EARNINGS_TRANSCRIPT_CHARS]}
+
+    Format your response with clear sections and bullet points.
+    """
+    return await _call_ai_api(prompt, stream=stream)
+
+
+async def summarize_transcript_chunk(
+    ticker: str,
+    chunk: str,
+    part: int,
+    parts: int,
+) -> str:
+    """Condense one part of a long transcript into analyst notes (map step)."""
+    prompt = f"""
+    You are an investment analyst taking notes on part {part} of {parts} of the
+    {ticker} earnings call transcript.
+
+    Record, as terse bullet points, everything in this part that bears on:
+    - Financial results (revenue, EPS, margins, segment numbers, with figures)
+    - Business developments (products, customers, expansions, capital returns)
+    - Guidance and outlook (quote ranges and any changes)
+    - Risks, headwinds and analysts' concerns raised in questions
+    - Management tone (confident, cautious, evasive) with brief evidence
+
+    Keep every number. Do not add facts that are not in the text. If this part
+    is only pleasantries or operator instructions, reply "No material content."
+
+    TRANSCRIPT PART {part}/{parts}:
+    {chunk}
+    """
+    return await _call_ai_api(prompt, max_tokens=settings.ai_chunk_max_tokens)
+
+
+async def explain_earnings_notes(
+    ticker: str,
+    notes: list[str],
+    fundamentals: dict | None = None,
+    stream: JobTextWriter | None = None,
+) -> str:
+    """Full earnings analysis from per-part notes of a long transcript (reduce step).
+
+    Produces the same seven sections as explain_earnings_call.
+    """
+    joined = "\n\n".join(
+        f"NOTES ON PART {i} OF {len(notes)}:\n{n}" for i, n in enumerate(notes, 1)
+    )
+    prompt = f"""
+    You are an investment analyst. Below are notes taken, in order, on every part of
+    the earnings call transcript for {ticker}, including prepared remarks and Q&A.
+
+    {_fundamentals_context(fundamentals)}
+
+    Please provide a comprehensive analysis covering:
+
+    {EARNINGS_SECTIONS}
+
+    Focus on actionable insights. Be concise but thorough. Weigh the Q&A as
+    heavily as the prepared remarks.
+
+    {joined}
 
     Format your response with clear sections and bullet points.
     """
-    return await _call_ai_api(prompt)
+    return await _call_ai_api(prompt, stream=stream)
 
 
 async def analyze_portfolio_with_earnings(
     portfolio_data: dict,
     earnings_analyses: list[dict],
+    stream: JobTextWriter | None = None,
 ) -> str:
     """Generate portfolio-level analysis incorporating earnings insights.
 
@@ -151,12 +347,13 @@ async def analyze_portfolio_with_earnings(
 
     Be educational, not advisory. Suggest what an investor might discuss with a financial professional.
     """
-    return await _call_ai_api(prompt)
+    return await _call_ai_api(prompt, stream=stream)
 
 
 async def analyze_stock_overview(
     ticker: str,
     context: str,
+    stream: JobTextWriter | None = None,
 ) -> str:
     """Generate stock analysis from fundamentals and news data.
 
@@ -182,12 +379,13 @@ async def analyze_stock_overview(
     Focus on actionable insights based on the actual data provided.
     Format your response with clear sections and bullet points.
     """
-    return await _call_ai_api(prompt)
+    return await _call_ai_api(prompt, stream=stream)
 
 
 async def compare_multiple_earnings(
     tickers: list[str],
     analyses: list[dict],
+    stream: JobTextWriter | None = None,
 ) -> str:
     """Compare earnings calls across multiple companies.
 
@@ -225,4 +423,4 @@ async def compare_multiple_earnings(
     Base your analysis strictly on the earnings data provided above.
     Highlight specific differences and similarities in management tone and outlook.
     """
-    return await _call_ai_api(prompt)
+    return await _call_ai_api(prompt, stream=stream)
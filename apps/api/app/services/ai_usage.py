@@ -0,0 +1,165 @@
+"""
+AI call accounting and daily token budgets.
+
+ai_analysis._call_ai_api reports every model call here (prompt and
+completion tokens from the provider's usage block, latency, tenacity
+attempts and any error) and analysis_cache reports shared-cache hits.
+Records are attributed to the job in the current usage scope, a contextvar
+the worker sets for the duration of a job, so nothing is threaded through
+the analysis functions; tasks started with asyncio.gather inherit it.
+Worker scopes carry a session factory and each model call's record is
+written at once in its own short session (flush_usage), so a job's spend
+counts against the budget while it is still running. Anything not yet
+written (cache hits, a failed flush, scopes without a factory) is added to
+the worker's own session by save_usage when the job finishes, failed jobs
+included. Calls outside a scope are only logged.
+
+Routers call subscription.check_ai_budget before creating a job: the
+user's tokens since midnight UTC against their plan's ai_tokens_per_day.
+"""
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import AIUsage
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+@dataclass
+class UsageScope:
+    user_id: str | None
+    job_type: str
+    job_id: str | None = None
+    # Set by the worker once the subscription is loaded; orders the AI queue
+    plan: str | None = None
+    session_factory: Callable[[], AsyncSession] | None = None
+    records: list[AIUsage] = field(default_factory=list)
+    # Records not written yet (a subset of records)
+    pending: list[AIUsage] = field(default_factory=list)
+
+
+_scope: ContextVar[UsageScope | None] = ContextVar("ai_usage_scope", default=None)
+
+
+@contextmanager
+def usage_scope(
+    user_id: str | None,
+    job_type: str,
+    job_id: str | None = None,
+    session_factory: Callable[[], AsyncSession] | None = None,
+) -> Iterator[UsageScope]:
+    """Attribute AI calls made inside the block to one job.
+
+    Usage:
+        with ai_usage.usage_scope(user_id, "comparison", job_id, async_session_factory):
+            ...
+            await ai_usage.save_usage(db)
+            await db.commit()
+    """
+    scope = UsageScope(user_id, job_type, job_id, session_factory=session_factory)
+    token = _scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _scope.reset(token)
+
+
+def current_scope() -> UsageScope | None:
+    return _scope.get()
+
+
+def record_call(
+    *,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    latency_ms: int = 0,
+    attempts: int = 1,
+    error: str | None = None,
+    cache_hit: bool = False,
+) -> None:
+    scope = _scope.get()
+    logger.info(
+        "AI usage",
+        job_type=scope.job_type if scope else "unscoped",
+        job_id=scope.job_id if scope else None,
+        cache_hit=cache_hit,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        latency_ms=latency_ms,
+        attempts=attempts,
+        error=error,
+    )
+    if scope is None:
+        return
+    record = AIUsage(
+        user_id=scope.user_id,
+        job_type=scope.job_type,
+        job_id=scope.job_id,
+        cache_hit=cache_hit,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        latency_ms=latency_ms,
+        attempts=attempts,
+        error=error,
+    )
+    scope.records.append(record)
+    scope.pending.append(record)
+
+
+def record_cache_hit() -> None:
+    """A shared-cache hit that saved a model call."""
+    record_call(cache_hit=True)
+
+
+async def flush_usage() -> int:
+    """Write the current scope's pending records in a short session of their own.
+
+    A no-op without a session factory. A failed write leaves the records
+    pending for save_usage. Returns the number of records written.
+    """
+    scope = _scope.get()
+    if scope is None or scope.session_factory is None or not scope.pending:
+        return 0
+    # Taken up front so concurrent calls in the same job never write a record twice
+    batch, scope.pending = scope.pending, []
+    try:
+        async with scope.session_factory() as db:
+            db.add_all(batch)
+            await db.commit()
+    except Exception as exc:
+        logger.warning("Could not write AI usage yet: %s", exc)
+        scope.pending[:0] = batch
+        return 0
+    return len(batch)
+
+
+async def save_usage(db: AsyncSession) -> int:
+    """Add the current scope's pending records to `db`; the caller commits.
+
+    Safe to call again after a rollback: the records stay pending in the
+    scope and adding an instance the session already holds is a no-op.
+    """
+    scope = _scope.get()
+    if scope is None:
+        return 0
+    db.add_all(scope.pending)
+    return len(scope.pending)
+
+
+async def tokens_used_today(db: AsyncSession, user_id: str) -> int:
+    """Prompt plus completion tokens billed to `user_id` since midnight UTC."""
+    midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    result = await db.execute(
+        select(
+            func.coalesce(func.sum(AIUsage.prompt_tokens + AIUsage.completion_tokens), 0)
+        ).where(AIUsage.user_id == user_id, AIUsage.created_at >= midnight)
+    )
+    return int(result.scalar() or 0)
@@ -0,0 +1,257 @@
+"""
+Cross-user AI analysis cache.
+
+EarningsCall rows are per user, but the analysis of a given transcript is
+not: every user analyzing AAPL's latest call would otherwise send the same
+prompt to the model. Results are stored once in ai_analysis_cache, keyed
+by a sha256 of the prompt version, ticker, the transcript text and a
+coarse bucket of the fundamentals quoted in the prompt (so a small move in
+beta or P/E does not defeat the cache). Per-user EarningsCall rows copy
+the summary and parsed metrics and keep analysis_key as a reference to
+the shared entry.
+
+Transcripts longer than ai_analysis.EARNINGS_TRANSCRIPT_CHARS are
+map-reduced: split on speaker/section boundaries, each chunk condensed to
+notes concurrently, and the notes combined into the usual seven-section
+analysis. Chunk notes are cached in the same table (kind "earnings_chunk")
+by chunk hash, so re-analysis with other fundamentals, or of an
+overlapping transcript, only pays for the reduce step.
+
+Lookups and inserts each use a short session from the caller's session
+factory, so no connection is held while the model is generating.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.job_stream import JobTextWriter
+from app.models import AIAnalysisCache
+from app.services import ai_analysis, ai_usage, sentiment_parser, transcript
+
+logger = structlog.stdlib.get_logger(__name__)
+
+EARNINGS_CALL = "earnings_call"
+EARNINGS_CHUNK = "earnings_chunk"
+
+
+def _number(value) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def fundamentals_bucket(fundamentals: dict | None) -> dict | None:
+    """The prompt's fundamentals rounded to a coarse grid.
+
+    Market cap to one significant figure, P/E to a whole number, beta to
+    0.1 and dividend yield to 0.1 percentage point.
+    """
+    if not fundamentals:
+        return None
+    market_cap = _number(fundamentals.get("market_cap"))
+    pe = _number(fundamentals.get("pe_ratio"))
+    beta = _number(fundamentals.get("beta"))
+    dividend_yield = _number(fundamentals.get("dividend_yield"))
+    return {
+        "sector": fundamentals.get("sector") or None,
+        "market_cap": float(f"{market_cap:.0e}") if market_cap else None,
+        "pe_ratio": round(pe) if pe is not None else None,
+        "beta": round(beta, 1) if beta is not None else None,
+        "dividend_yield": round(dividend_yield, 3) if dividend_yield is not None else None,
+    }
+
+
+def earnings_cache_key(ticker: str, call_text: str, fundamentals: dict | None) -> str:
+    """Content hash identifying an earnings analysis of `call_text`."""
+    payload = json.dumps(
+        {
+            "kind": EARNINGS_CALL,
+            "version": ai_analysis.EARNINGS_PROMPT_VERSION,
+            "ticker": ticker.upper(),
+            "transcript": hashlib.sha256(call_text.encode()).hexdigest(),
+            "fundamentals": fundamentals_bucket(fundamentals),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def chunk_cache_key(ticker: str, chunk: str) -> str:
+    """Content hash identifying the map-step notes for one transcript chunk."""
+    payload = json.dumps(
+        {
+            "kind": EARNINGS_CHUNK,
+            "version": ai_analysis.EARNINGS_CHUNK_PROMPT_VERSION,
+            "ticker": ticker.upper(),
+            "chunk": hashlib.sha256(chunk.encode()).hexdigest(),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def _insert_if_absent(db: AsyncSession, values: dict | list[dict]) -> None:
+    # Two workers may analyze the same call at once; the first insert wins
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    await db.execute(
+        dialect.insert(AIAnalysisCache).values(values).on_conflict_do_nothing(
+            index_elements=["key"]
+        )
+    )
+
+
+async def _chunk_notes(
+    session_factory: Callable[[], AsyncSession], ticker: str, call_text: str
+) -> list[str]:
+    """Map step: notes for every chunk of a long transcript, cached per chunk.
+
+    Missing chunks are summarized concurrently (bounded by the deepseek
+    rate governor). Notes that arrived are stored even if another chunk
+    fails or the caller is cancelled, so a retry only pays for the rest.
+    Raises the first chunk error once every chunk has finished.
+    """
+    chunks = transcript.split_transcript(call_text, settings.transcript_chunk_chars)
+    keys = [chunk_cache_key(ticker, c) for c in chunks]
+    async with session_factory() as db:
+        result = await db.execute(
+            select(AIAnalysisCache.key, AIAnalysisCache.summary).where(
+                AIAnalysisCache.key.in_(set(keys))
+            )
+        )
+        notes: dict[str, str] = dict(result.all())
+    for _ in notes:
+        ai_usage.record_cache_hit()
+
+    missing = {k: c for k, c in zip(keys, chunks) if k not in notes}
+
+    async def summarize(key: str, chunk: str) -> None:
+        notes[key] = await ai_analysis.summarize_transcript_chunk(
+            ticker, chunk, keys.index(key) + 1, len(chunks)
+        )
+
+    try:
+        results = await asyncio.gather(
+            *(summarize(k, c) for k, c in missing.items()), return_exceptions=True
+        )
+    finally:
+        # Runs on cancellation too (the per-ticker timeout)
+        fresh = [k for k in missing if k in notes]
+        if fresh:
+            now = datetime.now(timezone.utc)
+            async with session_factory() as db:
+                await _insert_if_absent(
+                    db,
+                    [
+                        {
+                            "key": key,
+                            "kind": EARNINGS_CHUNK,
+                            "prompt_version": ai_analysis.EARNINGS_CHUNK_PROMPT_VERSION,
+                            "ticker": ticker,
+                            "summary": notes[key],
+                            "parsed": None,
+                            "hit_count": 0,
+                            "created_at": now,
+                        }
+                        for key in fresh
+                    ],
+                )
+                await db.commit()
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        logger.warning(
+            "%d of %d transcript chunks failed for %s", len(errors), len(chunks), ticker
+        )
+        raise errors[0]
+    logger.info(
+        "Summarized %d of %d transcript chunks for %s", len(missing), len(chunks), ticker
+    )
+    return [notes[k] for k in keys]
+
+
+async def get_earnings_analysis(
+    session_factory: Callable[[], AsyncSession],
+    ticker: str,
+    call_text: str,
+    fundamentals: dict | None = None,
+    stream: JobTextWriter | None = None,
+) -> AIAnalysisCache:
+    """Shared analysis of an earnings call, calling the model only on a miss.
+
+    `stream` receives the model output live, or the cached text at once on a
+    hit. Raises AIAnalysisError (from the model call) on a miss that fails.
+    """
+    ticker = ticker.upper()
+    key = earnings_cache_key(ticker, call_text, fundamentals)
+    async with session_factory() as db:
+        entry = await db.get(AIAnalysisCache, key)
+        if entry is not None:
+            await db.execute(
+                update(AIAnalysisCache)
+                .where(AIAnalysisCache.key == key)
+                .values(
+                    hit_count=AIAnalysisCache.hit_count + 1,
+                    last_hit_at=datetime.now(timezone.utc),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+    if entry is not None:
+        logger.info("Shared analysis cache hit for %s", ticker)
+        ai_usage.record_cache_hit()
+        if stream is not None:
+            await stream.write(entry.summary)
+            await stream.flush()
+        return entry
+
+    if len(call_text) <= ai_analysis.EARNINGS_TRANSCRIPT_CHARS:
+        summary = await ai_analysis.explain_earnings_call(
+            ticker=ticker, call_text=call_text, fundamentals=fundamentals, stream=stream
+        )
+    else:
+        notes = await _chunk_notes(session_factory, ticker, call_text)
+        summary = await ai_analysis.explain_earnings_notes(
+            ticker, notes, fundamentals=fundamentals, stream=stream
+        )
+    async with session_factory() as db:
+        await _insert_if_absent(
+            db,
+            {
+                "key": key,
+                "kind": EARNINGS_CALL,
+                "prompt_version": ai_analysis.EARNINGS_PROMPT_VERSION,
+                "ticker": ticker,
+                "summary": summary,
+                "parsed": sentiment_parser.parse_analysis(summary),
+                "hit_count": 0,
+                "created_at": datetime.now(timezone.utc),
+            },
+        )
+        await db.commit()
+        result = await db.execute(select(AIAnalysisCache).where(AIAnalysisCache.key == key))
+        return result.scalars().one()
+
+
+def earnings_call_fields(entry: AIAnalysisCache) -> dict:
+    """EarningsCall column values copied from a shared analysis."""
+    parsed = entry.parsed or {}
+    return {
+        "analysis_key": entry.key,
+        "summary": entry.summary,
+        "sentiment_score": parsed.get("sentiment_score"),
+        "guidance_outlook": parsed.get("guidance_outlook"),
+        "risk_mentions": parsed.get("risk_mentions"),
+        "growth_mentions": parsed.get("growth_mentions"),
+        "key_metrics": parsed.get("key_metrics"),
+    }
@@ -0,0 +1,169 @@
+"""
+Walk-forward backtesting of the price forecast model.
+
+Replays `forecast._linear_forecast` over rolling historical origins using
+bars from the local price store and scores every horizon with MAE, MAPE,
+interval coverage (actual close inside the forecast band) and direction hit
+rate. Tickers are scored in parallel on the shared process pool.
+
+Runs from the CLI (`python backtest.py AAPL MSFT ...`) or as the
+`run_forecast_backtest` arq job; the latest stored result backs
+GET /analysis/forecast-quality.
+"""
+
+import asyncio
+from datetime import date
+
+import numpy as np
+import structlog
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import executors
+from app.models import ForecastBacktest
+from app.services import forecast, price_store
+
+logger = structlog.stdlib.get_logger(__name__)
+
+METHOD = "linear"
+DEFAULT_HORIZONS = (5, 10, 20, 30)
+DEFAULT_STEP = 5
+
+# get_forecast trains on period="1y" and refuses fewer than 60 bars.
+TRAINING_WINDOW = 252
+MIN_HISTORY = 60
+
+_SUM_KEYS = ("abs_err", "ape", "ape_n", "covered", "hits", "n")
+
+
+def _backtest_ticker(close: np.ndarray, horizons: tuple[int, ...], step: int) -> dict:
+    """Replay the forecast over every `step`-th origin of one close series.
+
+    Horizons are counted in trading bars, matching the model's x-axis.
+    Returns raw per-horizon sums so results can be merged across tickers.
+    """
+    h = np.asarray(horizons, dtype=int)
+    max_h = int(h.max())
+    sums = {int(k): dict.fromkeys(_SUM_KEYS, 0.0) for k in h}
+    origins = 0
+
+    for t in range(MIN_HISTORY, len(close) - max_h + 1, step):
+        window = close[max(0, t - TRAINING_WINDOW) : t]
+        fit = forecast._linear_forecast(window, max_h)
+        current = window[-1]
+
+        pred = fit["prices"][h - 1]
+        upper = fit["upper"][h - 1]
+        lower = np.maximum(fit["lower"][h - 1], 0)
+        actual = close[t + h - 1]
+
+        abs_err = np.abs(pred - actual)
+        covered = (actual >= lower) & (actual <= upper)
+        hits = np.sign(pred - current) == np.sign(actual - current)
+
+        for i, k in enumerate(h):
+            s = sums[int(k)]
+            s["abs_err"] += float(abs_err[i])
+            if actual[i] > 0:
+                s["ape"] += float(abs_err[i] / actual[i])
+                s["ape_n"] += 1
+            s["covered"] += bool(covered[i])
+            s["hits"] += bool(hits[i])
+            s["n"] += 1
+        origins += 1
+
+    return {"origins": origins, "sums": sums}
+
+
+def _summarize(sums: dict[int, dict]) -> dict[str, dict]:
+    """Turn per-horizon sums into metrics keyed by horizon (as str for JSONB)."""
+    metrics: dict[str, dict] = {}
+    for horizon, s in sorted(sums.items()):
+        n = s["n"]
+        if n == 0:
+            continue
+        metrics[str(horizon)] = {
+            "mae": round(s["abs_err"] / n, 4),
+            "mape": round(s["ape"] / s["ape_n"] * 100, 2) if s["ape_n"] else None,
+            "coverage": round(s["covered"] / n, 4),
+            "hit_rate": round(s["hits"] / n, 4),
+            "n": int(n),
+        }
+    return metrics
+
+
+async def run_backtest(
+    db: AsyncSession,
+    tickers: list[str],
+    horizons: tuple[int, ...] = DEFAULT_HORIZONS,
+    step: int = DEFAULT_STEP,
+    start: date | None = None,
+) -> ForecastBacktest:
+    """Backtest the forecast model across tickers and store the result.
+
+    Reads bars only from the local store; sync them first with
+    price_store.sync_closes (the CLI's --sync flag does this).
+    """
+    horizons = tuple(sorted({int(h) for h in horizons}))
+    closes = await price_store.load_closes(db, tickers, start=start)
+
+    usable = {
+        ticker: series.to_numpy(dtype=float)
+        for ticker, series in closes.items()
+        if len(series) >= MIN_HISTORY + max(horizons)
+    }
+    skipped = sorted({t.upper() for t in tickers} - set(usable))
+    if skipped:
+        logger.warning("Not enough stored bars to backtest", tickers=skipped)
+
+    results = await asyncio.gather(
+        *(
+            executors.run_in_process(_backtest_ticker, close, horizons, step)
+            for close in usable.values()
+        )
+    )
+
+    overall = {h: dict.fromkeys(_SUM_KEYS, 0.0) for h in horizons}
+    by_ticker: dict[str, dict] = {}
+    num_origins = 0
+    for ticker, result in zip(usable, results):
+        num_origins += result["origins"]
+        by_ticker[ticker] = _summarize(result["sums"])
+        for h, s in result["sums"].items():
+            for key in _SUM_KEYS:
+                overall[h][key] += s[key]
+
+    backtest = ForecastBacktest(
+        method=METHOD,
+        tickers=sorted(usable),
+        params={
+            "horizons": list(horizons),
+            "step": step,
+            "training_window": TRAINING_WINDOW,
+            "start": start.isoformat() if start else None,
+            "skipped": skipped,
+        },
+        metrics={"overall": _summarize(overall), "by_ticker": by_ticker},
+        num_origins=num_origins,
+    )
+    db.add(backtest)
+    await db.flush()
+    await db.refresh(backtest)
+
+    logger.info(
+        "Forecast backtest completed",
+        tickers=len(usable),
+        origins=num_origins,
+        backtest_id=backtest.id,
+    )
+    return backtest
+
+
+async def get_latest_backtest(db: AsyncSession, method: str = METHOD) -> ForecastBacktest | None:
+    result = await db.execute(
+        select(ForecastBacktest)
+        .where(ForecastBacktest.method == method)
+        .order_by(ForecastBacktest.created_at.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
@@ -0,0 +1,161 @@
+"""
+Deferred market-data enrichment for new holdings and watchlist items.
+
+Adding a ticker no longer waits on Alpha Vantage: rows are inserted with
+whatever the shared quote/fundamentals cache holds and, when that is cold,
+marked enrichment_status="pending". The router commits and calls
+enricher.schedule(ticker), which fetches the quote and fundamentals once
+and fills every pending holding and watchlist row for that ticker, whoever
+added it.
+
+Scheduling is coalesced per ticker: while an enrichment is in flight,
+further requests for the same ticker only mark it dirty, and the running
+task re-applies its (already fetched) data before finishing so rows
+committed mid-fetch are not left pending. The in-process task dies with
+the API, so the `retry_stale_enrichment` worker cron picks up rows left
+pending for settings.enrichment_stale_minutes.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_factory
+from app.models import Holding, WatchlistItem
+from app.services import market_data
+from app.services.portfolio import _parse_date, invalidate_holding_caches
+
+logger = structlog.stdlib.get_logger(__name__)
+
+
+async def fetch_market_data(ticker: str) -> tuple[dict | None, dict | None]:
+    """(quote, fundamentals) for `ticker`; a failed call yields None."""
+    quote: dict | None = None
+    fundamentals: dict | None = None
+    try:
+        quote = await market_data.get_quote(ticker)
+    except Exception as exc:
+        logger.warning("Quote fetch failed for %s: %s", ticker, exc)
+    try:
+        fundamentals = await market_data.get_stock_fundamentals(ticker)
+    except Exception as exc:
+        logger.warning("Fundamentals fetch failed for %s: %s", ticker, exc)
+    return quote, fundamentals
+
+
+async def apply_market_data(
+    db: AsyncSession, ticker: str, quote: dict | None, fundamentals: dict | None
+) -> int:
+    """Fill every pending row for `ticker`; returns the number of rows updated.
+
+    Rows become "ready" when a price arrived and "failed" otherwise, with
+    the same sector/beta fallbacks the synchronous add used to apply.
+    """
+    price = quote.get("price") if quote else None
+    status = "ready" if price is not None else "failed"
+    fundamentals = fundamentals or {}
+    now = datetime.now(timezone.utc)
+
+    result = await db.execute(
+        update(Holding)
+        .where(Holding.ticker == ticker, Holding.enrichment_status == "pending")
+        .values(
+            last_price=price,
+            previous_close=quote.get("previous_close") if quote else None,
+            sector=fundamentals.get("sector") or "Unknown",
+            beta=fundamentals.get("beta") or 1.0,
+            dividend_yield=fundamentals.get("dividend_yield"),
+            next_earnings_date=_parse_date(fundamentals.get("next_earnings_date")),
+            enrichment_status=status,
+            updated_at=now,
+        )
+        .returning(Holding.user_id, Holding.portfolio_id)
+        .execution_options(synchronize_session=False)
+    )
+    touched = set(result.all())
+    items = await db.execute(
+        update(WatchlistItem)
+        .where(WatchlistItem.ticker == ticker, WatchlistItem.enrichment_status == "pending")
+        .values(
+            last_price=price,
+            previous_close=quote.get("previous_close") if quote else None,
+            sector=fundamentals.get("sector") or None,
+            name=fundamentals.get("name") or None,
+            enrichment_status=status,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    for user_id, portfolio_id in touched:
+        invalidate_holding_caches(db, user_id, portfolio_id)
+    return len(touched) + items.rowcount
+
+
+async def stale_pending_tickers(db: AsyncSession, before: datetime) -> list[str]:
+    """Tickers with a holding or watchlist row still pending since `before`."""
+    result = await db.execute(
+        union(
+            select(Holding.ticker).where(
+                Holding.enrichment_status == "pending", Holding.updated_at < before
+            ),
+            select(WatchlistItem.ticker).where(
+                WatchlistItem.enrichment_status == "pending", WatchlistItem.added_at < before
+            ),
+        )
+    )
+    return sorted(result.scalars().all())
+
+
+class TickerEnricher:
+    """Per-process, per-ticker coalescing of background enrichment.
+
+    Usage (after committing the pending row):
+        enricher.schedule("AAPL")
+    """
+
+    def __init__(self, session_factory=async_session_factory):
+        self._session_factory = session_factory
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._dirty: set[str] = set()
+
+    def schedule(self, ticker: str) -> asyncio.Task:
+        """Start enriching `ticker`, or join the enrichment already running."""
+        ticker = ticker.upper()
+        task = self._inflight.get(ticker)
+        if task is not None and not task.done():
+            self._dirty.add(ticker)
+            return task
+        task = asyncio.create_task(self._run(ticker))
+        self._inflight[ticker] = task
+        task.add_done_callback(lambda t: self._forget(ticker, t))
+        return task
+
+    def _forget(self, ticker: str, task: asyncio.Task) -> None:
+        # A newer task may already own the slot
+        if self._inflight.get(ticker) is task:
+            del self._inflight[ticker]
+
+    async def _run(self, ticker: str) -> int:
+        try:
+            quote, fundamentals = await fetch_market_data(ticker)
+            updated = 0
+            while True:
+                self._dirty.discard(ticker)
+                async with self._session_factory() as db:
+                    updated += await apply_market_data(db, ticker, quote, fundamentals)
+                    await db.commit()
+                if ticker not in self._dirty:
+                    return updated
+        except Exception as exc:
+            logger.exception("Enrichment failed for %s: %s", ticker, exc)
+            return 0
+
+    async def wait_idle(self) -> None:
+        """Wait for every in-flight enrichment (shutdown, tests)."""
+        while self._inflight:
+            await asyncio.gather(*list(self._inflight.values()), return_exceptions=True)
+
+
+enricher = TickerEnricher()
@@ -1,27 +1,61 @@
 """
 Stock price forecasting using linear regression + moving averages.
 
-Uses historical price data from yfinance to build a simple predictive
-model that forecasts future stock prices.
+Uses a year of adjusted daily closes from yfinance to build a simple
+predictive model that forecasts future stock prices. A Monte Carlo mode
+(method="montecarlo") replaces the regression bands with simulated
+percentile fans (see services/montecarlo.py).
+
+Results are cached in the shared cache keyed by ticker and parameters, so
+the single-ticker endpoint and portfolio batch forecasts reuse each other's
+fits. Both load history the same way (stock_data.get_multi_ticker_history
+over HISTORY_DAYS), so a cached fit does not depend on which one ran first.
 """
 
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from app.config import settings
+from app.core import executors
+from app.core.cache import cache
+from app.services import montecarlo, stock_data
 
 logger = logging.getLogger(__name__)
 
 
+# Training window matching yfinance period="1y"
+HISTORY_DAYS = 365
+MIN_BARS = 60
+
+
 class ForecastError(Exception):
     pass
 
 
-def _build_forecast_sync(ticker: str, forecast_days: int = 30) -> dict:
-    """Build a price forecast — blocking call, run via asyncio.to_thread.
+def trend_signal_for(pct_change: float) -> str:
+    """Label a forecast move: beyond +/-5% is Bullish/Bearish."""
+    if pct_change > 5:
+        return "Bullish"
+    if pct_change < -5:
+        return "Bearish"
+    return "Neutral"
+
+
+def _cache_key(ticker: str, forecast_days: int, method: str, n_paths: int, model: str) -> str:
+    if method == "montecarlo":
+        return f"forecast:{ticker.upper()}:{forecast_days}:montecarlo:{model}:{n_paths}"
+    return f"forecast:{ticker.upper()}:{forecast_days}:linear"
+
+
+def _linear_forecast(close: np.ndarray, forecast_days: int) -> dict:
+    """Fit the forecast model to a close series and project it forward.
+
+    Pure NumPy so it can be replayed cheaply over many historical origins
+    (see services/backtest.py). `close` must hold at least 60 bars.
 
     Uses:
     1. Linear regression on closing prices for trend
@@ -29,141 +63,283 @@ def _build_forecast_sync(ticker: str, forecast_days: int = 30) -> dict:
     3. Bollinger Bands for confidence intervals
     4. RSI for momentum signal
 
-    Returns dict with forecast data.
+    Returns unrounded arrays `prices`, `upper`, `lower` (one per future bar)
+    plus the fitted indicators.
     """
-    try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period="1y")
-
-        if df is None or df.empty or len(df) < 60:
-            return {"error": f"Insufficient data for {ticker} (need at least 60 days)"}
-
-        close = df["Close"].values
-        dates = np.arange(len(close))
-
-        # --- Linear Regression (trend) ---
-        # Fit line to last 6 months for recent trend
-        recent_n = min(126, len(close))  # ~6 months of trading days
-        recent_close = close[-recent_n:]
-        recent_dates = np.arange(recent_n)
-
-        coeffs = np.polyfit(recent_dates, recent_close, 1)
-        slope = coeffs[0]
-        intercept = coeffs[1]
-
-        # --- Moving Averages ---
-        ma_20 = pd.Series(close).rolling(20).mean().iloc[-1]
-        ma_50 = pd.Series(close).rolling(50).mean().iloc[-1]
-
-        # --- Bollinger Bands (20-day) ---
-        bb_std = pd.Series(close).rolling(20).std().iloc[-1]
-        bb_upper = ma_20 + 2 * bb_std
-        bb_lower = ma_20 - 2 * bb_std
-
-        # --- RSI (14-day) ---
-        delta = pd.Series(close).diff()
-        gain = delta.where(delta > 0, 0).rolling(14).mean().iloc[-1]
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean().iloc[-1]
-        rs = gain / loss if loss > 0 else 100
-        rsi = 100 - (100 / (1 + rs))
-
-        # --- Momentum signal ---
-        momentum_factor = 1.0
-        if rsi > 70:
-            momentum_factor = 0.95  # Overbought: reduce upside prediction
-        elif rsi < 30:
-            momentum_factor = 1.05  # Oversold: increase upside prediction
-
-        # --- Mean reversion signal ---
-        current_price = close[-1]
-        ma_factor = 1.0
-        if current_price > ma_50 * 1.1:
-            ma_factor = 0.98  # Far above MA50: slight pullback expected
-        elif current_price < ma_50 * 0.9:
-            ma_factor = 1.02  # Far below MA50: slight rebound expected
-
-        # --- Generate forecast ---
-        forecast_dates = []
-        forecast_prices = []
-        upper_bound = []
-        lower_bound = []
-
-        last_date = df.index[-1].to_pydatetime()
-
-        for i in range(1, forecast_days + 1):
-            future_x = recent_n + i
-            base_price = slope * future_x + intercept
-
-            # Apply momentum and mean reversion adjustments
-            adjusted_price = base_price * momentum_factor * ma_factor
-
-            # Confidence interval widens over time
-            uncertainty = bb_std * np.sqrt(i / 20)
-            upper = adjusted_price + 2 * uncertainty
-            lower = adjusted_price - 2 * uncertainty
-
-            forecast_date = last_date + timedelta(days=i)
-            forecast_dates.append(forecast_date.strftime("%Y-%m-%d"))
-            forecast_prices.append(round(float(adjusted_price), 2))
-            upper_bound.append(round(float(upper), 2))
-            lower_bound.append(round(float(max(lower, 0)), 2))
-
-        # --- Historical prices (last 90 days for chart context) ---
-        hist_dates = []
-        hist_prices = []
-        for ts, row in df.tail(90).iterrows():
-            hist_dates.append(ts.strftime("%Y-%m-%d"))
-            hist_prices.append(round(float(row["Close"]), 2))
-
-        # --- Summary statistics ---
-        forecast_end_price = forecast_prices[-1]
-        price_change = forecast_end_price - current_price
-        pct_change = (price_change / current_price) * 100 if current_price > 0 else 0.0
-
-        if pct_change > 5:
-            trend_signal = "Bullish"
-        elif pct_change < -5:
-            trend_signal = "Bearish"
-        else:
-            trend_signal = "Neutral"
-
-        return {
-            "ticker": ticker.upper(),
-            "current_price": round(float(current_price), 2),
-            "forecast_days": forecast_days,
-            "trend_signal": trend_signal,
-            "predicted_price": forecast_end_price,
-            "price_change": round(float(price_change), 2),
-            "pct_change": round(float(pct_change), 2),
-            "rsi": round(float(rsi), 1),
-            "ma_20": round(float(ma_20), 2),
-            "ma_50": round(float(ma_50), 2),
-            "historical": {
-                "dates": hist_dates,
-                "prices": hist_prices,
-            },
-            "forecast": {
-                "dates": forecast_dates,
-                "prices": forecast_prices,
-                "upper_bound": upper_bound,
-                "lower_bound": lower_bound,
-            },
-            "model_info": {
-                "method": "Linear Regression + MA + RSI + Bollinger Bands",
-                "training_period": f"{recent_n} trading days",
-                "slope_per_day": round(float(slope), 4),
-                "r_squared": round(float(
-                    1 - np.sum((recent_close - np.polyval(coeffs, recent_dates)) ** 2)
-                    / np.sum((recent_close - np.mean(recent_close)) ** 2)
-                ), 4),
-            },
+    # --- Linear Regression (trend) ---
+    # Fit line to last 6 months for recent trend
+    recent_n = min(126, len(close))  # ~6 months of trading days
+    recent_close = close[-recent_n:]
+    recent_dates = np.arange(recent_n)
+
+    coeffs = np.polyfit(recent_dates, recent_close, 1)
+    slope = coeffs[0]
+    intercept = coeffs[1]
+
+    # --- Moving Averages ---
+    ma_20 = close[-20:].mean()
+    ma_50 = close[-50:].mean()
+
+    # --- Bollinger Bands (20-day) ---
+    bb_std = close[-20:].std(ddof=1)
+
+    # --- RSI (14-day) ---
+    delta = np.diff(close[-15:])
+    gain = np.where(delta > 0, delta, 0.0).mean()
+    loss = np.where(delta < 0, -delta, 0.0).mean()
+    rs = gain / loss if loss > 0 else 100
+    rsi = 100 - (100 / (1 + rs))
+
+    # --- Momentum signal ---
+    momentum_factor = 1.0
+    if rsi > 70:
+        momentum_factor = 0.95  # Overbought: reduce upside prediction
+    elif rsi < 30:
+        momentum_factor = 1.05  # Oversold: increase upside prediction
+
+    # --- Mean reversion signal ---
+    current_price = close[-1]
+    ma_factor = 1.0
+    if current_price > ma_50 * 1.1:
+        ma_factor = 0.98  # Far above MA50: slight pullback expected
+    elif current_price < ma_50 * 0.9:
+        ma_factor = 1.02  # Far below MA50: slight rebound expected
+
+    # --- Generate forecast ---
+    steps = np.arange(1, forecast_days + 1)
+    base_price = slope * (recent_n + steps) + intercept
+
+    # Apply momentum and mean reversion adjustments
+    prices = base_price * momentum_factor * ma_factor
+
+    # Confidence interval widens over time
+    uncertainty = bb_std * np.sqrt(steps / 20)
+
+    residuals = recent_close - np.polyval(coeffs, recent_dates)
+    r_squared = 1 - np.sum(residuals**2) / np.sum((recent_close - np.mean(recent_close)) ** 2)
+
+    return {
+        "current_price": current_price,
+        "prices": prices,
+        "upper": prices + 2 * uncertainty,
+        "lower": prices - 2 * uncertainty,
+        "rsi": rsi,
+        "ma_20": ma_20,
+        "ma_50": ma_50,
+        "slope": slope,
+        "recent_n": recent_n,
+        "r_squared": r_squared,
+    }
+
+
+def _forecast_from_closes(
+    ticker: str,
+    close: np.ndarray,
+    dates: pd.DatetimeIndex,
+    forecast_days: int,
+    method: str = "linear",
+    n_paths: int = 10000,
+    model: str = "gbm",
+) -> dict:
+    """Build the forecast response from an ascending close series.
+
+    `method="linear"` projects the regression line with Bollinger-width
+    bands; `method="montecarlo"` simulates `n_paths` price paths and reports
+    the median path with a 5/25/50/75/95 percentile fan.
+    """
+    fit = _linear_forecast(close, forecast_days)
+    current_price = fit["current_price"]
+
+    percentiles: dict[str, list[float]] | None = None
+    if method == "montecarlo":
+        paths = montecarlo.simulate_price_paths(close, forecast_days, n_paths, model)
+        fan = montecarlo.percentile_fan(paths)
+        prices, upper, lower = fan["p50"], fan["p95"], fan["p5"]
+        percentiles = {k: [round(float(v), 2) for v in band] for k, band in fan.items()}
+        model_info = {
+            "method": f"Monte Carlo ({model.upper() if model == 'gbm' else model}, "
+            f"{n_paths:,} paths)",
+            "training_period": f"{len(close) - 1} daily returns",
+            "slope_per_day": round(float((prices[-1] - current_price) / forecast_days), 4),
+            "r_squared": None,
+        }
+    else:
+        prices, upper, lower = fit["prices"], fit["upper"], fit["lower"]
+        model_info = {
+            "method": "Linear Regression + MA + RSI + Bollinger Bands",
+            "training_period": f"{fit['recent_n']} trading days",
+            "slope_per_day": round(float(fit["slope"]), 4),
+            "r_squared": round(float(fit["r_squared"]), 4),
         }
 
+    last_date = dates[-1].to_pydatetime()
+    forecast_dates = [
+        (last_date + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(1, forecast_days + 1)
+    ]
+    forecast_prices = [round(float(p), 2) for p in prices]
+    upper_bound = [round(float(u), 2) for u in upper]
+    lower_bound = [round(float(max(lo, 0)), 2) for lo in lower]
+
+    # --- Historical prices (last 90 days for chart context) ---
+    hist_dates = [ts.strftime("%Y-%m-%d") for ts in dates[-90:]]
+    hist_prices = [round(float(c), 2) for c in close[-90:]]
+
+    # --- Summary statistics ---
+    forecast_end_price = forecast_prices[-1]
+    price_change = forecast_end_price - current_price
+    pct_change = (price_change / current_price) * 100 if current_price > 0 else 0.0
+
+    trend_signal = trend_signal_for(pct_change)
+
+    return {
+        "ticker": ticker.upper(),
+        "current_price": round(float(current_price), 2),
+        "forecast_days": forecast_days,
+        "trend_signal": trend_signal,
+        "predicted_price": forecast_end_price,
+        "price_change": round(float(price_change), 2),
+        "pct_change": round(float(pct_change), 2),
+        "rsi": round(float(fit["rsi"]), 1),
+        "ma_20": round(float(fit["ma_20"]), 2),
+        "ma_50": round(float(fit["ma_50"]), 2),
+        "historical": {
+            "dates": hist_dates,
+            "prices": hist_prices,
+        },
+        "forecast": {
+            "dates": forecast_dates,
+            "prices": forecast_prices,
+            "upper_bound": upper_bound,
+            "lower_bound": lower_bound,
+            "percentiles": percentiles,
+        },
+        "model_info": model_info,
+    }
+
+
+def _history_window() -> tuple[str, str]:
+    today = date.today()
+    return (
+        (today - timedelta(days=HISTORY_DAYS)).strftime("%Y-%m-%d"),
+        (today + timedelta(days=1)).strftime("%Y-%m-%d"),
+    )
+
+
+def _fit_points(
+    ticker: str,
+    points: list[dict],
+    forecast_days: int,
+    method: str = "linear",
+    n_paths: int = 10000,
+    model: str = "gbm",
+) -> dict:
+    """Forecast from [{date, close}] history — blocking, run off the event loop.
+
+    Returns dict with forecast data, or {"error": ...}.
+    """
+    if len(points) < MIN_BARS:
+        return {"error": f"Insufficient data for {ticker} (need at least {MIN_BARS} days)"}
+    try:
+        return _forecast_from_closes(
+            ticker,
+            np.array([p["close"] for p in points], dtype=float),
+            pd.DatetimeIndex([p["date"] for p in points]),
+            forecast_days,
+            method=method,
+            n_paths=n_paths,
+            model=model,
+        )
     except Exception as exc:
         logger.error("Forecast error for %s: %s", ticker, exc)
         return {"error": f"Failed to generate forecast for {ticker}: {str(exc)}"}
 
 
-async def get_forecast(ticker: str, forecast_days: int = 30) -> dict:
-    """Async wrapper for forecast generation."""
-    return await asyncio.to_thread(_build_forecast_sync, ticker, forecast_days)
+async def get_forecast(
+    ticker: str,
+    forecast_days: int = 30,
+    method: str = "linear",
+    n_paths: int | None = None,
+    model: str = "gbm",
+) -> dict:
+    """Async wrapper for forecast generation.
+
+    Monte Carlo runs go through the bounded simulation pool so a burst of
+    requests cannot saturate every core; linear fits are cheap enough for
+    the default thread pool.
+    """
+    n_paths = n_paths or settings.montecarlo_paths
+    ticker = ticker.upper()
+    key = _cache_key(ticker, forecast_days, method, n_paths, model)
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached
+
+    history = await stock_data.get_multi_ticker_history([ticker], *_history_window())
+    points = history.get(ticker, [])
+    if method == "montecarlo":
+        result = await executors.run_in_thread_pool(
+            _fit_points, ticker, points, forecast_days, method, n_paths, model
+        )
+    else:
+        result = await asyncio.to_thread(_fit_points, ticker, points, forecast_days)
+
+    if "error" not in result:
+        await cache.set(key, result, settings.forecast_cache_ttl)
+    return result
+
+
+async def _fit_in_process(
+    ticker: str,
+    points: list[dict],
+    forecast_days: int,
+    method: str,
+    n_paths: int,
+    model: str,
+) -> dict:
+    if len(points) < MIN_BARS:
+        # Skip the round trip to the process pool
+        return _fit_points(ticker, points, forecast_days)
+    try:
+        return await executors.run_in_process(
+            _fit_points, ticker, points, forecast_days, method, n_paths, model
+        )
+    except Exception as exc:
+        logger.error("Forecast error for %s: %s", ticker, exc)
+        return {"error": f"Failed to generate forecast for {ticker}: {str(exc)}"}
+
+
+async def get_forecasts(
+    tickers: list[str],
+    forecast_days: int = 30,
+    method: str = "linear",
+    n_paths: int | None = None,
+    model: str = "gbm",
+) -> dict[str, dict]:
+    """Forecast many tickers at once.
+
+    Cached fits are reused; the rest share one batched yfinance download
+    and are fitted in parallel on the process pool. Returns
+    {TICKER: forecast dict or {"error": ...}}.
+    """
+    n_paths = n_paths or settings.montecarlo_paths
+    tickers = sorted({t.upper() for t in tickers})
+    keys = {t: _cache_key(t, forecast_days, method, n_paths, model) for t in tickers}
+
+    cached = await asyncio.gather(*(cache.get(keys[t]) for t in tickers))
+    results = {t: hit for t, hit in zip(tickers, cached) if hit is not None}
+    missing = [t for t in tickers if t not in results]
+    if not missing:
+        return results
+
+    history = await stock_data.get_multi_ticker_history(missing, *_history_window())
+    fitted = await asyncio.gather(
+        *(
+            _fit_in_process(t, history.get(t, []), forecast_days, method, n_paths, model)
+            for t in missing
+        )
+    )
+    for ticker, result in zip(missing, fitted):
+        results[ticker] = result
+        if "error" not in result:
+            await cache.set(keys[ticker], result, settings.forecast_cache_ttl)
+    return results
@@ -0,0 +1,92 @@
+"""
+Holdings import parsing.
+
+Accepts a brokerage-style CSV export (header row required) or JSON (a list
+of objects, or {"holdings": [...]}) and validates each row against
+HoldingCreate. Common column names from brokerage exports are mapped onto
+ours; invalid rows are reported by row number and skipped rather than
+failing the whole file.
+"""
+
+import csv
+import io
+import json
+
+from pydantic import ValidationError
+
+from app.schemas.holding import HoldingCreate, HoldingImportError
+
+# Accepted column names (lower-cased) for each HoldingCreate field
+COLUMN_ALIASES: dict[str, tuple[str, ...]] = {
+    "ticker": ("ticker", "symbol"),
+    "shares": ("shares", "quantity", "qty"),
+    "purchased_at": ("purchased_at", "purchase_date", "date_acquired", "date"),
+    "cost_basis": ("cost_basis", "cost_per_share", "price", "cost"),
+}
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def _normalize(raw: dict) -> dict:
+    row = {str(k).strip().lower().replace(" ", "_"): v for k, v in raw.items()}
+    out: dict = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            value = row.get(alias)
+            if isinstance(value, str):
+                value = value.strip().replace("$", "").replace(",", "") or None
+            if value is not None:
+                out[field] = value
+                break
+    return out
+
+
+def _records(body: bytes, content_type: str) -> list[dict]:
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError("Import file must be UTF-8") from exc
+
+    if "json" in content_type:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise ImportFormatError(f"Invalid JSON: {exc.msg}") from exc
+        if isinstance(data, dict):
+            data = data.get("holdings")
+        if not isinstance(data, list) or not all(isinstance(r, dict) for r in data):
+            raise ImportFormatError('JSON must be a list of holdings or {"holdings": [...]}')
+        return data
+
+    if "csv" in content_type or "text/plain" in content_type:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames:
+            raise ImportFormatError("CSV must start with a header row")
+        return list(reader)
+
+    raise ImportFormatError("Send CSV (text/csv) or JSON (application/json)")
+
+
+def parse_holdings(
+    body: bytes, content_type: str, max_rows: int
+) -> tuple[list[HoldingCreate], list[HoldingImportError]]:
+    """Validated holdings and per-row errors (1-based row numbers).
+
+    Raises ImportFormatError for unreadable files or more than `max_rows` rows.
+    """
+    records = _records(body, content_type)
+    if len(records) > max_rows:
+        raise ImportFormatError(f"Import is limited to {max_rows} rows")
+
+    holdings: list[HoldingCreate] = []
+    errors: list[HoldingImportError] = []
+    for i, record in enumerate(records, start=1):
+        try:
+            holdings.append(HoldingCreate.model_validate(_normalize(record)))
+        except ValidationError as exc:
+            first = exc.errors()[0]
+            field = ".".join(str(p) for p in first["loc"])
+            errors.append(HoldingImportError(row=i, error=f"{field}: {first['msg']}"))
+    return holdings, errors
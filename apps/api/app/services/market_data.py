@@ -3,6 +3,10 @@ Async Alpha Vantage integration.
 
 Migrated from: market_data.py (original StockBuddy)
 Changes: sync httpx → async httpx, added retry logic, proper error handling.
+Every request goes through the alpha_vantage rate governor, so callers may
+fetch concurrently without tripping the per-minute quota. Successful quotes
+and fundamentals are kept in the shared cache; peek_* read it without
+calling the API (used to fill new holdings instantly when warm).
 """
 
 import structlog
@@ -11,6 +15,8 @@ import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.config import settings
+from app.core.cache import cache
+from app.core.rate_governor import alpha_vantage
 
 logger = structlog.stdlib.get_logger(__name__)
 
@@ -24,6 +30,16 @@ def _require_api_key() -> None:
         raise MarketDataError("Missing ALPHA_VANTAGE_API_KEY in environment.")
 
 
+async def peek_quote(ticker: str) -> dict | None:
+    """Cached quote for `ticker`, or None (never calls the API)."""
+    return await cache.get(f"quote:{ticker.upper()}")
+
+
+async def peek_fundamentals(ticker: str) -> dict | None:
+    """Cached fundamentals for `ticker`, or None (never calls the API)."""
+    return await cache.get(f"fundamentals:{ticker.upper()}")
+
+
 def _check_rate_limit(data: dict) -> bool:
     """Return True if the API response indicates a rate limit hit."""
     if "Note" in data or "Information" in data:
@@ -42,6 +58,9 @@ async def get_stock_fundamentals(ticker: str) -> dict:
     """
     _require_api_key()
     ticker = ticker.upper()
+    cached = await peek_fundamentals(ticker)
+    if cached is not None:
+        return cached
 
     result: dict = {
         "price": None,
@@ -55,7 +74,7 @@ async def get_stock_fundamentals(ticker: str) -> dict:
         "pe_ratio": None,
     }
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
+    async with alpha_vantage, httpx.AsyncClient(timeout=10.0) as client:
         overview_resp = await client.get(
             settings.alpha_vantage_base_url,
             params={
@@ -82,6 +101,8 @@ async def get_stock_fundamentals(ticker: str) -> dict:
                     except (ValueError, TypeError):
                         pass
 
+    if result["name"] or result["sector"]:
+        await cache.set(f"fundamentals:{ticker}", result, settings.fundamentals_cache_ttl)
     return result
 
 
@@ -102,9 +123,13 @@ async def get_quote(ticker: str) -> dict:
     Returns {"price": float|None, "previous_close": float|None}.
     """
     _require_api_key()
+    ticker = ticker.upper()
+    cached = await peek_quote(ticker)
+    if cached is not None:
+        return cached
     result = {"price": None, "previous_close": None}
 
-    async with httpx.AsyncClient(timeout=10.0) as client:
+    async with alpha_vantage, httpx.AsyncClient(timeout=10.0) as client:
         resp = await client.get(
             settings.alpha_vantage_base_url,
             params={
@@ -120,6 +145,8 @@ async def get_quote(ticker: str) -> dict:
             gq = data.get("Global Quote", {})
             result["price"] = _safe_float(gq.get("05. price"))
             result["previous_close"] = _safe_float(gq.get("08. previous close"))
+    if result["price"] is not None:
+        await cache.set(f"quote:{ticker}", result, settings.quote_cache_ttl)
     return result
 
 
@@ -0,0 +1,118 @@
+"""
+Monte Carlo price simulation and portfolio Value-at-Risk.
+
+All paths are simulated in one batched NumPy draw: single tickers use either
+geometric Brownian motion fitted to daily log returns or a bootstrap of
+historical returns; portfolios draw correlated daily returns through the
+Cholesky factor of the holdings' covariance matrix (or bootstrap whole
+historical days, which keeps the empirical correlation).
+
+Functions here are blocking; callers run them via executors.run_in_thread_pool.
+"""
+
+import numpy as np
+
+MODELS = ("gbm", "bootstrap")
+FAN_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class SimulationError(Exception):
+    pass
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    """Daily log returns of a close series, dropping non-positive prices."""
+    close = close[close > 0]
+    return np.diff(np.log(close))
+
+
+def simulate_price_paths(
+    close: np.ndarray,
+    days: int,
+    n_paths: int,
+    model: str = "gbm",
+    seed: int | None = None,
+) -> np.ndarray:
+    """Simulate `n_paths` future price paths of `days` steps.
+
+    Returns an array of shape (n_paths, days) of simulated closes.
+    """
+    if model not in MODELS:
+        raise SimulationError(f"Unknown simulation model: {model}")
+    returns = log_returns(close)
+    if len(returns) < 20:
+        raise SimulationError("Need at least 20 daily returns to simulate")
+
+    rng = np.random.default_rng(seed)
+    if model == "gbm":
+        # Mean of log returns already includes the -sigma^2/2 Ito correction.
+        steps = rng.normal(returns.mean(), returns.std(ddof=1), size=(n_paths, days))
+    else:
+        steps = rng.choice(returns, size=(n_paths, days), replace=True)
+
+    return close[-1] * np.exp(np.cumsum(steps, axis=1))
+
+
+def percentile_fan(paths: np.ndarray) -> dict[str, np.ndarray]:
+    """Per-day percentiles across paths, keyed "p5", "p25", ..."""
+    bands = np.percentile(paths, FAN_PERCENTILES, axis=0)
+    return {f"p{p}": band for p, band in zip(FAN_PERCENTILES, bands)}
+
+
+def _cholesky(cov: np.ndarray) -> np.ndarray:
+    """Cholesky factor, nudging the diagonal when the sample matrix is not PD.
+
+    Tickers with overlapping histories (or duplicates such as GOOG/GOOGL)
+    make the sample covariance singular; a tiny ridge keeps the factor stable.
+    """
+    jitter = 0.0
+    scale = float(np.mean(np.diag(cov))) or 1e-8
+    for _ in range(6):
+        try:
+            return np.linalg.cholesky(cov + jitter * np.eye(len(cov)))
+        except np.linalg.LinAlgError:
+            jitter = scale * 1e-10 if jitter == 0.0 else jitter * 100
+    raise SimulationError("Covariance matrix is not positive definite")
+
+
+def simulate_portfolio_pnl(
+    returns: np.ndarray,
+    values: np.ndarray,
+    horizons: tuple[int, ...],
+    n_paths: int,
+    model: str = "gbm",
+    seed: int | None = None,
+) -> dict[int, np.ndarray]:
+    """Simulate portfolio profit/loss over each horizon (in trading days).
+
+    `returns` is a (n_days, n_assets) matrix of aligned daily log returns and
+    `values` the current dollar value of each position. Returns
+    {horizon: array of n_paths P&L outcomes in dollars}.
+    """
+    if model not in MODELS:
+        raise SimulationError(f"Unknown simulation model: {model}")
+    n_days, n_assets = returns.shape
+    if n_days < 20:
+        raise SimulationError("Need at least 20 aligned daily returns to simulate")
+
+    rng = np.random.default_rng(seed)
+    max_h = max(horizons)
+
+    if model == "gbm":
+        mu = returns.mean(axis=0)
+        chol = _cholesky(np.atleast_2d(np.cov(returns, rowvar=False)))
+        z = rng.standard_normal(size=(n_paths, max_h, n_assets))
+        daily = z @ chol.T + mu
+    else:
+        daily = returns[rng.integers(0, n_days, size=(n_paths, max_h))]
+
+    cumulative = np.cumsum(daily, axis=1)  # (n_paths, max_h, n_assets)
+    return {h: np.expm1(cumulative[:, h - 1, :]) @ values for h in horizons}
+
+
+def value_at_risk(pnl: np.ndarray, confidence: float) -> tuple[float, float]:
+    """Return (VaR, CVaR) as positive dollar losses at the given confidence."""
+    cutoff = np.quantile(pnl, 1 - confidence)
+    tail = pnl[pnl <= cutoff]
+    cvar = -tail.mean() if tail.size else -cutoff
+    return float(max(-cutoff, 0.0)), float(max(cvar, 0.0))
@@ -8,6 +8,7 @@ import structlog
 import httpx
 
 from app.config import settings
+from app.core.rate_governor import alpha_vantage
 
 logger = structlog.stdlib.get_logger(__name__)
 
@@ -32,7 +33,7 @@ async def get_stock_news(
         return []
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with alpha_vantage, httpx.AsyncClient(timeout=15.0) as client:
             resp = await client.get(
                 settings.alpha_vantage_base_url,
                 params={
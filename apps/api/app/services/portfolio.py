@@ -7,16 +7,36 @@ Changes: in-memory state → DB-backed via SQLModel, all queries scoped by user_
 """
 
 import asyncio
+from collections.abc import Awaitable, Callable
 import structlog
 from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import select
+import numpy as np
+import pandas as pd
+from sqlalchemy import case, delete, func, insert, literal, null, or_, select, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models import EarningsCall, Holding, Portfolio, PortfolioSnapshot
-from app.schemas.analysis import DashboardSummary, EarningsInsights, PerformerInfo, SectorAllocation
-from app.services import market_data, price_alerts
+from app.config import settings
+from app.core import executors
+from app.core.cache import cache
+from app.database import after_commit
+from app.models import EarningsCall, Holding, Portfolio, PortfolioDailyValue, PortfolioSnapshot
+from app.schemas.analysis import (
+    DashboardSummary,
+    EarningsInsights,
+    HoldingForecast,
+    PerformerInfo,
+    PortfolioForecast,
+    PortfolioSnapshotRead,
+    PortfolioTotals,
+    PortfolioVaR,
+    SectorAllocation,
+    VaRHorizon,
+)
+from app.schemas.holding import HoldingCreate
+from app.schemas.stock import ForecastPrediction, StockForecast
+from app.services import forecast, market_data, montecarlo, price_alerts, price_store
 
 logger = structlog.stdlib.get_logger(__name__)
 
@@ -65,13 +85,47 @@ async def delete_portfolio(db: AsyncSession, user_id: str, portfolio_id: int) ->
     portfolio = await get_portfolio(db, user_id, portfolio_id)
     if portfolio is None:
         return False
+    await invalidate_daily_values(db, portfolio_id)
+    invalidate_holding_caches(db, user_id, portfolio_id)
     await db.delete(portfolio)
     await db.flush()
     return True
 
 
+async def invalidate_daily_values(
+    db: AsyncSession, portfolio_id: int, since: date | None = None
+) -> None:
+    """Drop materialized daily values from `since` on (all if None).
+
+    Called on holding edits; once the edit commits,
+    services/portfolio_history.py rebuilds the missing tail in the
+    background.
+    """
+    from app.services.portfolio_history import refresher
+
+    stmt = delete(PortfolioDailyValue).where(PortfolioDailyValue.portfolio_id == portfolio_id)
+    if since is not None:
+        stmt = stmt.where(PortfolioDailyValue.value_date >= since)
+    await db.execute(stmt)
+
+    async def refresh() -> None:
+        refresher.schedule(portfolio_id)
+
+    after_commit(db, ("daily-values", portfolio_id), refresh)
+
+
 # ─── Holdings ─────────────────────────────────────────────────────────
 
+def _parse_date(value: str | None) -> date | None:
+    """ISO date from provider data; None if missing or malformed."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
 async def add_holding(
     db: AsyncSession,
     user_id: str,
@@ -81,41 +135,23 @@ async def add_holding(
     purchased_at: date | None = None,
     cost_basis: float | None = None,
 ) -> Holding | None:
-    """Add a holding and populate market data from Alpha Vantage."""
+    """Add a holding, filling market data from the shared cache when warm.
+
+    Never calls Alpha Vantage: on a cold cache the holding is stored with
+    enrichment_status="pending" and the caller schedules
+    enrichment.enricher after committing.
+    """
     # Verify portfolio belongs to user
     portfolio = await get_portfolio(db, user_id, portfolio_id)
     if portfolio is None:
         return None
 
     ticker = ticker.upper()
-
-    # Fetch market data — price and fundamentals independently so a rate-limit
-    # on one call doesn't lose the other's data.
-    last_price = 0.0
-    sector: str | None = "Unknown"
-    beta: float | None = 1.0
-    dividend_yield: float | None = None
-    next_earnings_date: str | None = None
-
-    previous_close: float | None = None
-
-    try:
-        quote = await market_data.get_quote(ticker)
-        last_price = quote["price"] or 0.0
-        previous_close = quote["previous_close"]
-    except Exception as exc:
-        logger.warning("Price fetch failed for %s: %s", ticker, exc)
-
-    await asyncio.sleep(1.5)  # respect Alpha Vantage rate limit
-
-    try:
-        fundamentals = await market_data.get_stock_fundamentals(ticker)
-        sector = fundamentals.get("sector") or "Unknown"
-        beta = fundamentals.get("beta") or 1.0
-        dividend_yield = fundamentals.get("dividend_yield")
-        next_earnings_date = fundamentals.get("next_earnings_date")
-    except Exception as exc:
-        logger.warning("Fundamentals fetch failed for %s: %s", ticker, exc)
+    quote = await market_data.peek_quote(ticker)
+    fundamentals = await market_data.peek_fundamentals(ticker)
+    warm = quote is not None and fundamentals is not None
+    quote = quote or {}
+    fundamentals = fundamentals or {}
 
     holding = Holding(
         user_id=user_id,
@@ -124,67 +160,172 @@ async def add_holding(
         shares=shares,
         purchased_at=purchased_at,
         cost_basis=cost_basis,
-        last_price=last_price,
-        previous_close=previous_close,
-        sector=sector,
-        beta=beta,
-        dividend_yield=dividend_yield,
-        next_earnings_date=next_earnings_date,
+        last_price=quote.get("price") if warm else None,
+        previous_close=quote.get("previous_close"),
+        sector=(fundamentals.get("sector") or "Unknown") if warm else None,
+        beta=(fundamentals.get("beta") or 1.0) if warm else None,
+        dividend_yield=fundamentals.get("dividend_yield"),
+        next_earnings_date=_parse_date(fundamentals.get("next_earnings_date")),
+        enrichment_status="ready" if warm else "pending",
     )
     db.add(holding)
+    if purchased_at is not None:
+        await invalidate_daily_values(db, portfolio_id, purchased_at)
+    invalidate_holding_caches(db, user_id, portfolio_id)
     await db.flush()
     await db.refresh(holding)
     return holding
 
 
+async def import_holdings(
+    db: AsyncSession, user_id: str, portfolio_id: int, rows: list[HoldingCreate]
+) -> list[int]:
+    """Insert many holdings in one multi-row INSERT, without market data.
+
+    Rows are stored with enrichment_status="pending"; prices and
+    fundamentals are left empty for a background refresh_holdings pass. Returns the new holding ids.
+    """
+    if not rows:
+        return []
+    now = datetime.now(timezone.utc)
+    # Core executemany with RETURNING is sent as multi-row INSERT ... VALUES
+    # batches ("insertmanyvalues"): one statement for up to 1000 rows. (The
+    # ORM form would split rows by which columns are None.)
+    table = Holding.__table__
+    result = await db.execute(
+        insert(table).returning(table.c.id),
+        [
+            {
+                "user_id": user_id,
+                "portfolio_id": portfolio_id,
+                "ticker": row.ticker.upper(),
+                "shares": row.shares,
+                "purchased_at": row.purchased_at,
+                "cost_basis": row.cost_basis,
+                "enrichment_status": "pending",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for row in rows
+        ],
+    )
+    ids = sorted(result.scalars().all())
+    dated = [row.purchased_at for row in rows if row.purchased_at is not None]
+    if dated:
+        await invalidate_daily_values(db, portfolio_id, min(dated))
+    invalidate_holding_caches(db, user_id, portfolio_id)
+    return ids
+
+
+async def _fetch_refresh_data(ticker: str, needs_fundamentals: bool) -> dict:
+    """Quote (and fundamentals if needed) for one ticker; failures become None."""
+    data: dict = {"quote": None, "fundamentals": None}
+    try:
+        data["quote"] = await market_data.get_quote(ticker)
+    except Exception as exc:
+        logger.warning("Price refresh failed for %s: %s", ticker, exc)
+    if needs_fundamentals:
+        try:
+            data["fundamentals"] = await market_data.get_stock_fundamentals(ticker)
+        except Exception as exc:
+            logger.warning("Fundamentals refresh failed for %s: %s", ticker, exc)
+    return data
+
+
 async def refresh_holdings(
-    db: AsyncSession, user_id: str, portfolio_id: int
+    db: AsyncSession,
+    user_id: str,
+    portfolio_id: int,
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
 ) -> list[Holding] | None:
     """Refresh prices for all holdings in a portfolio.
 
-    Adds a 1.5s delay between API calls to respect Alpha Vantage free-tier
-    rate limits (5 requests/minute, 25/day).
+    Each distinct ticker is fetched once, concurrently; the Alpha Vantage
+    rate governor (core/rate_governor.py) keeps requests within quota.
+    Results are written with a single UPDATE ... RETURNING and price alerts
+    are checked for all tickers in one batch. `on_progress(done, total)`
+    is awaited as each ticker's fetch finishes; it must not use `db`.
     """
     portfolio = await get_portfolio(db, user_id, portfolio_id)
     if portfolio is None:
         return None
 
     holdings = await get_holdings(db, user_id, portfolio_id)
-    for i, h in enumerate(holdings):
-        if i > 0:
-            await asyncio.sleep(1.5)
-        try:
-            quote = await market_data.get_quote(h.ticker)
+    if not holdings:
+        return holdings
+
+    # Fetch sector/beta/next_earnings_date only where some holding lacks them
+    needs_fundamentals: dict[str, bool] = {}
+    for h in holdings:
+        missing = h.sector is None or h.sector == "Unknown" or h.next_earnings_date is None
+        needs_fundamentals[h.ticker] = needs_fundamentals.get(h.ticker, False) or missing
+
+    tickers = sorted(needs_fundamentals)
+    done = 0
+
+    async def fetch(ticker: str) -> dict:
+        nonlocal done
+        data = await _fetch_refresh_data(ticker, needs_fundamentals[ticker])
+        done += 1
+        if on_progress is not None:
+            await on_progress(done, len(tickers))
+        return data
+
+    fetched = await asyncio.gather(*(fetch(t) for t in tickers))
+
+    columns: dict[str, dict[str, object]] = {
+        "last_price": {},
+        "previous_close": {},
+        "sector": {},
+        "beta": {},
+        "dividend_yield": {},
+        "next_earnings_date": {},
+        "enrichment_status": {},
+        "updated_at": {},
+    }
+    now = datetime.now(timezone.utc)
+    for ticker, data in zip(tickers, fetched):
+        quote, fundamentals = data["quote"], data["fundamentals"]
+        if quote is not None:
             if quote["price"] is not None:
-                h.last_price = quote["price"]
-                # Check price alerts for this ticker
-                await price_alerts.check_alerts_for_ticker(db, h.ticker, quote["price"])
+                columns["last_price"][ticker] = quote["price"]
+                columns["enrichment_status"][ticker] = "ready"
             if quote["previous_close"] is not None:
-                h.previous_close = quote["previous_close"]
-            h.updated_at = datetime.now(timezone.utc)
-            db.add(h)
-        except Exception as exc:
-            logger.warning("Price refresh failed for %s: %s", h.ticker, exc)
-
-        # Fetch sector/beta/next_earnings_date if missing
-        if h.sector is None or h.sector == "Unknown" or h.next_earnings_date is None:
-            await asyncio.sleep(1.5)
-            try:
-                fundamentals = await market_data.get_stock_fundamentals(h.ticker)
-                if fundamentals.get("sector"):
-                    h.sector = fundamentals["sector"]
-                if fundamentals.get("beta") is not None:
-                    h.beta = fundamentals["beta"]
-                if fundamentals.get("next_earnings_date"):
-                    h.next_earnings_date = fundamentals["next_earnings_date"]
-                db.add(h)
-            except Exception as exc:
-                logger.warning("Fundamentals refresh failed for %s: %s", h.ticker, exc)
+                columns["previous_close"][ticker] = quote["previous_close"]
+            columns["updated_at"][ticker] = now
+        if fundamentals:
+            if fundamentals.get("sector"):
+                columns["sector"][ticker] = fundamentals["sector"]
+            if fundamentals.get("beta") is not None:
+                columns["beta"][ticker] = fundamentals["beta"]
+            if fundamentals.get("dividend_yield") is not None:
+                columns["dividend_yield"][ticker] = fundamentals["dividend_yield"]
+            earnings_date = _parse_date(fundamentals.get("next_earnings_date"))
+            if earnings_date is not None:
+                columns["next_earnings_date"][ticker] = earnings_date
+
+    await price_alerts.check_alerts_for_prices(db, columns["last_price"])
+
+    # One statement for every holding: per-ticker CASE expressions, falling
+    # back to the current value for tickers without fresh data.
+    values = {
+        name: case(by_ticker, value=Holding.ticker, else_=getattr(Holding, name))
+        for name, by_ticker in columns.items()
+        if by_ticker
+    }
+    if not values:
+        return holdings
 
-    await db.flush()
-    for h in holdings:
-        await db.refresh(h)
-    return holdings
+    result = await db.execute(
+        update(Holding)
+        .where(Holding.id.in_([h.id for h in holdings]))
+        .values(**values)
+        .returning(Holding)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    refreshed = {h.id: h for h in result.scalars().all()}
+    invalidate_holding_caches(db, user_id, portfolio_id)
+    return [refreshed.get(h.id, h) for h in holdings]
 
 
 async def get_holdings(db: AsyncSession, user_id: str, portfolio_id: int) -> list[Holding]:
@@ -216,6 +357,10 @@ async def update_holding(
     holding = result.scalars().first()
     if holding is None:
         return None
+    affected = [d for d in (holding.purchased_at, purchased_at) if d is not None]
+    if affected:
+        await invalidate_daily_values(db, portfolio_id, min(affected))
+    invalidate_holding_caches(db, user_id, portfolio_id)
     holding.shares = shares
     holding.purchased_at = purchased_at
     holding.cost_basis = cost_basis
@@ -239,6 +384,9 @@ async def delete_holding(
     holding = result.scalars().first()
     if holding is None:
         return False
+    if holding.purchased_at is not None:
+        await invalidate_daily_values(db, portfolio_id, holding.purchased_at)
+    invalidate_holding_caches(db, user_id, portfolio_id)
     await db.delete(holding)
     await db.flush()
     return True
@@ -306,52 +454,94 @@ def calculate_health_score(
     return max(0, min(100, score))
 
 
-async def analyze_portfolio(
-    db: AsyncSession, user_id: str, portfolio_id: int
+async def get_latest_earnings(
+    db: AsyncSession, user_id: str, holdings: list[Holding]
+) -> dict[int, EarningsCall]:
+    """Latest earnings call per holding, matched by ticker or holding_id.
+
+    One query for any number of holdings: calls are ranked newest-first
+    within each ticker and within each holding_id (window functions, served
+    by ix_earnings_call_user_ticker_created_at and the holding_id index) and
+    only the top-ranked rows are loaded. Returns {holding.id: EarningsCall}.
+    """
+    if not holdings:
+        return {}
+
+    tickers = {h.ticker for h in holdings}
+    holding_ids = {h.id for h in holdings}
+    newest_first = (EarningsCall.created_at.desc(), EarningsCall.id.desc())
+    ranked = (
+        select(
+            EarningsCall.id,
+            func.row_number()
+            .over(partition_by=EarningsCall.ticker, order_by=newest_first)
+            .label("ticker_rank"),
+            func.row_number()
+            .over(partition_by=EarningsCall.holding_id, order_by=newest_first)
+            .label("holding_rank"),
+        )
+        .where(
+            EarningsCall.user_id == user_id,
+            EarningsCall.ticker.in_(tickers) | EarningsCall.holding_id.in_(holding_ids),
+        )
+        .subquery()
+    )
+    result = await db.execute(
+        select(EarningsCall)
+        .join(ranked, ranked.c.id == EarningsCall.id)
+        .where((ranked.c.ticker_rank == 1) | (ranked.c.holding_rank == 1))
+    )
+
+    by_ticker: dict[str, EarningsCall] = {}
+    by_holding: dict[int, EarningsCall] = {}
+    for ec in result.scalars().all():
+        newest = by_ticker.get(ec.ticker)
+        if newest is None or (ec.created_at, ec.id) > (newest.created_at, newest.id):
+            by_ticker[ec.ticker] = ec
+        if ec.holding_id is not None:
+            newest = by_holding.get(ec.holding_id)
+            if newest is None or (ec.created_at, ec.id) > (newest.created_at, newest.id):
+                by_holding[ec.holding_id] = ec
+
+    latest: dict[int, EarningsCall] = {}
+    for h in holdings:
+        candidates = [c for c in (by_ticker.get(h.ticker), by_holding.get(h.id)) if c]
+        if candidates:
+            latest[h.id] = max(candidates, key=lambda c: (c.created_at, c.id))
+    return latest
+
+
+async def compute_snapshot(
+    db: AsyncSession,
+    user_id: str,
+    portfolio_id: int,
+    holdings: list[Holding] | None = None,
 ) -> PortfolioSnapshot:
-    """Run portfolio analysis and persist a snapshot.
+    """Run portfolio analysis without writing anything.
 
-    Ported from PortfolioAnalyzer.analyze_portfolio.
+    Returns a transient (unsaved) PortfolioSnapshot. Ported from
+    PortfolioAnalyzer.analyze_portfolio.
     """
-    holdings = await get_holdings(db, user_id, portfolio_id)
+    if holdings is None:
+        holdings = await get_holdings(db, user_id, portfolio_id)
 
     if not holdings:
-        snapshot = PortfolioSnapshot(
+        return PortfolioSnapshot(
             user_id=user_id,
             portfolio_id=portfolio_id,
             num_positions=0,
             health_score=0,
         )
-        db.add(snapshot)
-        await db.flush()
-        await db.refresh(snapshot)
-        return snapshot
-
-    # Calculate total value & weights
-    total_value = sum(
-        (h.last_price or 0) * h.shares for h in holdings
-    )
-
-    weights = []
-    for h in holdings:
-        val = (h.last_price or 0) * h.shares
-        weights.append(val / total_value if total_value > 0 else 0)
 
-    concentration_risk = max(weights) if weights else 0.0
+    totals = portfolio_totals(holdings)
+    total_value = totals.total_value
+    concentration_risk = totals.concentration_risk
 
     # Sentiment from earnings calls (match by ticker or holding_id)
+    latest_calls = await get_latest_earnings(db, user_id, holdings)
     sentiment_scores: list[float] = []
     for h in holdings:
-        result = await db.execute(
-            select(EarningsCall)
-            .where(
-                EarningsCall.user_id == user_id,
-                (EarningsCall.ticker == h.ticker) | (EarningsCall.holding_id == h.id),
-            )
-            .order_by(EarningsCall.created_at.desc())
-            .limit(1)
-        )
-        latest_ec = result.scalars().first()
+        latest_ec = latest_calls.get(h.id)
         if latest_ec and latest_ec.sentiment_score is not None:
             sentiment_scores.append(latest_ec.sentiment_score)
 
@@ -377,35 +567,171 @@ async def analyze_portfolio(
         concentration_risk=concentration_risk,
         health_score=health_score,
     )
+    return snapshot
+
+
+async def analyze_portfolio(
+    db: AsyncSession, user_id: str, portfolio_id: int
+) -> PortfolioSnapshot:
+    """Run portfolio analysis and persist a snapshot.
+
+    Only the scheduled snapshot job persists; request paths use get_snapshot.
+    """
+    snapshot = await compute_snapshot(db, user_id, portfolio_id)
     db.add(snapshot)
     await db.flush()
     await db.refresh(snapshot)
     return snapshot
 
 
-async def get_sector_allocation(
+async def get_portfolios_due_for_snapshot(
+    db: AsyncSession, interval: timedelta
+) -> list[tuple[str, int]]:
+    """(user_id, portfolio_id) of portfolios with no snapshot newer than `interval`."""
+    latest = func.max(PortfolioSnapshot.created_at)
+    result = await db.execute(
+        select(Portfolio.user_id, Portfolio.id)
+        .outerjoin(PortfolioSnapshot, PortfolioSnapshot.portfolio_id == Portfolio.id)
+        .group_by(Portfolio.user_id, Portfolio.id)
+        .having(
+            or_(
+                latest.is_(None),
+                latest < datetime.now(timezone.utc) - interval,
+            )
+        )
+        .order_by(Portfolio.id)
+    )
+    return [(row.user_id, row.id) for row in result.all()]
+
+
+def invalidate_holding_caches(db: AsyncSession, user_id: str, portfolio_id: int) -> None:
+    """Drop cached reads derived from a portfolio's holdings once `db` commits."""
+
+    async def drop() -> None:
+        await invalidate_snapshot_cache(user_id, portfolio_id)
+        await cache.delete(_dashboard_cache_key(user_id))
+
+    after_commit(db, ("holding-caches", user_id, portfolio_id), drop)
+
+
+def invalidate_earnings_caches(db: AsyncSession, user_id: str) -> None:
+    """Drop a user's cached snapshots (earnings metrics feed them) once `db` commits."""
+    after_commit(db, ("snapshot-cache", user_id), lambda: invalidate_snapshot_cache(user_id))
+
+
+def _snapshot_cache_key(user_id: str, portfolio_id: int | None = None) -> str:
+    prefix = f"snapshot:{user_id}:"
+    return prefix if portfolio_id is None else f"{prefix}{portfolio_id}"
+
+
+async def invalidate_snapshot_cache(user_id: str, portfolio_id: int | None = None) -> None:
+    """Drop cached snapshots for one portfolio, or all of a user's if None."""
+    if portfolio_id is None:
+        await cache.delete_prefix(_snapshot_cache_key(user_id))
+    else:
+        await cache.delete(_snapshot_cache_key(user_id, portfolio_id))
+
+
+async def get_snapshot(
     db: AsyncSession, user_id: str, portfolio_id: int
-) -> list[SectorAllocation]:
-    """Calculate sector allocation.
+) -> PortfolioSnapshotRead | None:
+    """Current snapshot metrics with daily change, served from the cache.
 
-    Ported from PortfolioAnalyzer.get_sector_allocation.
+    Read-only: nothing is persisted. Holding and earnings mutations
+    invalidate the entry; the TTL bounds staleness from price moves.
+    Returns None if the portfolio is missing.
     """
-    holdings = await get_holdings(db, user_id, portfolio_id)
-    total_value = sum((h.last_price or 0) * h.shares for h in holdings)
+    key = _snapshot_cache_key(user_id, portfolio_id)
+    cached = await cache.get(key)
+    if cached is not None:
+        return PortfolioSnapshotRead.model_validate(cached)
+
+    portfolio = await get_portfolio(db, user_id, portfolio_id)
+    if portfolio is None:
+        return None
+
+    snapshot = await compute_snapshot(db, user_id, portfolio_id, portfolio.holdings)
+    result = PortfolioSnapshotRead.model_validate(snapshot)
+    result.daily_change, result.daily_change_pct = compute_daily_change(portfolio.holdings)
+    await cache.set(key, result.model_dump(mode="json"), settings.snapshot_cache_ttl)
+    return result
+
 
+def portfolio_totals(holdings: list[Holding]) -> PortfolioTotals:
+    """Totals, largest weight and sector allocation of already-loaded holdings.
+
+    In-memory counterpart of get_portfolio_totals for callers that hold the
+    rows anyway (snapshots, worker jobs).
+    """
+    total_value = sum((h.last_price or 0) * h.shares for h in holdings)
     if total_value == 0:
-        return []
+        return PortfolioTotals(num_positions=len(holdings))
 
     sector_totals: dict[str, float] = {}
+    max_value = 0.0
     for h in holdings:
         val = (h.last_price or 0) * h.shares
         sector = h.sector or "Unknown"
         sector_totals[sector] = sector_totals.get(sector, 0) + val
+        max_value = max(max_value, val)
 
-    return [
-        SectorAllocation(sector=sector, weight=val / total_value, value=round(val, 2))
-        for sector, val in sorted(sector_totals.items(), key=lambda x: -x[1])
+    return PortfolioTotals(
+        total_value=total_value,
+        num_positions=len(holdings),
+        concentration_risk=max_value / total_value,
+        sectors=[
+            SectorAllocation(sector=sector, weight=val / total_value, value=round(val, 2))
+            for sector, val in sorted(sector_totals.items(), key=lambda x: -x[1])
+        ],
+    )
+
+
+async def get_portfolio_totals(
+    db: AsyncSession, user_id: str, portfolio_id: int
+) -> PortfolioTotals:
+    """Totals, largest weight and sector allocation in one GROUP BY query.
+
+    One row per sector carries its value, holding count and largest
+    position; the portfolio total comes from a window over the groups.
+    """
+    value = func.coalesce(Holding.last_price, 0) * Holding.shares
+    sector = func.coalesce(func.nullif(Holding.sector, ""), "Unknown")
+    sector_value = func.sum(value)
+    result = await db.execute(
+        select(
+            sector.label("sector"),
+            sector_value.label("value"),
+            func.count().label("positions"),
+            func.max(value).label("max_value"),
+            func.sum(sector_value).over().label("total_value"),
+        )
+        .where(Holding.user_id == user_id, Holding.portfolio_id == portfolio_id)
+        .group_by(sector)
+        .order_by(sector_value.desc(), sector)
+    )
+    rows = result.all()
+    totals = PortfolioTotals(num_positions=sum(r.positions for r in rows))
+    total_value = rows[0].total_value if rows else 0
+    if not total_value:
+        return totals
+
+    totals.total_value = total_value
+    totals.concentration_risk = max(r.max_value for r in rows) / total_value
+    totals.sectors = [
+        SectorAllocation(sector=r.sector, weight=r.value / total_value, value=round(r.value, 2))
+        for r in rows
     ]
+    return totals
+
+
+async def get_sector_allocation(
+    db: AsyncSession, user_id: str, portfolio_id: int
+) -> list[SectorAllocation]:
+    """Calculate sector allocation.
+
+    Ported from PortfolioAnalyzer.get_sector_allocation.
+    """
+    return (await get_portfolio_totals(db, user_id, portfolio_id)).sectors
 
 
 async def get_snapshot_history(
@@ -439,18 +765,9 @@ async def get_earnings_insights(
         sentiment_summary={"positive": 0, "neutral": 0, "negative": 0, "no_data": 0}
     )
 
+    latest_calls = await get_latest_earnings(db, user_id, holdings)
     for h in holdings:
-        # Get latest earnings call for this holding (by ticker or holding_id)
-        result = await db.execute(
-            select(EarningsCall)
-            .where(
-                EarningsCall.user_id == user_id,
-                (EarningsCall.ticker == h.ticker) | (EarningsCall.holding_id == h.id),
-            )
-            .order_by(EarningsCall.created_at.desc())
-            .limit(1)
-        )
-        latest = result.scalars().first()
+        latest = latest_calls.get(h.id)
 
         if latest:
             insights.holdings_with_recent_earnings.append(h.ticker)
@@ -477,157 +794,298 @@ async def get_earnings_calendar(db: AsyncSession, user_id: str) -> list[Holding]
         .where(
             Holding.user_id == user_id,
             Holding.next_earnings_date.isnot(None),
-            Holding.next_earnings_date != "",
         )
         .order_by(Holding.next_earnings_date.asc())
     )
     return list(result.scalars().all())
 
 
+def _dashboard_cache_key(user_id: str) -> str:
+    return f"dashboard:{user_id}"
+
+
 async def get_dashboard_summary(db: AsyncSession, user_id: str) -> DashboardSummary:
-    """Compute dashboard summary: best/worst daily performer + upcoming earnings."""
-    result = await db.execute(
-        select(Holding).where(Holding.user_id == user_id)
+    """Compute dashboard summary: best/worst daily performer + upcoming earnings.
+
+    One query over the user's holdings: the best and worst daily movers by
+    window rank (ties go to the oldest holding) and every holding with
+    earnings in the next 14 days. Cached per user until holdings or prices
+    change (invalidate_holding_caches).
+    """
+    key = _dashboard_cache_key(user_id)
+    cached = await cache.get(key)
+    if cached is not None:
+        return DashboardSummary.model_validate(cached)
+
+    pct = (Holding.last_price - Holding.previous_close) / Holding.previous_close * 100
+    ranked = (
+        select(
+            Holding.id,
+            Holding.ticker,
+            pct.label("pct"),
+            func.row_number().over(order_by=(pct.desc(), Holding.id)).label("best_rank"),
+            func.row_number().over(order_by=(pct.asc(), Holding.id)).label("worst_rank"),
+        )
+        .where(
+            Holding.user_id == user_id,
+            Holding.last_price.isnot(None),
+            Holding.previous_close > 0,
+        )
+        .subquery()
     )
-    all_holdings = list(result.scalars().all())
-
-    best: PerformerInfo | None = None
-    worst: PerformerInfo | None = None
-
-    for h in all_holdings:
-        if h.last_price is not None and h.previous_close is not None and h.previous_close > 0:
-            pct = ((h.last_price - h.previous_close) / h.previous_close) * 100
-            info = PerformerInfo(ticker=h.ticker, daily_change_pct=round(pct, 2))
-            if best is None or pct > best.daily_change_pct:
-                best = info
-            if worst is None or pct < worst.daily_change_pct:
-                worst = info
-
-    # Upcoming earnings within next 14 days
-    now = datetime.now(timezone.utc).date()
-    cutoff = now + timedelta(days=14)
-    upcoming_tickers: list[str] = []
-    for h in all_holdings:
-        if h.next_earnings_date:
-            try:
-                ed = datetime.strptime(h.next_earnings_date, "%Y-%m-%d").date()
-                if now <= ed <= cutoff:
-                    upcoming_tickers.append(h.ticker)
-            except ValueError:
-                pass
-
-    return DashboardSummary(
-        best_performer=best,
-        worst_performer=worst,
-        upcoming_earnings_count=len(upcoming_tickers),
-        upcoming_earnings_tickers=upcoming_tickers,
+    today = datetime.now(timezone.utc).date()
+    rows = await db.execute(
+        union_all(
+            select(literal("best").label("kind"), ranked.c.id, ranked.c.ticker, ranked.c.pct)
+            .where(ranked.c.best_rank == 1),
+            select(literal("worst"), ranked.c.id, ranked.c.ticker, ranked.c.pct)
+            .where(ranked.c.worst_rank == 1),
+            select(literal("earnings"), Holding.id, Holding.ticker, null())
+            .where(
+                Holding.user_id == user_id,
+                Holding.next_earnings_date.between(today, today + timedelta(days=14)),
+            ),
+        ).order_by("kind", "id")
     )
 
+    summary = DashboardSummary()
+    for kind, _, ticker, change in rows.all():
+        if kind == "earnings":
+            summary.upcoming_earnings_tickers.append(ticker)
+            continue
+        info = PerformerInfo(ticker=ticker, daily_change_pct=round(change, 2))
+        if kind == "best":
+            summary.best_performer = info
+        else:
+            summary.worst_performer = info
+    summary.upcoming_earnings_count = len(summary.upcoming_earnings_tickers)
+
+    await cache.set(key, summary.model_dump(mode="json"), settings.dashboard_cache_ttl)
+    return summary
+
 
 # ─── Historical Reconstruction ───────────────────────────────────────
 
-async def reconstruct_portfolio_history(
+def history_value_series(
+    history: dict[str, list[dict]], holdings: list[Holding]
+) -> list[dict]:
+    """Daily value and invested cost of `holdings` over the downloaded history.
+
+    `history` is {ticker: [{date, close}, ...]} as returned by
+    stock_data.get_multi_ticker_history; every holding must have
+    purchased_at. Works on a (dates x holdings) matrix:
+
+    - closes are aligned on the union of trading dates and forward-filled,
+      but only from the ticker's first purchase date (earlier bars never
+      reach the portfolio);
+    - a holding is held from its purchase date on; cost per share is its
+      cost_basis, else the first close on or after the purchase date;
+    - value and cost are the held mask times per-position price/cost
+      columns, summed across holdings.
+
+    Dates before the first purchase or with zero value are dropped.
+    """
+    labels = sorted({p["date"] for points in history.values() for p in points})
+    if not labels:
+        return []
+    dates = np.array(labels, dtype="datetime64[D]")
+
+    tickers = sorted({h.ticker for h in holdings})
+    closes = np.full((len(dates), len(tickers)), np.nan)
+    for j, ticker in enumerate(tickers):
+        points = history.get(ticker, [])
+        if points:
+            point_dates = np.array([p["date"] for p in points], dtype="datetime64[D]")
+            rows = np.searchsorted(dates, point_dates)
+            closes[rows, j] = [p["close"] for p in points]
+
+    purchased = np.array([h.purchased_at for h in holdings], dtype="datetime64[D]")
+    shares = np.array([h.shares for h in holdings], dtype=float)
+    col = np.array([tickers.index(h.ticker) for h in holdings])
+
+    first_owned = np.array(
+        [purchased[col == j].min() for j in range(len(tickers))], dtype="datetime64[D]"
+    )
+    owned_closes = np.where(dates[:, None] >= first_owned[None, :], closes, np.nan)
+    prices = pd.DataFrame(owned_closes).ffill().fillna(0.0).to_numpy()
+
+    unit_cost = np.zeros(len(holdings))
+    for k, h in enumerate(holdings):
+        if h.cost_basis is not None:
+            unit_cost[k] = h.cost_basis
+            continue
+        traded = np.flatnonzero(~np.isnan(closes[:, col[k]]))
+        pos = np.searchsorted(dates[traded], purchased[k])
+        unit_cost[k] = (closes[traded[pos], col[k]] if pos < len(traded) else 0.0) or 0.0
+
+    held = dates[:, None] >= purchased[None, :]  # (dates, holdings)
+    position_value = prices[:, col] * shares * held
+    position_cost = (unit_cost * shares) * held
+
+    # Sum positions column by column in holding order rather than with a
+    # BLAS product: closes carry 4 decimals, so values often sit exactly on
+    # a half-cent and a different addition order would round differently.
+    value = np.zeros(len(dates))
+    cost = np.zeros(len(dates))
+    for k in range(len(holdings)):
+        value += position_value[:, k]
+        cost += position_cost[:, k]
+
+    keep = np.flatnonzero(held.any(axis=1) & (value > 0))
+    return [
+        {"date": labels[i], "value": round(float(value[i]), 2), "cost": round(float(cost[i]), 2)}
+        for i in keep
+    ]
+
+
+# ─── Value at Risk ────────────────────────────────────────────────────
+
+VAR_HORIZONS = (1, 10)
+VAR_LOOKBACK_DAYS = 365
+
+
+async def simulate_portfolio_var(
     db: AsyncSession,
     user_id: str,
     portfolio_id: int,
-) -> list[dict] | None:
-    """Reconstruct daily portfolio value from purchase dates using yfinance.
+    confidence: float = 0.95,
+    n_paths: int | None = None,
+    model: str = "gbm",
+) -> PortfolioVaR | None:
+    """Monte Carlo 1-day and 10-day VaR/CVaR for the current positions.
+
+    Simulates correlated daily log returns for every holding (Cholesky factor
+    of the 1-year covariance, or bootstrapped whole days) and revalues the
+    positions at their latest price. Returns None if the portfolio is missing;
+    raises montecarlo.SimulationError when there is not enough history.
+    """
+    portfolio = await get_portfolio(db, user_id, portfolio_id)
+    if portfolio is None:
+        return None
 
-    Returns list of {"date": "YYYY-MM-DD", "value": float, "cost": float}
-    or None if no holdings have purchased_at set.
+    n_paths = n_paths or settings.montecarlo_paths
+    position_values: dict[str, float] = {}
+    for h in portfolio.holdings:
+        value = (h.last_price or 0) * h.shares
+        if value > 0:
+            position_values[h.ticker] = position_values.get(h.ticker, 0.0) + value
 
-    `cost` tracks the total invested capital on each date so the benchmark
-    endpoint can compute gain-on-cost (value - cost) / cost rather than
-    raw % change from the first data point, which spikes when new holdings
-    enter the timeline.
-    """
-    from app.services import stock_data
+    result = PortfolioVaR(
+        portfolio_id=portfolio_id,
+        total_value=round(sum(position_values.values()), 2),
+        confidence=confidence,
+        model=model,
+        paths=n_paths,
+    )
+    if not position_values:
+        return result
+
+    start = date.today() - timedelta(days=VAR_LOOKBACK_DAYS)
+    closes = await price_store.get_closes(db, list(position_values), start)
+    tickers = [t for t in sorted(position_values) if t in closes]
+    result.excluded_tickers = sorted(set(position_values) - set(tickers))
+    if not tickers:
+        raise montecarlo.SimulationError("No price history available for any holding")
+
+    aligned = pd.concat([closes[t] for t in tickers], axis=1).sort_index().ffill().dropna()
+    returns = np.diff(np.log(aligned.to_numpy(dtype=float)), axis=0)
+    values = np.array([position_values[t] for t in tickers])
+
+    pnl = await executors.run_in_thread_pool(
+        montecarlo.simulate_portfolio_pnl, returns, values, VAR_HORIZONS, n_paths, model
+    )
 
-    holdings = await get_holdings(db, user_id, portfolio_id)
-    if not holdings:
+    total = float(values.sum())
+    for horizon in VAR_HORIZONS:
+        var, cvar = montecarlo.value_at_risk(pnl[horizon], confidence)
+        result.horizons.append(
+            VaRHorizon(
+                days=horizon,
+                var=round(var, 2),
+                cvar=round(cvar, 2),
+                var_pct=round(var / total * 100, 2),
+                cvar_pct=round(cvar / total * 100, 2),
+            )
+        )
+    return result
+
+
+async def forecast_portfolio(
+    db: AsyncSession,
+    user_id: str,
+    portfolio_id: int,
+    forecast_days: int = 30,
+    method: str = "linear",
+    n_paths: int | None = None,
+    model: str = "gbm",
+) -> PortfolioForecast | None:
+    """Forecast every holding and the value-weighted portfolio in one pass.
+
+    Histories come from one batched download and fits run in parallel (see
+    forecast.get_forecasts); fits are shared with /stocks/{ticker}/forecast
+    through the forecast cache. Returns None if the portfolio is missing.
+    """
+    portfolio = await get_portfolio(db, user_id, portfolio_id)
+    if portfolio is None:
         return None
 
-    # Filter to holdings with purchased_at
-    dated_holdings = [h for h in holdings if h.purchased_at is not None]
-    if not dated_holdings:
-        return None  # Fall back to snapshot-based history
+    shares: dict[str, float] = {}
+    for h in portfolio.holdings:
+        shares[h.ticker.upper()] = shares.get(h.ticker.upper(), 0.0) + h.shares
 
-    # Find the earliest purchase date
-    earliest = min(h.purchased_at for h in dated_holdings)
-    today = date.today()
-    start_str = earliest.strftime("%Y-%m-%d")
-    end_str = (today + timedelta(days=1)).strftime("%Y-%m-%d")
+    result = PortfolioForecast(
+        portfolio_id=portfolio_id, forecast_days=forecast_days, method=method
+    )
+    if not shares:
+        return result
 
-    # Gather unique tickers
-    tickers = list({h.ticker for h in dated_holdings})
+    forecasts = await forecast.get_forecasts(
+        list(shares), forecast_days, method=method, n_paths=n_paths, model=model
+    )
 
-    # Batch fetch all ticker histories
-    history = await stock_data.get_multi_ticker_history(tickers, start_str, end_str)
-    if not history:
-        return None
+    ok = {t: f for t, f in forecasts.items() if "error" not in f}
+    current_value = sum(shares[t] * f["current_price"] for t, f in ok.items())
 
-    # Build a unified date index from all tickers
-    all_dates: set[str] = set()
-    for ticker_data in history.values():
-        for point in ticker_data:
-            all_dates.add(point["date"])
-    sorted_dates = sorted(all_dates)
+    if ok:
+        qty = np.array([shares[t] for t in ok])
 
-    if not sorted_dates:
-        return None
+        def _path(key: str) -> list[float]:
+            # Summing per-holding bands assumes perfectly correlated moves,
+            # so the aggregate band is a conservative envelope.
+            stacked = np.array([f["forecast"][key] for f in ok.values()])
+            return [round(float(v), 2) for v in qty @ stacked]
 
-    # Build lookup: ticker -> {date: close_price}
-    price_lookup: dict[str, dict[str, float]] = {}
-    for ticker in tickers:
-        ticker_points = history.get(ticker, [])
-        price_lookup[ticker] = {p["date"]: p["close"] for p in ticker_points}
-
-    # Determine effective cost per share for each holding.
-    # Use user-provided cost_basis if available; otherwise fall back to
-    # the closing price on (or nearest after) the purchase date.
-    effective_cost: dict[int, float] = {}
-    for h in dated_holdings:
-        if h.cost_basis is not None:
-            effective_cost[h.id] = h.cost_basis
-        else:
-            purchase_str = h.purchased_at.strftime("%Y-%m-%d")
-            ticker_prices = price_lookup.get(h.ticker, {})
-            cost = ticker_prices.get(purchase_str)
-            if cost is None:
-                # Find the nearest trading day on or after purchase
-                for d in sorted_dates:
-                    if d >= purchase_str and h.ticker in price_lookup and d in price_lookup[h.ticker]:
-                        cost = price_lookup[h.ticker][d]
-                        break
-            effective_cost[h.id] = cost or 0.0
-
-    # For each date, sum (close * shares) for holdings purchased on or before
-    # that day.  Also track total invested cost.
-    # Forward-fill missing prices (weekends/holidays already excluded by
-    # yfinance, but gaps can still occur for individual tickers).
-    last_known_price: dict[str, float] = {}
-    portfolio_series: list[dict] = []
-
-    for d in sorted_dates:
-        daily_value = 0.0
-        daily_cost = 0.0
-        has_any_holding = False
-
-        for h in dated_holdings:
-            if h.purchased_at.strftime("%Y-%m-%d") <= d:
-                has_any_holding = True
-                close = price_lookup.get(h.ticker, {}).get(d)
-                if close is not None:
-                    last_known_price[h.ticker] = close
-                price = last_known_price.get(h.ticker, 0.0)
-                daily_value += price * h.shares
-                daily_cost += effective_cost.get(h.id, 0.0) * h.shares
-
-        if has_any_holding and daily_value > 0:
-            portfolio_series.append({
-                "date": d,
-                "value": round(daily_value, 2),
-                "cost": round(daily_cost, 2),
-            })
-
-    return portfolio_series if len(portfolio_series) >= 2 else None
+        prices = _path("prices")
+        result.aggregate = ForecastPrediction(
+            dates=next(iter(ok.values()))["forecast"]["dates"],
+            prices=prices,
+            upper_bound=_path("upper_bound"),
+            lower_bound=_path("lower_bound"),
+        )
+        result.current_value = round(current_value, 2)
+        result.predicted_value = prices[-1]
+        result.value_change = round(prices[-1] - current_value, 2)
+        if current_value > 0:
+            result.pct_change = round((prices[-1] - current_value) / current_value * 100, 2)
+        result.trend_signal = forecast.trend_signal_for(result.pct_change)
+
+    for ticker in sorted(shares):
+        f = forecasts.get(ticker, {"error": f"No forecast for {ticker}"})
+        if "error" in f:
+            result.holdings.append(
+                HoldingForecast(
+                    ticker=ticker, shares=shares[ticker], value=0.0, weight=0.0, error=f["error"]
+                )
+            )
+            continue
+        value = shares[ticker] * f["current_price"]
+        result.holdings.append(
+            HoldingForecast(
+                ticker=ticker,
+                shares=shares[ticker],
+                value=round(value, 2),
+                weight=round(value / current_value, 4) if current_value > 0 else 0.0,
+                forecast=StockForecast(**f),
+            )
+        )
+    return result
@@ -0,0 +1,412 @@
+"""
+Materialized daily portfolio value series.
+
+portfolio_daily_value keeps one row per trading day per portfolio (value,
+invested cost and the day's capital flows) computed from the local price
+store by portfolio.history_value_series. The nightly
+`extend_portfolio_daily_values` job appends the newest bar; holding edits
+delete rows from the affected purchase date on
+(portfolio.invalidate_daily_values) and, once they commit, `refresher`
+rebuilds only that tail in its own session. Reads are a plain range scan
+and never write; return math lives in services/returns.py.
+"""
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import structlog
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_session_factory
+from app.models import Holding, PortfolioDailyValue, PriceBar
+from app.schemas.analysis import (
+    BenchmarkPoint,
+    PortfolioHistoryWithBenchmark,
+    PortfolioReturns,
+    RollingReturnPoint,
+    TrailingReturn,
+)
+from app.services import price_store, returns
+from app.services.portfolio import (
+    get_holdings,
+    get_portfolio,
+    get_snapshot_history,
+    history_value_series,
+)
+
+logger = structlog.stdlib.get_logger(__name__)
+
+BENCHMARK_TICKER = "SPY"
+
+# Keep the benchmark chart responsive
+MAX_CHART_POINTS = 120
+
+# A read-triggered build that wrote nothing (no price data) is not retried sooner
+BACKFILL_RETRY_SECONDS = 900
+
+
+async def rebuild_daily_values(
+    db: AsyncSession,
+    portfolio_id: int,
+    holdings: list[Holding],
+    since: date | None = None,
+) -> int:
+    """Recompute stored rows from `since` onward (all rows if None).
+
+    The series is always evaluated from the earliest purchase so forward
+    fills and fallback costs match a full rebuild; only rows on or after
+    `since` are written; rows another rebuild already wrote are kept.
+    Returns the number of rows computed.
+    """
+    stmt = delete(PortfolioDailyValue).where(PortfolioDailyValue.portfolio_id == portfolio_id)
+    if since is not None:
+        stmt = stmt.where(PortfolioDailyValue.value_date >= since)
+    await db.execute(stmt)
+
+    dated = [h for h in holdings if h.purchased_at is not None]
+    if not dated:
+        return 0
+
+    start = min(h.purchased_at for h in dated)
+    tickers = {h.ticker.upper() for h in dated}
+    # The benchmark is synced alongside so reads can stay on the local store
+    closes = await price_store.get_closes(db, [*tickers, BENCHMARK_TICKER], start)
+    if BENCHMARK_TICKER not in tickers:
+        closes.pop(BENCHMARK_TICKER, None)
+    history = {
+        ticker: [
+            {"date": ts.strftime("%Y-%m-%d"), "close": float(close)} for ts, close in series.items()
+        ]
+        for ticker, series in closes.items()
+    }
+    series = history_value_series(history, dated)
+
+    rows = []
+    prev_cost = 0.0
+    for point in series:
+        value_date = date.fromisoformat(point["date"])
+        if since is None or value_date >= since:
+            rows.append(
+                {
+                    "portfolio_id": portfolio_id,
+                    "value_date": value_date,
+                    "value": point["value"],
+                    "cost": point["cost"],
+                    "flows": round(point["cost"] - prev_cost, 2),
+                }
+            )
+        prev_cost = point["cost"]
+
+    if rows:
+        # The nightly job and a post-edit refresh may rebuild the same days
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        await db.execute(
+            dialect.insert(PortfolioDailyValue)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["portfolio_id", "value_date"])
+        )
+    await db.flush()
+    return len(rows)
+
+
+async def extend_daily_values(db: AsyncSession, portfolio_id: int, holdings: list[Holding]) -> int:
+    """Append rows for stored price bars newer than the last stored day.
+
+    A no-op (two indexed lookups) when the series is already current.
+    """
+    dated = [h for h in holdings if h.purchased_at is not None]
+    if not dated:
+        return 0
+
+    last_row = (
+        await db.execute(
+            select(func.max(PortfolioDailyValue.value_date)).where(
+                PortfolioDailyValue.portfolio_id == portfolio_id
+            )
+        )
+    ).scalar()
+    if last_row is None:
+        return await rebuild_daily_values(db, portfolio_id, dated)
+
+    last_bar = (
+        await db.execute(
+            select(func.max(PriceBar.bar_date)).where(
+                PriceBar.ticker.in_({h.ticker for h in dated})
+            )
+        )
+    ).scalar()
+    if last_bar is None or last_bar <= last_row:
+        return 0
+    return await rebuild_daily_values(db, portfolio_id, dated, since=last_row + timedelta(days=1))
+
+
+async def get_daily_values(
+    db: AsyncSession, user_id: str, portfolio_id: int
+) -> list[PortfolioDailyValue] | None:
+    """Stored daily series for a portfolio (read-only).
+
+    A dated portfolio with no stored rows yet (e.g. created before the
+    series existed) gets a background build scheduled and an empty list
+    for now. Returns None if no holding has purchased_at (callers fall back
+    to snapshot history).
+    """
+    holdings = await get_holdings(db, user_id, portfolio_id)
+    if not any(h.purchased_at is not None for h in holdings):
+        return None
+
+    result = await db.execute(
+        select(PortfolioDailyValue)
+        .where(PortfolioDailyValue.portfolio_id == portfolio_id)
+        .order_by(PortfolioDailyValue.value_date)
+    )
+    rows = list(result.scalars().all())
+    if not rows:
+        refresher.backfill(portfolio_id)
+    return rows
+
+
+class DailyValueRefresher:
+    """Per-process, per-portfolio coalescing of daily value rebuilds.
+
+    Usage (from an after_commit callback, see portfolio.invalidate_daily_values):
+        refresher.schedule(portfolio_id)
+    """
+
+    def __init__(self, session_factory=async_session_factory):
+        self._session_factory = session_factory
+        self._inflight: dict[int, asyncio.Task] = {}
+        self._dirty: set[int] = set()
+        self._backfilled: dict[int, float] = {}
+
+    def backfill(self, portfolio_id: int) -> asyncio.Task | None:
+        """schedule() for a read that found no rows, rate limited per portfolio."""
+        now = time.monotonic()
+        last = self._backfilled.get(portfolio_id)
+        if last is not None and now - last < BACKFILL_RETRY_SECONDS:
+            return None
+        self._backfilled[portfolio_id] = now
+        return self.schedule(portfolio_id)
+
+    def schedule(self, portfolio_id: int) -> asyncio.Task:
+        """Start refreshing `portfolio_id`, or rerun the refresh already running."""
+        task = self._inflight.get(portfolio_id)
+        if task is not None and not task.done():
+            self._dirty.add(portfolio_id)
+            return task
+        task = asyncio.create_task(self._run(portfolio_id))
+        self._inflight[portfolio_id] = task
+        task.add_done_callback(lambda t: self._forget(portfolio_id, t))
+        return task
+
+    def _forget(self, portfolio_id: int, task: asyncio.Task) -> None:
+        if self._inflight.get(portfolio_id) is task:
+            del self._inflight[portfolio_id]
+
+    async def _run(self, portfolio_id: int) -> int:
+        try:
+            written = 0
+            while True:
+                self._dirty.discard(portfolio_id)
+                async with self._session_factory() as db:
+                    result = await db.execute(
+                        select(Holding).where(Holding.portfolio_id == portfolio_id)
+                    )
+                    holdings = list(result.scalars().all())
+                    written += await extend_daily_values(db, portfolio_id, holdings)
+                    await db.commit()
+                if portfolio_id not in self._dirty:
+                    return written
+        except Exception as exc:
+            logger.exception("Daily value refresh failed for %s: %s", portfolio_id, exc)
+            return 0
+
+    async def wait_idle(self) -> None:
+        """Wait for every in-flight refresh (shutdown, tests)."""
+        while self._inflight:
+            await asyncio.gather(*list(self._inflight.values()), return_exceptions=True)
+
+
+refresher = DailyValueRefresher()
+
+
+def _chart(points: list[BenchmarkPoint]) -> PortfolioHistoryWithBenchmark:
+    if len(points) > MAX_CHART_POINTS:
+        step = len(points) // 90
+        points = points[::step] + [points[-1]]
+    return PortfolioHistoryWithBenchmark(data=points)
+
+
+async def _benchmark_closes(
+    db: AsyncSession, start: date, end: date, sync: bool = False
+) -> tuple[np.ndarray, np.ndarray] | None:
+    """SPY (dates, closes) for [start, end] from the price store, or None.
+
+    Dated portfolios read without syncing (rebuild_daily_values stores SPY
+    alongside the holdings); `sync` fetches a range the store lacks.
+    """
+    load = price_store.get_closes if sync else price_store.load_closes
+    spy = (await load(db, [BENCHMARK_TICKER], start, end)).get(BENCHMARK_TICKER)
+    if spy is None or spy.empty or spy.iloc[0] <= 0:
+        return None
+    return spy.index.to_numpy(dtype="datetime64[D]"), spy.to_numpy(dtype=float)
+
+
+def _benchmark_pct(dates: np.ndarray, benchmark: tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """SPY % change since the first bar of the range, as of each date."""
+    spy_dates, spy_closes = benchmark
+    base = spy_closes[0]
+    # Days before the first bar count as flat.
+    on_day = np.nan_to_num(returns.asof(dates, spy_dates, spy_closes), nan=base)
+    return (on_day - base) / base * 100
+
+
+def daily_arrays(rows: list[PortfolioDailyValue]) -> tuple[np.ndarray, ...]:
+    return (
+        np.array([r.value_date for r in rows], dtype="datetime64[D]"),
+        np.array([r.value for r in rows]),
+        np.array([r.cost for r in rows]),
+        np.array([r.flows for r in rows]),
+    )
+
+
+async def history_with_benchmark(
+    db: AsyncSession, rows: list[PortfolioDailyValue]
+) -> PortfolioHistoryWithBenchmark | None:
+    """Portfolio TWR % alongside S&P 500 (SPY) % change over the stored range.
+
+    Returns None when there is no benchmark data for the range.
+    """
+    if len(rows) < 2:
+        return None
+    benchmark = await _benchmark_closes(db, rows[0].value_date, rows[-1].value_date)
+    if benchmark is None:
+        return None
+
+    dates, values, costs, flows = daily_arrays(rows)
+    portfolio_pct = returns.time_weighted_pct(values, costs, flows)
+    sp500_pct = _benchmark_pct(dates, benchmark)
+    return _chart(
+        [
+            BenchmarkPoint(
+                date=r.value_date.strftime("%b %d"),
+                portfolio_pct=round(float(p), 2),
+                sp500_pct=round(float(b), 2),
+            )
+            for r, p, b in zip(rows, portfolio_pct, sp500_pct)
+        ]
+    )
+
+
+async def snapshot_history_with_benchmark(
+    db: AsyncSession, user_id: str, portfolio_id: int, days: int
+) -> PortfolioHistoryWithBenchmark:
+    """Fallback for portfolios without purchase dates: % change of stored
+    snapshot values since the first snapshot, alongside SPY."""
+    snapshots = await get_snapshot_history(db, user_id, portfolio_id, days)
+    if len(snapshots) < 2 or not snapshots[0].total_value:
+        return PortfolioHistoryWithBenchmark(data=[])
+
+    # Nothing else stores SPY for undated portfolios
+    benchmark = await _benchmark_closes(
+        db, snapshots[0].created_at.date(), snapshots[-1].created_at.date(), sync=True
+    )
+    if benchmark is None:
+        return PortfolioHistoryWithBenchmark(data=[])
+
+    dates = np.array([s.created_at.date() for s in snapshots], dtype="datetime64[D]")
+    values = np.array([s.total_value or 0.0 for s in snapshots])
+    portfolio_pct = returns.pct_change_from_first(values)
+    sp500_pct = _benchmark_pct(dates, benchmark)
+    return PortfolioHistoryWithBenchmark(
+        data=[
+            BenchmarkPoint(
+                date=s.created_at.strftime("%b %d"),
+                portfolio_pct=round(float(p), 2),
+                sp500_pct=round(float(b), 2),
+            )
+            for s, p, b in zip(snapshots, portfolio_pct, sp500_pct)
+        ]
+    )
+
+
+async def get_history_with_benchmark(
+    db: AsyncSession, user_id: str, portfolio_id: int, days: int = 90
+) -> PortfolioHistoryWithBenchmark:
+    """Daily-value TWR history if holdings are dated, else snapshot history."""
+    rows = await get_daily_values(db, user_id, portfolio_id)
+    if rows:
+        result = await history_with_benchmark(db, rows)
+        if result is not None:
+            return result
+    return await snapshot_history_with_benchmark(db, user_id, portfolio_id, days)
+
+
+async def get_returns(
+    db: AsyncSession, user_id: str, portfolio_id: int, window: int = 21
+) -> PortfolioReturns | None:
+    """Return metrics over the materialized daily series.
+
+    Time-weighted (since inception, annualized once over a year), money-
+    weighted (XIRR of the daily flows plus the ending value), trailing
+    period returns and rolling `window`-day returns, each next to SPY.
+    Returns None if the portfolio is missing.
+    """
+    if await get_portfolio(db, user_id, portfolio_id) is None:
+        return None
+    result = PortfolioReturns(portfolio_id=portfolio_id, rolling_window=window)
+    rows = await get_daily_values(db, user_id, portfolio_id)
+    if not rows or len(rows) < 2:
+        return result
+
+    dates, values, costs, flows = daily_arrays(rows)
+    growth = returns.growth_index(values, costs, flows)
+    benchmark = await _benchmark_closes(db, rows[0].value_date, rows[-1].value_date)
+    spy_index = _benchmark_pct(dates, benchmark) / 100 + 1 if benchmark else None
+
+    span_days = float((dates[-1] - dates[0]).astype(int))
+    twr = float(growth[-1] - 1.0)
+    result.start_date = rows[0].value_date
+    result.end_date = rows[-1].value_date
+    result.twr_pct = round(twr * 100, 2)
+    annualized = returns.annualize(twr, span_days)
+    result.twr_annualized_pct = round(annualized * 100, 2) if annualized is not None else None
+    # Investor's view: each day's flow is paid in, the ending value comes out.
+    cash_flows = -flows
+    cash_flows[-1] += values[-1]
+    mwr = returns.xirr(dates, cash_flows)
+    result.mwr_pct = round(mwr * 100, 2) if mwr is not None else None
+    if spy_index is not None:
+        result.benchmark_pct = round(float(spy_index[-1] - 1.0) * 100, 2)
+
+    end = dates[-1]
+    starts = {label: end - np.timedelta64(n, "D") for label, n in returns.TRAILING_PERIODS.items()}
+    starts["YTD"] = np.datetime64(date(rows[-1].value_date.year - 1, 12, 31), "D")
+    for label in ("1M", "3M", "6M", "YTD", "1Y"):
+        start = starts[label]
+        p = returns.trailing_return(dates, growth, start)
+        b = returns.trailing_return(dates, spy_index, start) if spy_index is not None else None
+        result.trailing.append(
+            TrailingReturn(
+                period=label,
+                portfolio_pct=round(p * 100, 2) if p is not None else None,
+                benchmark_pct=round(b * 100, 2) if b is not None else None,
+            )
+        )
+
+    rolling = returns.rolling_returns(growth, window)
+    rolling_spy = returns.rolling_returns(spy_index, window) if spy_index is not None else None
+    for i in range(window, len(rows)):
+        result.rolling.append(
+            RollingReturnPoint(
+                date=rows[i].value_date,
+                portfolio_pct=round(float(rolling[i]) * 100, 2),
+                benchmark_pct=(
+                    round(float(rolling_spy[i]) * 100, 2) if rolling_spy is not None else None
+                ),
+            )
+        )
+    return result
@@ -72,28 +72,38 @@ async def delete_alert(db: AsyncSession, user_id: str, alert_id: int) -> bool:
     return True
 
 
-async def check_alerts_for_ticker(
-    db: AsyncSession, ticker: str, current_price: float
-) -> None:
-    """Check and trigger any active alerts for the given ticker."""
+async def check_alerts_for_prices(
+    db: AsyncSession, prices: dict[str, float]
+) -> list[PriceAlert]:
+    """Check and trigger active alerts for many tickers in one query.
+
+    `prices` maps ticker -> current price. Returns the alerts triggered.
+    """
+    prices = {t.upper(): p for t, p in prices.items() if p is not None}
+    if not prices:
+        return []
+
     result = await db.execute(
         select(PriceAlert).where(
-            PriceAlert.ticker == ticker.upper(),
+            PriceAlert.ticker.in_(prices),
             PriceAlert.triggered == False,  # noqa: E712
         )
     )
-    alerts = list(result.scalars().all())
 
-    for alert in alerts:
+    triggered: list[PriceAlert] = []
+    now = datetime.now(timezone.utc)
+    for alert in result.scalars().all():
+        current_price = prices[alert.ticker]
         should_trigger = (
             (alert.direction == "above" and current_price >= alert.target_price)
             or (alert.direction == "below" and current_price <= alert.target_price)
         )
         if should_trigger:
             alert.triggered = True
-            alert.triggered_at = datetime.now(timezone.utc)
+            alert.triggered_at = now
             alert.triggered_price = current_price
             db.add(alert)
+            triggered.append(alert)
             logger.info(
                 "Price alert triggered",
                 alert_id=alert.id,
@@ -103,5 +113,13 @@ async def check_alerts_for_ticker(
                 current=current_price,
             )
 
-    if alerts:
+    if triggered:
         await db.flush()
+    return triggered
+
+
+async def check_alerts_for_ticker(
+    db: AsyncSession, ticker: str, current_price: float
+) -> None:
+    """Check and trigger any active alerts for the given ticker."""
+    await check_alerts_for_prices(db, {ticker: current_price})
@@ -0,0 +1,141 @@
+"""
+Local daily price store backed by the price_bar table.
+
+Backtests and batch analytics read bars from here instead of re-downloading
+the same history from yfinance on every call. `get_closes` is read-through:
+tickers whose stored range does not cover the request are synced first.
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+import structlog
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import PriceBar
+from app.services import stock_data
+
+logger = structlog.stdlib.get_logger(__name__)
+
+# Stored bars may lag `end` by a weekend plus a market holiday before a sync.
+MAX_STALENESS_DAYS = 4
+
+_INSERT_CHUNK = 5000
+
+
+async def load_closes(
+    db: AsyncSession,
+    tickers: list[str],
+    start: date | None = None,
+    end: date | None = None,
+) -> dict[str, pd.Series]:
+    """Read stored daily closes without touching the network.
+
+    Returns {ticker: Series of closes indexed by DatetimeIndex, ascending}.
+    Tickers with no stored bars are omitted.
+    """
+    tickers = sorted({t.upper() for t in tickers})
+    if not tickers:
+        return {}
+
+    stmt = select(PriceBar.ticker, PriceBar.bar_date, PriceBar.close).where(
+        PriceBar.ticker.in_(tickers)
+    )
+    if start is not None:
+        stmt = stmt.where(PriceBar.bar_date >= start)
+    if end is not None:
+        stmt = stmt.where(PriceBar.bar_date <= end)
+    stmt = stmt.order_by(PriceBar.ticker, PriceBar.bar_date)
+
+    result = await db.execute(stmt)
+    rows = result.all()
+    if not rows:
+        return {}
+
+    df = pd.DataFrame(rows, columns=["ticker", "bar_date", "close"])
+    df["bar_date"] = pd.to_datetime(df["bar_date"])
+    return {
+        ticker: group.set_index("bar_date")["close"].astype(float).rename(ticker)
+        for ticker, group in df.groupby("ticker", sort=True)
+    }
+
+
+async def sync_closes(
+    db: AsyncSession,
+    tickers: list[str],
+    start: date,
+    end: date,
+) -> int:
+    """Download closes for [start, end] in one batched call and store them.
+
+    Existing bars in the range are replaced. Returns the number of bars written.
+    """
+    tickers = sorted({t.upper() for t in tickers})
+    if not tickers:
+        return 0
+
+    history = await stock_data.get_multi_ticker_history(
+        tickers,
+        start.strftime("%Y-%m-%d"),
+        (end + timedelta(days=1)).strftime("%Y-%m-%d"),  # yfinance end is exclusive
+    )
+    rows = [
+        {
+            "ticker": ticker,
+            "bar_date": date.fromisoformat(point["date"]),
+            "close": point["close"],
+        }
+        for ticker, points in history.items()
+        for point in points
+    ]
+    fetched = sorted({row["ticker"] for row in rows})
+    if not fetched:
+        logger.warning("No bars downloaded", tickers=tickers)
+        return 0
+
+    await db.execute(
+        delete(PriceBar).where(
+            PriceBar.ticker.in_(fetched),
+            PriceBar.bar_date >= start,
+            PriceBar.bar_date <= end,
+        )
+    )
+    for i in range(0, len(rows), _INSERT_CHUNK):
+        await db.execute(insert(PriceBar), rows[i : i + _INSERT_CHUNK])
+    await db.flush()
+
+    logger.info("Stored daily bars", tickers=fetched, bars=len(rows))
+    return len(rows)
+
+
+async def get_closes(
+    db: AsyncSession,
+    tickers: list[str],
+    start: date,
+    end: date | None = None,
+) -> dict[str, pd.Series]:
+    """Return closes for [start, end], syncing tickers the store does not cover."""
+    tickers = sorted({t.upper() for t in tickers})
+    end = end or date.today()
+    if not tickers:
+        return {}
+
+    result = await db.execute(
+        select(PriceBar.ticker, func.min(PriceBar.bar_date), func.max(PriceBar.bar_date))
+        .where(PriceBar.ticker.in_(tickers))
+        .group_by(PriceBar.ticker)
+    )
+    coverage = {ticker: (first, last) for ticker, first, last in result.all()}
+
+    stale = [
+        t
+        for t in tickers
+        if t not in coverage
+        or coverage[t][0] > start + timedelta(days=MAX_STALENESS_DAYS)
+        or coverage[t][1] < end - timedelta(days=MAX_STALENESS_DAYS)
+    ]
+    if stale:
+        await sync_closes(db, stale, start, end)
+
+    return await load_closes(db, tickers, start, end)
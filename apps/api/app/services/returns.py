@@ -0,0 +1,120 @@
+"""
+Portfolio return analytics.
+
+Pure NumPy helpers behind the history and returns endpoints: time-weighted
+returns chained from daily values with capital flows excluded,
+money-weighted return (XIRR), trailing and rolling returns, and as-of joins
+of a benchmark series onto portfolio dates via searchsorted. Date arrays
+are numpy datetime64[D], ascending.
+"""
+
+import numpy as np
+
+DAYS_PER_YEAR = 365.0
+
+# Calendar days back from the last point; YTD is handled by the caller.
+TRAILING_PERIODS: dict[str, int] = {"1M": 30, "3M": 91, "6M": 182, "1Y": 365}
+
+
+def asof(dates: np.ndarray, ref_dates: np.ndarray, ref_values: np.ndarray) -> np.ndarray:
+    """Latest `ref_values` entry on or before each of `dates` (NaN before the first)."""
+    idx = np.searchsorted(ref_dates, dates, side="right") - 1
+    out = ref_values[np.clip(idx, 0, None)].astype(float)
+    out[idx < 0] = np.nan
+    return out
+
+
+def growth_index(values: np.ndarray, costs: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """Chained time-weighted growth of 1.0 invested on the first day.
+
+    Each day's return excludes that day's capital flow, so money added to
+    the portfolio does not show up as a gain. Flows only rebase once there
+    was invested capital the day before. `values` must be positive.
+    """
+    if len(values) == 0:
+        return np.array([])
+    adjusted = values[1:] - np.where(costs[:-1] > 0, flows[1:], 0.0)
+    return np.concatenate([[1.0], np.cumprod(adjusted / values[:-1])])
+
+
+def time_weighted_pct(values: np.ndarray, costs: np.ndarray, flows: np.ndarray) -> np.ndarray:
+    """Cumulative time-weighted return (%) at each day."""
+    return (growth_index(values, costs, flows) - 1.0) * 100
+
+
+def pct_change_from_first(values: np.ndarray) -> np.ndarray:
+    """Simple % change of every point relative to the first."""
+    return (values - values[0]) / values[0] * 100
+
+
+def trailing_return(
+    dates: np.ndarray, index: np.ndarray, period_start: np.datetime64
+) -> float | None:
+    """Return of a growth/price index from `period_start` to the last date.
+
+    Uses the last point on or before `period_start`; None if the series
+    starts after it.
+    """
+    i = np.searchsorted(dates, period_start, side="right") - 1
+    if i < 0 or index[i] <= 0:
+        return None
+    return float(index[-1] / index[i] - 1.0)
+
+
+def rolling_returns(index: np.ndarray, window: int) -> np.ndarray:
+    """Return over the trailing `window` points at each point (NaN until full)."""
+    out = np.full(len(index), np.nan)
+    if window < len(index):
+        out[window:] = index[window:] / index[:-window] - 1.0
+    return out
+
+
+def annualize(total_return: float, days: float) -> float | None:
+    """Annualized rate for a total return over `days`; None under one year."""
+    if days < DAYS_PER_YEAR or total_return <= -1:
+        return None
+    return float((1.0 + total_return) ** (DAYS_PER_YEAR / days) - 1.0)
+
+
+def xirr(dates: np.ndarray, amounts: np.ndarray) -> float | None:
+    """Annualized money-weighted return of dated cash flows.
+
+    `amounts` are signed from the investor's side (contributions negative,
+    ending value positive). Newton's method with a bisection fallback;
+    None if the flows have no sign change or no root is found.
+    """
+    if len(amounts) < 2 or not ((amounts > 0).any() and (amounts < 0).any()):
+        return None
+    years = (dates - dates[0]).astype("timedelta64[D]").astype(float) / DAYS_PER_YEAR
+
+    def npv(rate: float) -> float:
+        return float(np.sum(amounts / (1.0 + rate) ** years))
+
+    rate = 0.1
+    for _ in range(50):
+        discount = (1.0 + rate) ** years
+        value = np.sum(amounts / discount)
+        slope = np.sum(-years * amounts / (discount * (1.0 + rate)))
+        if slope == 0 or not np.isfinite(value):
+            break
+        step = value / slope
+        rate -= step
+        if rate <= -1:
+            break
+        if abs(step) < 1e-10:
+            return float(rate)
+
+    lo, hi = -0.9999, 100.0
+    f_lo, f_hi = npv(lo), npv(hi)
+    if not np.isfinite(f_lo) or np.sign(f_lo) == np.sign(f_hi):
+        return None
+    for _ in range(200):
+        mid = (lo + hi) / 2
+        f_mid = npv(mid)
+        if abs(f_mid) < 1e-9 or hi - lo < 1e-12:
+            return float(mid)
+        if np.sign(f_mid) == np.sign(f_lo):
+            lo, f_lo = mid, f_mid
+        else:
+            hi = mid
+    return float((lo + hi) / 2)
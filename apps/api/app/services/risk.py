@@ -0,0 +1,211 @@
+"""
+Portfolio risk analytics.
+
+Volatility, realized beta vs SPY, marginal risk contributions and the
+correlation matrix come from a Ledoit-Wolf shrinkage covariance of daily
+log returns over the past year. Shrinkage toward a scaled identity keeps
+the matrix well conditioned when a portfolio holds many names relative to
+the number of trading days.
+
+Covariance blocks depend only on the ticker set and the price data, not on
+share counts, so they are cached by (ticker set, as-of date) in the shared
+cache and reused by every user holding the same names; weights are applied
+per request. Max drawdown is measured on the materialized daily value
+series (services/portfolio_history.py) with capital flows excluded.
+
+The NumPy helpers are blocking; get_portfolio_risk runs the covariance fit
+via executors.run_in_thread_pool.
+"""
+
+import hashlib
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core import executors
+from app.core.cache import cache
+from app.schemas.analysis import PortfolioRisk, RiskContribution
+from app.services import portfolio_history, price_store, returns
+from app.services.portfolio import get_portfolio
+
+TRADING_DAYS = 252
+LOOKBACK_DAYS = 365
+MIN_OBSERVATIONS = 20
+
+
+class RiskError(Exception):
+    pass
+
+
+def ledoit_wolf(x: np.ndarray) -> tuple[np.ndarray, float]:
+    """Ledoit-Wolf shrunk covariance of a (n_days, n_assets) return matrix.
+
+    Shrinks the sample covariance toward mu * I (mu = mean variance) with
+    the analytically optimal intensity. Returns (covariance, shrinkage).
+    """
+    n, p = x.shape
+    x = x - x.mean(axis=0)
+    sample = x.T @ x / n
+    mu = np.trace(sample) / p
+    delta = np.sum((sample - mu * np.eye(p)) ** 2) / p
+    x2 = x**2
+    beta = (np.sum(x2.T @ x2) / n - np.sum(sample**2)) / (n * p)
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+    return (1 - shrinkage) * sample + shrinkage * mu * np.eye(p), float(shrinkage)
+
+
+def correlation(cov: np.ndarray) -> np.ndarray:
+    """Correlation matrix of a covariance matrix (zero-variance rows are 0)."""
+    std = np.sqrt(np.diag(cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = cov / np.outer(std, std)
+    return np.nan_to_num(corr)
+
+
+def risk_contributions(
+    weights: np.ndarray, cov: np.ndarray
+) -> tuple[float, np.ndarray, np.ndarray]:
+    """(portfolio sigma, marginal contributions, % of total risk) per asset.
+
+    The marginal contribution d(sigma)/d(w_i) = (cov @ w)_i / sigma; each
+    asset's share w_i * marginal_i sums to sigma across assets.
+    """
+    sigma = float(np.sqrt(weights @ cov @ weights))
+    if sigma == 0:
+        return 0.0, np.zeros_like(weights), np.zeros_like(weights)
+    marginal = cov @ weights / sigma
+    return sigma, marginal, weights * marginal / sigma
+
+
+def max_drawdown(index: np.ndarray) -> float:
+    """Largest peak-to-trough fall of a growth index, as a negative fraction."""
+    if len(index) == 0:
+        return 0.0
+    return float(np.min(index / np.maximum.accumulate(index) - 1.0))
+
+
+def fit_covariance_block(log_returns: np.ndarray) -> dict:
+    """Covariance block for assets plus the benchmark in the last column.
+
+    Holdings get the shrunk covariance; the covariance of each holding with
+    the benchmark (for beta) uses the plain sample estimate.
+    """
+    cov, shrinkage = ledoit_wolf(log_returns[:, :-1])
+    sample = np.cov(log_returns, rowvar=False, ddof=0)
+    return {
+        "cov": cov.tolist(),
+        "shrinkage": shrinkage,
+        "benchmark_cov": sample[:-1, -1].tolist(),
+        "benchmark_var": float(sample[-1, -1]),
+        "observations": len(log_returns),
+    }
+
+
+def _block_cache_key(tickers: list[str], as_of: date) -> str:
+    digest = hashlib.sha1(",".join(tickers).encode()).hexdigest()[:16]
+    return f"risk:cov:{as_of.isoformat()}:{digest}"
+
+
+async def get_covariance_block(
+    db: AsyncSession, tickers: list[str], as_of: date
+) -> tuple[list[str], list[str], dict]:
+    """Cached covariance block for `tickers` over the year before `as_of`.
+
+    Returns (tickers used, tickers without history, block). Raises
+    RiskError when there is too little overlapping history.
+    """
+    key = _block_cache_key(tickers, as_of)
+    cached = await cache.get(key)
+    if cached is not None:
+        return cached["tickers"], cached["excluded"], cached["block"]
+
+    benchmark = portfolio_history.BENCHMARK_TICKER
+    closes = await price_store.get_closes(
+        db, [*tickers, benchmark], as_of - timedelta(days=LOOKBACK_DAYS), as_of
+    )
+    if benchmark not in closes:
+        raise RiskError("No benchmark price history available")
+    used = [t for t in tickers if t in closes]
+    excluded = [t for t in tickers if t not in closes]
+    if not used:
+        raise RiskError("No price history available for any holding")
+
+    aligned = pd.concat([closes[t] for t in [*used, benchmark]], axis=1).sort_index()
+    aligned = aligned.ffill().dropna()
+    log_returns = np.diff(np.log(aligned.to_numpy(dtype=float)), axis=0)
+    if len(log_returns) < MIN_OBSERVATIONS:
+        raise RiskError(f"Need at least {MIN_OBSERVATIONS} aligned daily returns")
+
+    block = await executors.run_in_thread_pool(fit_covariance_block, log_returns)
+    await cache.set(
+        key,
+        {"tickers": used, "excluded": excluded, "block": block},
+        settings.risk_cache_ttl,
+    )
+    return used, excluded, block
+
+
+async def get_portfolio_risk(
+    db: AsyncSession, user_id: str, portfolio_id: int
+) -> PortfolioRisk | None:
+    """Risk metrics for the current positions, weighted by market value.
+
+    Returns None if the portfolio is missing; raises RiskError when there is
+    not enough price history.
+    """
+    portfolio = await get_portfolio(db, user_id, portfolio_id)
+    if portfolio is None:
+        return None
+
+    position_values: dict[str, float] = {}
+    for h in portfolio.holdings:
+        value = (h.last_price or 0) * h.shares
+        if value > 0:
+            position_values[h.ticker] = position_values.get(h.ticker, 0.0) + value
+
+    result = PortfolioRisk(portfolio_id=portfolio_id)
+    if not position_values:
+        return result
+
+    as_of = date.today()
+    tickers, excluded, block = await get_covariance_block(db, sorted(position_values), as_of)
+    values = np.array([position_values[t] for t in tickers])
+    weights = values / values.sum()
+    cov = np.array(block["cov"])
+
+    sigma, marginal, share = risk_contributions(weights, cov)
+    beta = (
+        float(weights @ np.array(block["benchmark_cov"])) / block["benchmark_var"]
+        if block["benchmark_var"] > 0
+        else None
+    )
+
+    result.as_of = as_of
+    result.tickers = tickers
+    result.excluded_tickers = excluded
+    result.observations = block["observations"]
+    result.shrinkage = round(block["shrinkage"], 4)
+    result.volatility_pct = round(sigma * np.sqrt(TRADING_DAYS) * 100, 2)
+    result.beta = round(beta, 3) if beta is not None else None
+    result.contributions = [
+        RiskContribution(
+            ticker=t,
+            weight=round(float(w), 4),
+            marginal_pct=round(float(m) * np.sqrt(TRADING_DAYS) * 100, 2),
+            contribution_pct=round(float(s) * 100, 2),
+        )
+        for t, w, m, s in zip(tickers, weights, marginal, share)
+    ]
+    result.correlation = np.round(correlation(cov), 3).tolist()
+
+    rows = await portfolio_history.get_daily_values(db, user_id, portfolio_id)
+    start = as_of - timedelta(days=LOOKBACK_DAYS)
+    rows = [r for r in rows or [] if r.value_date >= start]
+    if len(rows) > 1:
+        _, daily_values, costs, flows = portfolio_history.daily_arrays(rows)
+        index = returns.growth_index(daily_values, costs, flows)
+        result.max_drawdown_pct = round(max_drawdown(index) * 100, 2)
+    return result
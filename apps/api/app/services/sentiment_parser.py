@@ -3,6 +3,15 @@ Parse structured sentiment data from AI earnings analysis text.
 
 Extracts sentiment_score, guidance_outlook, risk/growth mention counts,
 and key financial metrics from the sectioned AI response format.
+
+Sections are located in one pass: a single header regex finds every
+parsed section, and each body ends at the next numbered line. Keyword
+lists are then counted with str.count / `in` over the lowercased body of
+the section they read, which in CPython beats a combined keyword automaton
+(nearly every letter can start a keyword, so the regex engine cannot skip
+ahead). The previous parser, which re-searched the whole text once per
+section, is kept in benchmarks/bench_sentiment_parser.py for timing and
+output parity checks.
 """
 
 import re
@@ -10,6 +19,71 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Numbered sections of the earnings prompt (ai_analysis.EARNINGS_SECTIONS) that are parsed
+FINANCIAL_PERFORMANCE = 2
+BUSINESS_HIGHLIGHTS = 3
+MANAGEMENT_GUIDANCE = 4
+RISK_FACTORS = 5
+SENTIMENT_ANALYSIS = 7
+
+_SECTION_NAMES = {
+    FINANCIAL_PERFORMANCE: "FINANCIAL PERFORMANCE",
+    BUSINESS_HIGHLIGHTS: "BUSINESS HIGHLIGHTS",
+    MANAGEMENT_GUIDANCE: "MANAGEMENT GUIDANCE",
+    RISK_FACTORS: "RISK FACTORS",
+    SENTIMENT_ANALYSIS: "SENTIMENT ANALYSIS",
+}
+
+# Checked in this order; the first tier with a phrase present sets the score
+SENTIMENT_TIERS = [
+    (0.8, ["strongly positive", "very positive", "highly positive", "bullish"]),
+    (-0.8, ["strongly negative", "very negative", "highly negative", "bearish"]),
+    (0.5, ["positive", "optimistic", "confident", "upbeat", "encouraging"]),
+    (-0.5, ["negative", "pessimistic", "cautious", "concerning", "disappointing"]),
+    (0.0, ["neutral", "mixed", "balanced", "moderate"]),
+]
+
+POSITIVE_GUIDANCE = [
+    "raised guidance", "increased outlook", "positive guidance",
+    "above expectations", "strong outlook", "optimistic forecast",
+    "upside", "accelerat", "raised", "exceeded",
+]
+NEGATIVE_GUIDANCE = [
+    "lowered guidance", "reduced outlook", "negative guidance",
+    "below expectations", "cautious outlook", "downside",
+    "cut", "lowered", "missed", "decline",
+]
+
+RISK_KEYWORDS = [
+    "risk", "challenge", "headwind", "uncertainty", "threat",
+    "competition", "regulatory", "volatility", "concern", "pressure",
+    "decline", "weakness", "disruption", "litigation", "debt",
+]
+GROWTH_KEYWORDS = [
+    "growth", "expansion", "new product", "innovation", "launch",
+    "market share", "opportunity", "momentum", "increase", "scale",
+    "revenue growth", "acquisition", "partnership", "pipeline",
+]
+
+_HEADER_RE = re.compile(
+    # The group follows the digit so the engine can skip to candidate digits
+    "|".join(rf"{num}\.\s*(?P<s{num}>){name}" for num, name in _SECTION_NAMES.items()),
+    re.IGNORECASE,
+)
+# A section runs until the next "<n>. <Letter>" (case-insensitive, as before)
+_SECTION_END_RE = re.compile(r"\d+\.\s+(?i:[A-Z])")
+
+_REVENUE_RE = re.compile(
+    r"revenue\s*(?:of\s*)?[\$]?([\d,.]+)\s*(billion|million|B|M)?", re.IGNORECASE
+)
+_EPS_RE = re.compile(r"(?:EPS|earnings per share)\s*(?:of\s*)?[\$]?([\d,.]+)", re.IGNORECASE)
+_MARGIN_RE = re.compile(
+    r"(?:gross|operating|net|profit)\s*margin\s*(?:of\s*)?(\d+\.?\d*)\s*%", re.IGNORECASE
+)
+_YOY_RE = re.compile(r"(\d+\.?\d*)\s*%\s*(?:year-over-year|YoY|y\/y)", re.IGNORECASE)
+
+Span = tuple[int, int]
+
 
 def parse_analysis(text: str) -> dict:
     """Parse an AI-generated earnings analysis into structured fields.
@@ -30,84 +104,74 @@ def parse_analysis(text: str) -> dict:
     }
 
     try:
-        result["sentiment_score"] = _extract_sentiment_score(text)
-        result["guidance_outlook"] = _extract_guidance_outlook(text)
-        result["risk_mentions"] = _count_risk_mentions(text)
-        result["growth_mentions"] = _count_growth_mentions(text)
-        result["key_metrics"] = _extract_key_metrics(text)
+        sections = _split_sections(text)
+
+        def lowered(num: int) -> str | None:
+            if num not in sections:
+                return None
+            start, end = sections[num]
+            return text[start:end].lower()
+
+        result["sentiment_score"] = _sentiment_score(
+            lowered(SENTIMENT_ANALYSIS) or text.lower()
+        )
+        result["guidance_outlook"] = _guidance_outlook(
+            lowered(MANAGEMENT_GUIDANCE) or text.lower()
+        )
+        risk = lowered(RISK_FACTORS)
+        if risk:
+            result["risk_mentions"] = sum(map(risk.count, RISK_KEYWORDS))
+        growth = lowered(BUSINESS_HIGHLIGHTS)
+        if growth:
+            result["growth_mentions"] = sum(map(growth.count, GROWTH_KEYWORDS))
+        if FINANCIAL_PERFORMANCE in sections:
+            start, end = sections[FINANCIAL_PERFORMANCE]
+            result["key_metrics"] = _extract_key_metrics(text[start:end].strip())
     except Exception as exc:
         logger.warning("Failed to parse analysis text: %s", exc)
 
     return result
 
 
-def _extract_section(text: str, section_num: int, section_name: str) -> str:
-    """Extract text between a numbered section header and the next section."""
-    pattern = rf"{section_num}\.\s*{section_name}.*?\n(.*?)(?=\d+\.\s+[A-Z]|\Z)"
-    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
-    return match.group(1).strip() if match else ""
-
-
-def _extract_sentiment_score(text: str) -> float:
-    """Extract sentiment score from the SENTIMENT ANALYSIS section."""
-    section = _extract_section(text, 7, "SENTIMENT ANALYSIS")
-    if not section:
-        # Fall back to searching the full text
-        section = text
-
-    text_lower = section.lower()
-
-    # Look for explicit sentiment keywords
-    strong_positive = ["strongly positive", "very positive", "highly positive", "bullish"]
-    strong_negative = ["strongly negative", "very negative", "highly negative", "bearish"]
-    positive = ["positive", "optimistic", "confident", "upbeat", "encouraging"]
-    negative = ["negative", "pessimistic", "cautious", "concerning", "disappointing"]
-    neutral = ["neutral", "mixed", "balanced", "moderate"]
-
-    for phrase in strong_positive:
-        if phrase in text_lower:
-            return 0.8
-
-    for phrase in strong_negative:
-        if phrase in text_lower:
-            return -0.8
-
-    for phrase in positive:
-        if phrase in text_lower:
-            return 0.5
-
-    for phrase in negative:
-        if phrase in text_lower:
-            return -0.5
-
-    for phrase in neutral:
-        if phrase in text_lower:
-            return 0.0
+def _split_sections(text: str) -> dict[int, Span]:
+    """Body span of each parsed section that has content.
 
+    A body starts on the line after the first "<n>. <NAME>" header and ends
+    at the next "<n>. <Letter>"; sections that are blank are left out, as
+    their callers fall back (or return nothing) for an empty section.
+    """
+    sections: dict[int, Span] = {}
+    seen: set[int] = set()
+    for header in _HEADER_RE.finditer(text):
+        num = int(header.lastgroup[1:])
+        if num in seen:
+            continue
+        seen.add(num)
+        newline = text.find("\n", header.end())
+        if newline == -1:
+            continue
+        start = newline + 1
+        end = _SECTION_END_RE.search(text, start)
+        span = (start, end.start() if end else len(text))
+        if text[span[0]:span[1]].strip():
+            sections[num] = span
+        if len(seen) == len(_SECTION_NAMES):
+            break
+    return sections
+
+
+def _sentiment_score(text_lower: str) -> float:
+    """Score from the SENTIMENT ANALYSIS section (or the full text)."""
+    for score, phrases in SENTIMENT_TIERS:
+        if any(map(text_lower.__contains__, phrases)):
+            return score
     return 0.0
 
 
-def _extract_guidance_outlook(text: str) -> str:
-    """Extract guidance outlook from MANAGEMENT GUIDANCE section."""
-    section = _extract_section(text, 4, "MANAGEMENT GUIDANCE")
-    if not section:
-        section = text
-
-    text_lower = section.lower()
-
-    positive_words = [
-        "raised guidance", "increased outlook", "positive guidance",
-        "above expectations", "strong outlook", "optimistic forecast",
-        "upside", "accelerat", "raised", "exceeded",
-    ]
-    negative_words = [
-        "lowered guidance", "reduced outlook", "negative guidance",
-        "below expectations", "cautious outlook", "downside",
-        "cut", "lowered", "missed", "decline",
-    ]
-
-    pos_count = sum(1 for w in positive_words if w in text_lower)
-    neg_count = sum(1 for w in negative_words if w in text_lower)
+def _guidance_outlook(text_lower: str) -> str:
+    """Outlook from the MANAGEMENT GUIDANCE section (or the full text)."""
+    pos_count = sum(map(text_lower.__contains__, POSITIVE_GUIDANCE))
+    neg_count = sum(map(text_lower.__contains__, NEGATIVE_GUIDANCE))
 
     if pos_count > neg_count:
         return "positive"
@@ -116,75 +180,23 @@ def _extract_guidance_outlook(text: str) -> str:
     return "neutral"
 
 
-def _count_risk_mentions(text: str) -> int:
-    """Count risk-related keywords in RISK FACTORS section."""
-    section = _extract_section(text, 5, "RISK FACTORS")
-    if not section:
-        return 0
-
-    risk_keywords = [
-        "risk", "challenge", "headwind", "uncertainty", "threat",
-        "competition", "regulatory", "volatility", "concern", "pressure",
-        "decline", "weakness", "disruption", "litigation", "debt",
-    ]
-
-    text_lower = section.lower()
-    return sum(text_lower.count(kw) for kw in risk_keywords)
-
-
-def _count_growth_mentions(text: str) -> int:
-    """Count growth-related keywords in BUSINESS HIGHLIGHTS section."""
-    section = _extract_section(text, 3, "BUSINESS HIGHLIGHTS")
-    if not section:
-        return 0
-
-    growth_keywords = [
-        "growth", "expansion", "new product", "innovation", "launch",
-        "market share", "opportunity", "momentum", "increase", "scale",
-        "revenue growth", "acquisition", "partnership", "pipeline",
-    ]
-
-    text_lower = section.lower()
-    return sum(text_lower.count(kw) for kw in growth_keywords)
-
-
-def _extract_key_metrics(text: str) -> dict:
-    """Extract key financial metrics from FINANCIAL PERFORMANCE section."""
-    section = _extract_section(text, 2, "FINANCIAL PERFORMANCE")
-    if not section:
-        return {}
-
+def _extract_key_metrics(section: str) -> dict:
+    """Extract key financial metrics from the FINANCIAL PERFORMANCE section."""
     metrics: dict[str, str] = {}
 
-    # Revenue patterns
-    rev_match = re.search(
-        r"revenue\s*(?:of\s*)?[\$]?([\d,.]+)\s*(billion|million|B|M)?",
-        section, re.IGNORECASE
-    )
+    rev_match = _REVENUE_RE.search(section)
     if rev_match:
         metrics["revenue"] = rev_match.group(0).strip()
 
-    # EPS patterns
-    eps_match = re.search(
-        r"(?:EPS|earnings per share)\s*(?:of\s*)?[\$]?([\d,.]+)",
-        section, re.IGNORECASE
-    )
+    eps_match = _EPS_RE.search(section)
     if eps_match:
         metrics["eps"] = eps_match.group(0).strip()
 
-    # Margin patterns
-    margin_match = re.search(
-        r"(?:gross|operating|net|profit)\s*margin\s*(?:of\s*)?(\d+\.?\d*)\s*%",
-        section, re.IGNORECASE
-    )
+    margin_match = _MARGIN_RE.search(section)
     if margin_match:
         metrics["margin"] = margin_match.group(0).strip()
 
-    # YoY growth
-    yoy_match = re.search(
-        r"(\d+\.?\d*)\s*%\s*(?:year-over-year|YoY|y\/y)",
-        section, re.IGNORECASE
-    )
+    yoy_match = _YOY_RE.search(section)
     if yoy_match:
         metrics["yoy_growth"] = yoy_match.group(0).strip()
 
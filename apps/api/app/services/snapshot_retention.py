@@ -0,0 +1,140 @@
+"""
+Portfolio snapshot retention.
+
+Snapshots are kept at full resolution for settings.snapshot_full_resolution_days,
+then thinned to the last snapshot of each day until
+settings.snapshot_daily_resolution_days, and to the last snapshot of each ISO
+week beyond that. Each nightly run only scans the rows that crossed a cutoff
+since the previous run (a job_watermark row records how far the weekly tier
+got), so its cost does not grow with the archive. Keeping the closing
+snapshot of a period (rather than averaging) leaves every stored row a real
+point-in-time reading, so history charts and the % change fallback need no
+special cases.
+
+In Postgres portfolio_snapshot is range-partitioned by created_at month
+(migration 010); ensure_snapshot_partitions creates upcoming months so new
+rows never land in the DEFAULT partition. Both run from the nightly
+`prune_portfolio_snapshots` worker job.
+"""
+
+from collections.abc import Callable, Hashable
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import JobWatermark, PortfolioSnapshot
+
+PARTITION_MONTHS_AHEAD = 3
+_DELETE_BATCH = 1000
+# Rows before this watermark's week were thinned to weekly by earlier runs
+WEEKLY_WATERMARK = "snapshot_retention.weekly"
+
+
+def _day(ts: datetime) -> Hashable:
+    return ts.date()
+
+
+def _iso_week(ts: datetime) -> Hashable:
+    return ts.isocalendar()[:2]
+
+
+def _week_start(ts: datetime) -> datetime:
+    """Midnight on the Monday of `ts`'s ISO week."""
+    return (ts - timedelta(days=ts.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def downsample_snapshots(
+    db: AsyncSession,
+    before: datetime,
+    bucket: Callable[[datetime], Hashable],
+    after: datetime | None = None,
+) -> int:
+    """Keep only the last snapshot per portfolio per `bucket` in [after, before).
+
+    Returns the number of rows deleted.
+    """
+    stmt = select(
+        PortfolioSnapshot.id, PortfolioSnapshot.portfolio_id, PortfolioSnapshot.created_at
+    ).where(PortfolioSnapshot.created_at < before)
+    if after is not None:
+        stmt = stmt.where(PortfolioSnapshot.created_at >= after)
+    rows = (
+        await db.execute(
+            stmt.order_by(PortfolioSnapshot.portfolio_id, PortfolioSnapshot.created_at)
+        )
+    ).all()
+
+    # Rows are ordered, so a row is redundant when the next one shares its bucket
+    redundant = [
+        row.id
+        for row, nxt in zip(rows, rows[1:])
+        if row.portfolio_id == nxt.portfolio_id and bucket(row.created_at) == bucket(nxt.created_at)
+    ]
+    for i in range(0, len(redundant), _DELETE_BATCH):
+        # The created_at bound lets Postgres prune untouched partitions
+        await db.execute(
+            delete(PortfolioSnapshot)
+            .where(
+                PortfolioSnapshot.id.in_(redundant[i : i + _DELETE_BATCH]),
+                PortfolioSnapshot.created_at < before,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    return len(redundant)
+
+
+async def apply_retention(db: AsyncSession, now: datetime | None = None) -> dict[str, int]:
+    """Downsample old snapshots to daily, then weekly, resolution.
+
+    The weekly tier resumes from the last run's cutoff however long ago that
+    was; the first run scans the whole archive. Returns rows deleted per tier.
+    """
+    now = now or datetime.now(timezone.utc)
+    daily_cutoff = now - timedelta(days=settings.snapshot_full_resolution_days)
+    weekly_cutoff = now - timedelta(days=settings.snapshot_daily_resolution_days)
+    watermark = await db.get(JobWatermark, WEEKLY_WATERMARK)
+    deleted = {
+        "daily": await downsample_snapshots(db, daily_cutoff, _day, after=weekly_cutoff),
+        "weekly": await downsample_snapshots(
+            db,
+            weekly_cutoff,
+            _iso_week,
+            # Whole weeks, so a week is never split across two runs' windows
+            after=_week_start(watermark.processed_until) if watermark else None,
+        ),
+    }
+    if watermark is None:
+        db.add(JobWatermark(name=WEEKLY_WATERMARK, processed_until=weekly_cutoff))
+    else:
+        watermark.processed_until = weekly_cutoff
+    return deleted
+
+
+async def ensure_snapshot_partitions(
+    db: AsyncSession, months_ahead: int = PARTITION_MONTHS_AHEAD
+) -> int:
+    """Create monthly portfolio_snapshot partitions up to `months_ahead`.
+
+    A no-op outside Postgres (the test suite runs on SQLite). Returns the
+    number of months checked.
+    """
+    dialect = db.get_bind().dialect
+    if dialect.name != "postgresql":
+        return 0
+    quote = dialect.identifier_preparer.quote
+    today = datetime.now(timezone.utc)
+    year, month = today.year, today.month
+    for _ in range(months_ahead + 1):
+        start = datetime(year, month, 1, tzinfo=timezone.utc)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        end = datetime(year, month, 1, tzinfo=timezone.utc)
+        await db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {quote(f'portfolio_snapshot_{start:%Y_%m}')} "
+                f"PARTITION OF {quote(PortfolioSnapshot.__tablename__)} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+    return months_ahead + 1
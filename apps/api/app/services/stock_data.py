@@ -165,10 +165,10 @@ def _fetch_multi_ticker_history_sync(
         result: dict[str, list[dict]] = {}
         for ticker in tickers:
             try:
-                if len(tickers) == 1:
-                    closes = df["Close"]
-                else:
-                    closes = df[("Close", ticker)]
+                closes = df["Close"]
+                # Current yfinance keeps the (field, ticker) columns even for one ticker
+                if isinstance(closes, pd.DataFrame):
+                    closes = closes[ticker]
                 closes = closes.dropna()
                 result[ticker] = [
                     {"date": ts.strftime("%Y-%m-%d"), "close": round(float(val), 4)}
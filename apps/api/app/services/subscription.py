@@ -13,6 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.models import Portfolio, Subscription
+from app.services import ai_usage
 
 logger = structlog.stdlib.get_logger(__name__)
 
@@ -28,6 +29,8 @@ FREE_LIMITS = {
     "can_forecast": True,
     "can_export_csv": True,
     "show_sentiment_scores": True,
+    # Cost guard rather than a paywall: prompt + completion tokens per UTC day
+    "ai_tokens_per_day": 500_000,
 }
 
 PRO_LIMITS = {
@@ -39,6 +42,7 @@ PRO_LIMITS = {
     "can_forecast": True,
     "can_export_csv": True,
     "show_sentiment_scores": True,
+    "ai_tokens_per_day": 2_000_000,
 }
 
 
@@ -153,6 +157,15 @@ async def check_can_forecast(db: AsyncSession, user_id: str) -> bool:
     return get_limits(sub.plan)["can_forecast"]
 
 
+async def check_ai_budget(db: AsyncSession, user_id: str) -> bool:
+    """Check if the user has AI tokens left in today's plan budget."""
+    sub = await get_or_create_subscription(db, user_id)
+    limit = get_limits(sub.plan)["ai_tokens_per_day"]
+    if limit is None:
+        return True
+    return await ai_usage.tokens_used_today(db, user_id) < limit
+
+
 async def increment_usage(
     db: AsyncSession, user_id: str, usage_type: str
 ) -> None:
@@ -2,40 +2,108 @@
 Earnings call transcript fetcher using Financial Modeling Prep (FMP) API.
 
 Replaces the original Selenium-based scraper from the Tkinter app.
+Transcripts are stored once, zlib-compressed, in the shared transcript
+table (keyed by ticker/year/quarter, deduplicated per ticker by content
+hash);
+get_transcript checks it before calling FMP.
 """
 
+import hashlib
 import logging
+import re
+import zlib
+from datetime import datetime, timedelta, timezone
 
 import httpx
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.core.rate_governor import fmp
+from app.models import Transcript
 
 logger = logging.getLogger(__name__)
 
 FMP_BASE_URL = "https://financialmodelingprep.com/api/v3"
 
 
+# "Tim Cook:" / "Operator:" / "Jane Doe -- Analyst, Bank:" at the start of a line
+_SPEAKER_RE = re.compile(r"^[A-Z][^:\n]{0,80}:\s")
+_SECTION_RE = re.compile(
+    r"^\s*(question[- ]and[- ]answer|questions and answers|q\s*&\s*a|prepared remarks)\b",
+    re.IGNORECASE,
+)
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+
+
 class TranscriptError(Exception):
     pass
 
 
-async def fetch_transcript(
+def _split_long(text: str, max_chars: int) -> list[str]:
+    """Split one oversized turn at sentence ends (hard cut as a last resort)."""
+    pieces: list[str] = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        while len(sentence) > max_chars:
+            pieces.extend([current] if current else [])
+            current = ""
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars:]
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_transcript(text: str, max_chars: int) -> list[str]:
+    """Split a transcript into chunks of at most `max_chars` characters.
+
+    Chunks break between speaker turns, and always at a section heading
+    (e.g. the start of Q&A), so no chunk starts mid-answer. A single turn
+    longer than `max_chars` is split at sentence ends.
+    """
+    turns: list[tuple[bool, str]] = []  # (starts a section, text)
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        section = bool(_SECTION_RE.match(line))
+        if not turns or section or _SPEAKER_RE.match(line):
+            turns.append((section, line.strip()))
+        else:
+            starts, body = turns[-1]
+            turns[-1] = (starts, f"{body}\n{line.strip()}")
+
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for section, turn in turns:
+        for piece in _split_long(turn, max_chars) if len(turn) > max_chars else [turn]:
+            if current and (section or size + len(piece) + 1 > max_chars):
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+            section = False
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+async def fetch_transcript_record(
     ticker: str,
     year: int | None = None,
     quarter: int | None = None,
-) -> str | None:
-    """Fetch the latest earnings call transcript for a ticker from FMP.
-
-    Args:
-        ticker: Stock ticker symbol (e.g., "AAPL").
-        year: Optional year to target a specific call.
-        quarter: Optional quarter (1-4) to target a specific call.
-
-    Returns:
-        The transcript text, or None if unavailable.
+) -> dict | None:
+    """Fetch the latest (or a specific) transcript record from FMP.
 
-    Raises:
-        TranscriptError: On HTTP or API errors.
+    Returns FMP's record ({"content", "year", "quarter", "date", ...}), or
+    None if unavailable. Raises TranscriptError on HTTP or API errors.
     """
     if not settings.fmp_api_key:
         logger.warning("FMP_API_KEY not configured — cannot fetch transcripts")
@@ -50,7 +118,7 @@ async def fetch_transcript(
     url = f"{FMP_BASE_URL}/earning_call_transcript/{ticker.upper()}"
 
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with fmp, httpx.AsyncClient(timeout=30.0) as client:
             resp = await client.get(url, params=params)
             resp.raise_for_status()
             data = resp.json()
@@ -68,9 +136,142 @@ async def fetch_transcript(
     # FMP returns a list of transcripts; take the first (most recent)
     if isinstance(data, list) and len(data) > 0:
         transcript = data[0]
-        content = transcript.get("content", "")
-        if content:
-            return content
+        if transcript.get("content"):
+            return transcript
 
     logger.info("Empty transcript response for %s", ticker)
     return None
+
+
+async def fetch_transcript(
+    ticker: str,
+    year: int | None = None,
+    quarter: int | None = None,
+) -> str | None:
+    """Fetch the latest earnings call transcript for a ticker from FMP.
+
+    Args:
+        ticker: Stock ticker symbol (e.g., "AAPL").
+        year: Optional year to target a specific call.
+        quarter: Optional quarter (1-4) to target a specific call.
+
+    Returns:
+        The transcript text, or None if unavailable.
+
+    Raises:
+        TranscriptError: On HTTP or API errors.
+    """
+    record = await fetch_transcript_record(ticker, year, quarter)
+    return record["content"] if record else None
+
+
+def _parse_call_date(value) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+async def store_transcript(
+    db: AsyncSession,
+    ticker: str,
+    text: str,
+    *,
+    year: int | None = None,
+    quarter: int | None = None,
+    call_date: datetime | None = None,
+    source: str = "user",
+) -> Transcript:
+    """Store a transcript once per ticker; returns the existing row for known content or period."""
+    ticker = ticker.upper()
+    content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    values = {
+        "ticker": ticker,
+        "year": year,
+        "quarter": quarter,
+        "call_date": call_date,
+        "source": source,
+        "content_hash": content_hash,
+        "content": zlib.compress(text.encode("utf-8"), 6),
+        "size": len(text),
+        "fetched_at": datetime.now(timezone.utc),
+    }
+    # A duplicate (ticker, hash) or (ticker, year, quarter) keeps the stored row
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    await db.execute(dialect.insert(Transcript).values(**values).on_conflict_do_nothing())
+
+    match = Transcript.content_hash == content_hash
+    if year is not None and quarter is not None:
+        match = or_(match, and_(Transcript.year == year, Transcript.quarter == quarter))
+    result = await db.execute(
+        select(Transcript).where(Transcript.ticker == ticker, match).limit(1)
+    )
+    return result.scalars().one()
+
+
+async def find_transcript(
+    db: AsyncSession,
+    ticker: str,
+    year: int | None = None,
+    quarter: int | None = None,
+) -> Transcript | None:
+    """The stored transcript get_transcript would serve without asking FMP."""
+    ticker = ticker.upper()
+    stmt = select(Transcript).where(Transcript.ticker == ticker, Transcript.source == "fmp")
+    if year is not None and quarter is not None:
+        stmt = stmt.where(Transcript.year == year, Transcript.quarter == quarter)
+    else:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.transcript_refresh_hours)
+        stmt = stmt.where(Transcript.fetched_at >= cutoff)
+    result = await db.execute(
+        stmt.order_by(Transcript.year.desc(), Transcript.quarter.desc()).limit(1)
+    )
+    return result.scalars().first()
+
+
+async def store_transcript_record(
+    db: AsyncSession,
+    ticker: str,
+    record: dict,
+    year: int | None = None,
+    quarter: int | None = None,
+) -> Transcript:
+    """Store a record from fetch_transcript_record as the latest FMP transcript."""
+    stored = await store_transcript(
+        db,
+        ticker,
+        record["content"],
+        year=record.get("year", year),
+        quarter=record.get("quarter", quarter),
+        call_date=_parse_call_date(record.get("date")),
+        source="fmp",
+    )
+    # FMP confirmed it is still the latest call; reuse it for another window
+    stored.fetched_at = datetime.now(timezone.utc)
+    return stored
+
+
+async def get_transcript(
+    db: AsyncSession,
+    ticker: str,
+    year: int | None = None,
+    quarter: int | None = None,
+) -> Transcript | None:
+    """Stored transcript for a ticker, fetching from FMP only when needed.
+
+    A specific (year, quarter) is served from the table whenever present.
+    Without one, the newest stored FMP transcript is reused if it was
+    fetched within settings.transcript_refresh_hours; otherwise FMP is asked
+    for the latest call (which is usually the one already stored).
+    Raises TranscriptError on FMP errors.
+    """
+    stored = await find_transcript(db, ticker, year, quarter)
+    if stored is not None:
+        return stored
+    record = await fetch_transcript_record(ticker.upper(), year, quarter)
+    if record is None:
+        return None
+    return await store_transcript_record(db, ticker, record, year, quarter)
@@ -18,7 +18,12 @@ logger = structlog.stdlib.get_logger(__name__)
 async def add_item(
     db: AsyncSession, user_id: str, ticker: str
 ) -> WatchlistItem:
-    """Add a ticker to the watchlist. Fetches price and fundamentals."""
+    """Add a ticker to the watchlist.
+
+    Price, name and sector come from the shared market-data cache when
+    warm; otherwise the item is stored with enrichment_status="pending"
+    and the caller schedules enrichment.enricher after committing.
+    """
     ticker = ticker.upper()
 
     # Check for duplicate
@@ -32,35 +37,20 @@ async def add_item(
     if existing is not None:
         return existing
 
-    # Fetch price + previous close
-    last_price: float | None = None
-    previous_close: float | None = None
-    try:
-        quote = await market_data.get_quote(ticker)
-        last_price = quote["price"]
-        previous_close = quote["previous_close"]
-    except Exception as exc:
-        logger.warning("Quote fetch failed for %s: %s", ticker, exc)
-
-    await asyncio.sleep(1.5)  # respect Alpha Vantage rate limit
-
-    # Fetch fundamentals for name + sector
-    name: str | None = None
-    sector: str | None = None
-    try:
-        fundamentals = await market_data.get_stock_fundamentals(ticker)
-        sector = fundamentals.get("sector") or None
-        name = fundamentals.get("name") or None
-    except Exception as exc:
-        logger.warning("Fundamentals fetch failed for %s: %s", ticker, exc)
+    quote = await market_data.peek_quote(ticker)
+    fundamentals = await market_data.peek_fundamentals(ticker)
+    warm = quote is not None and fundamentals is not None
+    quote = quote or {}
+    fundamentals = fundamentals or {}
 
     item = WatchlistItem(
         user_id=user_id,
         ticker=ticker,
-        name=name,
-        last_price=last_price,
-        previous_close=previous_close,
-        sector=sector,
+        name=fundamentals.get("name") or None,
+        last_price=quote.get("price"),
+        previous_close=quote.get("previous_close"),
+        sector=fundamentals.get("sector") or None,
+        enrichment_status="ready" if warm else "pending",
     )
     db.add(item)
     await db.flush()
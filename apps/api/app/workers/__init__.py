@@ -5,16 +5,56 @@ Usage:
     arq worker.WorkerSettings
 """
 
+from arq import cron
 from arq.connections import RedisSettings
+from arq.worker import func
 
 from app.config import settings
-from app.workers.tasks import run_earnings_analysis, run_portfolio_analysis, run_comparison
+from app.workers.tasks import (
+    extend_portfolio_daily_values,
+    persist_portfolio_snapshots,
+    prune_portfolio_snapshots,
+    retry_stale_enrichment,
+    run_comparison,
+    run_earnings_analysis,
+    run_forecast_backtest,
+    run_holdings_enrichment,
+    run_portfolio_analysis,
+)
+
+
+def _analysis_job(coroutine):
+    # Enqueued by workers/dispatch.py. The task applies job_timeout_seconds and
+    # asks for retries itself (arq.Retry); arq's timeout is only the backstop.
+    return func(
+        coroutine,
+        timeout=settings.job_timeout_seconds + 60,
+        max_tries=settings.job_max_tries,
+    )
 
 
 class WorkerSettings:
     """arq worker settings — connects tasks to Redis."""
 
-    functions = [run_earnings_analysis, run_portfolio_analysis, run_comparison]
+    functions = [
+        _analysis_job(run_earnings_analysis),
+        _analysis_job(run_portfolio_analysis),
+        _analysis_job(run_comparison),
+        run_holdings_enrichment,
+        func(run_forecast_backtest, timeout=1800),  # replays thousands of origins
+    ]
+    cron_jobs = [
+        # After the US close, once the day's bars are published
+        cron(extend_portfolio_daily_values, hour={22}, minute={30}, timeout=1800),
+        # Bounded snapshot history; reads never write
+        cron(persist_portfolio_snapshots, minute={5}, timeout=900),
+        cron(prune_portfolio_snapshots, hour={3}, minute={15}, timeout=1800),
+        # Rows the API's in-process enricher left pending
+        cron(retry_stale_enrichment, minute={0, 10, 20, 30, 40, 50}, timeout=300),
+    ]
     redis_settings = RedisSettings.from_dsn(settings.redis_url)
-    max_jobs = 10
+    # Concurrent jobs per worker process; AI calls are further capped by core/ai_scheduler.py
+    max_jobs = settings.worker_max_jobs
+    # The API only enqueues while this key is fresh (workers/dispatch.py)
+    health_check_interval = settings.worker_health_check_seconds
     job_timeout = 300  # 5 minutes for DeepSeek retries
@@ -0,0 +1,108 @@
+"""
+Start analysis jobs from the API.
+
+Jobs are enqueued to the arq worker (`arq app.workers.WorkerSettings`), so
+model calls and transcript fetches do not share the API's event loop and a
+job outlives an API restart. With settings.job_backend = "inline", or when
+the arq pool is unavailable or no worker has refreshed its health-check key
+(a deployment that runs only the API) and settings.job_inline_fallback is
+on, the job runs as a task in the API process under the same retry policy.
+
+Usage (after committing the pending AnalysisJob):
+    await dispatch_job(db, pool, job, run_comparison, user_id, tickers)
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+import structlog
+from arq import ArqRedis, Retry
+from arq.constants import health_check_key_suffix
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import AnalysisJob
+
+logger = structlog.stdlib.get_logger(__name__)
+
+# Strong references: the event loop only keeps weak ones to running tasks
+_inline_jobs: set[asyncio.Task] = set()
+
+# A stalled worker loop can miss a refresh; only fall back after several intervals
+WORKER_GRACE_INTERVALS = 5
+_worker_seen_at: float | None = None
+
+
+class JobDispatchError(Exception):
+    """No worker queue is available and the inline fallback is disabled."""
+
+
+def _log_task_exception(task: asyncio.Task) -> None:
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc:
+        logger.error("Background task failed", error=str(exc), exc_info=exc)
+
+
+async def _worker_alive(pool: ArqRedis) -> bool:
+    """Whether a worker's health-check key was present within the grace period."""
+    global _worker_seen_at
+    now = time.monotonic()
+    grace = settings.worker_health_check_seconds * WORKER_GRACE_INTERVALS
+    # Workers rewrite this key every health_check_interval, with a TTL just past it
+    if await pool.exists(f"{pool.default_queue_name}{health_check_key_suffix}"):
+        _worker_seen_at = now
+        return True
+    return _worker_seen_at is not None and now - _worker_seen_at < grace
+
+
+async def run_inline(function: Callable[..., Awaitable], job_id: str, *args) -> None:
+    """Run a job in this process, honouring arq.Retry like the worker does."""
+    for job_try in range(1, settings.job_max_tries + 1):
+        try:
+            await function({"job_id": job_id, "job_try": job_try}, job_id, *args)
+            return
+        except Retry as retry:
+            await asyncio.sleep((retry.defer_score or 0) / 1000)
+
+
+async def dispatch_job(
+    db: AsyncSession,
+    pool: ArqRedis | None,
+    job: AnalysisJob,
+    function: Callable[..., Awaitable],
+    *args,
+) -> None:
+    """Enqueue `function(ctx, job.id, *args)` on arq, or run it inline.
+
+    The arq job id is the AnalysisJob id, so a job is never queued twice.
+    Raises JobDispatchError (after marking the job failed) when it can run
+    nowhere.
+    """
+    job_id = str(job.id)
+    if settings.job_backend == "arq":
+        if pool is not None:
+            try:
+                if await _worker_alive(pool):
+                    await pool.enqueue_job(function.__name__, job_id, *args, _job_id=job_id)
+                    return
+                logger.warning("No live arq worker", job_id=job_id)
+            except (RedisError, OSError) as exc:
+                logger.warning("Could not enqueue job", job_id=job_id, error=str(exc))
+        if not settings.job_inline_fallback:
+            job.status = "failed"
+            job.error = "Background workers are unavailable"
+            job.completed_at = datetime.now(timezone.utc)
+            db.add(job)
+            await db.commit()
+            raise JobDispatchError(job.error)
+        logger.warning("arq unavailable, running job inline", job_id=job_id)
+
+    task = asyncio.create_task(run_inline(function, job_id, *args))
+    _inline_jobs.add(task)
+    task.add_done_callback(_inline_jobs.discard)
+    task.add_done_callback(_log_task_exception)
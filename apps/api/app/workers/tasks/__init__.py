@@ -5,20 +5,88 @@ Each task creates its own DB session since workers run outside FastAPI's
 request lifecycle. Jobs are tracked via the AnalysisJob model.
 """
 
+import asyncio
 import structlog
-from datetime import datetime, timezone
-
-from sqlalchemy import select
-
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import date, datetime, timedelta, timezone
+
+import httpx
+from arq import Retry
+from redis.exceptions import RedisError
+from sqlalchemy import select, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from tenacity import RetryError
+
+from app.config import settings
+from app.core.cache import cache
+from app.core.job_stream import JobTextWriter, job_streams
 from app.database import async_session_factory
-from app.models import AnalysisJob, EarningsCall
-from app.services import ai_analysis, market_data, transcript, sentiment_parser, news
+from app.models import AnalysisJob, EarningsCall, Holding
+from app.services import ai_analysis, ai_usage, market_data, transcript, sentiment_parser, news
+from app.services import analysis_cache, backtest, portfolio_history, price_store
+from app.services import enrichment, snapshot_retention
 from app.services import portfolio as portfolio_svc
 from app.services import subscription as sub_svc
 
 logger = structlog.stdlib.get_logger(__name__)
 
 
+def job_progress_key(job_id: str) -> str:
+    return f"job:progress:{job_id}"
+
+
+def _job_progress(job_id: str) -> Callable[[int, int], Awaitable[None]]:
+    """on_progress callback publishing {"done", "total"} for GET /analysis/jobs/{id}."""
+
+    async def report(done: int, total: int) -> None:
+        await cache.set(job_progress_key(job_id), {"done": done, "total": total}, 3600)
+
+    return report
+
+
+def _is_transient(exc: Exception) -> bool:
+    if isinstance(exc, TimeoutError):
+        return False  # the job used its whole budget; another try would too
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated
+    # RetryError: the provider still failed after ai_analysis's own retries
+    return isinstance(exc, (RetryError, httpx.TransportError, RedisError, OSError))
+
+
+async def _fail_or_retry(ctx: dict, db: AsyncSession, job_id: str, exc: Exception) -> None:
+    """Failure path of an analysis job: mark it failed, or pending for another try.
+
+    ctx["job_try"] is set by arq and by workers.dispatch for inline jobs; a
+    transient error before settings.job_max_tries raises arq.Retry with
+    exponential backoff, and the job's stream stays open for the next try.
+    """
+    await db.rollback()
+    job_try = ctx.get("job_try")
+    retry = (
+        job_try is not None and job_try < settings.job_max_tries and _is_transient(exc)
+    )
+
+    # Re-fetch job to update status
+    result = await db.execute(select(AnalysisJob).where(AnalysisJob.id == job_id))
+    job = result.scalars().first()
+    if job:
+        if retry:
+            job.status = "pending"
+            job.error = f"Attempt {job_try} failed, retrying: {exc}"
+        else:
+            job.status = "failed"
+            job.error = str(exc)
+            job.completed_at = datetime.now(timezone.utc)
+        db.add(job)
+        await ai_usage.save_usage(db)
+        await db.commit()
+    if retry:
+        raise Retry(defer=settings.job_retry_backoff_seconds * 2 ** (job_try - 1))
+    await job_streams.finish(job_id, "failed")
+
+
 async def run_earnings_analysis(
     ctx: dict,
     job_id: str,
@@ -30,94 +98,95 @@ async def run_earnings_analysis(
 
     If no transcript is provided, attempts to fetch one from FMP.
     """
-    async with async_session_factory() as db:
-        try:
-            # Load job and mark processing
-            result = await db.execute(
-                select(AnalysisJob).where(AnalysisJob.id == job_id)
-            )
-            job = result.scalars().first()
-            if job is None:
-                logger.error("Job %s not found", job_id)
-                return
-
-            job.status = "processing"
-            job.started_at = datetime.now(timezone.utc)
-            db.add(job)
-            await db.flush()
-
-            # Fetch transcript if not provided
-            if not transcript_text:
-                logger.info("No transcript provided for %s, fetching from FMP", ticker)
-                transcript_text = await transcript.fetch_transcript(ticker)
-
-            if not transcript_text:
-                job.status = "failed"
-                job.error = (
-                    f"No earnings transcript available for {ticker}. "
-                    "Please provide a transcript manually or ensure FMP_API_KEY is configured."
-                )
-                job.completed_at = datetime.now(timezone.utc)
-                db.add(job)
-                await db.commit()
-                return
-
-            # Get fundamentals for context
-            fundamentals = await market_data.get_stock_fundamentals(ticker)
-
-            # Run AI analysis
-            analysis_text = await ai_analysis.explain_earnings_call(
-                ticker=ticker,
-                call_text=transcript_text,
-                fundamentals=fundamentals,
-            )
-
-            # Parse structured data from AI response
-            parsed = sentiment_parser.parse_analysis(analysis_text)
-
-            # Store earnings call record with all fields populated
-            ec = EarningsCall(
-                user_id=user_id,
-                ticker=ticker.upper(),
-                extracted_text=transcript_text[:5000],
-                summary=analysis_text,
-                sentiment_score=parsed["sentiment_score"],
-                guidance_outlook=parsed["guidance_outlook"],
-                risk_mentions=parsed["risk_mentions"],
-                growth_mentions=parsed["growth_mentions"],
-                key_metrics=parsed["key_metrics"],
-            )
-            db.add(ec)
-
-            # Update job
-            job.status = "completed"
-            job.result = {"analysis": analysis_text}
-            job.completed_at = datetime.now(timezone.utc)
-            await sub_svc.increment_usage(db, user_id, "earnings_analysis")
-            db.add(job)
-            await db.commit()
+    with ai_usage.usage_scope(
+        user_id, "earnings_analysis", job_id, async_session_factory
+    ) as scope:
+        async with async_session_factory() as db:
+            try:
+                async with asyncio.timeout(settings.job_timeout_seconds):
+                    # Load job and mark processing
+                    result = await db.execute(
+                        select(AnalysisJob).where(AnalysisJob.id == job_id)
+                    )
+                    job = result.scalars().first()
+                    if job is None:
+                        logger.error("Job %s not found", job_id)
+                        return
+                    if job.status in ("completed", "failed"):
+                        # Re-delivered after a worker restart; already finished
+                        return
+
+                    job.status = "processing"
+                    job.started_at = datetime.now(timezone.utc)
+                    db.add(job)
+                    # Pro users' AI calls go first in the shared queue
+                    scope.plan = (await sub_svc.get_or_create_subscription(db, user_id)).plan
+                    await db.flush()
+
+                    # Store a pasted transcript, or load the latest (stored or from FMP)
+                    if transcript_text:
+                        stored = await transcript.store_transcript(db, ticker, transcript_text)
+                    else:
+                        logger.info("No transcript provided for %s, checking store / FMP", ticker)
+                        stored = await transcript.get_transcript(db, ticker)
+
+                    if stored is None:
+                        job.status = "failed"
+                        job.error = (
+                            f"No earnings transcript available for {ticker}. "
+                            "Please provide a transcript manually or ensure "
+                            "FMP_API_KEY is configured."
+                        )
+                        job.completed_at = datetime.now(timezone.utc)
+                        db.add(job)
+                        await db.commit()
+                        await job_streams.finish(job_id, "failed")
+                        return
+
+                    # Get fundamentals for context
+                    fundamentals = await market_data.get_stock_fundamentals(ticker)
+
+                    # Run AI analysis (shared across users analyzing the same call)
+                    entry = await analysis_cache.get_earnings_analysis(
+                        async_session_factory,
+                        ticker,
+                        stored.text,
+                        fundamentals,
+                        stream=JobTextWriter(job_id),
+                    )
+                    analysis_text = entry.summary
+
+                    # Store earnings call record with all fields populated
+                    ec = EarningsCall(
+                        user_id=user_id,
+                        ticker=ticker.upper(),
+                        transcript_id=stored.id,
+                        call_date=stored.call_date,
+                        **analysis_cache.earnings_call_fields(entry),
+                    )
+                    db.add(ec)
 
-            logger.info("Earnings analysis completed for %s (job %s)", ticker, job_id)
+                    # Update job
+                    job.status = "completed"
+                    job.result = {"analysis": analysis_text}
+                    job.completed_at = datetime.now(timezone.utc)
+                    await sub_svc.increment_usage(db, user_id, "earnings_analysis")
+                    db.add(job)
+                    await ai_usage.save_usage(db)
+                    await db.commit()
+                    await job_streams.finish(job_id, "completed")
+                    # Earnings metrics feed every cached snapshot of this user's
+                    await portfolio_svc.invalidate_snapshot_cache(user_id)
 
-        except Exception as exc:
-            logger.exception("Earnings analysis failed for %s: %s", ticker, exc)
-            await db.rollback()
+                    logger.info("Earnings analysis completed for %s (job %s)", ticker, job_id)
 
-            # Re-fetch job to update status
-            result = await db.execute(
-                select(AnalysisJob).where(AnalysisJob.id == job_id)
-            )
-            job = result.scalars().first()
-            if job:
-                job.status = "failed"
-                job.error = str(exc)
-                job.completed_at = datetime.now(timezone.utc)
-                db.add(job)
-                await db.commit()
+            except Exception as exc:
+                logger.exception("Earnings analysis failed for %s: %s", ticker, exc)
+                await _fail_or_retry(ctx, db, job_id, exc)
 
 
 async def _ensure_earnings_data(
-    db, user_id: str, ticker: str
+    user_id: str, ticker: str, budget: asyncio.Timeout | None = None
 ) -> EarningsCall | None:
     """Check DB for existing earnings data; if missing, gather data and analyze.
 
@@ -126,42 +195,64 @@ async def _ensure_earnings_data(
     2. FMP earnings transcript (if FMP_API_KEY configured)
     3. Alpha Vantage fundamentals + news sentiment (fallback — always available)
 
-    Returns the EarningsCall record (existing or newly created), or None on failure.
+    Runs concurrently per ticker (gather_earnings_data), so each database
+    step uses its own short session and none is open during provider or
+    model calls. A long transcript extends the per-ticker `budget` by a
+    bounded amount per chunk, since its map-reduce makes several model calls.
+    Returns the EarningsCall record (existing or newly created), or None
+    on failure.
     """
     ticker = ticker.upper()
 
-    # 1. Check for existing earnings analysis
-    ec_result = await db.execute(
-        select(EarningsCall)
-        .where(
-            EarningsCall.user_id == user_id,
-            EarningsCall.ticker == ticker,
+    # 1. Check for existing earnings analysis and a stored transcript
+    async with async_session_factory() as db:
+        ec_result = await db.execute(
+            select(EarningsCall)
+            .where(
+                EarningsCall.user_id == user_id,
+                EarningsCall.ticker == ticker,
+            )
+            .order_by(EarningsCall.created_at.desc())
+            .limit(1)
         )
-        .order_by(EarningsCall.created_at.desc())
-        .limit(1)
-    )
-    ec = ec_result.scalars().first()
-    if ec and ec.summary:
-        logger.info("Found existing earnings data for %s", ticker)
-        return ec
-
-    # 2. Try FMP transcript first (best data source)
-    transcript_text = None
-    try:
-        transcript_text = await transcript.fetch_transcript(ticker)
-    except Exception as exc:
-        logger.warning("Failed to fetch transcript for %s: %s", ticker, exc)
+        ec = ec_result.scalars().first()
+        if ec and ec.summary:
+            logger.info("Found existing earnings data for %s", ticker)
+            return ec
+        stored = await transcript.find_transcript(db, ticker)
+
+    # 2. Otherwise try FMP (best data source)
+    if stored is None:
+        try:
+            record = await transcript.fetch_transcript_record(ticker)
+            if record is not None:
+                async with async_session_factory() as db:
+                    stored = await transcript.store_transcript_record(db, ticker, record)
+                    await db.commit()
+        except Exception as exc:
+            logger.warning("Failed to fetch transcript for %s: %s", ticker, exc)
 
     # 3. Get fundamentals (always available via Alpha Vantage)
     fundamentals = await market_data.get_stock_fundamentals(ticker)
 
-    if transcript_text:
-        # Have real transcript — run full earnings analysis
+    if stored is not None:
+        # Have real transcript — run full earnings analysis (shared cache)
         logger.info("Analyzing FMP transcript for %s", ticker)
-        analysis_text = await ai_analysis.explain_earnings_call(
+        call_text = stored.text
+        if budget is not None and len(call_text) > ai_analysis.EARNINGS_TRANSCRIPT_CHARS:
+            chunks = transcript.split_transcript(call_text, settings.transcript_chunk_chars)
+            budget.reschedule(
+                budget.when() + settings.earnings_chunk_timeout_seconds * len(chunks)
+            )
+        entry = await analysis_cache.get_earnings_analysis(
+            async_session_factory, ticker, call_text, fundamentals
+        )
+        ec = EarningsCall(
+            user_id=user_id,
             ticker=ticker,
-            call_text=transcript_text,
-            fundamentals=fundamentals,
+            transcript_id=stored.id,
+            call_date=stored.call_date,
+            **analysis_cache.earnings_call_fields(entry),
         )
     else:
         # No transcript — build analysis from fundamentals + news sentiment
@@ -205,28 +296,70 @@ Recent News & Sentiment:
             context=analysis_context,
         )
 
-    # 4. Parse structured data
-    parsed = sentiment_parser.parse_analysis(analysis_text)
+        # 4. Parse structured data
+        parsed = sentiment_parser.parse_analysis(analysis_text)
+        ec = EarningsCall(
+            user_id=user_id,
+            ticker=ticker,
+            extracted_text="Generated from fundamentals + news",
+            summary=analysis_text,
+            sentiment_score=parsed["sentiment_score"],
+            guidance_outlook=parsed["guidance_outlook"],
+            risk_mentions=parsed["risk_mentions"],
+            growth_mentions=parsed["growth_mentions"],
+            key_metrics=parsed["key_metrics"],
+        )
 
     # 5. Store in DB for future use
-    ec = EarningsCall(
-        user_id=user_id,
-        ticker=ticker,
-        extracted_text=(transcript_text or "Generated from fundamentals + news")[:5000],
-        summary=analysis_text,
-        sentiment_score=parsed["sentiment_score"],
-        guidance_outlook=parsed["guidance_outlook"],
-        risk_mentions=parsed["risk_mentions"],
-        growth_mentions=parsed["growth_mentions"],
-        key_metrics=parsed["key_metrics"],
-    )
-    db.add(ec)
-    await db.flush()
+    async with async_session_factory() as db:
+        db.add(ec)
+        portfolio_svc.invalidate_earnings_caches(db, user_id)
+        await db.commit()
 
     logger.info("Created new earnings analysis for %s", ticker)
     return ec
 
 
+async def gather_earnings_data(
+    user_id: str,
+    tickers: list[str],
+    on_progress: Callable[[int, int], Awaitable[None]] | None = None,
+) -> dict[str, EarningsCall | None]:
+    """_ensure_earnings_data for many tickers concurrently.
+
+    At most settings.earnings_gather_concurrency tickers run at once, each
+    committing its EarningsCall as soon as it is ready; upstream calls are
+    further bounded by the per-provider rate governors
+    (core/rate_governor.py). A ticker that fails or exceeds
+    settings.earnings_ticker_timeout_seconds (counted once it starts, and
+    lifted for map-reduced transcripts) maps to None without holding up
+    the others. `on_progress(done, total)` is awaited as tickers finish.
+    """
+    unique = list(dict.fromkeys(t.upper() for t in tickers))
+    limit = asyncio.Semaphore(settings.earnings_gather_concurrency)
+    done = 0
+
+    async def one(ticker: str) -> EarningsCall | None:
+        nonlocal done
+        try:
+            async with limit:
+                async with asyncio.timeout(settings.earnings_ticker_timeout_seconds) as budget:
+                    return await _ensure_earnings_data(user_id, ticker, budget)
+        except TimeoutError:
+            logger.warning("Earnings data for %s timed out", ticker)
+            return None
+        except Exception as exc:
+            logger.exception("Earnings data for %s failed: %s", ticker, exc)
+            return None
+        finally:
+            done += 1
+            if on_progress is not None:
+                await on_progress(done, len(unique))
+
+    results = await asyncio.gather(*(one(t) for t in unique))
+    return dict(zip(unique, results))
+
+
 async def run_portfolio_analysis(
     ctx: dict,
     job_id: str,
@@ -234,99 +367,327 @@ async def run_portfolio_analysis(
     portfolio_id: int,
 ) -> None:
     """Background task: full AI portfolio analysis with snapshot."""
+    with ai_usage.usage_scope(
+        user_id, "portfolio_analysis", job_id, async_session_factory
+    ) as scope:
+        async with async_session_factory() as db:
+            try:
+                async with asyncio.timeout(settings.job_timeout_seconds):
+                    # Load job and mark processing
+                    result = await db.execute(
+                        select(AnalysisJob).where(AnalysisJob.id == job_id)
+                    )
+                    job = result.scalars().first()
+                    if job is None:
+                        logger.error("Job %s not found", job_id)
+                        return
+                    if job.status in ("completed", "failed"):
+                        # Re-delivered after a worker restart; already finished
+                        return
+
+                    job.status = "processing"
+                    job.started_at = datetime.now(timezone.utc)
+                    db.add(job)
+                    # Pro users' AI calls go first in the shared queue
+                    scope.plan = (await sub_svc.get_or_create_subscription(db, user_id)).plan
+                    # Committed so per-ticker sessions in gather_earnings_data can write
+                    await db.commit()
+
+                    # One holdings load shared by every step of the job
+                    holdings = await portfolio_svc.get_holdings(db, user_id, portfolio_id)
+
+                    # Compute snapshot (persisted separately by persist_portfolio_snapshots)
+                    snapshot = await portfolio_svc.compute_snapshot(
+                        db, user_id, portfolio_id, holdings
+                    )
+                    sectors = portfolio_svc.portfolio_totals(holdings).sectors
+
+                    # Gather earnings summaries for holdings (fetch from FMP if missing)
+                    earnings = await gather_earnings_data(
+                        user_id, [h.ticker for h in holdings], on_progress=_job_progress(job_id)
+                    )
+                    earnings_analyses: list[dict] = []
+                    for h in holdings:
+                        ec = earnings.get(h.ticker.upper())
+                        if ec and ec.summary:
+                            earnings_analyses.append({"ticker": h.ticker, "summary": ec.summary})
+
+                    sector_dict = {s.sector: round(s.weight, 3) for s in sectors}
+
+                    portfolio_data = {
+                        "total_value": snapshot.total_value or 0,
+                        "num_positions": snapshot.num_positions,
+                        "health_score": snapshot.health_score or 0,
+                        "sector_allocation": sector_dict,
+                    }
+
+                    analysis_text = await ai_analysis.analyze_portfolio_with_earnings(
+                        portfolio_data=portfolio_data,
+                        earnings_analyses=earnings_analyses,
+                        stream=JobTextWriter(job_id),
+                    )
+
+                    # Update job
+                    job.status = "completed"
+                    job.result = {
+                        "analysis": analysis_text,
+                        "snapshot": {
+                            "total_value": snapshot.total_value,
+                            "health_score": snapshot.health_score,
+                            "num_positions": snapshot.num_positions,
+                            "concentration_risk": snapshot.concentration_risk,
+                        },
+                    }
+                    job.completed_at = datetime.now(timezone.utc)
+                    await sub_svc.increment_usage(db, user_id, "portfolio_analysis")
+                    db.add(job)
+                    await ai_usage.save_usage(db)
+                    await db.commit()
+                    await job_streams.finish(job_id, "completed")
+
+                    logger.info(
+                        "Portfolio analysis completed for portfolio %d (job %s)",
+                        portfolio_id, job_id,
+                    )
+
+            except Exception as exc:
+                logger.exception("Portfolio analysis failed: %s", exc)
+                await _fail_or_retry(ctx, db, job_id, exc)
+
+
+async def run_comparison(
+    ctx: dict,
+    job_id: str,
+    user_id: str,
+    tickers: list[str],
+) -> None:
+    """Background task: compare earnings calls across multiple tickers.
+
+    For each ticker, ensures we have real earnings data by fetching
+    transcripts from FMP if no prior analysis exists.
+    """
+    with ai_usage.usage_scope(
+        user_id, "comparison", job_id, async_session_factory
+    ) as scope:
+        async with async_session_factory() as db:
+            try:
+                async with asyncio.timeout(settings.job_timeout_seconds):
+                    # Load job and mark processing
+                    result = await db.execute(
+                        select(AnalysisJob).where(AnalysisJob.id == job_id)
+                    )
+                    job = result.scalars().first()
+                    if job is None:
+                        logger.error("Job %s not found", job_id)
+                        return
+                    if job.status in ("completed", "failed"):
+                        # Re-delivered after a worker restart; already finished
+                        return
+
+                    job.status = "processing"
+                    job.started_at = datetime.now(timezone.utc)
+                    db.add(job)
+                    # Pro users' AI calls go first in the shared queue
+                    scope.plan = (await sub_svc.get_or_create_subscription(db, user_id)).plan
+                    # Committed so per-ticker sessions in gather_earnings_data can write
+                    await db.commit()
+
+                    # Gather real earnings data for each ticker (fetch if missing)
+                    earnings = await gather_earnings_data(
+                        user_id, tickers, on_progress=_job_progress(job_id)
+                    )
+                    analyses: list[dict] = []
+                    for ticker in tickers:
+                        ec = earnings.get(ticker.upper())
+                        if ec and ec.summary:
+                            analyses.append(
+                                {
+                                    "sentiment": ec.guidance_outlook or "Neutral",
+                                    "key_themes": ec.summary[:500],
+                                    "guidance": ec.guidance_outlook or "",
+                                }
+                            )
+                        else:
+                            analyses.append(
+                                {
+                                    "sentiment": "No transcript available",
+                                    "key_themes": "",
+                                    "guidance": "",
+                                }
+                            )
+
+                    comparison_text = await ai_analysis.compare_multiple_earnings(
+                        tickers=tickers,
+                        analyses=analyses,
+                        stream=JobTextWriter(job_id),
+                    )
+
+                    # Update job
+                    job.status = "completed"
+                    job.result = {"comparison": comparison_text}
+                    job.completed_at = datetime.now(timezone.utc)
+                    db.add(job)
+                    await ai_usage.save_usage(db)
+                    await db.commit()
+                    await job_streams.finish(job_id, "completed")
+
+                    logger.info("Comparison completed for %s (job %s)", tickers, job_id)
+
+            except Exception as exc:
+                logger.exception("Comparison failed: %s", exc)
+                await _fail_or_retry(ctx, db, job_id, exc)
+
+
+async def run_forecast_backtest(
+    ctx: dict,
+    tickers: list[str],
+    horizons: list[int] | None = None,
+    step: int = backtest.DEFAULT_STEP,
+) -> int | None:
+    """Background task: walk-forward backtest of the forecast model.
+
+    Reads bars from the local price store; returns the stored backtest id.
+    """
     async with async_session_factory() as db:
         try:
-            # Load job and mark processing
-            result = await db.execute(
-                select(AnalysisJob).where(AnalysisJob.id == job_id)
+            result = await backtest.run_backtest(
+                db,
+                tickers,
+                horizons=tuple(horizons or backtest.DEFAULT_HORIZONS),
+                step=step,
             )
-            job = result.scalars().first()
-            if job is None:
-                logger.error("Job %s not found", job_id)
-                return
+            await db.commit()
+            return result.id
+        except Exception as exc:
+            logger.exception("Forecast backtest failed: %s", exc)
+            await db.rollback()
+            return None
 
-            job.status = "processing"
-            job.started_at = datetime.now(timezone.utc)
-            db.add(job)
-            await db.flush()
-
-            # Compute snapshot
-            snapshot = await portfolio_svc.analyze_portfolio(db, user_id, portfolio_id)
-            sectors = await portfolio_svc.get_sector_allocation(db, user_id, portfolio_id)
-
-            # Gather earnings summaries for holdings (fetch from FMP if missing)
-            holdings = await portfolio_svc.get_holdings(db, user_id, portfolio_id)
-            earnings_analyses: list[dict] = []
-            for h in holdings:
-                ec = await _ensure_earnings_data(db, user_id, h.ticker)
-                if ec and ec.summary:
-                    earnings_analyses.append({"ticker": h.ticker, "summary": ec.summary})
-
-            sector_dict = {s.sector: round(s.weight, 3) for s in sectors}
-
-            portfolio_data = {
-                "total_value": snapshot.total_value or 0,
-                "num_positions": snapshot.num_positions,
-                "health_score": snapshot.health_score or 0,
-                "sector_allocation": sector_dict,
-            }
 
-            analysis_text = await ai_analysis.analyze_portfolio_with_earnings(
-                portfolio_data=portfolio_data,
-                earnings_analyses=earnings_analyses,
-            )
+async def extend_portfolio_daily_values(ctx: dict) -> int:
+    """Nightly cron: pull the latest bars and extend every daily value series.
 
-            # Update job
-            job.status = "completed"
-            job.result = {
-                "analysis": analysis_text,
-                "snapshot": {
-                    "total_value": snapshot.total_value,
-                    "health_score": snapshot.health_score,
-                    "num_positions": snapshot.num_positions,
-                    "concentration_risk": snapshot.concentration_risk,
-                },
-            }
-            job.completed_at = datetime.now(timezone.utc)
-            await sub_svc.increment_usage(db, user_id, "portfolio_analysis")
-            db.add(job)
+    Downloads the past week for all dated holdings (plus the benchmark) in
+    one batch, then appends the new day(s) per portfolio. Returns the
+    number of rows written.
+    """
+    async with async_session_factory() as db:
+        try:
+            result = await db.execute(select(Holding).where(Holding.purchased_at.isnot(None)))
+            by_portfolio: dict[int, list[Holding]] = defaultdict(list)
+            for h in result.scalars().all():
+                by_portfolio[h.portfolio_id].append(h)
+            if not by_portfolio:
+                return 0
+
+            tickers = {h.ticker for hs in by_portfolio.values() for h in hs}
+            tickers.add(portfolio_history.BENCHMARK_TICKER)
+            today = date.today()
+            await price_store.sync_closes(db, sorted(tickers), today - timedelta(days=7), today)
+
+            written = 0
+            for portfolio_id, holdings in by_portfolio.items():
+                written += await portfolio_history.extend_daily_values(db, portfolio_id, holdings)
             await db.commit()
-
             logger.info(
-                "Portfolio analysis completed for portfolio %d (job %s)",
-                portfolio_id, job_id,
+                "Extended portfolio daily values",
+                portfolios=len(by_portfolio),
+                rows=written,
             )
-
+            return written
         except Exception as exc:
-            logger.exception("Portfolio analysis failed: %s", exc)
+            logger.exception("Daily value extension failed: %s", exc)
             await db.rollback()
+            return 0
 
-            result = await db.execute(
-                select(AnalysisJob).where(AnalysisJob.id == job_id)
+
+async def persist_portfolio_snapshots(ctx: dict) -> int:
+    """Hourly cron: persist a snapshot for portfolios whose latest one is stale.
+
+    Snapshot reads are side-effect free (portfolio.get_snapshot), so this is
+    the only writer of routine snapshots: at most one per portfolio per
+    settings.snapshot_persist_interval_hours. Returns the number written.
+    """
+    async with async_session_factory() as db:
+        try:
+            due = await portfolio_svc.get_portfolios_due_for_snapshot(
+                db, timedelta(hours=settings.snapshot_persist_interval_hours)
             )
-            job = result.scalars().first()
-            if job:
-                job.status = "failed"
-                job.error = str(exc)
-                job.completed_at = datetime.now(timezone.utc)
-                db.add(job)
-                await db.commit()
+            for user_id, portfolio_id in due:
+                await portfolio_svc.analyze_portfolio(db, user_id, portfolio_id)
+            await db.commit()
+            logger.info("Persisted portfolio snapshots", portfolios=len(due))
+            return len(due)
+        except Exception as exc:
+            logger.exception("Snapshot persistence failed: %s", exc)
+            await db.rollback()
+            return 0
 
 
-async def run_comparison(
+async def prune_portfolio_snapshots(ctx: dict) -> int:
+    """Nightly cron: downsample old snapshots and pre-create partitions.
+
+    Returns the number of snapshots removed.
+    """
+    async with async_session_factory() as db:
+        try:
+            await snapshot_retention.ensure_snapshot_partitions(db)
+            deleted = await snapshot_retention.apply_retention(db)
+            await db.commit()
+            logger.info("Pruned portfolio snapshots", **deleted)
+            return sum(deleted.values())
+        except Exception as exc:
+            logger.exception("Snapshot retention failed: %s", exc)
+            await db.rollback()
+            return 0
+
+
+async def retry_stale_enrichment(ctx: dict) -> int:
+    """Cron: finish enrichments the API never completed (e.g. it restarted).
+
+    Rows pending longer than settings.enrichment_stale_minutes are fetched
+    once more and marked "ready" or "failed", so none stay pending. Returns
+    the number of rows updated.
+    """
+    before = datetime.now(timezone.utc) - timedelta(minutes=settings.enrichment_stale_minutes)
+    async with async_session_factory() as db:
+        tickers = await enrichment.stale_pending_tickers(db, before)
+    if not tickers:
+        return 0
+
+    # Fetched with no session open; market_data's governor bounds the calls
+    fetched = await asyncio.gather(*(enrichment.fetch_market_data(t) for t in tickers))
+    async with async_session_factory() as db:
+        try:
+            updated = 0
+            for ticker, (quote, fundamentals) in zip(tickers, fetched):
+                updated += await enrichment.apply_market_data(db, ticker, quote, fundamentals)
+            await db.commit()
+            logger.info("Retried stale enrichment", tickers=len(tickers), rows=updated)
+            return updated
+        except Exception as exc:
+            logger.exception("Stale enrichment retry failed: %s", exc)
+            await db.rollback()
+            return 0
+
+
+async def run_holdings_enrichment(
     ctx: dict,
     job_id: str,
     user_id: str,
-    tickers: list[str],
+    portfolio_id: int,
+    holding_ids: list[int],
 ) -> None:
-    """Background task: compare earnings calls across multiple tickers.
+    """Background task: fill prices and fundamentals after a bulk import.
 
-    For each ticker, ensures we have real earnings data by fetching
-    transcripts from FMP if no prior analysis exists.
+    One refresh_holdings pass covers every imported ticker (fetched once
+    each, concurrently under the Alpha Vantage governor, then written with
+    a single UPDATE). Imported rows (`holding_ids`) left without a quote
+    are marked failed. Progress is published to the shared cache and
+    merged into GET /analysis/jobs/{job_id} while the job runs.
     """
     async with async_session_factory() as db:
         try:
-            # Load job and mark processing
             result = await db.execute(
                 select(AnalysisJob).where(AnalysisJob.id == job_id)
             )
@@ -338,45 +699,42 @@ async def run_comparison(
             job.status = "processing"
             job.started_at = datetime.now(timezone.utc)
             db.add(job)
-            await db.flush()
-
-            # Gather real earnings data for each ticker (fetch if missing)
-            analyses: list[dict] = []
-            for ticker in tickers:
-                ec = await _ensure_earnings_data(db, user_id, ticker.upper())
-                if ec and ec.summary:
-                    analyses.append(
-                        {
-                            "sentiment": ec.guidance_outlook or "Neutral",
-                            "key_themes": ec.summary[:500],
-                            "guidance": ec.guidance_outlook or "",
-                        }
-                    )
-                else:
-                    analyses.append(
-                        {
-                            "sentiment": "No transcript available",
-                            "key_themes": "",
-                            "guidance": "",
-                        }
-                    )
+            await db.commit()
 
-            comparison_text = await ai_analysis.compare_multiple_earnings(
-                tickers=tickers,
-                analyses=analyses,
+            holdings = await portfolio_svc.refresh_holdings(
+                db, user_id, portfolio_id, on_progress=_job_progress(job_id)
+            )
+            priced = [h for h in holdings or [] if h.last_price is not None]
+            # Tickers without a quote stay unpriced; stop showing them as loading.
+            # Other pending rows belong to the in-process enricher.
+            await db.execute(
+                update(Holding)
+                .where(
+                    Holding.id.in_(holding_ids),
+                    Holding.enrichment_status == "pending",
+                )
+                .values(enrichment_status="failed")
+                .execution_options(synchronize_session=False)
             )
 
-            # Update job
             job.status = "completed"
-            job.result = {"comparison": comparison_text}
+            job.result = {
+                "holdings": len(holdings or []),
+                "priced": len(priced),
+                "tickers": len({h.ticker for h in holdings or []}),
+            }
             job.completed_at = datetime.now(timezone.utc)
             db.add(job)
             await db.commit()
+            await cache.delete(job_progress_key(job_id))
 
-            logger.info("Comparison completed for %s (job %s)", tickers, job_id)
+            logger.info(
+                "Holdings enrichment completed for portfolio %d (job %s)",
+                portfolio_id, job_id,
+            )
 
         except Exception as exc:
-            logger.exception("Comparison failed: %s", exc)
+            logger.exception("Holdings enrichment failed: %s", exc)
             await db.rollback()
 
             result = await db.execute(
@@ -0,0 +1,50 @@
+"""
+Command-line entrypoint for walk-forward forecast backtests.
+
+Usage:
+    python backtest.py AAPL MSFT NVDA --sync --years 5
+    python backtest.py AAPL MSFT --horizons 5 10 20 --step 1
+
+--sync downloads bars into the local price store first; otherwise only
+already-stored bars are used. The result is stored and served by
+GET /api/v1/analysis/forecast-quality.
+"""
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+
+from app.database import async_session_factory
+from app.services import backtest, price_store
+
+
+async def main(args: argparse.Namespace) -> None:
+    async with async_session_factory() as db:
+        if args.sync:
+            start = date.today() - timedelta(days=365 * args.years)
+            await price_store.sync_closes(db, args.tickers, start, date.today())
+            await db.commit()
+
+        result = await backtest.run_backtest(
+            db, args.tickers, horizons=tuple(args.horizons), step=args.step
+        )
+        await db.commit()
+
+    print(f"Backtest #{result.id}: {len(result.tickers)} tickers, {result.num_origins} origins")
+    print(f"{'horizon':>8} {'MAE':>10} {'MAPE %':>8} {'coverage':>9} {'hit rate':>9} {'n':>7}")
+    for horizon, m in result.metrics["overall"].items():
+        mape = f"{m['mape']:.2f}" if m["mape"] is not None else "-"
+        print(
+            f"{horizon:>8} {m['mae']:>10.4f} {mape:>8} "
+            f"{m['coverage']:>9.2%} {m['hit_rate']:>9.2%} {m['n']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest the price forecast model.")
+    parser.add_argument("tickers", nargs="+", type=str.upper)
+    parser.add_argument("--horizons", nargs="+", type=int, default=list(backtest.DEFAULT_HORIZONS))
+    parser.add_argument("--step", type=int, default=backtest.DEFAULT_STEP)
+    parser.add_argument("--sync", action="store_true", help="download bars before running")
+    parser.add_argument("--years", type=int, default=5, help="history to sync with --sync")
+    asyncio.run(main(parser.parse_args()))
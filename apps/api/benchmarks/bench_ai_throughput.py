@@ -0,0 +1,117 @@
+"""
+Benchmark: AI pipeline throughput against the local fake DeepSeek server.
+
+Runs N concurrent jobs through the real ai_analysis call path (httpx,
+tenacity retries, the AI scheduler and deepseek rate governor, optional
+token streaming)
+with benchmarks/fake_deepseek.py standing in for the provider, and reports
+wall time, per-job latency, retries and the peak concurrency the server
+saw. Each job is a long-transcript earnings analysis (map: one call per
+chunk, reduce: one combined call) unless --chunks 0.
+
+Usage:
+    python -m benchmarks.bench_ai_throughput [--jobs 20] [--chunks 4] [--latency-ms 800]
+        [--error-rate 0.05] [--governor-rpm 60] [--governor-concurrency 4]
+        [--ai-concurrency 4] [--server-rpm 120] [--stream]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.config import settings
+from app.core import rate_governor
+from app.core.ai_scheduler import ai_scheduler
+from app.core.job_stream import JobTextWriter, job_streams
+from app.services import ai_analysis, ai_usage
+from benchmarks.fake_deepseek import FakeDeepSeekConfig, running
+
+
+async def _job(index: int, chunks: int, stream: bool) -> tuple[float, list]:
+    with ai_usage.usage_scope("bench", "earnings_analysis", f"bench-{index}") as scope:
+        t0 = time.perf_counter()
+        writer = JobTextWriter(f"bench-{index}") if stream else None
+        if chunks:
+            notes = await asyncio.gather(
+                *(
+                    ai_analysis.summarize_transcript_chunk(
+                        f"T{index:03d}", f"Transcript part {part} of job {index}.", part, chunks
+                    )
+                    for part in range(1, chunks + 1)
+                )
+            )
+            await ai_analysis.explain_earnings_notes(f"T{index:03d}", notes, stream=writer)
+        else:
+            await ai_analysis.explain_earnings_call(
+                f"T{index:03d}", f"Transcript of job {index}.", stream=writer
+            )
+        return time.perf_counter() - t0, scope.records
+
+
+async def main(args: argparse.Namespace) -> None:
+    job_streams.configure(memory_only=True)
+    ai_scheduler.configure(memory_only=True)
+    settings.ai_initial_concurrency = args.ai_concurrency
+    ai_analysis.deepseek = rate_governor.RateGovernor(
+        "deepseek", args.governor_rpm, args.governor_concurrency
+    )
+    config = FakeDeepSeekConfig(
+        latency=args.latency,
+        latency_ms=args.latency_ms,
+        spread=args.spread,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        requests_per_minute=args.server_rpm,
+    )
+
+    async with running(config) as stats:
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            *(_job(i, args.chunks, args.stream) for i in range(args.jobs)),
+            return_exceptions=True,
+        )
+        wall = time.perf_counter() - t0
+
+    done = [r for r in results if not isinstance(r, BaseException)]
+    latencies = sorted(latency for latency, _ in done)
+    records = [record for _, job_records in done for record in job_records]
+    calls = len(records)
+    retries = sum(record.attempts - 1 for record in records)
+    tokens = sum(record.prompt_tokens + record.completion_tokens for record in records)
+    print(
+        f"{args.jobs} jobs x {args.chunks + 1 if args.chunks else 1} calls "
+        f"(governor {args.governor_rpm}/min, {args.governor_concurrency} concurrent): "
+        f"{wall:.1f} s wall, {len(done) / wall:.2f} jobs/s, {len(results) - len(done)} failed"
+    )
+    if latencies:
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"  job latency p50 {statistics.median(latencies):.2f} s, p95 {p95:.2f} s, "
+            f"max {latencies[-1]:.2f} s"
+        )
+    limit = ai_scheduler._memory._limit()
+    print(f"  AI scheduler limit {limit:.1f} (started at {args.ai_concurrency})")
+    print(
+        f"  {calls} completed calls, {retries} retries, {tokens} tokens; "
+        f"server: {stats.requests} requests, peak {stats.max_in_flight} in flight, "
+        f"status {dict(stats.status)}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=4)
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--server-rpm", type=int, default=0)
+    parser.add_argument("--governor-rpm", type=int, default=600)
+    parser.add_argument("--governor-concurrency", type=int, default=4)
+    parser.add_argument("--ai-concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,120 @@
+"""
+Benchmark: portfolio snapshot latency vs. number of holdings.
+
+Seeds an in-memory SQLite database with N holdings (each with a few
+earnings calls) and times analyze_portfolio, counting the SQL statements it
+issues. The latest-earnings lookup is one query regardless of N; the
+per-holding loop it replaced is timed alongside for comparison.
+
+Usage:
+    python -m benchmarks.bench_portfolio_snapshot [--sizes 5 25 100 400]
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401 — populate metadata
+from app.database import AppSession
+from app.models import EarningsCall, Holding, Portfolio
+from app.services import portfolio as portfolio_svc
+
+CALLS_PER_HOLDING = 4
+
+
+async def _legacy_latest(db: AsyncSession, user_id: str, holdings: list[Holding]) -> int:
+    """The old one-query-per-holding lookup."""
+    found = 0
+    for h in holdings:
+        result = await db.execute(
+            select(EarningsCall)
+            .where(
+                EarningsCall.user_id == user_id,
+                (EarningsCall.ticker == h.ticker) | (EarningsCall.holding_id == h.id),
+            )
+            .order_by(EarningsCall.created_at.desc())
+            .limit(1)
+        )
+        found += result.scalars().first() is not None
+    return found
+
+
+async def _run(size: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AppSession, expire_on_commit=False)
+
+    statements = 0
+
+    def _count(*_args) -> None:
+        nonlocal statements
+        statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+
+    async with session_factory() as db:
+        portfolio = Portfolio(user_id="bench", name="Bench")
+        db.add(portfolio)
+        await db.flush()
+        holdings = [
+            Holding(
+                user_id="bench",
+                portfolio_id=portfolio.id,
+                ticker=f"T{i:04d}",
+                shares=10,
+                last_price=100 + i,
+            )
+            for i in range(size)
+        ]
+        db.add_all(holdings)
+        now = datetime.now(timezone.utc)
+        db.add_all(
+            EarningsCall(
+                user_id="bench",
+                ticker=f"T{i:04d}",
+                sentiment_score=(i % 7 - 3) / 10,
+                created_at=now - timedelta(days=90 * k),
+            )
+            for i in range(size)
+            for k in range(CALLS_PER_HOLDING)
+        )
+        await db.commit()
+
+        timings, legacy = [], []
+        for _ in range(repeat):
+            statements = 0
+            t0 = time.perf_counter()
+            await portfolio_svc.analyze_portfolio(db, "bench", portfolio.id)
+            timings.append(time.perf_counter() - t0)
+            snapshot_queries = statements
+
+            t0 = time.perf_counter()
+            await _legacy_latest(db, "bench", holdings)
+            legacy.append(time.perf_counter() - t0)
+
+    await engine.dispose()
+    print(
+        f"{size:>5} holdings: snapshot {min(timings) * 1000:7.1f} ms "
+        f"({snapshot_queries} queries) | per-holding earnings loop "
+        f"{min(legacy) * 1000:7.1f} ms ({size} queries)"
+    )
+
+
+async def main(sizes: list[int], repeat: int) -> None:
+    for size in sizes:
+        await _run(size, repeat)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 25, 100, 400])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.repeat))
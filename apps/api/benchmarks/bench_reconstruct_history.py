@@ -0,0 +1,45 @@
+"""
+Benchmark: reconstructed portfolio history on large synthetic portfolios.
+
+Compares portfolio.history_value_series (aligned close matrix, held mask,
+matrix products) with the original date x holding Python loop, kept with
+the parity tests as tests/legacy/history.py.
+
+Usage:
+    python -m benchmarks.bench_reconstruct_history [--years 10] [--holdings 60]
+"""
+
+import argparse
+import time
+
+from app.services.portfolio import history_value_series
+from tests.legacy.history import legacy_value_series, synthetic_portfolio
+
+
+def main(years: int, n_holdings: int, repeat: int) -> None:
+    history, holdings = synthetic_portfolio(years, n_holdings)
+
+    def best(fn) -> tuple[float, list[dict]]:
+        timings = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = fn(history, holdings)
+            timings.append(time.perf_counter() - t0)
+        return min(timings), out
+
+    legacy_t, legacy = best(legacy_value_series)
+    new_t, new = best(history_value_series)
+    print(
+        f"{years}y x {n_holdings} holdings ({len(new)} points): "
+        f"loop {legacy_t * 1000:.0f} ms, vectorized {new_t * 1000:.1f} ms "
+        f"({legacy_t / new_t:.0f}x), identical output: {legacy == new}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--holdings", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.years, args.holdings, args.repeat)
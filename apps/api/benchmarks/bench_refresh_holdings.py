@@ -0,0 +1,90 @@
+"""
+Benchmark: refresh_holdings wall time for a portfolio of N holdings.
+
+Alpha Vantage is replaced by a fake that sleeps for a fixed latency inside
+the real rate governor, so the result reflects deduplication, concurrency
+and the bulk UPDATE rather than network variance. The sequential version
+slept 1.5 s before every quote, i.e. over a minute for 50 holdings.
+
+Usage (with premium Alpha Vantage limits; the free-tier defaults take minutes):
+    ALPHA_VANTAGE_REQUESTS_PER_MINUTE=75 ALPHA_VANTAGE_MAX_CONCURRENCY=10 \
+        python -m benchmarks.bench_refresh_holdings [--holdings 50] [--latency 0.2]
+"""
+
+import argparse
+import asyncio
+import time
+from unittest.mock import patch
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+import app.models  # noqa: F401 — populate metadata
+from app.config import settings
+from app.core.rate_governor import alpha_vantage
+from app.database import AppSession
+from app.models import Holding, Portfolio
+from app.services import portfolio as portfolio_svc
+
+
+async def main(n_holdings: int, latency: float) -> None:
+    calls = 0
+
+    async def fake_quote(ticker: str) -> dict:
+        nonlocal calls
+        async with alpha_vantage:
+            calls += 1
+            await asyncio.sleep(latency)
+        return {"price": 100.0 + len(ticker), "previous_close": 99.0}
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AppSession, expire_on_commit=False)
+
+    statements = 0
+
+    def _count(*_args) -> None:
+        nonlocal statements
+        statements += 1
+
+    async with session_factory() as db:
+        portfolio = Portfolio(user_id="bench", name="Bench")
+        db.add(portfolio)
+        await db.flush()
+        # ~20% duplicate tickers (lots bought at different times)
+        db.add_all(
+            Holding(
+                user_id="bench",
+                portfolio_id=portfolio.id,
+                ticker=f"T{i % max(1, int(n_holdings * 0.8)):03d}",
+                shares=1,
+                sector="Technology",
+                next_earnings_date="2026-01-01",
+            )
+            for i in range(n_holdings)
+        )
+        await db.commit()
+
+        event.listen(engine.sync_engine, "before_cursor_execute", _count)
+        with patch.object(portfolio_svc.market_data, "get_quote", fake_quote):
+            t0 = time.perf_counter()
+            holdings = await portfolio_svc.refresh_holdings(db, "bench", portfolio.id)
+            elapsed = time.perf_counter() - t0
+
+    await engine.dispose()
+    print(
+        f"{len(holdings)} holdings, {calls} quote calls at {latency * 1000:.0f} ms "
+        f"(concurrency {settings.alpha_vantage_max_concurrency}): "
+        f"{elapsed:.2f} s, {statements} SQL statements"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--holdings", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(main(args.holdings, args.latency))
@@ -0,0 +1,72 @@
+"""
+Benchmark: sentiment_parser.parse_analysis over a corpus of analyses.
+
+Compares the current parser (all sections located in one header pass) with
+the original, which re-searched the whole text with a lazy DOTALL regex for
+each section (kept with the parity tests as tests/legacy/sentiment_parser.py).
+
+The corpus is the stored analyses (ai_analysis_cache and earnings_call
+summaries) when --database-url is given, otherwise synthetic analyses in
+the seven-section prompt format.
+
+Usage:
+    python -m benchmarks.bench_sentiment_parser [--analyses 500]
+    python -m benchmarks.bench_sentiment_parser --database-url postgresql+asyncpg://...
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models import AIAnalysisCache, EarningsCall
+from app.services.sentiment_parser import parse_analysis
+from tests.legacy.sentiment_parser import legacy_parse_analysis, synthetic_analyses
+
+
+async def stored_analyses(database_url: str) -> list[str]:
+    engine = create_async_engine(database_url)
+    async with engine.connect() as conn:
+        shared = await conn.execute(select(AIAnalysisCache.summary))
+        per_user = await conn.execute(
+            select(EarningsCall.summary).where(EarningsCall.summary.is_not(None))
+        )
+        texts = [row[0] for row in shared] + [row[0] for row in per_user]
+    await engine.dispose()
+    return texts
+
+
+def main(corpus: list[str], repeat: int) -> None:
+    chars = sum(len(t) for t in corpus)
+
+    def best(fn) -> tuple[float, list[dict]]:
+        timings = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = [fn(t) for t in corpus]
+            timings.append(time.perf_counter() - t0)
+        return min(timings), out
+
+    legacy_t, legacy = best(legacy_parse_analysis)
+    new_t, new = best(parse_analysis)
+    mismatches = sum(a != b for a, b in zip(legacy, new))
+    print(
+        f"{len(corpus)} analyses ({chars / 1e6:.1f}M chars): "
+        f"legacy {legacy_t * 1000:.0f} ms, one pass {new_t * 1000:.0f} ms "
+        f"({legacy_t / new_t:.1f}x), mismatches: {mismatches}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--analyses", type=int, default=500)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.database_url:
+        corpus = asyncio.run(stored_analyses(args.database_url))
+    else:
+        corpus = synthetic_analyses(args.analyses)
+    main(corpus, args.repeat)
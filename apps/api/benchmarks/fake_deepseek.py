@@ -0,0 +1,309 @@
+"""
+Local DeepSeek-compatible chat-completions server for load and latency tests.
+
+Speaks the subset of the API that ai_analysis._call_ai_api uses: POST
+/v1/chat/completions with a bearer token, plain or streamed (SSE) responses,
+stream_options.include_usage and a `usage` block. Replies are deterministic
+seven-section analyses (same prompt, same text) that sentiment_parser can
+parse, truncated to max_tokens.
+
+Latency, streaming pace, server errors and rate limiting are configurable,
+and /stats reports requests, status codes and peak concurrency so worker
+throughput and the deepseek rate governor can be measured offline.
+
+Usage:
+    # As an ASGI app (settings.deepseek_url = http://127.0.0.1:8089/v1/chat/completions)
+    python -m benchmarks.fake_deepseek --port 8089 --latency-ms 800 --error-rate 0.02
+
+    # In-process, pointing settings.deepseek_url at it for the duration
+    async with fake_deepseek.running(FakeDeepSeekConfig(latency_ms=200)) as server:
+        ...
+        print(server.stats)
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.config import settings
+
+SECTIONS = [
+    "EXECUTIVE SUMMARY",
+    "FINANCIAL PERFORMANCE",
+    "BUSINESS HIGHLIGHTS",
+    "MANAGEMENT GUIDANCE",
+    "RISK FACTORS",
+    "INVESTMENT IMPLICATIONS",
+    "SENTIMENT ANALYSIS",
+]
+
+_BULLETS = {
+    "EXECUTIVE SUMMARY": [
+        "Results came in ahead of consensus on both revenue and EPS.",
+        "Management emphasized disciplined spending and capital returns.",
+        "Demand trends were described as stable across core segments.",
+        "The quarter included one-time restructuring charges.",
+    ],
+    "FINANCIAL PERFORMANCE": [
+        "Revenue of $24.3 billion, up 8.4% year-over-year.",
+        "EPS of $1.92 versus $1.75 a year ago.",
+        "Operating margin of 31.2% expanded on mix.",
+        "Free cash flow improved on lower capital expenditure.",
+    ],
+    "BUSINESS HIGHLIGHTS": [
+        "New product launch drove growth in the subscription segment.",
+        "Expansion into two new markets adds to the pipeline.",
+        "A strategic partnership supports market share gains.",
+        "Momentum in services continues to scale.",
+    ],
+    "MANAGEMENT GUIDANCE": [
+        "Raised guidance for full-year revenue.",
+        "Expects margins to stay within the prior range.",
+        "Lowered outlook for the hardware segment.",
+        "Sees upside from pricing actions in the second half.",
+    ],
+    "RISK FACTORS": [
+        "Competition and pricing pressure in mature markets.",
+        "Regulatory uncertainty in Europe.",
+        "FX volatility remains a headwind.",
+        "Supply chain disruption risk persists.",
+    ],
+    "INVESTMENT IMPLICATIONS": [
+        "Execution supports the current valuation.",
+        "Capital returns provide downside support.",
+        "Watch segment margins for confirmation of the trend.",
+    ],
+    "SENTIMENT ANALYSIS": [
+        "Overall tone: Positive, management sounded confident.",
+        "Overall tone: Neutral, with mixed commentary across segments.",
+        "Overall tone: Negative, management was cautious on demand.",
+    ],
+}
+
+
+@dataclass
+class FakeDeepSeekConfig:
+    # Time to first token: "fixed", "uniform" (latency_ms +/- spread * latency_ms)
+    # or "lognormal" (median latency_ms, sigma = spread)
+    latency: str = "lognormal"
+    latency_ms: float = 800.0
+    spread: float = 0.5
+    # Streaming / generation pace; 0 = all tokens at once
+    tokens_per_second: float = 60.0
+    # Fraction of requests answered with HTTP 500
+    error_rate: float = 0.0
+    # Requests per rolling minute before answering 429 (0 = unlimited)
+    requests_per_minute: int = 0
+    # Fraction of requests answered with 429 regardless of volume
+    rate_limit_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class FakeDeepSeekStats:
+    requests: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    status: Counter = field(default_factory=Counter)
+    completion_tokens: int = 0
+
+
+def canned_analysis(prompt: str) -> str:
+    """Deterministic seven-section analysis for `prompt`."""
+    rng = random.Random(hashlib.sha256(prompt.encode()).digest())
+    parts = []
+    for num, name in enumerate(SECTIONS, 1):
+        options = _BULLETS[name]
+        count = 1 if name == "SENTIMENT ANALYSIS" else rng.randint(2, len(options))
+        bullets = "\n".join(f"- {b}" for b in rng.sample(options, count))
+        parts.append(f"{num}. {name}\n{bullets}")
+    return "\n\n".join(parts)
+
+
+def _tokens(text: str) -> list[str]:
+    # Whitespace-delimited "tokens", each keeping its trailing whitespace
+    tokens, start = [], 0
+    for i, ch in enumerate(text):
+        if ch.isspace() and i + 1 < len(text) and not text[i + 1].isspace():
+            tokens.append(text[start : i + 1])
+            start = i + 1
+    if start < len(text):
+        tokens.append(text[start:])
+    return tokens
+
+
+def create_app(config: FakeDeepSeekConfig | None = None) -> FastAPI:
+    config = config or FakeDeepSeekConfig()
+    rng = random.Random(config.seed)
+    stats = FakeDeepSeekStats()
+    recent: deque[float] = deque()
+    app = FastAPI(title="Fake DeepSeek")
+    app.state.config = config
+    app.state.stats = stats
+
+    def first_token_delay() -> float:
+        if config.latency == "fixed":
+            ms = config.latency_ms
+        elif config.latency == "uniform":
+            ms = rng.uniform(1 - config.spread, 1 + config.spread) * config.latency_ms
+        else:
+            ms = rng.lognormvariate(0, config.spread) * config.latency_ms
+        return max(ms, 0.0) / 1000
+
+    def token_delay() -> float:
+        return 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0.0
+
+    def rejection() -> JSONResponse | None:
+        now = time.monotonic()
+        while recent and now - recent[0] > 60:
+            recent.popleft()
+        if (config.requests_per_minute and len(recent) >= config.requests_per_minute) or (
+            rng.random() < config.rate_limit_rate
+        ):
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+        recent.append(now)
+        if rng.random() < config.error_rate:
+            return JSONResponse(
+                {"error": {"message": "Injected server error", "type": "server_error"}},
+                status_code=500,
+            )
+        return None
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**asdict(stats), "status": dict(stats.status)}
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        stats.requests += 1
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            stats.status[401] += 1
+            return JSONResponse({"error": {"message": "Missing API key"}}, status_code=401)
+        rejected = rejection()
+        if rejected is not None:
+            stats.status[rejected.status_code] += 1
+            return rejected
+
+        body = await request.json()
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        tokens = _tokens(canned_analysis(prompt))[: body.get("max_tokens") or None]
+        usage = {
+            "prompt_tokens": max(1, len(prompt) // 4),
+            "completion_tokens": len(tokens),
+            "total_tokens": max(1, len(prompt) // 4) + len(tokens),
+        }
+        stats.status[200] += 1
+        stats.completion_tokens += len(tokens)
+        created = int(time.time())
+
+        if not body.get("stream"):
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                await asyncio.sleep(first_token_delay() + token_delay() * len(tokens))
+            finally:
+                stats.in_flight -= 1
+            return {
+                "id": f"fake-{stats.requests}",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "deepseek-chat"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": "".join(tokens)},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": usage,
+            }
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        async def events():
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                await asyncio.sleep(first_token_delay())
+                for token in tokens:
+                    chunk = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    if token_delay():
+                        await asyncio.sleep(token_delay())
+                if include_usage:
+                    yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats.in_flight -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def running(config: FakeDeepSeekConfig | None = None):
+    """Serve a fake on a free local port and point settings.deepseek_url at it.
+
+    Yields the app's FakeDeepSeekStats (live). The previous URL and API key
+    are restored on exit.
+    """
+    app = create_app(config)
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+
+    previous = settings.deepseek_url, settings.deepseek_api_key
+    settings.deepseek_url = f"http://127.0.0.1:{port}/v1/chat/completions"
+    settings.deepseek_api_key = settings.deepseek_api_key or "fake-key"
+    try:
+        yield app.state.stats
+    finally:
+        settings.deepseek_url, settings.deepseek_api_key = previous
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--tokens-per-second", type=float, default=60.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    host, port = args.host, args.port
+    del args.host, args.port
+    uvicorn.run(create_app(FakeDeepSeekConfig(**vars(args))), host=host, port=port)
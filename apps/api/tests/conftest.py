@@ -3,23 +3,27 @@ Test fixtures for StockBuddy API.
 
 Uses in-memory SQLite via aiosqlite. Overrides auth (always "test-user"),
 database session, and arq pool (AsyncMock). Registers a JSONB → JSON
-compiler so PostgreSQL-specific columns work with SQLite.
+compiler so PostgreSQL-specific columns work with SQLite. The shared cache
+is pinned to its in-memory backend and emptied between tests.
 """
 
-from contextlib import asynccontextmanager
-from unittest.mock import AsyncMock, MagicMock
+from contextlib import asynccontextmanager, contextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import JSON
+from sqlalchemy import JSON, event
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 
 from app.api.deps import get_arq_pool, get_current_user
-from app.database import get_db
+from app.core.ai_scheduler import ai_scheduler
+from app.core.cache import cache
+from app.core.job_stream import job_streams
+from app.database import AppSession, get_db
 
 # ─── JSONB → JSON for SQLite ─────────────────────────────────────────
 # PostgreSQL JSONB columns need to render as plain JSON in SQLite tests.
@@ -34,7 +38,7 @@ def compile_jsonb_sqlite(type_, compiler, **kw):
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 engine = create_async_engine(TEST_DATABASE_URL, echo=False)
-TestSession = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+TestSession = sessionmaker(engine, class_=AppSession, expire_on_commit=False)
 
 
 @pytest.fixture(autouse=True)
@@ -50,6 +54,40 @@ async def setup_db():
         await conn.run_sync(SQLModel.metadata.drop_all)
 
 
+# ─── Shared cache: in-memory only, fresh per test ─────────────────────
+
+cache.configure(memory_only=True)
+job_streams.configure(memory_only=True)
+ai_scheduler.configure(memory_only=True)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear_memory()
+    job_streams.clear_memory()
+    ai_scheduler.clear_memory()
+    yield
+
+
+# ─── Background ticker enrichment: recorded, never run ────────────────
+
+@pytest.fixture(autouse=True)
+def mock_enricher():
+    with patch("app.services.enrichment.enricher.schedule") as schedule:
+        yield schedule
+
+
+# ─── Background daily value refreshes: recorded, never run ────────────
+
+@pytest.fixture(autouse=True)
+def mock_refresher():
+    with (
+        patch("app.services.portfolio_history.refresher.schedule") as schedule,
+        patch("app.services.portfolio_history.refresher._backfilled", {}),
+    ):
+        yield schedule
+
+
 # ─── Override app lifespan to skip Redis ──────────────────────────────
 
 @asynccontextmanager
@@ -108,3 +146,29 @@ async def client():
 async def db():
     async with TestSession() as session:
         yield session
+
+
+@pytest.fixture
+def count_statements():
+    """Record the SQL statements executed on the test engine.
+
+    Usage:
+        with count_statements() as statements:
+            await portfolio_svc.get_portfolio_totals(db, "test-user", pid)
+        assert len(statements) == 1
+    """
+
+    @contextmanager
+    def recording():
+        statements: list[str] = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    return recording
@@ -0,0 +1,87 @@
+"""The per-date, per-holding history loop, kept for parity tests and benchmarks."""
+
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+
+def legacy_value_series(history: dict[str, list[dict]], holdings: list) -> list[dict]:
+    """The per-date, per-holding loop history_value_series replaced."""
+    all_dates: set[str] = set()
+    for ticker_data in history.values():
+        for point in ticker_data:
+            all_dates.add(point["date"])
+    sorted_dates = sorted(all_dates)
+    if not sorted_dates:
+        return []
+
+    tickers = list({h.ticker for h in holdings})
+    price_lookup: dict[str, dict[str, float]] = {}
+    for ticker in tickers:
+        price_lookup[ticker] = {p["date"]: p["close"] for p in history.get(ticker, [])}
+
+    effective_cost: dict[int, float] = {}
+    for k, h in enumerate(holdings):
+        if h.cost_basis is not None:
+            effective_cost[k] = h.cost_basis
+        else:
+            purchase_str = h.purchased_at.strftime("%Y-%m-%d")
+            cost = price_lookup.get(h.ticker, {}).get(purchase_str)
+            if cost is None:
+                for d in sorted_dates:
+                    if d >= purchase_str and d in price_lookup[h.ticker]:
+                        cost = price_lookup[h.ticker][d]
+                        break
+            effective_cost[k] = cost or 0.0
+
+    last_known_price: dict[str, float] = {}
+    series: list[dict] = []
+    for d in sorted_dates:
+        daily_value = 0.0
+        daily_cost = 0.0
+        has_any_holding = False
+        for k, h in enumerate(holdings):
+            if h.purchased_at.strftime("%Y-%m-%d") <= d:
+                has_any_holding = True
+                close = price_lookup.get(h.ticker, {}).get(d)
+                if close is not None:
+                    last_known_price[h.ticker] = close
+                daily_value += last_known_price.get(h.ticker, 0.0) * h.shares
+                daily_cost += effective_cost.get(k, 0.0) * h.shares
+        if has_any_holding and daily_value > 0:
+            series.append(
+                {"date": d, "value": round(daily_value, 2), "cost": round(daily_cost, 2)}
+            )
+    return series
+
+
+def synthetic_portfolio(years: int, n_holdings: int, seed: int = 0):
+    """Random-walk histories with gaps, plus holdings bought over the period."""
+    rng = np.random.default_rng(seed)
+    end = date.today()
+    days = pd.bdate_range(end=end, periods=252 * years)
+    n_tickers = max(1, int(n_holdings * 0.8))
+
+    history: dict[str, list[dict]] = {}
+    for t in range(n_tickers):
+        closes = np.round(20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(days)))), 4)
+        listed = rng.integers(0, len(days) // 3) if t % 5 == 0 else 0  # late IPOs
+        present = rng.random(len(days)) > 0.01  # ~1% missing bars
+        history[f"T{t:03d}"] = [
+            {"date": d.strftime("%Y-%m-%d"), "close": float(c)}
+            for d, c, ok in zip(days[listed:], closes[listed:], present[listed:])
+            if ok
+        ]
+
+    holdings = [
+        SimpleNamespace(
+            ticker=f"T{k % n_tickers:03d}",
+            shares=float(rng.integers(1, 200)),
+            purchased_at=end - timedelta(days=int(rng.integers(0, 365 * years))),
+            cost_basis=float(rng.uniform(5, 50)) if k % 3 == 0 else None,
+        )
+        for k in range(n_holdings)
+    ]
+    return history, holdings
@@ -0,0 +1,231 @@
+"""The per-section sentiment parser, kept for parity tests and benchmarks."""
+
+import random
+import re
+
+
+def legacy_parse_analysis(text: str) -> dict:
+    """The per-section, per-phrase parser sentiment_parser.parse_analysis replaced."""
+    result = {
+        "sentiment_score": 0.0,
+        "guidance_outlook": "neutral",
+        "risk_mentions": 0,
+        "growth_mentions": 0,
+        "key_metrics": {},
+    }
+
+    try:
+        result["sentiment_score"] = _legacy_extract_sentiment_score(text)
+        result["guidance_outlook"] = _legacy_extract_guidance_outlook(text)
+        result["risk_mentions"] = _legacy_count_risk_mentions(text)
+        result["growth_mentions"] = _legacy_count_growth_mentions(text)
+        result["key_metrics"] = _legacy_extract_key_metrics(text)
+    except Exception:
+        pass
+
+    return result
+
+
+def _legacy_extract_section(text: str, section_num: int, section_name: str) -> str:
+    """Extract text between a numbered section header and the next section."""
+    pattern = rf"{section_num}\.\s*{section_name}.*?\n(.*?)(?=\d+\.\s+[A-Z]|\Z)"
+    match = re.search(pattern, text, re.DOTALL | re.IGNORECASE)
+    return match.group(1).strip() if match else ""
+
+
+def _legacy_extract_sentiment_score(text: str) -> float:
+    """Extract sentiment score from the SENTIMENT ANALYSIS section."""
+    section = _legacy_extract_section(text, 7, "SENTIMENT ANALYSIS")
+    if not section:
+        # Fall back to searching the full text
+        section = text
+
+    text_lower = section.lower()
+
+    # Look for explicit sentiment keywords
+    strong_positive = ["strongly positive", "very positive", "highly positive", "bullish"]
+    strong_negative = ["strongly negative", "very negative", "highly negative", "bearish"]
+    positive = ["positive", "optimistic", "confident", "upbeat", "encouraging"]
+    negative = ["negative", "pessimistic", "cautious", "concerning", "disappointing"]
+    neutral = ["neutral", "mixed", "balanced", "moderate"]
+
+    for phrase in strong_positive:
+        if phrase in text_lower:
+            return 0.8
+
+    for phrase in strong_negative:
+        if phrase in text_lower:
+            return -0.8
+
+    for phrase in positive:
+        if phrase in text_lower:
+            return 0.5
+
+    for phrase in negative:
+        if phrase in text_lower:
+            return -0.5
+
+    for phrase in neutral:
+        if phrase in text_lower:
+            return 0.0
+
+    return 0.0
+
+
+def _legacy_extract_guidance_outlook(text: str) -> str:
+    """Extract guidance outlook from MANAGEMENT GUIDANCE section."""
+    section = _legacy_extract_section(text, 4, "MANAGEMENT GUIDANCE")
+    if not section:
+        section = text
+
+    text_lower = section.lower()
+
+    positive_words = [
+        "raised guidance", "increased outlook", "positive guidance",
+        "above expectations", "strong outlook", "optimistic forecast",
+        "upside", "accelerat", "raised", "exceeded",
+    ]
+    negative_words = [
+        "lowered guidance", "reduced outlook", "negative guidance",
+        "below expectations", "cautious outlook", "downside",
+        "cut", "lowered", "missed", "decline",
+    ]
+
+    pos_count = sum(1 for w in positive_words if w in text_lower)
+    neg_count = sum(1 for w in negative_words if w in text_lower)
+
+    if pos_count > neg_count:
+        return "positive"
+    elif neg_count > pos_count:
+        return "negative"
+    return "neutral"
+
+
+def _legacy_count_risk_mentions(text: str) -> int:
+    """Count risk-related keywords in RISK FACTORS section."""
+    section = _legacy_extract_section(text, 5, "RISK FACTORS")
+    if not section:
+        return 0
+
+    risk_keywords = [
+        "risk", "challenge", "headwind", "uncertainty", "threat",
+        "competition", "regulatory", "volatility", "concern", "pressure",
+        "decline", "weakness", "disruption", "litigation", "debt",
+    ]
+
+    text_lower = section.lower()
+    return sum(text_lower.count(kw) for kw in risk_keywords)
+
+
+def _legacy_count_growth_mentions(text: str) -> int:
+    """Count growth-related keywords in BUSINESS HIGHLIGHTS section."""
+    section = _legacy_extract_section(text, 3, "BUSINESS HIGHLIGHTS")
+    if not section:
+        return 0
+
+    growth_keywords = [
+        "growth", "expansion", "new product", "innovation", "launch",
+        "market share", "opportunity", "momentum", "increase", "scale",
+        "revenue growth", "acquisition", "partnership", "pipeline",
+    ]
+
+    text_lower = section.lower()
+    return sum(text_lower.count(kw) for kw in growth_keywords)
+
+
+def _legacy_extract_key_metrics(text: str) -> dict:
+    """Extract key financial metrics from FINANCIAL PERFORMANCE section."""
+    section = _legacy_extract_section(text, 2, "FINANCIAL PERFORMANCE")
+    if not section:
+        return {}
+
+    metrics: dict[str, str] = {}
+
+    # Revenue patterns
+    rev_match = re.search(
+        r"revenue\s*(?:of\s*)?[\$]?([\d,.]+)\s*(billion|million|B|M)?",
+        section, re.IGNORECASE
+    )
+    if rev_match:
+        metrics["revenue"] = rev_match.group(0).strip()
+
+    # EPS patterns
+    eps_match = re.search(
+        r"(?:EPS|earnings per share)\s*(?:of\s*)?[\$]?([\d,.]+)",
+        section, re.IGNORECASE
+    )
+    if eps_match:
+        metrics["eps"] = eps_match.group(0).strip()
+
+    # Margin patterns
+    margin_match = re.search(
+        r"(?:gross|operating|net|profit)\s*margin\s*(?:of\s*)?(\d+\.?\d*)\s*%",
+        section, re.IGNORECASE
+    )
+    if margin_match:
+        metrics["margin"] = margin_match.group(0).strip()
+
+    # YoY growth
+    yoy_match = re.search(
+        r"(\d+\.?\d*)\s*%\s*(?:year-over-year|YoY|y\/y)",
+        section, re.IGNORECASE
+    )
+    if yoy_match:
+        metrics["yoy_growth"] = yoy_match.group(0).strip()
+
+    return metrics
+
+
+_PHRASES = [
+    "Revenue of $94.9 billion, up 6% year-over-year, with gross margin of 46.2%.",
+    "EPS of $1.64 exceeded expectations; services revenue growth accelerated.",
+    "Management raised guidance for the full year and sees upside in the pipeline.",
+    "Lowered guidance in China amid competition and regulatory pressure.",
+    "Headwinds from FX volatility, supply chain disruption and litigation risk.",
+    "New product launch and a strategic partnership expand market share.",
+    "Tone was cautiously optimistic; management sounded confident but measured.",
+    "Overall sentiment: strongly positive, with bullish commentary on AI demand.",
+    "Demand remained mixed, and the outlook is balanced against macro uncertainty.",
+    "Operating margin of 30.1% despite a decline in hardware sales in Q3. Revenue mix shifted.",
+    "Debt refinancing removes a concern; momentum in subscriptions continues to scale.",
+    "Analysts questioned whether the acquisition will increase revenue growth in 2025.",
+]
+_SECTIONS = [
+    "EXECUTIVE SUMMARY",
+    "FINANCIAL PERFORMANCE",
+    "BUSINESS HIGHLIGHTS",
+    "MANAGEMENT GUIDANCE",
+    "RISK FACTORS",
+    "INVESTMENT IMPLICATIONS",
+    "SENTIMENT ANALYSIS",
+]
+
+
+def synthetic_analyses(n: int, seed: int = 0) -> list[str]:
+    """Analyses in the prompt's numbered-section format, with the usual quirks.
+
+    Some use markdown headers, some skip or repeat sections, and some have no
+    sections at all (the parser falls back to the full text).
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(n):
+        style = rng.random()
+        parts = []
+        for num, name in enumerate(_SECTIONS, 1):
+            if style < 0.1 or (style < 0.3 and rng.random() < 0.2):
+                continue
+            if style > 0.9:
+                header = f"{num}. {name.title()}"
+            elif style > 0.7:
+                header = f"**{num}. {name}**"
+            else:
+                header = f"{num}. {name}"
+            bullets = "\n".join(
+                f"- {rng.choice(_PHRASES)}" for _ in range(rng.randint(2, 8))
+            )
+            parts.append(f"{header}\n{bullets}")
+        if style < 0.1:
+            parts = [" ".join(rng.choice(_PHRASES) for _ in range(40))]
+        corpus.append("\n\n".join(parts))
+    return corpus
@@ -1,5 +1,24 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock
+
+import httpx
 import pytest
 from httpx import AsyncClient
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import select
+from tenacity import RetryError, wait_none
+
+from app.api.deps import get_arq_pool
+from app.config import settings
+from app.core.ai_scheduler import ai_scheduler, priority_for
+from app.core.job_stream import JobTextWriter, job_streams
+from app.main import app
+from app.models import AIUsage, AnalysisJob, EarningsCall
+from app.services import ai_analysis, ai_usage, sentiment_parser
+from app.workers import dispatch, tasks
+from benchmarks.fake_deepseek import FakeDeepSeekConfig, create_app
+from tests.conftest import TestSession
 
 
 @pytest.mark.asyncio
@@ -30,3 +49,328 @@ async def test_compare_enqueues_job(client: AsyncClient):
 async def test_get_job_not_found(client: AsyncClient):
     resp = await client.get("/api/v1/analysis/jobs/nonexistent-uuid")
     assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_ai_call_streams_tokens_to_job(monkeypatch):
+    chunks = ["Port", "folio ", "looks ", "balanced."]
+    body = "".join(
+        f'data: {{"choices": [{{"delta": {{"content": "{c}"}}}}]}}\n\n' for c in chunks
+    ) + "data: [DONE]\n\n"
+    payloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        payloads.append(request.read())
+        return httpx.Response(
+            200, content=body.encode(), headers={"content-type": "text/event-stream"}
+        )
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        ai_analysis.httpx, "AsyncClient",
+        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+    )
+    monkeypatch.setattr(settings, "deepseek_api_key", "test-key")
+
+    text = await ai_analysis._call_ai_api("prompt", stream=JobTextWriter("job-1", min_chars=8))
+
+    assert text == "Portfolio looks balanced."
+    assert b'"stream": true' in payloads[0] or b'"stream":true' in payloads[0]
+    events = [e for _, e in await job_streams.read("job-1", block_ms=10)]
+    assert events[0] == {"type": "reset"}
+    assert "".join(e["text"] for e in events[1:]) == text
+    assert len(events) < len(chunks) + 1  # small deltas are batched
+
+
+@pytest.mark.asyncio
+async def test_job_stream_endpoint_relays_events(client: AsyncClient, db):
+    job = AnalysisJob(user_id="test-user", job_type="portfolio_analysis", status="processing")
+    other = AnalysisJob(user_id="test-user", job_type="holdings_import", status="processing")
+    done = AnalysisJob(user_id="test-user", job_type="comparison", status="completed")
+    db.add_all([job, other, done])
+    await db.commit()
+    await job_streams.publish(job.id, {"type": "delta", "text": "Hello"})
+
+    async def worker():
+        await asyncio.sleep(0.05)
+        await job_streams.publish(job.id, {"type": "delta", "text": ", world"})
+        await job_streams.finish(job.id, "completed")
+
+    resp, _ = await asyncio.gather(
+        client.get(f"/api/v1/analysis/jobs/{job.id}/stream"), worker()
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    frames = [f for f in resp.text.split("\n\n") if f.startswith("id:")]
+    assert [f.splitlines()[1] for f in frames] == ["event: delta", "event: delta", "event: done"]
+    assert frames[1].splitlines()[2] == 'data: {"text": ", world"}'
+
+    # Resume after the first event
+    resumed = await client.get(
+        f"/api/v1/analysis/jobs/{job.id}/stream", headers={"Last-Event-ID": "2"}
+    )
+    assert resumed.text.count("event:") == 1 and "event: done" in resumed.text
+
+    finished = await client.get(f"/api/v1/analysis/jobs/{done.id}/stream")
+    assert finished.text == 'event: done\ndata: {"status": "completed"}\n\n'
+    assert (await client.get(f"/api/v1/analysis/jobs/{other.id}/stream")).status_code == 400
+    assert (await client.get("/api/v1/analysis/jobs/nope/stream")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_comparison_gathers_tickers_concurrently(client: AsyncClient, db, monkeypatch):
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    monkeypatch.setattr(settings, "earnings_ticker_timeout_seconds", 0.3)
+    monkeypatch.setattr(settings, "earnings_gather_concurrency", 3)
+    # Staggered so each session commits before the next writes (the test
+    # engine shares one SQLite connection between sessions)
+    delays = {"AAPL": 0.1, "MSFT": 0.15, "NVDA": 0.2}
+    running = peak = 0
+
+    async def ensure(user_id, ticker, budget):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            if ticker == "SLOW":
+                await asyncio.sleep(10)
+            if ticker == "BAD":
+                raise RuntimeError("upstream down")
+            await asyncio.sleep(delays[ticker])
+            ec = EarningsCall(user_id=user_id, ticker=ticker, summary=f"{ticker} beat estimates")
+            async with TestSession() as session:
+                session.add(ec)
+                await session.commit()
+            return ec
+        finally:
+            running -= 1
+
+    monkeypatch.setattr(tasks, "_ensure_earnings_data", ensure)
+    compare = AsyncMock(return_value="comparison")
+    monkeypatch.setattr(tasks.ai_analysis, "compare_multiple_earnings", compare)
+    job = AnalysisJob(user_id="test-user", job_type="comparison")
+    db.add(job)
+    await db.commit()
+
+    tickers = ["AAPL", "MSFT", "SLOW", "BAD", "NVDA"]
+    started = time.monotonic()
+    await tasks.run_comparison({}, job.id, "test-user", tickers)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6  # sequential: 0.45 s of work plus the 0.3 s timeout
+    assert peak == 3
+    analyses = compare.await_args.kwargs["analyses"]
+    themes = [a["key_themes"] for a in analyses]
+    assert themes == ["AAPL beat estimates", "MSFT beat estimates", "", "", "NVDA beat estimates"]
+    saved = (await db.execute(select(EarningsCall.ticker))).scalars().all()
+    assert sorted(saved) == ["AAPL", "MSFT", "NVDA"]
+    status = (await client.get(f"/api/v1/analysis/jobs/{job.id}")).json()
+    assert status["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_ai_calls_are_recorded_against_the_job(db, monkeypatch):
+    attempts = []
+    streams = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) == 1:
+            return httpx.Response(503)
+        if b'"stream": true' in request.content or b'"stream":true' in request.content:
+            streams.append(request)
+            body = (
+                'data: {"choices": [{"delta": {"content": "Hi"}}]}\n\n'
+                'data: {"choices": [], "usage": {"prompt_tokens": 30, "completion_tokens": 2}}\n\n'
+            )
+            # The first stream breaks after its usage chunk; those tokens were still spent
+            body += "data: {not json\n\n" if len(streams) == 1 else "data: [DONE]\n\n"
+            return httpx.Response(200, content=body.encode())
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "Notes"}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20},
+        })
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        ai_analysis.httpx, "AsyncClient",
+        lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw),
+    )
+    monkeypatch.setattr(settings, "deepseek_api_key", "test-key")
+    monkeypatch.setattr(ai_analysis, "wait_exponential", lambda **kw: wait_none())
+
+    with ai_usage.usage_scope("test-user", "comparison", "job-9", TestSession):
+        assert await ai_analysis._call_ai_api("p") == "Notes"
+        # Written per call, so the running job already counts against the budget
+        assert await ai_usage.tokens_used_today(db, "test-user") == 120
+        assert await ai_analysis._call_ai_api("p", stream=JobTextWriter("job-9")) == "Hi"
+        ai_usage.record_cache_hit()
+        # Only the cache hit is left for the job's own session
+        assert await ai_usage.save_usage(db) == 1
+        await db.commit()
+    await ai_analysis._call_ai_api("unscoped")  # logged only
+
+    rows = (await db.execute(select(AIUsage).order_by(AIUsage.id))).scalars().all()
+    assert [(r.prompt_tokens, r.completion_tokens, r.attempts, r.cache_hit) for r in rows] == [
+        (100, 20, 2, False),
+        (60, 4, 2, False),
+        (0, 0, 1, True),
+    ]
+    assert {(r.user_id, r.job_type, r.job_id) for r in rows} == {
+        ("test-user", "comparison", "job-9")
+    }
+    assert await ai_usage.tokens_used_today(db, "test-user") == 184
+
+
+@pytest.mark.asyncio
+async def test_fake_deepseek_speaks_the_completions_api(monkeypatch):
+    fake = create_app(FakeDeepSeekConfig(latency="fixed", latency_ms=0, tokens_per_second=0,
+                                         requests_per_minute=3))
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        ai_analysis.httpx, "AsyncClient",
+        lambda **kw: real_client(transport=httpx.ASGITransport(app=fake), **kw),
+    )
+    monkeypatch.setattr(settings, "deepseek_url", "http://fake/v1/chat/completions")
+    monkeypatch.setattr(settings, "deepseek_api_key", "test-key")
+    monkeypatch.setattr(ai_analysis, "wait_exponential", lambda **kw: wait_none())
+
+    with ai_usage.usage_scope("test-user", "earnings_analysis", "job-f") as scope:
+        plain = await ai_analysis.explain_earnings_call("AAPL", "transcript")
+        streamed = await ai_analysis.explain_earnings_call(
+            "AAPL", "transcript", stream=JobTextWriter("job-f")
+        )
+        short = await ai_analysis._call_ai_api("other prompt", max_tokens=5)
+        with pytest.raises(RetryError):  # the fourth request in a minute is rate limited
+            await ai_analysis._call_ai_api("one too many")
+
+    assert plain == streamed  # deterministic per prompt, streamed or not
+    assert sentiment_parser.parse_analysis(plain)["risk_mentions"] > 0
+    assert len(short.split()) == 5
+    assert [r.attempts for r in scope.records] == [1, 1, 1, 3]
+    assert scope.records[1].completion_tokens == len(plain.split())
+    assert "429" in scope.records[3].error
+    assert fake.state.stats.status == {200: 3, 429: 3}
+
+
+@pytest.mark.asyncio
+async def test_ai_scheduler_orders_waiters_and_adapts_its_limit(monkeypatch):
+    monkeypatch.setattr(settings, "ai_initial_concurrency", 1)
+    monkeypatch.setattr(settings, "ai_max_concurrency", 1)
+    order: list[str] = []
+
+    async def call(name: str, job_type: str, plan: str):
+        async with ai_scheduler.slot(priority_for(job_type, plan)):
+            order.append(name)
+
+    async with ai_scheduler.slot(priority_for("portfolio_analysis", "free")):
+        waiters = [
+            asyncio.create_task(call("batch", "portfolio_analysis", "pro")),
+            asyncio.create_task(call("free", "earnings_analysis", "free")),
+            asyncio.create_task(call("pro", "earnings_analysis", "pro")),
+        ]
+        await asyncio.sleep(0.05)
+        assert order == []  # one slot, held
+    await asyncio.gather(*waiters)
+
+    # Interactive before batch, Pro before free, whatever the arrival order
+    assert order == ["pro", "free", "batch"]
+
+    # Additive increase: +1/limit per successful call, up to the ceiling
+    monkeypatch.setattr(settings, "ai_max_concurrency", 3)
+    for _ in range(4):
+        async with ai_scheduler.slot(0):
+            pass
+    assert ai_scheduler._memory.limit == 3  # 1 -> 2 -> 2.5 -> 2.9 -> capped
+
+    for _ in range(3):  # a burst of 429s halves the limit once
+        async with ai_scheduler.slot(0) as slot:
+            slot.throttled()
+    assert ai_scheduler._memory.limit == 1.5
+
+    with pytest.raises(RuntimeError):  # failures release without adapting
+        async with ai_scheduler.slot(0):
+            raise RuntimeError("boom")
+    assert ai_scheduler._memory.limit == 1.5
+    assert ai_scheduler._memory.inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_enqueued_to_arq_with_inline_fallback(client: AsyncClient, db, monkeypatch):
+    pool = AsyncMock(default_queue_name="arq:queue")
+    monkeypatch.setitem(app.dependency_overrides, get_arq_pool, lambda: pool)
+    monkeypatch.setattr(dispatch, "_worker_seen_at", None)
+    run_inline = AsyncMock()
+    monkeypatch.setattr(dispatch, "run_inline", run_inline)
+
+    resp = await client.post("/api/v1/analysis/compare", json={"tickers": ["AAPL", "MSFT"]})
+    job_id = resp.json()["id"]
+    pool.enqueue_job.assert_awaited_once_with(
+        "run_comparison", job_id, "test-user", ["AAPL", "MSFT"], _job_id=job_id
+    )
+    run_inline.assert_not_awaited()
+    pool.exists.assert_awaited_with("arq:queue:health-check")
+
+    # A missed health-check refresh is tolerated for a few intervals
+    pool.exists.return_value = 0
+    resp = await client.post("/api/v1/analysis/compare", json={"tickers": ["AAPL", "AMD"]})
+    assert resp.status_code == 202
+    assert pool.enqueue_job.await_count == 2
+
+    # No worker for longer than the grace period: its health-check key is gone
+    grace = settings.worker_health_check_seconds * dispatch.WORKER_GRACE_INTERVALS
+    monkeypatch.setattr(dispatch, "_worker_seen_at", dispatch._worker_seen_at - grace)
+    resp = await client.post("/api/v1/analysis/compare", json={"tickers": ["AAPL", "NVDA"]})
+    assert resp.status_code == 202
+    await asyncio.sleep(0)
+    assert pool.enqueue_job.await_count == 2
+    assert run_inline.await_args.args[1:] == (resp.json()["id"], "test-user", ["AAPL", "NVDA"])
+    pool.exists.return_value = 1
+
+    # Redis down: the job runs in the API process instead
+    pool.enqueue_job.side_effect = RedisConnectionError("redis down")
+    resp = await client.post("/api/v1/stocks/AAPL/earnings/analyze", json={})
+    assert resp.status_code == 202
+    await asyncio.sleep(0)
+    assert run_inline.await_args.args[1:] == (resp.json()["id"], "test-user", "AAPL", None)
+
+    # ...unless the fallback is off
+    monkeypatch.setattr(settings, "job_inline_fallback", False)
+    resp = await client.post("/api/v1/analysis/compare", json={"tickers": ["AAPL", "MSFT"]})
+    assert resp.status_code == 503
+    failed = (await db.execute(select(AnalysisJob).where(AnalysisJob.status == "failed"))).scalars()
+    assert [(j.job_type, j.error) for j in failed] == [
+        ("comparison", "Background workers are unavailable")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_transient_job_failures_are_retried_with_backoff(
+    client: AsyncClient, db, monkeypatch
+):
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    monkeypatch.setattr(settings, "job_retry_backoff_seconds", 0.01)
+    monkeypatch.setattr(tasks, "gather_earnings_data", AsyncMock(return_value={}))
+    compare = AsyncMock(side_effect=[httpx.ConnectError("reset"), "comparison"])
+    monkeypatch.setattr(tasks.ai_analysis, "compare_multiple_earnings", compare)
+    job = AnalysisJob(user_id="test-user", job_type="comparison")
+    db.add(job)
+    await db.commit()
+
+    await dispatch.run_inline(tasks.run_comparison, job.id, "test-user", ["AAPL"])
+    assert compare.await_count == 2
+    status = (await client.get(f"/api/v1/analysis/jobs/{job.id}")).json()
+    assert status["status"] == "completed"
+    assert status["result"] == {"comparison": "comparison"}
+
+    # Re-delivery of a finished job is a no-op; other errors fail at once
+    await dispatch.run_inline(tasks.run_comparison, job.id, "test-user", ["AAPL"])
+    assert compare.await_count == 2
+    failing = AnalysisJob(user_id="test-user", job_type="comparison")
+    db.add(failing)
+    await db.commit()
+    compare.side_effect = ValueError("bad prompt")
+    await dispatch.run_inline(tasks.run_comparison, failing.id, "test-user", ["AAPL"])
+    assert compare.await_count == 3
+    status = (await client.get(f"/api/v1/analysis/jobs/{failing.id}")).json()
+    assert (status["status"], status["error"]) == ("failed", "bad prompt")
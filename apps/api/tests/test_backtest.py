@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.models import PriceBar
+from app.services import backtest
+
+
+def _random_walk(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.015, n)))
+
+
+async def _inline(fn, *args):
+    return fn(*args)
+
+
+def test_backtest_ticker_counts_every_origin():
+    close = _random_walk(300)
+    result = backtest._backtest_ticker(close, (5, 20), 10)
+
+    expected_origins = len(range(backtest.MIN_HISTORY, len(close) - 20 + 1, 10))
+    assert result["origins"] == expected_origins
+    for sums in result["sums"].values():
+        assert sums["n"] == expected_origins
+        assert 0 <= sums["covered"] <= sums["n"]
+        assert 0 <= sums["hits"] <= sums["n"]
+
+
+def test_summarize_produces_rates():
+    sums = {5: {"abs_err": 10.0, "ape": 0.5, "ape_n": 10, "covered": 8, "hits": 6, "n": 10}}
+    metrics = backtest._summarize(sums)
+    assert metrics["5"] == {"mae": 1.0, "mape": 5.0, "coverage": 0.8, "hit_rate": 0.6, "n": 10}
+
+
+@pytest.mark.asyncio
+async def test_run_backtest_stores_result_and_serves_quality(client: AsyncClient, db):
+    start = date(2022, 1, 3)
+    for ticker, seed in (("AAA", 1), ("BBB", 2)):
+        for i, close in enumerate(_random_walk(200, seed)):
+            db.add(PriceBar(ticker=ticker, bar_date=start + timedelta(days=i), close=close))
+    await db.commit()
+
+    with patch("app.services.backtest.executors.run_in_process", _inline):
+        result = await backtest.run_backtest(db, ["AAA", "BBB", "ZZZ"], horizons=(5, 10))
+    await db.commit()
+
+    assert result.tickers == ["AAA", "BBB"]
+    assert result.params["skipped"] == ["ZZZ"]
+    assert set(result.metrics["overall"]) == {"5", "10"}
+
+    resp = await client.get("/api/v1/analysis/forecast-quality")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["num_origins"] == result.num_origins
+    assert set(data["by_ticker"]) == {"AAA", "BBB"}
+
+
+@pytest.mark.asyncio
+async def test_forecast_quality_not_found(client: AsyncClient):
+    resp = await client.get("/api/v1/analysis/forecast-quality")
+    assert resp.status_code == 404
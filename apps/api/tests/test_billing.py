@@ -1,6 +1,11 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
 
+from app.models import AIUsage
+from app.services.subscription import FREE_LIMITS
+
 
 @pytest.mark.asyncio
 async def test_get_subscription_default_free(client: AsyncClient):
@@ -67,3 +72,31 @@ async def test_portal_returns_503_without_stripe(client: AsyncClient):
     """Portal should fail gracefully when Stripe is not configured."""
     resp = await client.post("/api/v1/billing/portal")
     assert resp.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_daily_ai_token_budget_blocks_new_jobs(client: AsyncClient, db):
+    """AI jobs are refused once today's tokens reach the plan budget."""
+    budget = FREE_LIMITS["ai_tokens_per_day"]
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    db.add_all([
+        AIUsage(
+            user_id="test-user", job_type="comparison", prompt_tokens=budget, created_at=yesterday
+        ),
+        AIUsage(user_id="test-user", job_type="comparison", prompt_tokens=budget - 10),
+        AIUsage(user_id="someone-else", job_type="comparison", completion_tokens=budget),
+    ])
+    await db.commit()
+
+    usage = (await client.get("/api/v1/billing/usage")).json()
+    assert usage["ai_tokens_used_today"] == budget - 10
+    assert usage["ai_tokens_per_day"] == budget
+    compare = {"tickers": ["AAPL", "MSFT"]}
+    assert (await client.post("/api/v1/analysis/compare", json=compare)).status_code == 202
+
+    db.add(AIUsage(user_id="test-user", job_type="comparison", completion_tokens=10))
+    await db.commit()
+    resp = await client.post("/api/v1/analysis/compare", json=compare)
+    assert resp.status_code == 429
+    resp = await client.post("/api/v1/stocks/AAPL/earnings/analyze", json={"transcript": "x"})
+    assert resp.status_code == 429
@@ -1,5 +1,15 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models import AIAnalysisCache, AnalysisJob, EarningsCall, Transcript
+from app.services import ai_analysis, analysis_cache, transcript
+from app.workers import tasks
+from tests.conftest import TestSession
 
 
 @pytest.mark.asyncio
@@ -32,3 +42,211 @@ async def test_analyze_earnings_no_transcript(client: AsyncClient):
     assert resp.status_code == 202
     data = resp.json()
     assert data["status"] == "pending"
+
+
+@pytest.mark.asyncio
+async def test_earnings_analysis_is_shared_across_users(db, monkeypatch):
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    jobs = [AnalysisJob(user_id=u, job_type="earnings_analysis") for u in ("u1", "u2", "u3")]
+    db.add_all(jobs)
+    await db.commit()
+
+    analysis = "7. SENTIMENT ANALYSIS\nOverall tone: Positive. Strong revenue growth."
+    # Beta 1.21 vs 1.24 falls in the same fundamentals bucket; 1.6 does not
+    betas = iter([1.21, 1.24, 1.6])
+    with (
+        patch.object(tasks.market_data, "get_stock_fundamentals",
+                     new=AsyncMock(side_effect=lambda t: {"sector": "Tech", "beta": next(betas)})),
+        patch.object(tasks.ai_analysis, "explain_earnings_call",
+                     new=AsyncMock(return_value=analysis)) as explain,
+    ):
+        for job in jobs:
+            await tasks.run_earnings_analysis({}, job.id, job.user_id, "aapl", "Same transcript")
+
+    assert explain.await_count == 2
+    calls = (await db.execute(select(EarningsCall).order_by(EarningsCall.user_id))).scalars().all()
+    assert [c.summary for c in calls] == [analysis] * 3
+    assert calls[0].analysis_key == calls[1].analysis_key != calls[2].analysis_key
+    assert calls[0].sentiment_score == calls[1].sentiment_score
+    entries = (await db.execute(select(AIAnalysisCache))).scalars().all()
+    assert sorted(e.hit_count for e in entries) == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_transcripts_are_stored_once_and_reused(db, monkeypatch):
+    text = "Operator: Welcome to the call. " * 2000
+    record = {"content": text, "year": 2026, "quarter": 2, "date": "2026-07-30 17:00:00"}
+    fetch = AsyncMock(return_value=record)
+    with patch.object(transcript, "fetch_transcript_record", new=fetch) as fmp:
+        first = await transcript.get_transcript(db, "msft")
+        again = await transcript.get_transcript(db, "MSFT")
+        by_period = await transcript.get_transcript(db, "MSFT", 2026, 2)
+    assert fmp.await_count == 1
+    assert first.id == again.id == by_period.id
+    assert first.text == text and first.size == len(text)
+    assert len(first.content) < len(text) // 20
+    assert first.call_date.year == 2026
+
+    # Pasted copies of the same text from two users share that row
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    jobs = [AnalysisJob(user_id=u, job_type="earnings_analysis") for u in ("u1", "u2")]
+    db.add_all(jobs)
+    await db.commit()
+    with (
+        patch.object(tasks.market_data, "get_stock_fundamentals", new=AsyncMock(return_value={})),
+        patch.object(
+            tasks.ai_analysis, "summarize_transcript_chunk", new=AsyncMock(return_value="n")
+        ),
+        patch.object(
+            tasks.ai_analysis, "explain_earnings_notes", new=AsyncMock(return_value="ok")
+        ),
+    ):
+        for job in jobs:
+            await tasks.run_earnings_analysis({}, job.id, job.user_id, "MSFT", text)
+
+    assert await db.scalar(select(func.count()).select_from(Transcript)) == 1
+    calls = (await db.execute(select(EarningsCall))).scalars().all()
+    assert [(c.transcript_id, c.extracted_text) for c in calls] == [(first.id, None)] * 2
+
+    # The same text under another ticker is that ticker's own transcript
+    other = await transcript.store_transcript(db, "AAPL", text)
+    assert other.id != first.id and other.ticker == "AAPL"
+    assert (await transcript.store_transcript(db, "aapl", text)).id == other.id
+    assert await db.scalar(select(func.count()).select_from(Transcript)) == 2
+
+
+def _long_transcript() -> str:
+    prepared = "\n".join(
+        f"CEO: Segment {i} revenue grew {i}% year over year." * 8 for i in range(40)
+    )
+    qa = "\n".join(
+        f"Analyst {i}: What about margins in region {i}?\nCFO: Stable." for i in range(60)
+    )
+    return f"Operator: Welcome.\n{prepared}\nQuestion-and-Answer Session\n{qa}"
+
+
+async def _notes_for(ticker, chunk, part, parts):
+    return f"notes {part}/{parts}"
+
+
+@pytest.mark.asyncio
+async def test_long_transcript_is_map_reduced_with_cached_chunks(db, monkeypatch):
+    monkeypatch.setattr(settings, "transcript_chunk_chars", 4000)
+    text = _long_transcript()
+    chunks = transcript.split_transcript(text, 4000)
+    assert len(text) > ai_analysis.EARNINGS_TRANSCRIPT_CHARS
+    assert all(len(c) <= 4000 for c in chunks)
+    assert any(c.startswith("Question-and-Answer Session") for c in chunks)
+    assert "".join(c.replace("\n", "") for c in chunks) == text.replace("\n", "")
+
+    with (
+        patch.object(
+            ai_analysis, "summarize_transcript_chunk", new=AsyncMock(side_effect=_notes_for)
+        ) as mapper,
+        patch.object(
+            ai_analysis, "explain_earnings_notes", new=AsyncMock(return_value="analysis")
+        ) as reducer,
+        patch.object(ai_analysis, "explain_earnings_call", new=AsyncMock()) as single,
+    ):
+        first = await analysis_cache.get_earnings_analysis(
+            TestSession, "AAPL", text, {"beta": 1.0}
+        )
+        # Other fundamentals miss the analysis cache but reuse every chunk's notes
+        second = await analysis_cache.get_earnings_analysis(
+            TestSession, "AAPL", text, {"beta": 2.0}
+        )
+
+    single.assert_not_awaited()
+    assert mapper.await_count == len(chunks)
+    assert reducer.await_count == 2
+    parts = len(chunks)
+    assert reducer.await_args.args[1] == [f"notes {i}/{parts}" for i in range(1, parts + 1)]
+    assert first.key != second.key and first.summary == second.summary == "analysis"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("failure", ["error", "timeout"])
+async def test_map_step_keeps_notes_of_finished_chunks(db, monkeypatch, failure):
+    monkeypatch.setattr(settings, "transcript_chunk_chars", 4000)
+    text = _long_transcript()
+    parts = len(transcript.split_transcript(text, 4000))
+
+    async def second_chunk_fails(ticker, chunk, part, parts):
+        if part == 2:
+            if failure == "error":
+                raise RuntimeError("model error")
+            await asyncio.sleep(10)
+        return await _notes_for(ticker, chunk, part, parts)
+
+    with patch.object(
+        ai_analysis, "summarize_transcript_chunk", new=AsyncMock(side_effect=second_chunk_fails)
+    ):
+        with pytest.raises((RuntimeError, TimeoutError)):
+            await asyncio.wait_for(
+                analysis_cache.get_earnings_analysis(TestSession, "AAPL", text), 0.2
+            )
+
+    stored = await db.scalar(
+        select(func.count())
+        .select_from(AIAnalysisCache)
+        .where(AIAnalysisCache.kind == analysis_cache.EARNINGS_CHUNK)
+    )
+    assert stored == parts - 1
+
+    # The retry only pays for the chunk that was lost
+    with (
+        patch.object(
+            ai_analysis, "summarize_transcript_chunk", new=AsyncMock(side_effect=_notes_for)
+        ) as mapper,
+        patch.object(ai_analysis, "explain_earnings_notes", new=AsyncMock(return_value="ok")),
+    ):
+        entry = await analysis_cache.get_earnings_analysis(TestSession, "AAPL", text)
+    assert mapper.await_count == 1
+    assert entry.summary == "ok"
+
+
+@pytest.mark.asyncio
+async def test_gather_extends_ticker_timeout_for_map_reduce(db, monkeypatch):
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    monkeypatch.setattr(settings, "earnings_ticker_timeout_seconds", 0.1)
+    monkeypatch.setattr(settings, "earnings_chunk_timeout_seconds", 0.1)
+    # One ticker at a time: the test engine shares one SQLite connection
+    monkeypatch.setattr(settings, "earnings_gather_concurrency", 1)
+    monkeypatch.setattr(settings, "transcript_chunk_chars", 4000)
+    await transcript.store_transcript(db, "MSFT", _long_transcript(), source="fmp")
+    await transcript.store_transcript(db, "AAPL", "Operator: Short call.", source="fmp")
+    await db.commit()
+
+    async def slow(*args, **kwargs):
+        await asyncio.sleep(0.15)
+        return "analysis"
+
+    with (
+        patch.object(tasks.market_data, "get_stock_fundamentals", new=AsyncMock(return_value={})),
+        patch.object(
+            tasks.ai_analysis, "summarize_transcript_chunk", new=AsyncMock(side_effect=slow)
+        ),
+        patch.object(tasks.ai_analysis, "explain_earnings_notes", new=AsyncMock(return_value="ok")),
+        patch.object(tasks.ai_analysis, "explain_earnings_call", new=AsyncMock(side_effect=slow)),
+    ):
+        results = await tasks.gather_earnings_data("u1", ["MSFT", "AAPL"])
+
+    assert results["MSFT"].summary == "ok"
+    assert results["AAPL"] is None
+
+    # The extension is bounded: a hung map step still times out
+    nvda = _long_transcript() + "\nCEO: Thanks."
+    await transcript.store_transcript(db, "NVDA", nvda, source="fmp")
+    await db.commit()
+
+    async def hang(*args, **kwargs):
+        await asyncio.sleep(60)
+
+    with (
+        patch.object(tasks.market_data, "get_stock_fundamentals", new=AsyncMock(return_value={})),
+        patch.object(
+            tasks.ai_analysis, "summarize_transcript_chunk", new=AsyncMock(side_effect=hang)
+        ),
+    ):
+        results = await asyncio.wait_for(tasks.gather_earnings_data("u1", ["NVDA"]), 5)
+    assert results["NVDA"] is None
@@ -0,0 +1,123 @@
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from httpx import AsyncClient
+
+from app.models import Holding
+from app.services import forecast, stock_data
+
+
+async def _inline(fn, *args):
+    return fn(*args)
+
+
+def _history(tickers, seed=7):
+    rng = np.random.default_rng(seed)
+    today = date.today()
+    return {
+        t: [
+            {"date": (today - timedelta(days=200 - i)).isoformat(), "close": float(c)}
+            for i, c in enumerate(50 * (k + 1) * np.exp(np.cumsum(rng.normal(0, 0.01, 200))))
+        ]
+        for k, t in enumerate(tickers)
+    }
+
+
+@pytest.mark.asyncio
+async def test_portfolio_forecasts_batch_and_share_cache(client: AsyncClient, db):
+    portfolio = await client.post("/api/v1/portfolios", json={"name": "Growth"})
+    pid = portfolio.json()["id"]
+    for ticker, shares in (("AAA", 10), ("BBB", 4), ("AAA", 5)):
+        db.add(Holding(user_id="test-user", portfolio_id=pid, ticker=ticker, shares=shares))
+    await db.commit()
+
+    download = AsyncMock(side_effect=lambda tickers, *_: _history(tickers))
+    with (
+        patch("app.services.forecast.stock_data.get_multi_ticker_history", download),
+        patch("app.services.forecast.executors.run_in_process", _inline),
+    ):
+        resp = await client.get(f"/api/v1/portfolios/{pid}/forecasts", params={"days": 10})
+        again = await client.get(f"/api/v1/portfolios/{pid}/forecasts", params={"days": 10})
+
+    assert resp.status_code == 200
+    assert again.json() == resp.json()
+    download.assert_awaited_once()
+    assert download.await_args.args[0] == ["AAA", "BBB"]
+
+    data = resp.json()
+    by_ticker = {h["ticker"]: h for h in data["holdings"]}
+    assert by_ticker["AAA"]["shares"] == 15
+    assert sum(h["weight"] for h in data["holdings"]) == pytest.approx(1, abs=1e-3)
+
+    expected = [
+        15 * a + 4 * b
+        for a, b in zip(
+            by_ticker["AAA"]["forecast"]["forecast"]["prices"],
+            by_ticker["BBB"]["forecast"]["forecast"]["prices"],
+        )
+    ]
+    assert data["aggregate"]["prices"] == pytest.approx(expected, abs=0.01)
+    assert len(data["aggregate"]["dates"]) == 10
+
+    # The single-ticker endpoint is served from the same cache entry.
+    with patch(
+        "app.services.forecast.stock_data.get_multi_ticker_history",
+        AsyncMock(side_effect=AssertionError),
+    ):
+        single = await forecast.get_forecast("aaa", forecast_days=10)
+    assert single == by_ticker["AAA"]["forecast"]
+
+
+@pytest.mark.asyncio
+async def test_single_ticker_forecast_loads_the_batch_history():
+    download = AsyncMock(side_effect=lambda tickers, *_: _history(tickers))
+    with patch("app.services.forecast.stock_data.get_multi_ticker_history", download):
+        single = await forecast.get_forecast("ccc", forecast_days=10)
+        batch = await forecast.get_forecasts(["CCC"], forecast_days=10)
+
+    # Same source and window as the batch path, so its cached fit is interchangeable
+    download.assert_awaited_once()
+    tickers, start, end = download.await_args.args
+    assert tickers == ["CCC"]
+    assert date.fromisoformat(end) - date.fromisoformat(start) == timedelta(
+        days=forecast.HISTORY_DAYS + 1
+    )
+    assert batch == {"CCC": single}
+    assert single["current_price"] == round(_history(["CCC"])["CCC"][-1]["close"], 2)
+
+
+@pytest.mark.asyncio
+async def test_portfolio_forecasts_report_missing_history(client: AsyncClient, db):
+    portfolio = await client.post("/api/v1/portfolios", json={"name": "Thin"})
+    pid = portfolio.json()["id"]
+    db.add(Holding(user_id="test-user", portfolio_id=pid, ticker="NEW", shares=1))
+    await db.commit()
+
+    with patch(
+        "app.services.forecast.stock_data.get_multi_ticker_history",
+        AsyncMock(return_value={"NEW": _history(["NEW"])["NEW"][:30]}),
+    ):
+        resp = await client.get(f"/api/v1/portfolios/{pid}/forecasts")
+
+    data = resp.json()
+    assert data["aggregate"] is None
+    assert "Insufficient data" in data["holdings"][0]["error"]
+
+
+@pytest.mark.parametrize("tickers", [["AAPL"], ["AAPL", "SPY"]])
+def test_batch_history_reads_yfinance_multiindex_columns(tickers):
+    index = pd.date_range("2024-01-02", periods=3, freq="B")
+    columns = pd.MultiIndex.from_product([["Close", "Volume"], tickers], names=["Price", "Ticker"])
+    frame = pd.DataFrame(
+        np.arange(3 * len(columns), dtype=float).reshape(3, -1), index=index, columns=columns
+    )
+    with patch("app.services.stock_data.yf.download", return_value=frame):
+        history = stock_data._fetch_multi_ticker_history_sync(tickers, "2024-01-01", "2024-01-05")
+
+    assert list(history) == tickers
+    for k, ticker in enumerate(tickers):
+        assert [p["date"] for p in history[ticker]] == ["2024-01-02", "2024-01-03", "2024-01-04"]
+        assert history[ticker][0]["close"] == float(k)
@@ -1,7 +1,15 @@
+from datetime import date, datetime, timedelta, timezone
+
 import pytest
 from unittest.mock import patch, AsyncMock
 from httpx import AsyncClient
 
+from app.core.cache import cache
+from app.models import AnalysisJob, Holding, PriceAlert
+from app.services import enrichment
+from app.workers import tasks
+from tests.conftest import TestSession
+
 
 @pytest.fixture
 def mock_market_data():
@@ -19,6 +27,8 @@ def mock_market_data():
             }
         )
         mock.get_latest_price = AsyncMock(return_value=150.0)
+        mock.peek_quote = AsyncMock(return_value=None)
+        mock.peek_fundamentals = AsyncMock(return_value=None)
         yield mock
 
 
@@ -69,3 +79,259 @@ async def test_add_holding_portfolio_not_found(client: AsyncClient, mock_market_
         json={"ticker": "AAPL", "shares": 10},
     )
     assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_refresh_holdings_dedupes_tickers_and_triggers_alerts(client: AsyncClient, db):
+    portfolio = await client.post("/api/v1/portfolios", json={"name": "Refresh"})
+    pid = portfolio.json()["id"]
+    for ticker, shares in (("AAPL", 1), ("MSFT", 2), ("AAPL", 3)):
+        db.add(
+            Holding(
+                user_id="test-user",
+                portfolio_id=pid,
+                ticker=ticker,
+                shares=shares,
+                last_price=100.0,
+                sector="Technology",
+                next_earnings_date=date(2026, 1, 1),
+            )
+        )
+    db.add(PriceAlert(user_id="test-user", ticker="AAPL", target_price=150, direction="above"))
+    db.add(PriceAlert(user_id="test-user", ticker="MSFT", target_price=100, direction="below"))
+    await db.commit()
+
+    quotes = {
+        "AAPL": {"price": 155.0, "previous_close": 150.0},
+        "MSFT": {"price": None, "previous_close": None},
+    }
+    with patch("app.services.portfolio.market_data") as mock:
+        mock.get_quote = AsyncMock(side_effect=lambda t: quotes[t])
+        mock.get_stock_fundamentals = AsyncMock()
+        resp = await client.post(f"/api/v1/portfolios/{pid}/holdings/refresh")
+
+    assert resp.status_code == 200
+    assert sorted(c.args[0] for c in mock.get_quote.await_args_list) == ["AAPL", "MSFT"]
+    mock.get_stock_fundamentals.assert_not_awaited()
+    prices = [(h["ticker"], h["last_price"], h["previous_close"]) for h in resp.json()]
+    assert prices == [("AAPL", 155.0, 150.0), ("MSFT", 100.0, None), ("AAPL", 155.0, 150.0)]
+
+    alerts = (await client.get("/api/v1/alerts")).json()
+    triggered = {a["ticker"]: a["triggered"] for a in alerts}
+    assert triggered == {"AAPL": True, "MSFT": False}
+
+
+@pytest.mark.asyncio
+async def test_import_holdings_csv_and_json(client: AsyncClient, db, count_statements):
+    portfolio = await client.post("/api/v1/portfolios", json={"name": "Import"})
+    pid = portfolio.json()["id"]
+    csv_body = (
+        "Symbol,Quantity,Purchase Date,Cost Basis\n"
+        "aapl,10,2024-01-02,$150.00\n"
+        "MSFT,2,,\n"
+        "BAD TICKER,1,,\n"
+        "GOOG,-3,,\n"
+    )
+    enrichment_job = patch("app.api.routers.holdings.run_holdings_enrichment", new=AsyncMock())
+    with count_statements() as statements, enrichment_job as job:
+        resp = await client.post(
+            f"/api/v1/portfolios/{pid}/holdings/import",
+            content=csv_body,
+            headers={"content-type": "text/csv"},
+        )
+
+    assert resp.status_code == 202
+    data = resp.json()
+    assert data["imported"] == 2
+    assert [e["row"] for e in data["errors"]] == [3, 4]
+    assert len([s for s in statements if s.startswith("INSERT INTO holding")]) == 1
+    job.assert_awaited_once()
+    assert job.await_args.args[1:] == (data["job_id"], "test-user", pid, data["holding_ids"])
+
+    holdings = (await client.get(f"/api/v1/portfolios/{pid}/holdings")).json()
+    assert [(h["ticker"], h["shares"], h["cost_basis"]) for h in holdings] == [
+        ("AAPL", 10.0, 150.0),
+        ("MSFT", 2.0, None),
+    ]
+
+    with patch("app.api.routers.holdings.run_holdings_enrichment", new=AsyncMock()):
+        resp = await client.post(
+            f"/api/v1/portfolios/{pid}/holdings/import",
+            json={"holdings": [{"ticker": "NVDA", "shares": 1}]},
+        )
+        assert resp.json()["imported"] == 1
+        bad = await client.post(
+            f"/api/v1/portfolios/{pid}/holdings/import",
+            content="not json",
+            headers={"content-type": "application/json"},
+        )
+        assert bad.status_code == 400
+        empty = await client.post(f"/api/v1/portfolios/{pid}/holdings/import", json=[{}])
+        assert empty.status_code == 422
+        missing = await client.post("/api/v1/portfolios/9999/holdings/import", json=[])
+        assert missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_holdings_enrichment_job_reports_progress(client: AsyncClient, db, monkeypatch):
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    pid = (await client.post("/api/v1/portfolios", json={"name": "Enrich"})).json()["id"]
+    imported = [
+        Holding(
+            user_id="test-user", portfolio_id=pid, ticker=t, shares=1, enrichment_status="pending"
+        )
+        for t in ("AAA", "BBB", "AAA", "ZZZ")
+    ]
+    # Added by hand while the import runs; the in-process enricher owns it
+    added = Holding(
+        user_id="test-user", portfolio_id=pid, ticker="NEW", shares=1, enrichment_status="pending"
+    )
+    job = AnalysisJob(user_id="test-user", job_type="holdings_import")
+    db.add_all([*imported, added, job])
+    await db.commit()
+
+    progress: list[dict] = []
+    real_set = cache.set
+
+    async def record(key, value, ttl):
+        if key == tasks.job_progress_key(job.id):
+            progress.append(value)
+        await real_set(key, value, ttl)
+
+    monkeypatch.setattr(cache, "set", record)
+    with patch("app.services.portfolio.market_data") as mock:
+        mock.get_quote = AsyncMock(
+            side_effect=lambda t: {"price": 10.0, "previous_close": 9.0}
+            if t in ("AAA", "BBB")
+            else None
+        )
+        mock.get_stock_fundamentals = AsyncMock(
+            return_value={"sector": "Technology", "beta": 1.1, "dividend_yield": 0.02}
+        )
+        await tasks.run_holdings_enrichment(
+            {}, job.id, "test-user", pid, [h.id for h in imported]
+        )
+
+    assert progress == [{"done": i, "total": 4} for i in range(1, 5)]
+    status = (await client.get(f"/api/v1/analysis/jobs/{job.id}")).json()
+    assert status["status"] == "completed"
+    assert status["result"] == {"holdings": 5, "priced": 3, "tickers": 4}
+    holdings = (await client.get(f"/api/v1/portfolios/{pid}/holdings")).json()
+    priced = [h for h in holdings if h["ticker"] in ("AAA", "BBB")]
+    assert {(h["last_price"], h["sector"], h["dividend_yield"]) for h in priced} == {
+        (10.0, "Technology", 0.02)
+    }
+    status_by_ticker = {h["ticker"]: h["enrichment_status"] for h in holdings}
+    assert (status_by_ticker["ZZZ"], status_by_ticker["NEW"]) == ("failed", "pending")
+
+
+@pytest.mark.asyncio
+async def test_add_holding_uses_warm_cache_without_api_calls(client: AsyncClient, mock_enricher):
+    await cache.set("quote:AAPL", {"price": 190.0, "previous_close": 188.0}, 60)
+    await cache.set("fundamentals:AAPL", {"sector": "Technology", "beta": 1.2}, 60)
+    portfolio = await client.post("/api/v1/portfolios", json={"name": "Warm"})
+    pid = portfolio.json()["id"]
+
+    with patch("app.services.market_data.get_quote", new=AsyncMock()) as get_quote:
+        resp = await client.post(
+            f"/api/v1/portfolios/{pid}/holdings", json={"ticker": "aapl", "shares": 1}
+        )
+
+    data = resp.json()
+    assert (data["enrichment_status"], data["last_price"], data["sector"]) == (
+        "ready", 190.0, "Technology"
+    )
+    get_quote.assert_not_awaited()
+    mock_enricher.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_add_holding_cold_cache_is_enriched_in_background(
+    client: AsyncClient, mock_market_data, mock_enricher
+):
+    p1 = (await client.post("/api/v1/portfolios", json={"name": "A"})).json()["id"]
+    p2 = (await client.post("/api/v1/portfolios", json={"name": "B"})).json()["id"]
+    for pid in (p1, p2):
+        resp = await client.post(
+            f"/api/v1/portfolios/{pid}/holdings", json={"ticker": "NVDA", "shares": 2}
+        )
+        assert resp.status_code == 201
+        assert resp.json()["enrichment_status"] == "pending"
+        assert resp.json()["last_price"] is None
+    await client.post("/api/v1/watchlist", json={"ticker": "NVDA"})
+    assert [c.args[0] for c in mock_enricher.call_args_list] == ["NVDA"] * 3
+
+    fundamentals = {"sector": "Technology", "beta": 1.7, "name": "NVIDIA"}
+    runner = enrichment.TickerEnricher(session_factory=TestSession)
+    with patch("app.services.enrichment.market_data") as md:
+        md.get_quote = AsyncMock(return_value={"price": 120.0, "previous_close": 118.0})
+        md.get_stock_fundamentals = AsyncMock(return_value=fundamentals)
+        first, second = runner.schedule("NVDA"), runner.schedule("nvda")
+        assert first is second
+        await runner.wait_idle()
+
+    # One fetch filled both users' portfolios and the watchlist item
+    md.get_quote.assert_awaited_once_with("NVDA")
+    md.get_stock_fundamentals.assert_awaited_once_with("NVDA")
+    for pid in (p1, p2):
+        [h] = (await client.get(f"/api/v1/portfolios/{pid}/holdings")).json()
+        assert (h["enrichment_status"], h["last_price"], h["beta"]) == ("ready", 120.0, 1.7)
+    [item] = (await client.get("/api/v1/watchlist")).json()
+    assert (item["enrichment_status"], item["name"], item["last_price"]) == (
+        "ready", "NVIDIA", 120.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_enricher_keeps_a_newer_task_registered():
+    runner = enrichment.TickerEnricher(session_factory=TestSession)
+    with patch.object(runner, "_run", AsyncMock(return_value=0)):
+        old = runner.schedule("AAPL")
+        await old
+        new = runner.schedule("AAPL")
+        # The finished task's callback must not evict its successor
+        runner._forget("AAPL", old)
+        assert runner._inflight["AAPL"] is new
+        await runner.wait_idle()
+    assert runner._inflight == {}
+
+
+@pytest.mark.asyncio
+async def test_stale_pending_rows_are_retried_by_worker(client: AsyncClient, db, monkeypatch):
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    pid = (await client.post("/api/v1/portfolios", json={"name": "Stale"})).json()["id"]
+    long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.add_all(
+        [
+            Holding(
+                user_id="test-user", portfolio_id=pid, ticker="AAPL", shares=1,
+                enrichment_status="pending", updated_at=long_ago,
+            ),
+            Holding(
+                user_id="test-user", portfolio_id=pid, ticker="ZZZZ", shares=1,
+                enrichment_status="pending", updated_at=long_ago,
+            ),
+            # Still within the in-process enricher's window
+            Holding(
+                user_id="test-user", portfolio_id=pid, ticker="MSFT", shares=1,
+                enrichment_status="pending",
+            ),
+        ]
+    )
+    await db.commit()
+
+    async def get_quote(ticker):
+        return {"price": 200.0} if ticker == "AAPL" else None
+
+    with patch("app.services.enrichment.market_data") as md:
+        md.get_quote = AsyncMock(side_effect=get_quote)
+        md.get_stock_fundamentals = AsyncMock(return_value={})
+        assert await tasks.retry_stale_enrichment({}) == 2
+    assert sorted(c.args[0] for c in md.get_quote.await_args_list) == ["AAPL", "ZZZZ"]
+
+    holdings = (await client.get(f"/api/v1/portfolios/{pid}/holdings")).json()
+    assert {h["ticker"]: h["enrichment_status"] for h in holdings} == {
+        "AAPL": "ready",
+        "ZZZZ": "failed",
+        "MSFT": "pending",
+    }
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.models import Holding, PriceBar
+from app.services import montecarlo
+
+
+def test_simulate_price_paths_shape_and_fan():
+    rng = np.random.default_rng(3)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, 120)))
+    for model in montecarlo.MODELS:
+        paths = montecarlo.simulate_price_paths(close, 15, 2000, model, seed=1)
+        assert paths.shape == (2000, 15)
+        assert (paths > 0).all()
+        fan = montecarlo.percentile_fan(paths)
+        assert (fan["p5"] <= fan["p50"]).all() and (fan["p50"] <= fan["p95"]).all()
+
+
+def test_value_at_risk_of_normal_losses():
+    pnl = np.random.default_rng(0).normal(0, 100, 200_000)
+    var, cvar = montecarlo.value_at_risk(pnl, 0.95)
+    assert var == pytest.approx(164.5, rel=0.02)
+    assert cvar == pytest.approx(206.3, rel=0.02)
+
+
+def test_portfolio_pnl_respects_correlation():
+    rng = np.random.default_rng(1)
+    common = rng.normal(0, 0.01, (500, 1))
+    returns = np.hstack([common, common + rng.normal(0, 1e-4, (500, 1))])
+    pnl = montecarlo.simulate_portfolio_pnl(
+        returns, np.array([1000.0, -1000.0]), (1, 10), 5000, "gbm", seed=2
+    )
+    # A long/short pair of near-identical assets should almost fully hedge.
+    assert np.std(pnl[10]) < 5
+
+
+@pytest.mark.asyncio
+async def test_portfolio_var_endpoint(client: AsyncClient, db):
+    portfolio = await client.post("/api/v1/portfolios", json={"name": "Risky"})
+    pid = portfolio.json()["id"]
+
+    rng = np.random.default_rng(5)
+    today = date.today()
+    for ticker in ("AAA", "BBB"):
+        db.add(
+            Holding(user_id="test-user", portfolio_id=pid, ticker=ticker, shares=10, last_price=100)
+        )
+        closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 380)))
+        for i, close in enumerate(closes):
+            db.add(PriceBar(ticker=ticker, bar_date=today - timedelta(days=379 - i), close=close))
+    await db.commit()
+
+    resp = await client.get(f"/api/v1/portfolios/{pid}/var", params={"paths": 2000})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total_value"] == 2000
+    assert [h["days"] for h in data["horizons"]] == [1, 10]
+    one_day, ten_day = data["horizons"]
+    assert 0 < one_day["var"] <= one_day["cvar"]
+    assert ten_day["var"] > one_day["var"]
+
+
+@pytest.mark.asyncio
+async def test_portfolio_var_not_found(client: AsyncClient):
+    resp = await client.get("/api/v1/portfolios/9999/var")
+    assert resp.status_code == 404
@@ -0,0 +1,162 @@
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from sqlalchemy import func, select
+
+from app.models import Holding, PortfolioDailyValue, PortfolioSnapshot, PriceBar
+from app.services import portfolio_history, price_store
+from app.services.portfolio import history_value_series
+from app.services.returns import time_weighted_pct
+from tests.conftest import TestSession
+from tests.legacy.history import legacy_value_series, synthetic_portfolio
+
+
+@pytest.mark.parametrize("years,n_holdings,seed", [(1, 3, 0), (3, 25, 1), (5, 60, 2)])
+def test_history_value_series_matches_legacy_loop(years, n_holdings, seed):
+    history, holdings = synthetic_portfolio(years, n_holdings, seed)
+    assert history_value_series(history, holdings) == legacy_value_series(history, holdings)
+
+
+def test_history_value_series_edge_cases():
+    start = date(2024, 1, 1)
+
+    def day(i: int) -> str:
+        return (start + timedelta(days=i)).isoformat()
+
+    history = {
+        "AAA": [{"date": day(i), "close": 10.0 + i} for i in range(10) if i != 4],
+        "BBB": [{"date": day(i), "close": 50.0} for i in range(6, 10)],  # listed late
+        "CCC": [],  # no data at all
+    }
+    holdings = [
+        # Bought on a missing bar: cost falls forward to the next close.
+        SimpleNamespace(
+            ticker="AAA", shares=2, purchased_at=start + timedelta(days=4), cost_basis=None
+        ),
+        # Bought before listing: no value until the first bar.
+        SimpleNamespace(
+            ticker="BBB", shares=1, purchased_at=start + timedelta(days=2), cost_basis=None
+        ),
+        SimpleNamespace(ticker="CCC", shares=5, purchased_at=start, cost_basis=3.0),
+        SimpleNamespace(
+            ticker="AAA", shares=1, purchased_at=start + timedelta(days=8), cost_basis=0.0
+        ),
+    ]
+    result = history_value_series(history, holdings)
+    assert result == legacy_value_series(history, holdings)
+    # AAA's bar on day 3 predates its first purchase, so day 4 has no price yet.
+    assert result[0]["date"] == day(5)
+    assert result[0]["cost"] == 2 * 15.0 + 5 * 3.0 + 50.0
+
+
+def test_time_weighted_pct_excludes_capital_flows():
+    values = np.array([100.0, 110.0, 310.0, 341.0])
+    costs = np.array([100.0, 100.0, 300.0, 300.0])
+    flows = np.array([100.0, 0.0, 200.0, 0.0])
+    # +10%, flat once the new 200 is excluded, then +10%
+    assert time_weighted_pct(values, costs, flows) == pytest.approx([0, 10, 10, 21])
+
+
+@pytest.mark.asyncio
+async def test_history_with_benchmark_reads_materialized_series(client, db, mock_refresher):
+    today = date.today()
+    start = today - timedelta(days=30)
+    create = await client.post("/api/v1/portfolios", json={"name": "Dated"})
+    pid = create.json()["id"]
+    holding = Holding(
+        user_id="test-user", portfolio_id=pid, ticker="AAA", shares=10, purchased_at=start
+    )
+    later_lot = Holding(
+        user_id="test-user",
+        portfolio_id=pid,
+        ticker="AAA",
+        shares=5,
+        purchased_at=start + timedelta(days=20),
+    )
+    db.add_all([holding, later_lot])
+    for i in range(31):
+        day = start + timedelta(days=i)
+        db.add(PriceBar(ticker="AAA", bar_date=day, close=100.0 + i))
+        db.add(PriceBar(ticker="SPY", bar_date=day, close=400.0))
+    await db.commit()
+
+    async def stored_rows() -> int:
+        return (
+            await db.execute(
+                select(func.count())
+                .select_from(PortfolioDailyValue)
+                .where(PortfolioDailyValue.portfolio_id == pid)
+            )
+        ).scalar()
+
+    url = f"/api/v1/portfolios/{pid}/history-with-benchmark"
+    # Reads never write: an unbuilt series falls back to snapshot history
+    # and is built in the background.
+    assert (await client.get(url)).json()["data"] == []
+    assert await stored_rows() == 0
+    mock_refresher.assert_called_once_with(pid)
+    assert (await client.get(url)).json()["data"] == []
+    mock_refresher.assert_called_once()  # not rescheduled on every read
+    mock_refresher.reset_mock()
+
+    async with TestSession() as session:
+        holdings = [holding, later_lot]
+        assert await portfolio_history.extend_daily_values(session, pid, holdings) == 31
+        await session.commit()
+
+    with patch.object(portfolio_history, "rebuild_daily_values") as rebuild:
+        first = (await client.get(url)).json()["data"]
+    rebuild.assert_not_called()
+    assert first[0]["portfolio_pct"] == 0
+    assert first[-1]["portfolio_pct"] == 30.0
+    assert {p["sp500_pct"] for p in first} == {0.0}
+
+    # Removing a later lot drops only the rows from its purchase date on;
+    # the refresh scheduled on commit rebuilds that tail.
+    resp = await client.delete(f"/api/v1/portfolios/{pid}/holdings/{later_lot.id}")
+    assert resp.status_code == 204
+    mock_refresher.assert_called_once_with(pid)
+    assert await stored_rows() == 20
+
+    assert await portfolio_history.DailyValueRefresher(TestSession).schedule(pid) == 11
+    assert await stored_rows() == 31
+    rebuilt = (await client.get(url)).json()["data"]
+    assert rebuilt[:20] == first[:20]
+    assert rebuilt[-1]["portfolio_pct"] == 30.0
+
+
+@pytest.mark.asyncio
+async def test_snapshot_history_syncs_missing_benchmark(client, db):
+    pid = (await client.post("/api/v1/portfolios", json={"name": "Undated"})).json()["id"]
+    today = date.today()
+    start = today - timedelta(days=60)
+    db.add_all(
+        [
+            PortfolioSnapshot(
+                user_id="test-user",
+                portfolio_id=pid,
+                total_value=value,
+                created_at=datetime.combine(day, time(12), timezone.utc),
+            )
+            for day, value in ((start, 100.0), (today, 110.0))
+        ]
+    )
+    await db.commit()
+
+    async def sync_closes(session, tickers, sync_start, sync_end):
+        assert tickers == ["SPY"] and (sync_start, sync_end) == (start, today)
+        session.add_all(
+            [
+                PriceBar(ticker="SPY", bar_date=start, close=400.0),
+                PriceBar(ticker="SPY", bar_date=today, close=420.0),
+            ]
+        )
+        await session.flush()
+
+    with patch.object(price_store, "sync_closes", side_effect=sync_closes) as sync:
+        data = (await client.get(f"/api/v1/portfolios/{pid}/history-with-benchmark")).json()
+    sync.assert_called_once()
+    assert [(p["portfolio_pct"], p["sp500_pct"]) for p in data["data"]] == [(0, 0), (10.0, 5.0)]
@@ -1,5 +1,16 @@
+from datetime import date, datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.core.cache import cache
+from app.models import EarningsCall, Holding, JobWatermark, PortfolioSnapshot
+from app.services import portfolio as portfolio_svc
+from app.services import snapshot_retention
+from app.workers import tasks
+from tests.conftest import TestSession
 
 
 @pytest.mark.asyncio
@@ -52,3 +63,284 @@ async def test_delete_portfolio(client: AsyncClient):
     assert resp.status_code == 204
     resp2 = await client.get(f"/api/v1/portfolios/{pid}")
     assert resp2.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_earnings_insights_use_latest_call_per_holding(
+    client: AsyncClient, db, count_statements
+):
+    create = await client.post("/api/v1/portfolios", json={"name": "Earnings"})
+    pid = create.json()["id"]
+    holdings = [
+        Holding(user_id="test-user", portfolio_id=pid, ticker=t, shares=1)
+        for t in ("AAA", "BBB", "CCC", "DDD")
+    ]
+    db.add_all(holdings)
+    await db.flush()
+
+    now = datetime.now(timezone.utc)
+    db.add_all(
+        [
+            EarningsCall(
+                user_id="test-user",
+                ticker="AAA",
+                sentiment_score=-0.5,
+                created_at=now - timedelta(days=90),
+            ),
+            EarningsCall(user_id="test-user", ticker="AAA", sentiment_score=0.5, created_at=now),
+            # Matched through holding_id even though the ticker differs
+            EarningsCall(
+                user_id="test-user",
+                ticker="BBB.OLD",
+                holding_id=holdings[1].id,
+                sentiment_score=-0.5,
+                created_at=now,
+            ),
+            EarningsCall(user_id="other-user", ticker="CCC", sentiment_score=0.9, created_at=now),
+        ]
+    )
+    await db.commit()
+
+    with count_statements() as statements:
+        latest = await portfolio_svc.get_latest_earnings(db, "test-user", holdings)
+
+    assert len(statements) == 1
+    assert {holdings[0].id: 0.5, holdings[1].id: -0.5} == {
+        hid: ec.sentiment_score for hid, ec in latest.items()
+    }
+
+    resp = await client.get(f"/api/v1/portfolios/{pid}/earnings-insights")
+    data = resp.json()
+    assert data["positive_outlooks"] == ["AAA"]
+    assert data["risk_warnings"] == ["BBB"]
+    assert data["sentiment_summary"]["no_data"] == 2
+
+
+@pytest.mark.asyncio
+async def test_snapshot_reads_are_cached_and_write_nothing(client: AsyncClient, db):
+    create = await client.post("/api/v1/portfolios", json={"name": "Snap"})
+    pid = create.json()["id"]
+    db.add(Holding(user_id="test-user", portfolio_id=pid, ticker="AAA", shares=2, last_price=10))
+    await db.commit()
+
+    first = await client.get(f"/api/v1/portfolios/{pid}/snapshot")
+    second = await client.get(f"/api/v1/portfolios/{pid}/snapshot")
+    assert first.status_code == 200
+    assert first.json()["id"] is None
+    assert first.json()["total_value"] == second.json()["total_value"] == 20.0
+    count = await db.execute(select(func.count()).select_from(PortfolioSnapshot))
+    assert count.scalar() == 0
+
+    # Mutations invalidate the cached snapshot
+    holding_id = (await client.get(f"/api/v1/portfolios/{pid}/holdings")).json()[0]["id"]
+    await client.put(f"/api/v1/portfolios/{pid}/holdings/{holding_id}", json={"shares": 5})
+    resp = await client.get(f"/api/v1/portfolios/{pid}/snapshot")
+    assert resp.json()["total_value"] == 50.0
+
+    assert (await client.get("/api/v1/portfolios/9999/snapshot")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_holding_edits_invalidate_caches_after_commit(client: AsyncClient, db):
+    pid = (await client.post("/api/v1/portfolios", json={"name": "Commit"})).json()["id"]
+    db.add(Holding(user_id="test-user", portfolio_id=pid, ticker="AAA", shares=2, last_price=10))
+    await db.commit()
+    holding_id = (await client.get(f"/api/v1/portfolios/{pid}/holdings")).json()[0]["id"]
+    url = f"/api/v1/portfolios/{pid}/snapshot"
+
+    async def cached_value() -> float | None:
+        snapshot = await cache.get(f"snapshot:test-user:{pid}")
+        return snapshot and snapshot["total_value"]
+
+    assert (await client.get(url)).json()["total_value"] == 20.0
+    await portfolio_svc.update_holding(db, "test-user", pid, holding_id, shares=5)
+    # A read racing the edit may cache the old rows; the entry is dropped after commit
+    assert await cached_value() == 20.0
+    await db.commit()
+    assert await cached_value() is None
+    assert (await client.get(url)).json()["total_value"] == 50.0
+
+    # A rolled-back edit keeps the cache
+    await portfolio_svc.update_holding(db, "test-user", pid, holding_id, shares=7)
+    await db.rollback()
+    assert await cached_value() == 50.0
+
+
+@pytest.mark.asyncio
+async def test_persist_snapshots_respects_interval(client: AsyncClient, db, monkeypatch):
+    monkeypatch.setattr(tasks, "async_session_factory", TestSession)
+    fresh = (await client.post("/api/v1/portfolios", json={"name": "Fresh"})).json()["id"]
+    stale = (await client.post("/api/v1/portfolios", json={"name": "Stale"})).json()["id"]
+    empty = (await client.post("/api/v1/portfolios", json={"name": "Empty"})).json()["id"]
+    now = datetime.now(timezone.utc)
+    db.add_all(
+        [
+            PortfolioSnapshot(user_id="test-user", portfolio_id=fresh, created_at=now),
+            PortfolioSnapshot(
+                user_id="test-user", portfolio_id=stale, created_at=now - timedelta(days=2)
+            ),
+        ]
+    )
+    await db.commit()
+
+    assert await tasks.persist_portfolio_snapshots({}) == 2
+    assert await tasks.persist_portfolio_snapshots({}) == 0
+
+    result = await db.execute(
+        select(PortfolioSnapshot.portfolio_id, func.count()).group_by(
+            PortfolioSnapshot.portfolio_id
+        )
+    )
+    assert dict(result.all()) == {fresh: 1, stale: 2, empty: 1}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_retention_downsamples_by_age(client: AsyncClient, db):
+    pid = (await client.post("/api/v1/portfolios", json={"name": "Old"})).json()["id"]
+    now = datetime(2026, 6, 15, 12, tzinfo=timezone.utc)
+    stamps = (
+        [
+            now - timedelta(days=1, hours=h)
+            for h in (0, 2, 4)  # full resolution
+        ]
+        + [
+            now - timedelta(days=100, hours=h)
+            for h in (0, 3)  # daily tier, same day
+        ]
+        + [
+            now - timedelta(days=370 + d)
+            for d in (0, 1, 2)  # weekly tier
+        ]
+        + [
+            now - timedelta(days=420, hours=h)
+            for h in (0, 1)  # weekly tier, cutoff crossed while the cron was not running
+        ]
+        + [
+            now - timedelta(days=500, hours=h)
+            for h in (0, 1)  # thinned by earlier runs, never rescanned
+        ]
+    )
+    db.add_all(
+        [PortfolioSnapshot(user_id="test-user", portfolio_id=pid, created_at=ts) for ts in stamps]
+    )
+    # The last run was 90 days ago
+    last_cutoff = now - timedelta(days=90 + settings.snapshot_daily_resolution_days)
+    db.add(JobWatermark(name=snapshot_retention.WEEKLY_WATERMARK, processed_until=last_cutoff))
+    await db.commit()
+
+    deleted = await snapshot_retention.apply_retention(db, now=now)
+    await db.commit()
+
+    kept = (
+        (
+            await db.execute(
+                select(PortfolioSnapshot.created_at).order_by(PortfolioSnapshot.created_at)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    assert deleted["daily"] == 1
+    # 370-372 days back spans two ISO weeks at most
+    weeks = {(now - timedelta(days=370 + d)).isocalendar()[:2] for d in (0, 1, 2)}
+    assert deleted["weekly"] == 3 - len(weeks) + 1
+    assert len(kept) == 3 + 1 + len(weeks) + 1 + 2
+    assert kept[-1].replace(tzinfo=timezone.utc) == now - timedelta(days=1)
+    watermark = await db.get(JobWatermark, snapshot_retention.WEEKLY_WATERMARK)
+    assert watermark.processed_until.replace(tzinfo=timezone.utc) == now - timedelta(
+        days=settings.snapshot_daily_resolution_days
+    )
+    # Already-downsampled data is left alone
+    assert await snapshot_retention.apply_retention(db, now=now) == {"daily": 0, "weekly": 0}
+
+
+@pytest.mark.asyncio
+async def test_dashboard_summary_single_query_and_cached(
+    client: AsyncClient, db, count_statements
+):
+    pid = (await client.post("/api/v1/portfolios", json={"name": "Dash"})).json()["id"]
+    today = date.today()
+    rows = [
+        ("UP", 110.0, 100.0, today + timedelta(days=3)),
+        ("UP2", 55.0, 50.0, None),  # ties with UP; the older holding wins
+        ("DOWN", 90.0, 100.0, today + timedelta(days=30)),
+        ("FLAT", 100.0, None, today),
+        ("PAST", None, 100.0, today - timedelta(days=1)),
+    ]
+    for ticker, price, prev, earnings in rows:
+        db.add(
+            Holding(
+                user_id="test-user",
+                portfolio_id=pid,
+                ticker=ticker,
+                shares=1,
+                last_price=price,
+                previous_close=prev,
+                next_earnings_date=earnings,
+            )
+        )
+    await db.commit()
+
+    with count_statements() as statements:
+        first = await client.get("/api/v1/portfolios/dashboard-summary")
+        second = await client.get("/api/v1/portfolios/dashboard-summary")
+
+    assert len([s for s in statements if "holding" in s]) == 1
+    assert first.json() == second.json() == {
+        "best_performer": {"ticker": "UP", "daily_change_pct": 10.0},
+        "worst_performer": {"ticker": "DOWN", "daily_change_pct": -10.0},
+        "upcoming_earnings_count": 2,
+        "upcoming_earnings_tickers": ["UP", "FLAT"],
+    }
+
+    # Holding changes invalidate the cached summary
+    holdings = (await client.get(f"/api/v1/portfolios/{pid}/holdings")).json()
+    await client.delete(f"/api/v1/portfolios/{pid}/holdings/{holdings[0]['id']}")
+    resp = await client.get("/api/v1/portfolios/dashboard-summary")
+    assert resp.json()["best_performer"]["ticker"] == "UP2"
+    assert resp.json()["upcoming_earnings_tickers"] == ["FLAT"]
+
+
+@pytest.mark.asyncio
+async def test_portfolio_totals_match_in_memory_aggregation(
+    client: AsyncClient, db, count_statements
+):
+    pid = (await client.post("/api/v1/portfolios", json={"name": "Sectors"})).json()["id"]
+    for ticker, shares, price, sector in (
+        ("AAA", 10, 50.0, "Technology"),
+        ("BBB", 5, 20.0, "Energy"),
+        ("CCC", 4, 100.0, "Technology"),
+        ("DDD", 1, None, None),
+        ("EEE", 2, 30.0, ""),
+    ):
+        db.add(
+            Holding(
+                user_id="test-user",
+                portfolio_id=pid,
+                ticker=ticker,
+                shares=shares,
+                last_price=price,
+                sector=sector,
+            )
+        )
+    await db.commit()
+
+    with count_statements() as statements:
+        totals = await portfolio_svc.get_portfolio_totals(db, "test-user", pid)
+
+    assert len(statements) == 1
+    holdings = await portfolio_svc.get_holdings(db, "test-user", pid)
+    assert totals == portfolio_svc.portfolio_totals(holdings)
+    assert totals.total_value == 1060.0
+    assert totals.num_positions == 5
+    assert totals.concentration_risk == pytest.approx(500 / 1060)
+    assert [(s.sector, s.value) for s in totals.sectors] == [
+        ("Technology", 900.0),
+        ("Energy", 100.0),
+        ("Unknown", 60.0),
+    ]
+
+    resp = await client.get(f"/api/v1/portfolios/{pid}/sectors")
+    assert [s["sector"] for s in resp.json()] == ["Technology", "Energy", "Unknown"]
+    empty = await portfolio_svc.get_portfolio_totals(db, "test-user", 9999)
+    assert empty.sectors == [] and empty.num_positions == 0
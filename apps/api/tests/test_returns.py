@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.models import Holding, PriceBar
+from app.services import portfolio_history, returns
+
+
+def _days(*isos: str) -> np.ndarray:
+    return np.array(isos, dtype="datetime64[D]")
+
+
+def test_asof_uses_latest_value_on_or_before():
+    ref_dates = _days("2024-01-02", "2024-01-04", "2024-01-08")
+    ref_values = np.array([10.0, 11.0, 12.0])
+    out = returns.asof(
+        _days("2024-01-01", "2024-01-02", "2024-01-06", "2024-01-09"), ref_dates, ref_values
+    )
+    assert np.isnan(out[0])
+    assert out[1:].tolist() == [10.0, 11.0, 12.0]
+
+
+def test_xirr_matches_known_rates():
+    one_year = _days("2023-01-01", "2024-01-01")
+    assert returns.xirr(one_year, np.array([-1000.0, 1100.0])) == pytest.approx(0.1, abs=1e-6)
+    # Second contribution halfway through: 10% a year on both lots.
+    dates = _days("2023-01-01", "2023-07-02", "2024-01-01")
+    final = 1000 * 1.1 + 500 * 1.1 ** (183 / 365)
+    assert returns.xirr(dates, np.array([-1000.0, -500.0, final])) == pytest.approx(0.1, abs=1e-6)
+    assert returns.xirr(one_year, np.array([-1000.0, -5.0])) is None
+
+
+def test_trailing_and_rolling_returns():
+    dates = np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-01-11"))
+    index = 1.01 ** np.arange(10)
+    assert returns.trailing_return(dates, index, np.datetime64("2024-01-05")) == pytest.approx(
+        1.01**5 - 1
+    )
+    assert returns.trailing_return(dates, index, np.datetime64("2023-12-01")) is None
+    rolling = returns.rolling_returns(index, 3)
+    assert np.isnan(rolling[:3]).all()
+    assert rolling[3:] == pytest.approx(np.full(7, 1.01**3 - 1))
+    assert returns.annualize(0.21, 730) == pytest.approx(0.1)
+    assert returns.annualize(0.05, 100) is None
+
+
+@pytest.mark.asyncio
+async def test_portfolio_returns_endpoint(client: AsyncClient, db):
+    today = date.today()
+    start = today - timedelta(days=400)
+    create = await client.post("/api/v1/portfolios", json={"name": "Returns"})
+    pid = create.json()["id"]
+    holding = Holding(
+        user_id="test-user", portfolio_id=pid, ticker="AAA", shares=10, purchased_at=start
+    )
+    db.add(holding)
+    for i in range(401):
+        day = start + timedelta(days=i)
+        db.add(PriceBar(ticker="AAA", bar_date=day, close=100.0 * 1.001**i))
+        db.add(PriceBar(ticker="SPY", bar_date=day, close=400.0))
+    await db.commit()
+    await portfolio_history.extend_daily_values(db, pid, [holding])
+    await db.commit()
+
+    resp = await client.get(f"/api/v1/portfolios/{pid}/returns", params={"window": 5})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["twr_pct"] == pytest.approx((1.001**400 - 1) * 100, abs=0.01)
+    # One contribution and no flows since: money- and time-weighted agree.
+    assert data["mwr_pct"] == pytest.approx(data["twr_annualized_pct"], abs=0.01)
+    assert data["benchmark_pct"] == 0
+    trailing = {t["period"]: t["portfolio_pct"] for t in data["trailing"]}
+    assert list(trailing) == ["1M", "3M", "6M", "YTD", "1Y"]
+    assert trailing["1M"] == pytest.approx((1.001**30 - 1) * 100, abs=0.01)
+    assert len(data["rolling"]) == 401 - 5
+
+    missing = await client.get("/api/v1/portfolios/999/returns")
+    assert missing.status_code == 404
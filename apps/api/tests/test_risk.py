@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.models import Holding, PriceBar
+from app.services import risk
+
+
+def test_ledoit_wolf_shrinks_toward_scaled_identity():
+    rng = np.random.default_rng(0)
+    # Few observations for many assets: the sample matrix is singular
+    x = rng.normal(0, 0.01, size=(20, 40))
+    cov, shrinkage = risk.ledoit_wolf(x)
+    assert 0 < shrinkage <= 1
+    assert np.linalg.eigvalsh(cov).min() > 0
+    assert np.trace(cov) == pytest.approx(np.trace(np.cov(x, rowvar=False, ddof=0)))
+
+    # A strong common factor is kept almost untouched
+    factor = rng.normal(0, 0.01, size=(250, 1))
+    _, shrinkage = risk.ledoit_wolf(factor + 0.001 * rng.normal(size=(250, 5)))
+    assert shrinkage < 0.05
+
+
+def test_risk_contributions_and_drawdown():
+    cov = np.array([[0.04, 0.006], [0.006, 0.01]])
+    weights = np.array([0.6, 0.4])
+    sigma, marginal, share = risk.risk_contributions(weights, cov)
+    assert sigma == pytest.approx(np.sqrt(weights @ cov @ weights))
+    assert weights @ marginal == pytest.approx(sigma)
+    assert share.sum() == pytest.approx(1.0)
+    assert risk.correlation(cov)[0, 1] == pytest.approx(0.006 / (0.2 * 0.1))
+    assert risk.max_drawdown(np.array([1.0, 1.2, 0.9, 1.3, 1.1])) == pytest.approx(-0.25)
+
+
+@pytest.mark.asyncio
+async def test_portfolio_risk_endpoint_reuses_cached_block(
+    client: AsyncClient, db, count_statements
+):
+    today = date.today()
+    start = today - timedelta(days=200)
+    rng = np.random.default_rng(1)
+    market = np.cumsum(rng.normal(0, 0.01, 201))
+    series = {
+        "SPY": market,
+        "AAA": 2 * market + np.cumsum(rng.normal(0, 0.005, 201)),
+        "BBB": np.cumsum(rng.normal(0, 0.01, 201)),
+    }
+    for ticker, logs in series.items():
+        for i, value in enumerate(logs):
+            db.add(
+                PriceBar(
+                    ticker=ticker, bar_date=start + timedelta(days=i), close=100 * np.exp(value)
+                )
+            )
+
+    pids = []
+    for name in ("Mine", "Same names"):
+        pid = (await client.post("/api/v1/portfolios", json={"name": name})).json()["id"]
+        pids.append(pid)
+        for ticker, shares in (("AAA", 3), ("BBB", 1), ("ZZZ", 0)):
+            db.add(
+                Holding(
+                    user_id="test-user",
+                    portfolio_id=pid,
+                    ticker=ticker,
+                    shares=shares,
+                    last_price=100,
+                )
+            )
+    await db.commit()
+
+    resp = await client.get(f"/api/v1/portfolios/{pids[0]}/risk")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["tickers"] == ["AAA", "BBB"]
+    assert data["observations"] == 200
+    assert [c["weight"] for c in data["contributions"]] == [0.75, 0.25]
+    assert sum(c["contribution_pct"] for c in data["contributions"]) == pytest.approx(100, abs=0.05)
+    assert data["beta"] > 1.2
+    assert data["correlation"][0][0] == 1.0
+    assert data["max_drawdown_pct"] is None  # no purchase dates
+
+    with count_statements() as statements:
+        other = await client.get(f"/api/v1/portfolios/{pids[1]}/risk")
+    assert other.json()["volatility_pct"] == data["volatility_pct"]
+    assert not [s for s in statements if "price_bar" in s]
+
+    assert (await client.get("/api/v1/portfolios/9999/risk")).status_code == 404
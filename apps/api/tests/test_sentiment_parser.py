@@ -0,0 +1,50 @@
+import pytest
+
+from app.services.sentiment_parser import parse_analysis
+from tests.legacy.sentiment_parser import legacy_parse_analysis, synthetic_analyses
+
+EDGE_CASES = [
+    "",
+    "No sections here, but the tone was strongly positive and guidance was raised.",
+    "7. SENTIMENT ANALYSIS",  # header without a body line
+    "7. SENTIMENT ANALYSIS\n   \n8. Notes\nbearish",  # blank section: full-text fallback
+    "2.FINANCIAL PERFORMANCE\nRevenue of $3.2 billion in Q3. Revenue grew 12% YoY",
+    "3. business highlights\nRevenue growth and new product launches; market share gains.",
+    "5. RISK FACTORS\nrisks: debt, debt and more debt\n12. RISK FACTORS\ncompetition",
+    "**4. MANAGEMENT GUIDANCE**\nLowered guidance; missed estimates.\n"
+    "**7. SENTIMENT ANALYSIS**\nCautious.",
+    "4. Management Guidance\nRaised and exceeded, upside ahead. 5. risk factors\nİnflation risk",
+    "1. EXECUTIVE SUMMARY\nok\n7. SENTIMENT ANALYSIS\nMixed. 2. FINANCIAL PERFORMANCE\n"
+    "gross margin of 41.5% and EPS of $2.10\n3. BUSINESS HIGHLIGHTS\nscale",
+]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_parse_analysis_matches_legacy_edge_cases(text):
+    assert parse_analysis(text) == legacy_parse_analysis(text)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_parse_analysis_matches_legacy_corpus(seed):
+    for text in synthetic_analyses(200, seed):
+        assert parse_analysis(text) == legacy_parse_analysis(text)
+
+
+def test_parse_analysis_reads_each_section():
+    text = (
+        "2. FINANCIAL PERFORMANCE\nRevenue of $94.9 billion, operating margin of 30.1%.\n"
+        "3. BUSINESS HIGHLIGHTS\nRevenue growth from a new product launch.\n"
+        "4. MANAGEMENT GUIDANCE\nRaised guidance; some downside risk.\n"
+        "5. RISK FACTORS\nCompetition and regulatory pressure.\n"
+        "7. SENTIMENT ANALYSIS\nOverall tone: very positive."
+    )
+    assert parse_analysis(text) == {
+        "sentiment_score": 0.8,
+        "guidance_outlook": "positive",
+        "risk_mentions": 3,
+        "growth_mentions": 4,
+        "key_metrics": {
+            "revenue": "Revenue of $94.9 billion",
+            "margin": "operating margin of 30.1%",
+        },
+    }
@@ -14,7 +14,7 @@ import { UpgradePrompt } from "@/components/ui/upgrade-prompt";
 import { PastComparisons } from "@/components/compare/past-comparisons";
 
 export default function ComparePage() {
-  const { job, isPolling, startPolling } = useJobPolling();
+  const { job, streamText, isPolling, startPolling } = useJobPolling();
   const compare = useCompare();
   const { data: usage } = useUsage();
   const [selectedTickers, setSelectedTickers] = useState<string[]>([]);
@@ -73,7 +73,15 @@ export default function ComparePage() {
       </div>
 
       <div className="mt-6">
-        {isRunning ? (
+        {isPolling && streamText ? (
+          <Card>
+            <CardContent className="pt-6">
+              <div className="whitespace-pre-wrap text-sm leading-relaxed">
+                {streamText}
+              </div>
+            </CardContent>
+          </Card>
+        ) : isRunning ? (
           <Card>
             <CardContent className="flex items-center justify-center py-12">
               <Loader2 className="mr-2 h-5 w-5 animate-spin text-muted-foreground" />
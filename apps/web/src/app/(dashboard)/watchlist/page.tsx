@@ -162,7 +162,9 @@ export default function WatchlistPage() {
                       <TableCell className="text-right">
                         {item.last_price != null
                           ? formatCurrency(item.last_price)
-                          : "--"}
+                          : item.enrichment_status === "pending"
+                            ? "Loading…"
+                            : "--"}
                       </TableCell>
                       <TableCell className="text-right">
                         {change != null ? (
@@ -18,7 +18,7 @@ interface AnalyzeEarningsFormProps {
 export function AnalyzeEarningsForm({ onTickerSelect }: AnalyzeEarningsFormProps) {
   const [ticker, setTicker] = useState("");
   const [transcript, setTranscript] = useState("");
-  const { job, isPolling, startPolling, reset } = useJobPolling();
+  const { job, streamText, isPolling, startPolling, reset } = useJobPolling();
   const analyzeEarnings = useAnalyzeEarnings();
   const { data: usage } = useUsage();
 
@@ -41,7 +41,9 @@ export function AnalyzeEarningsForm({ onTickerSelect }: AnalyzeEarningsFormProps
   const analysisText =
     job?.status === "completed"
       ? (job.result as { analysis?: string })?.analysis
-      : null;
+      : isPolling && streamText
+        ? streamText
+        : null;
 
   return (
     <div className="space-y-4">
@@ -159,7 +159,11 @@ export function HoldingsTable({ holdings, portfolioId, portfolioName }: Holdings
                   </TableCell>
                   <TableCell className="text-right">{h.shares}</TableCell>
                   <TableCell className="text-right">
-                    {h.last_price ? formatCurrency(h.last_price) : "--"}
+                    {h.last_price
+                      ? formatCurrency(h.last_price)
+                      : h.enrichment_status === "pending"
+                        ? "Loading…"
+                        : "--"}
                   </TableCell>
                   <TableCell className="text-right">
                     {h.cost_basis != null ? formatCurrency(h.cost_basis) : "--"}
@@ -14,7 +14,7 @@ interface PortfolioAnalysisPanelProps {
 }
 
 export function PortfolioAnalysisPanel({ portfolioId }: PortfolioAnalysisPanelProps) {
-  const { job, isPolling, startPolling } = useJobPolling();
+  const { job, streamText, isPolling, startPolling } = useJobPolling();
   const analyzePortfolio = useAnalyzePortfolio();
   const { data: usage } = useUsage();
 
@@ -32,7 +32,9 @@ export function PortfolioAnalysisPanel({ portfolioId }: PortfolioAnalysisPanelPr
 
   const analysis = job?.status === "completed"
     ? (job.result as { analysis?: string })?.analysis
-    : null;
+    : isPolling && streamText
+      ? streamText
+      : null;
 
   const snapshot = job?.status === "completed"
     ? (job.result as { snapshot?: Record<string, unknown> })?.snapshot
@@ -17,6 +17,11 @@ export function useHoldings(portfolioId: number) {
     queryFn: () =>
       fetchApi<HoldingRead[]>(`/api/v1/portfolios/${portfolioId}/holdings`),
     enabled: portfolioId > 0,
+    // Poll while newly added holdings are still fetching market data
+    refetchInterval: (query) =>
+      query.state.data?.some((h) => h.enrichment_status === "pending")
+        ? 3_000
+        : false,
   });
 }
 
@@ -7,13 +7,23 @@ import type { JobStatus } from "@/types";
 
 const POLL_INTERVAL_MS = 2000;
 
+function isTerminal(job: JobStatus) {
+  return job.status === "completed" || job.status === "failed";
+}
+
 /**
- * Polls GET /api/v1/analysis/jobs/{jobId} every 2 seconds until the job
- * reaches a terminal status ("completed" or "failed").
+ * Follows a background job until it reaches a terminal status
+ * ("completed" or "failed").
+ *
+ * AI jobs are followed over GET /api/v1/analysis/jobs/{jobId}/stream
+ * (Server-Sent Events): `streamText` grows as the model writes, and the
+ * final job is fetched once when the stream reports it is done. Jobs that
+ * do not stream (or a dropped connection) fall back to polling
+ * GET /api/v1/analysis/jobs/{jobId} every 2 seconds.
  *
  * Usage:
  * ```tsx
- * const { job, isPolling, startPolling } = useJobPolling();
+ * const { job, streamText, isPolling, startPolling } = useJobPolling();
  *
  * // In your mutation onSuccess:
  * onSuccess: (pendingJob) => startPolling(pendingJob),
@@ -23,53 +33,113 @@ export function useJobPolling() {
   const { getToken } = useAuth();
 
   const [job, setJob] = useState<JobStatus | null>(null);
+  const [streamText, setStreamText] = useState("");
   const [isPolling, setIsPolling] = useState(false);
   const intervalRef = useRef<ReturnType<typeof setInterval> | null>(null);
+  const abortRef = useRef<AbortController | null>(null);
 
   function stopPolling() {
     if (intervalRef.current) {
       clearInterval(intervalRef.current);
       intervalRef.current = null;
     }
+    abortRef.current?.abort();
+    abortRef.current = null;
     setIsPolling(false);
   }
 
+  async function fetchJob(jobId: string) {
+    const freshFetch = createClientFetch(getToken);
+    const updated = await freshFetch<JobStatus>(`/api/v1/analysis/jobs/${jobId}`);
+    setJob(updated);
+    if (isTerminal(updated)) {
+      stopPolling();
+    }
+    return updated;
+  }
+
+  function poll(jobId: string) {
+    intervalRef.current = setInterval(async () => {
+      try {
+        await fetchJob(jobId);
+      } catch {
+        stopPolling();
+      }
+    }, POLL_INTERVAL_MS);
+  }
+
+  /** Resolves true when the stream reported completion. */
+  async function stream(jobId: string, signal: AbortSignal): Promise<boolean> {
+    const token = await getToken();
+    const res = await fetch(`/api/v1/analysis/jobs/${jobId}/stream`, {
+      headers: token ? { Authorization: `Bearer ${token}` } : {},
+      signal,
+    });
+    if (!res.ok || !res.body) return false;
+
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return false;
+      buffer += value;
+      let end: number;
+      while ((end = buffer.indexOf("\n\n")) >= 0) {
+        const frame = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        let event = "message";
+        let data = "";
+        for (const line of frame.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        if (event === "delta") {
+          const { text } = JSON.parse(data) as { text: string };
+          setStreamText((prev) => prev + text);
+        } else if (event === "reset") {
+          setStreamText("");
+        } else if (event === "done") {
+          return true;
+        }
+      }
+    }
+  }
+
   function startPolling(pendingJob: JobStatus) {
     // If job was already terminal (edge case), just set it
-    if (pendingJob.status === "completed" || pendingJob.status === "failed") {
+    if (isTerminal(pendingJob)) {
       setJob(pendingJob);
       return;
     }
 
     // Stop any previous polling first
-    if (intervalRef.current) {
-      clearInterval(intervalRef.current);
-      intervalRef.current = null;
-    }
+    stopPolling();
 
     setJob(pendingJob);
+    setStreamText("");
     setIsPolling(true);
 
-    intervalRef.current = setInterval(async () => {
-      try {
-        const freshFetch = createClientFetch(getToken);
-        const updated = await freshFetch<JobStatus>(
-          `/api/v1/analysis/jobs/${pendingJob.id}`
-        );
-        setJob(updated);
-
-        if (updated.status === "completed" || updated.status === "failed") {
-          stopPolling();
+    const controller = new AbortController();
+    abortRef.current = controller;
+    stream(pendingJob.id, controller.signal)
+      .catch(() => false)
+      .then(async (finished) => {
+        if (controller.signal.aborted) return;
+        if (finished) {
+          try {
+            if (isTerminal(await fetchJob(pendingJob.id))) return;
+          } catch {
+            // fall through to polling
+          }
         }
-      } catch {
-        stopPolling();
-      }
-    }, POLL_INTERVAL_MS);
+        poll(pendingJob.id);
+      });
   }
 
   function reset() {
     stopPolling();
     setJob(null);
+    setStreamText("");
   }
 
   // Cleanup on unmount
@@ -78,8 +148,9 @@ export function useJobPolling() {
       if (intervalRef.current) {
         clearInterval(intervalRef.current);
       }
+      abortRef.current?.abort();
     };
   }, []);
 
-  return { job, isPolling, startPolling, reset };
+  return { job, streamText, isPolling, startPolling, reset };
 }
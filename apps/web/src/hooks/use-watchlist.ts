@@ -15,6 +15,10 @@ export function useWatchlist() {
   return useQuery({
     queryKey: ["watchlist"],
     queryFn: () => fetchApi<WatchlistItem[]>("/api/v1/watchlist"),
+    refetchInterval: (query) =>
+      query.state.data?.some((i) => i.enrichment_status === "pending")
+        ? 3_000
+        : false,
   });
 }
 
@@ -1,5 +1,5 @@
 export interface PortfolioSnapshotRead {
-  id: number;
+  id: number | null;
   portfolio_id: number;
   created_at: string;
   total_value: number | null;
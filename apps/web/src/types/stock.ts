@@ -116,11 +116,13 @@ export interface StockForecast {
     prices: number[];
     upper_bound: number[];
     lower_bound: number[];
+    /** Monte Carlo percentile fan (p5, p25, p50, p75, p95); null for linear forecasts. */
+    percentiles?: Record<string, number[]> | null;
   };
   model_info: {
     method: string;
     training_period: string;
     slope_per_day: number;
-    r_squared: number;
+    r_squared: number | null;
   };
 }
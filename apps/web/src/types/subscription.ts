@@ -19,6 +19,8 @@ export interface UsageInfo {
   portfolio_analysis_limit: number | null;
   portfolio_count: number;
   portfolio_limit: number | null;
+  ai_tokens_used_today: number;
+  ai_tokens_per_day: number | null;
   can_create_portfolio: boolean;
   can_analyze_earnings: boolean;
   can_analyze_portfolio: boolean;
@@ -5,6 +5,7 @@ export interface WatchlistItem {
   last_price: number | null;
   previous_close: number | null;
   sector: string | null;
+  enrichment_status: "ready" | "pending" | "failed";
   added_at: string;
 }
 